@@ -8,7 +8,11 @@ import os
 import logging
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from utils.face_matcher import compare_two_images
+from utils.face_matcher import compare_two_images, compare_reference_to_many, get_pipeline_stats
+from utils.warmup import get_process_report
+from utils.deadline import Deadline, DEADLINE_HEADER
+from utils.face_profiles import get_profile, PROFILES
+from utils.face_hints import parse_face_box
 
 # Configuração de logging
 logging.basicConfig(
@@ -35,8 +39,11 @@ CORS(app, origins="*")
 app.config.update(
     SECRET_KEY=os.getenv('SECRET_KEY', 'sua-chave-secreta-super-forte-aqui'),
     DEBUG=os.getenv('DEBUG', 'False').lower() == 'true',
-    MAX_CONTENT_LENGTH=20 * 1024 * 1024,  # 20MB max (duas imagens)
-    FACE_TOLERANCE=float(os.getenv('FACE_TOLERANCE', '0.6'))
+    MAX_CONTENT_LENGTH=int(os.getenv('FACE_MAX_CONTENT_LENGTH', str(20 * 1024 * 1024))),  # 20MB (duas imagens ou um lote pequeno)
+    FACE_TOLERANCE=float(os.getenv('FACE_TOLERANCE', '0.6')),
+    COMPARE_DEADLINE_SECONDS=float(os.getenv('COMPARE_DEADLINE_SECONDS', '10')),
+    COMPARE_BATCH_DEADLINE_SECONDS=float(os.getenv('COMPARE_BATCH_DEADLINE_SECONDS', '60')),  # Modo lote (até 50 capturas)
+    COMPARE_MAX_CAPTURES=int(os.getenv('FACE_COMPARE_MAX_CAPTURES', '50'))
 )
 
 @app.route('/', methods=['GET'])
@@ -80,7 +87,9 @@ def health():
                 "debug": app.config['DEBUG'],
                 "face_tolerance": app.config['FACE_TOLERANCE'],
                 "max_file_size_mb": app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
-            }
+            },
+            "process": get_process_report(),
+            "pipeline": get_pipeline_stats()
         })
     except Exception as e:
         logger.error(f"Erro no health check: {e}")
@@ -98,17 +107,35 @@ def compare():
     {
         "reference_image": "data:image/jpeg;base64,/9j/4AAQSkZ...",
         "captured_image": "data:image/jpeg;base64,/9j/4AAQSkZ...",
-        "employee_id": "123" (opcional, apenas para log)
+        "employee_id": "123" (opcional, apenas para log),
+        "profile": "fast" | "balanced" | "accurate" (opcional),
+        "captured_face_box": {"x": 120, "y": 80, "width": 200, "height": 200} (opcional),
+        "reference_face_box": [x, y, largura, altura] (opcional)
     }
     
+    Modo lote (auditorias): "captured_images": [...] no lugar de
+    "captured_image" compara a mesma referência com até
+    FACE_COMPARE_MAX_CAPTURES capturas. A referência é codificada uma vez e
+    a resposta traz "results" na ordem recebida, cada item com index,
+    success, match, confidence e distance (ou reason).
+    
     Response JSON:
     {
         "success": true,
         "match": true,
         "confidence": 0.92,
         "distance": 0.08,
-        "threshold": 0.6
+        "threshold": 0.6,
+        "profile": "balanced"
     }
+    
+    As caixas de rosto (detector do aparelho, em pixels da imagem enviada)
+    substituem a detecção quando passam na conferência de landmarks.
+    
+    O cabeçalho opcional X-Request-Deadline (Unix epoch em segundos) limita o
+    processamento; expirado, a resposta é 504. Sem ele, vale
+    COMPARE_DEADLINE_SECONDS (par de imagens) ou COMPARE_BATCH_DEADLINE_SECONDS
+    (modo lote, "captured_images").
     """
     try:
         # Validar se é uma requisição JSON
@@ -129,7 +156,9 @@ def compare():
         
         reference_image = data.get('reference_image')
         captured_image = data.get('captured_image')
+        captured_images = data.get('captured_images')  # Modo lote
         employee_id = data.get('employee_id', 'unknown')  # Opcional
+        profile = data.get('profile')  # Opcional: padrão FACE_COMPARE_PROFILE
         
         if not reference_image:
             return jsonify({
@@ -137,30 +166,97 @@ def compare():
                 "error": "Campo 'reference_image' é obrigatório"
             }), 400
         
-        if not captured_image:
+        if captured_images is not None:
+            if not isinstance(captured_images, list) or not captured_images:
+                return jsonify({
+                    "success": False,
+                    "error": "Campo 'captured_images' deve ser uma lista não vazia"
+                }), 400
+            if len(captured_images) > app.config['COMPARE_MAX_CAPTURES']:
+                return jsonify({
+                    "success": False,
+                    "error": f"Máximo de {app.config['COMPARE_MAX_CAPTURES']} imagens em 'captured_images'"
+                }), 400
+        elif not captured_image:
             return jsonify({
                 "success": False,
                 "error": "Campo 'captured_image' é obrigatório"
             }), 400
         
         # Validar formato base64 das imagens
-        for field, image in [('reference_image', reference_image), ('captured_image', captured_image)]:
-            if not image.startswith('data:image/'):
+        images = [('reference_image', reference_image)]
+        if captured_images is not None:
+            images += [(f'captured_images[{i}]', image) for i, image in enumerate(captured_images)]
+        else:
+            images.append(('captured_image', captured_image))
+        for field, image in images:
+            if not isinstance(image, str) or not image.startswith('data:image/'):
                 return jsonify({
                     "success": False,
                     "error": f"Campo '{field}' tem formato inválido. Use data:image/jpeg;base64,..."
                 }), 400
         
+        if profile is not None:
+            try:
+                profile = get_profile(str(profile)).name
+            except ValueError:
+                return jsonify({
+                    "success": False,
+                    "error": f"Campo 'profile' inválido. Perfis disponíveis: {', '.join(PROFILES)}"
+                }), 400
+        
+        face_boxes = {}
+        for field in ('reference_face_box', 'captured_face_box'):
+            if data.get(field) is not None:
+                try:
+                    face_boxes[field] = parse_face_box(data[field])
+                except ValueError as e:
+                    return jsonify({
+                        "success": False,
+                        "error": f"Campo '{field}': {e}"
+                    }), 400
+        
         # Log da requisição
         logger.info(f"📨 Comparação facial solicitada para funcionário: {employee_id}")
         
         # Realizar comparação facial
+        deadline = Deadline.from_header(
+            request.headers.get(DEADLINE_HEADER),
+            app.config['COMPARE_BATCH_DEADLINE_SECONDS' if captured_images is not None else 'COMPARE_DEADLINE_SECONDS']
+        )
+        
+        if captured_images is not None:
+            result = compare_reference_to_many(
+                reference_image,
+                captured_images,
+                app.config['FACE_TOLERANCE'],
+                deadline=deadline,
+                profile=profile,
+                reference_box=face_boxes.get('reference_face_box')
+            )
+            if not result.get('success') and deadline.expired():
+                logger.warning(f"⏳ Deadline excedido na comparação em lote para {employee_id}")
+                return jsonify(result), 504
+            if result.get('success'):
+                logger.info(f"🎯 Lote para {employee_id}: {result['matches']}/{len(result['results'])} MATCH")
+            else:
+                logger.warning(f"⚠️ Erro na comparação em lote para {employee_id}: {result.get('reason', 'Erro desconhecido')}")
+            return jsonify(result)
+        
         result = compare_two_images(
             reference_image, 
             captured_image,
-            app.config['FACE_TOLERANCE']
+            app.config['FACE_TOLERANCE'],
+            deadline=deadline,
+            profile=profile,
+            reference_box=face_boxes.get('reference_face_box'),
+            captured_box=face_boxes.get('captured_face_box')
         )
         
+        if not result.get('success') and deadline.expired():
+            logger.warning(f"⏳ Deadline excedido na comparação para {employee_id}")
+            return jsonify(result), 504
+        
         # Log do resultado
         if result.get('success'):
             match_status = "✅ MATCH" if result.get('match') else "❌ NO MATCH"
@@ -1,32 +1,41 @@
 # Endpoints da API de reconhecimento facial
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import os
+import uuid
+import zipfile
+import time
 import aiofiles
 from loguru import logger
 from datetime import datetime
 
-# Importar serviço facial com fallback inteligente
-try:
-    from app.services.facial_service import facial_service
-    SERVICE_MODE = "real" if facial_service.facial_recognition_available else "limited"
-    logger.info(f"✅ Serviço facial carregado em modo: {SERVICE_MODE}")
-except ImportError as e:
-    # Fallback para versão mock se houver erro crítico
-    logger.warning(f"⚠️ Erro ao carregar serviço facial: {e}")
-    try:
-        from app.services.facial_service_mock import facial_service
-        SERVICE_MODE = "mock"
-        logger.info("🎭 Usando serviço facial MOCK como fallback")
-    except ImportError as e2:
-        logger.error(f"❌ Erro crítico: não foi possível carregar nenhum serviço facial: {e2}")
-        raise RuntimeError("Nenhum serviço facial disponível")
+# Serviço facial: sem as dependências de CV o motor simulado assume (modo limitado)
+from app.services.facial_service import facial_service
+SERVICE_MODE = "real" if facial_service.facial_recognition_available else "limited"
+logger.info(f"✅ Serviço facial carregado em modo: {SERVICE_MODE}")
 from app.config import settings
-from app.models.employee import FacialVerificationResult, FacialRegistrationResult
+from app.models.employee import FacialVerificationResult, FacialRegistrationResult, EnrollmentJobStatus
+from app.services.enrollment_jobs import enrollment_jobs, validate_callback_url
+from utils.deadline import Deadline, DEADLINE_HEADER
+from utils.image_inspector import inspect_image, ImageRejected
+from utils.face_profiles import get_profile, PROFILES
+from utils.face_hints import parse_face_box
+from utils.job_queue import JobAlreadyPending
+from app.api.uploads import read_upload, save_upload
+from app.services.encoding_store import encoding_store
+from utils.bulk_enrollment import BulkEnrollment
 
 # Criar router para endpoints de reconhecimento facial
 router = APIRouter()
 
+# Com o cadastro em dois níveis a requisição grava o template rápido; o refinado vem da fila de jobs
+REGISTER_DEFAULT_PROFILE = settings.TEMPLATE_FAST_PROFILE if settings.TEMPLATE_REFINE_ENABLED else settings.REGISTER_PROFILE
+
 def validate_file(file: UploadFile) -> None:
     """
     Valida o arquivo enviado
@@ -62,18 +71,117 @@ def validate_file(file: UploadFile) -> None:
                 detail=f"Tipo de arquivo não permitido. Formatos aceitos: {allowed}"
             )
 
+def inspect_upload(file: UploadFile, image_bytes: bytes) -> None:
+    """
+    Valida o conteúdo do upload pelo cabeçalho, sem decodificar a imagem
+    
+    O formato real precisa bater com a extensão, e as dimensões devem estar
+    entre o mínimo e o limite de pixels (proteção contra bombas de descompressão).
+    
+    Args:
+        file: Arquivo enviado via upload
+        image_bytes: Conteúdo lido do arquivo
+        
+    Raises:
+        HTTPException: Se o cabeçalho for inválido ou violar os limites
+    """
+    try:
+        inspect_image(
+            image_bytes,
+            expected_format=file.filename,
+            min_dimension=settings.MIN_IMAGE_DIMENSION,
+            max_pixels=settings.MAX_IMAGE_PIXELS
+        )
+    except ImageRejected as e:
+        logger.warning(f"🚫 Upload rejeitado ({e.reason}): {file.filename}")
+        raise HTTPException(
+            status_code=413 if e.reason == "too_many_pixels" else 400,
+            detail=e.message
+        )
+
+def resolve_profile(name: Optional[str], default: str) -> str:
+    """
+    Valida o perfil pedido na query string
+    
+    Args:
+        name: Perfil informado pelo cliente (None usa o padrão do endpoint)
+        default: Perfil padrão do endpoint
+        
+    Returns:
+        str: Nome do perfil
+        
+    Raises:
+        HTTPException: Se o perfil não existir
+    """
+    try:
+        return get_profile(name, default).name
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Perfil inválido: {name}. Perfis disponíveis: {', '.join(PROFILES)}"
+        )
+
+async def _cancel_on_disconnect(request: Request, deadline: Deadline) -> None:
+    """
+    Cancela o deadline desta requisição se o cliente desconectar antes da resposta
+
+    Só o Deadline da própria conexão é cancelado. Num job coalescido ele é um
+    dos participantes do SharedDeadline: a requisição sai da espera e o job
+    continua para as demais, sendo abortado apenas quando não resta nenhuma.
+    """
+    while not deadline.expired():
+        if await request.is_disconnected():
+            logger.info(f"🔌 Cliente desconectou: cancelando {request.url.path}")
+            deadline.cancel()
+            return
+        await asyncio.sleep(0.25)
+
+@asynccontextmanager
+async def request_deadline(request: Request, default_seconds: float, cancel_on_disconnect: bool = True):
+    """
+    Deadline da requisição (cabeçalho X-Request-Deadline ou padrão do endpoint)
+    
+    Enquanto o bloco executa, a desconexão do cliente também cancela o deadline
+    (exceto com cancel_on_disconnect=False, para operações que devem terminar).
+    
+    Args:
+        request: Requisição atual
+        default_seconds: Deadline padrão do endpoint
+        cancel_on_disconnect: Cancelar o deadline se o cliente desconectar
+    """
+    deadline = Deadline.from_header(request.headers.get(DEADLINE_HEADER), default_seconds)
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, deadline)) if cancel_on_disconnect else None
+    try:
+        yield deadline
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+def raise_if_deadline_exceeded(deadline: Deadline) -> None:
+    """Responde 504 quando o trabalho foi abortado pelo deadline"""
+    if deadline.expired():
+        raise HTTPException(
+            status_code=504,
+            detail="Tempo limite da requisição excedido. Tente novamente."
+        )
+
 @router.post(
     "/register-employee/{employee_id}",
     response_model=FacialRegistrationResult,
     summary="Registrar foto de funcionário",
-    description="Registra a foto de um funcionário para uso no reconhecimento facial"
+    description="Registra a foto de um funcionário para uso no reconhecimento facial",
+    responses={202: {"model": EnrollmentJobStatus, "description": "Cadastro enfileirado (background=true)"}}
 )
 async def register_employee_photo(
     employee_id: str,
+    request: Request,
     file: UploadFile = File(
         ..., 
         description="Arquivo de imagem contendo o rosto do funcionário (JPG, PNG, WEBP)"
-    )
+    ),
+    profile: Optional[str] = Query(None, description="Perfil: fast, balanced ou accurate (padrão TEMPLATE_FAST_PROFILE ou REGISTER_PROFILE)"),
+    background: Optional[bool] = Query(None, description="Processar na fila e responder 202 (padrão REGISTER_BACKGROUND_DEFAULT)"),
+    callback_url: Optional[str] = Query(None, description="URL que recebe um POST com o estado final do job (background)")
 ):
     """
     Registra a foto de um funcionário para reconhecimento facial
@@ -81,6 +189,9 @@ async def register_employee_photo(
     **Parâmetros:**
     - **employee_id**: ID único do funcionário (string)
     - **file**: Arquivo de imagem com o rosto do funcionário
+    - **profile**: Perfil de precisão/latência (opcional)
+    - **background**: Enfileira o cadastro e responde 202 com o `job_id` (opcional)
+    - **callback_url**: Notificada ao fim do job com o mesmo JSON de `/api/v1/jobs/{job_id}` (opcional)
     
     **Requisitos da imagem:**
     - Formato: JPG, PNG ou WEBP
@@ -93,12 +204,23 @@ async def register_employee_photo(
     - Resultado do registro com status de sucesso/falha
     - Mensagem explicativa
     - Caminhos dos arquivos salvos (se sucesso)
+    - Com background: 202 e o job (acompanhe em `status_url`)
     """
     try:
         logger.info(f"🎯 Recebida solicitação de registro para funcionário {employee_id}")
         
         # Validar arquivo enviado
         validate_file(file)
+        profile = resolve_profile(profile, REGISTER_DEFAULT_PROFILE)
+        background = settings.REGISTER_BACKGROUND_DEFAULT if background is None else background
+        if callback_url:
+            if not background:
+                raise HTTPException(status_code=400, detail="callback_url só é aceito com background=true")
+            try:
+                # Resolve o host (DNS bloqueante) fora do event loop
+                await asyncio.get_running_loop().run_in_executor(None, validate_callback_url, callback_url)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
         # Verificar se funcionário já possui foto
         if facial_service.employee_has_photo(employee_id):
@@ -107,17 +229,38 @@ async def register_employee_photo(
                 status_code=409,
                 detail=f"Funcionário {employee_id} já possui foto registrada. Use o endpoint de atualização."
             )
+        pending_job = await enrollment_jobs.pending_for(employee_id)
+        if pending_job:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Cadastro do funcionário {employee_id} já está na fila (job {pending_job})"
+            )
         
         # Ler conteúdo do arquivo
-        image_bytes = await file.read()
+        image_bytes = await read_upload(file)
         logger.info(f"📁 Arquivo lido: {len(image_bytes)} bytes")
+        inspect_upload(file, image_bytes)
+        
+        # Cadastro assíncrono: só a validação do upload acontece na requisição
+        if background:
+            try:
+                job = await enrollment_jobs.submit(employee_id, image_bytes, profile, callback_url)
+            except JobAlreadyPending as e:
+                # Outra requisição enfileirou o mesmo funcionário depois da conferência acima
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Cadastro do funcionário {employee_id} já está na fila (job {e.job_id})"
+                )
+            job["status_url"] = request.url_for("get_job_status", job_id=job["job_id"]).path
+            return JSONResponse(status_code=202, content=jsonable_encoder(EnrollmentJobStatus(**job)))
         
         # Salvar foto e gerar encoding
-        success, message = await facial_service.save_employee_photo(employee_id, image_bytes)
+        async with request_deadline(request, settings.REGISTER_DEADLINE_SECONDS) as deadline:
+            success, message = await facial_service.save_employee_photo(employee_id, image_bytes, deadline, profile)
         
         if success:
             photo_path = f"{settings.STORAGE_PATH}/{employee_id}.jpg"
-            encoding_path = f"{settings.STORAGE_PATH}/{employee_id}_encoding.json"
+            encoding_path = encoding_store.encoding_path(employee_id)
             
             result = FacialRegistrationResult(
                 employee_id=employee_id,
@@ -131,6 +274,7 @@ async def register_employee_photo(
             return result
         else:
             logger.error(f"❌ Falha no registro do funcionário {employee_id}: {message}")
+            raise_if_deadline_exceeded(deadline)
             raise HTTPException(
                 status_code=400,
                 detail=message
@@ -153,9 +297,15 @@ async def register_employee_photo(
 )
 async def verify_employee_face(
     employee_id: str,
+    request: Request,
     file: UploadFile = File(
         ..., 
         description="Arquivo de imagem para verificação facial"
+    ),
+    profile: Optional[str] = Query(None, description="Perfil: fast, balanced ou accurate (padrão VERIFY_PROFILE)"),
+    face_box: Optional[str] = Form(
+        None,
+        description="Caixa do rosto detectada no aparelho: x,y,largura,altura em pixels da imagem enviada"
     )
 ):
     """
@@ -164,6 +314,12 @@ async def verify_employee_face(
     **Parâmetros:**
     - **employee_id**: ID do funcionário para verificar
     - **file**: Arquivo de imagem contendo o rosto para verificação
+    - **profile**: Perfil de precisão/latência (opcional; quiosques usam fast)
+    - **face_box**: Caixa do rosto já detectada no aparelho (opcional); se
+      passar na conferência de landmarks, a detecção na imagem inteira é pulada
+    
+    **Deadline:** o cabeçalho opcional `X-Request-Deadline` (Unix epoch em
+    segundos) limita o processamento; expirado, a resposta é 504.
     
     **Processo de verificação:**
     1. Valida o arquivo enviado
@@ -177,12 +333,20 @@ async def verify_employee_face(
     - **similarity**: Porcentagem de similaridade (0-100%)
     - **confidence**: Nível de confiança (high/medium/low)
     - **timestamp**: Momento da verificação
+    - **faces**: Rostos detectados/codificados e o rosto usado (com vários rostos, o maior)
     """
     try:
         logger.info(f"🔍 Recebida solicitação de verificação para funcionário {employee_id}")
         
         # Validar arquivo enviado
         validate_file(file)
+        profile = resolve_profile(profile, settings.VERIFY_PROFILE)
+        face_hint = None
+        if face_box:
+            try:
+                face_hint = parse_face_box(face_box)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
         # Verificar se funcionário possui foto cadastrada
         if not facial_service.employee_has_photo(employee_id):
@@ -193,11 +357,19 @@ async def verify_employee_face(
             )
         
         # Ler conteúdo do arquivo
-        image_bytes = await file.read()
+        image_bytes = await read_upload(file)
         logger.info(f"📁 Arquivo de verificação lido: {len(image_bytes)} bytes")
+        inspect_upload(file, image_bytes)
         
         # Verificar rosto
-        is_match, similarity, confidence = await facial_service.verify_face(employee_id, image_bytes)
+        async with request_deadline(request, settings.VERIFY_DEADLINE_SECONDS) as deadline:
+            details = {}
+            is_match, similarity, confidence = await facial_service.verify_face(
+                employee_id, image_bytes, deadline, profile, details, face_hint
+            )
+        
+        if confidence == "deadline_exceeded":
+            raise_if_deadline_exceeded(deadline)
         
         # Criar resultado da verificação
         result = FacialVerificationResult(
@@ -205,7 +377,8 @@ async def verify_employee_face(
             verified=is_match,
             similarity=round(similarity * 100, 2),  # Converter para porcentagem
             confidence=confidence,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            faces=details or None
         )
         
         # Log do resultado
@@ -226,6 +399,241 @@ async def verify_employee_face(
             detail="Erro interno do servidor. Tente novamente."
         )
 
+async def _verify_batch_item(index: int, employee_id: str, image_bytes: Optional[bytes], error: Optional[HTTPException],
+                             profile: str, deadline: Deadline, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Verifica um item do lote; falhas viram uma linha de erro em vez de derrubar o lote
+    
+    Returns:
+        dict: Linha do NDJSON (result com status 200 ou error com o status equivalente)
+    """
+    try:
+        if error is not None:
+            raise error
+        async with semaphore:
+            if deadline.expired():
+                raise_if_deadline_exceeded(deadline)
+            if not facial_service.employee_has_photo(employee_id):
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Funcionário {employee_id} não possui foto cadastrada. Registre uma foto primeiro."
+                )
+            details = {}
+            is_match, similarity, confidence = await facial_service.verify_face(
+                employee_id, image_bytes, deadline, profile, details
+            )
+        if confidence == "deadline_exceeded":
+            raise_if_deadline_exceeded(deadline)
+        
+        result = FacialVerificationResult(
+            employee_id=employee_id,
+            verified=is_match,
+            similarity=round(similarity * 100, 2),
+            confidence=confidence,
+            timestamp=datetime.now(),
+            faces=details or None
+        )
+        return {"index": index, "employee_id": employee_id, "status_code": 200, "result": jsonable_encoder(result)}
+    except HTTPException as e:
+        return {"index": index, "employee_id": employee_id, "status_code": e.status_code, "error": e.detail}
+    except Exception as e:
+        logger.error(f"❌ Erro no item {index} do lote (funcionário {employee_id}): {e}")
+        return {"index": index, "employee_id": employee_id, "status_code": 500, "error": "Erro interno do servidor"}
+
+async def _stream_batch(request: Request, items: list, profile: str):
+    """Executa os itens em paralelo e emite cada linha assim que o item termina"""
+    start = time.perf_counter()
+    summary = {"total": len(items), "verified": 0, "not_verified": 0, "errors": 0}
+    async with request_deadline(request, settings.BATCH_VERIFY_DEADLINE_SECONDS) as deadline:
+        semaphore = asyncio.Semaphore(max(1, settings.BATCH_VERIFY_CONCURRENCY))
+        tasks = [
+            asyncio.create_task(_verify_batch_item(index, employee_id, image_bytes, error, profile, deadline, semaphore))
+            for index, employee_id, image_bytes, error in items
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                line = await finished
+                if "error" in line:
+                    summary["errors"] += 1
+                elif line["result"]["verified"]:
+                    summary["verified"] += 1
+                else:
+                    summary["not_verified"] += 1
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # Cliente desconectou no meio do streaming: aborta o que ainda está no pipeline
+            if any(not task.done() for task in tasks):
+                deadline.cancel()
+                for task in tasks:
+                    task.cancel()
+    
+    summary["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(f"📦 Lote concluído: {summary}")
+    yield json.dumps({"summary": summary}) + "\n"
+
+@router.post(
+    "/verify-batch",
+    summary="Verificar vários funcionários numa requisição",
+    description="Verifica pares (employee_id, imagem) em paralelo e devolve NDJSON, uma linha por item conforme terminam"
+)
+async def verify_batch(
+    request: Request,
+    employee_ids: List[str] = Form(..., description="IDs dos funcionários, na mesma ordem dos arquivos"),
+    files: List[UploadFile] = File(..., description="Imagens de verificação, uma por employee_id"),
+    profile: Optional[str] = Query(None, description="Perfil: fast, balanced ou accurate (padrão VERIFY_PROFILE)")
+):
+    """
+    Verifica vários funcionários numa única requisição (quiosques offline, reverificação noturna)
+    
+    **Parâmetros (multipart):**
+    - **employee_ids**: campo repetido, um por arquivo
+    - **files**: campo repetido, na mesma ordem de employee_ids
+    - **profile**: Perfil de precisão/latência para todos os itens (opcional)
+    
+    **Resposta:** `application/x-ndjson`, uma linha por item na ordem em que
+    terminam (use `index` para casar com o envio):
+    - sucesso: `{"index", "employee_id", "status_code": 200, "result": {...}}`
+    - falha do item: `{"index", "employee_id", "status_code", "error"}`;
+      os demais itens continuam
+    - última linha: `{"summary": {"total", "verified", "not_verified", "errors", "elapsed_ms"}}`
+    
+    **Deadline:** `X-Request-Deadline` ou BATCH_VERIFY_DEADLINE_SECONDS para o lote inteiro.
+    """
+    if len(employee_ids) != len(files):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Quantidade de employee_ids ({len(employee_ids)}) diferente da de arquivos ({len(files)})"
+        )
+    if len(files) > settings.BATCH_VERIFY_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Lote muito grande: {len(files)} itens. Máximo: {settings.BATCH_VERIFY_MAX_ITEMS}"
+        )
+    profile = resolve_profile(profile, settings.VERIFY_PROFILE)
+    
+    # Uploads lidos antes de responder: o corpo multipart não fica disponível durante o streaming
+    items = []
+    for index, (employee_id, file) in enumerate(zip(employee_ids, files)):
+        try:
+            validate_file(file)
+            image_bytes = await read_upload(file)
+            inspect_upload(file, image_bytes)
+            items.append((index, employee_id, image_bytes, None))
+        except HTTPException as e:
+            items.append((index, employee_id, None, e))
+    
+    logger.info(f"📦 Lote de verificação recebido: {len(items)} itens (perfil {profile})")
+    return StreamingResponse(_stream_batch(request, items, profile), media_type="application/x-ndjson")
+
+async def _stream_bulk_enrollment(enrollment: BulkEnrollment, archive_path: str):
+    """Executa o cadastro em massa fora do event loop e emite cada linha do relatório"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def progress(entry):
+        if entry["status"] == "enrolled":
+            encoding_store.get(entry["employee_id"])  # Cache e matriz 1:N deste worker atualizados
+        loop.call_soon_threadsafe(queue.put_nowait, entry)
+    
+    def run():
+        # Continua mesmo se o cliente desconectar: o relatório fica no TEMP_PATH
+        try:
+            return enrollment.run(archive_path, progress=progress)
+        finally:
+            os.remove(archive_path)
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+    
+    future = loop.run_in_executor(None, run)
+    while True:
+        entry = await queue.get()
+        if entry is None:
+            break
+        yield json.dumps(entry, ensure_ascii=False) + "\n"
+    
+    try:
+        summary = await future
+        yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.error(f"❌ Erro no cadastro em massa: {e}")
+        yield json.dumps({"error": f"Erro no cadastro em massa: {e}"}, ensure_ascii=False) + "\n"
+
+@router.post(
+    "/bulk-enroll",
+    summary="Cadastro em massa a partir de um .zip",
+    description="Cadastra cada {employee_id}.jpg do .zip e devolve NDJSON, uma linha por arquivo"
+)
+async def bulk_enroll(
+    file: UploadFile = File(..., description="Arquivo .zip com fotos {employee_id}.jpg/.jpeg/.png/.webp"),
+    profile: Optional[str] = Query(None, description="Perfil: fast, balanced ou accurate (padrão REGISTER_PROFILE)"),
+    overwrite: bool = Query(False, description="Recadastrar funcionários que já têm foto e encoding")
+):
+    """
+    Cadastra muitos funcionários de uma vez (carga inicial, migração do RH)
+    
+    O .zip é gravado no TEMP_PATH e lido membro a membro; detecção e encoding
+    rodam num pool de BULK_ENROLL_WORKERS processos e fotos/encodings são
+    gravados em lotes de BULK_ENROLL_BATCH_SIZE.
+    
+    **Resposta:** `application/x-ndjson`, uma linha por arquivo quando o lote é gravado:
+    - `{"file", "employee_id", "status": "enrolled"}`
+    - `{"file", "employee_id", "status": "failed", "reason", "message"}`
+    - `{"file", "employee_id", "status": "skipped", "reason"}` (já cadastrado ou repetido no .zip)
+    - última linha: `{"summary": {"enrolled", "failed", "skipped", "elapsed_s", "images_per_s", "report"}}`
+    
+    **Retomada:** reenviar o mesmo .zip pula quem já foi cadastrado.
+    """
+    if not getattr(facial_service, 'facial_recognition_available', False):
+        raise HTTPException(status_code=503, detail="Cadastro em massa requer o reconhecimento facial disponível")
+    profile = resolve_profile(profile, settings.REGISTER_PROFILE)
+    
+    job_id = f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+    archive_path = os.path.join(settings.TEMP_PATH, f"bulk_enroll_{job_id}.zip")
+    await save_upload(file, archive_path, settings.BULK_ENROLL_MAX_BYTES)
+    if not zipfile.is_zipfile(archive_path):
+        os.remove(archive_path)
+        raise HTTPException(status_code=400, detail="Envie um arquivo .zip com as fotos")
+    
+    enrollment = BulkEnrollment(
+        settings.STORAGE_PATH,
+        os.path.join(settings.TEMP_PATH, f"bulk_enroll_{job_id}.jsonl"),
+        workers=settings.BULK_ENROLL_WORKERS,
+        batch_size=settings.BULK_ENROLL_BATCH_SIZE,
+        batch_max_bytes=settings.BULK_ENROLL_BATCH_MAX_BYTES,
+        profile=profile,
+        engine_options={
+            "name": settings.FACE_ENGINE,
+            "yunet_model": settings.FACE_YUNET_MODEL,
+            "sface_model": settings.FACE_SFACE_MODEL,
+            "ort_recognizer_model": settings.FACE_ORT_RECOGNIZER_MODEL,
+            "ort_threads": settings.FACE_ORT_THREADS
+        },
+        overwrite=overwrite,
+        tolerance=settings.FACE_TOLERANCE,
+        disk_format=settings.ENCODING_DISK_FORMAT,
+        min_dimension=settings.MIN_IMAGE_DIMENSION,
+        max_pixels=settings.MAX_IMAGE_PIXELS,
+        model_version=settings.ENCODING_MODEL_VERSION
+    )
+    logger.info(f"📥 Cadastro em massa {job_id} recebido (perfil {profile})")
+    return StreamingResponse(_stream_bulk_enrollment(enrollment, archive_path), media_type="application/x-ndjson")
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=EnrollmentJobStatus,
+    summary="Estado de um cadastro assíncrono",
+    description="Consulta um job criado por /register-employee?background=true"
+)
+async def get_job_status(job_id: str):
+    """
+    Estado de um cadastro assíncrono
+    
+    **status:** `queued` → `running` → `succeeded` ou `failed` (motivo em `message`)
+    """
+    job = await enrollment_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado")
+    return EnrollmentJobStatus(**job)
+
 @router.put(
     "/update-employee/{employee_id}",
     response_model=FacialRegistrationResult,
@@ -234,21 +642,25 @@ async def verify_employee_face(
 )
 async def update_employee_photo(
     employee_id: str,
+    request: Request,
     file: UploadFile = File(
         ..., 
         description="Nova foto do funcionário"
-    )
+    ),
+    profile: Optional[str] = Query(None, description="Perfil: fast, balanced ou accurate (padrão TEMPLATE_FAST_PROFILE ou REGISTER_PROFILE)")
 ):
     """
     Atualiza a foto de um funcionário já cadastrado
     
-    **Nota:** Remove a foto anterior e registra a nova
+    **Nota:** A foto e o encoding anteriores continuam valendo até a nova foto
+    ser validada e gravada; se a nova for recusada, o cadastro antigo é mantido
     """
     try:
         logger.info(f"🔄 Recebida solicitação de atualização para funcionário {employee_id}")
         
         # Validar arquivo
         validate_file(file)
+        profile = resolve_profile(profile, REGISTER_DEFAULT_PROFILE)
         
         # Verificar se funcionário existe
         if not facial_service.employee_has_photo(employee_id):
@@ -257,13 +669,16 @@ async def update_employee_photo(
                 detail=f"Funcionário {employee_id} não encontrado. Use o endpoint de registro."
             )
         
-        # Remover dados antigos
-        await facial_service.delete_employee_data(employee_id)
-        logger.info(f"🗑️ Dados antigos removidos para funcionário {employee_id}")
+        # Ler e validar a nova foto
+        image_bytes = await read_upload(file)
+        inspect_upload(file, image_bytes)
         
-        # Ler e processar nova foto
-        image_bytes = await file.read()
-        success, message = await facial_service.save_employee_photo(employee_id, image_bytes)
+        # Processar e gravar a nova foto por cima da antiga (troca atômica, sem apagar antes).
+        # Sem cancelamento por desconexão: a troca começada termina mesmo sem o cliente
+        async with request_deadline(request, settings.REGISTER_DEADLINE_SECONDS, cancel_on_disconnect=False) as deadline:
+            success, message = await facial_service.save_employee_photo(
+                employee_id, image_bytes, deadline, profile, replace=True
+            )
         
         if success:
             result = FacialRegistrationResult(
@@ -271,12 +686,13 @@ async def update_employee_photo(
                 success=True,
                 message=f"Foto do funcionário {employee_id} atualizada com sucesso",
                 photo_path=f"{settings.STORAGE_PATH}/{employee_id}.jpg",
-                encoding_path=f"{settings.STORAGE_PATH}/{employee_id}_encoding.json"
+                encoding_path=encoding_store.encoding_path(employee_id)
             )
             
             logger.info(f"✅ Funcionário {employee_id} atualizado com sucesso")
             return result
         else:
+            raise_if_deadline_exceeded(deadline)
             raise HTTPException(status_code=400, detail=message)
             
     except HTTPException:
@@ -362,6 +778,7 @@ async def get_system_statistics():
     """
     try:
         stats = facial_service.get_statistics()
+        stats["enrollment_jobs"] = enrollment_jobs.stats()
         stats["generated_at"] = datetime.now().isoformat()
         return stats
         
@@ -389,6 +806,11 @@ async def get_service_info():
                 "image_storage": True,
                 "basic_validation": True
             },
+            "profiles": {
+                "available": {name: profile.describe() for name, profile in PROFILES.items()},
+                "verify_default": settings.VERIFY_PROFILE,
+                "register_default": settings.REGISTER_PROFILE
+            },
             "recommendations": {
                 "install_dependencies": SERVICE_MODE != "real",
                 "command": "pip install face-recognition opencv-python-headless numpy" if SERVICE_MODE != "real" else None
@@ -0,0 +1,201 @@
+# Leitura de uploads com limite de tamanho aplicado durante o streaming
+import os
+import json
+from typing import Dict, Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from loguru import logger
+from starlette.requests import ClientDisconnect
+
+from app.config import settings
+
+# Tamanho dos blocos lidos do upload
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Folga para os cabeçalhos do multipart além do próprio arquivo
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Middleware ASGI que limita o corpo das requisições antes do parsing do multipart
+
+    - Content-Length acima do limite: 413 imediato, sem ler o corpo
+    - Sem Content-Length (chunked) ou com valor falso: os bytes são contados
+      enquanto chegam e o recebimento é abortado assim que o limite é passado
+
+    Sem isso o Starlette grava o upload inteiro em disco (SpooledTemporaryFile)
+    antes de o endpoint conseguir verificar qualquer coisa.
+
+    Endpoints com vários arquivos por requisição (lotes) têm limite próprio
+    em `path_limits` (prefixo do caminho → bytes).
+    """
+
+    def __init__(self, app, max_body_size: Optional[int] = None, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_body_size = max_body_size or settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD
+        self.path_limits = path_limits or {}
+
+    def limit_for(self, path: str) -> int:
+        """Limite do corpo para o caminho da requisição"""
+        for prefix, limit in self.path_limits.items():
+            if path.startswith(prefix):
+                return limit
+        return self.max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_body_size = self.limit_for(scope["path"])
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body_size:
+            logger.warning(f"🚫 Corpo recusado pelo Content-Length: {int(content_length)} bytes em {scope['path']}")
+            await self._send_too_large(send, max_body_size)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    exceeded = True
+                    logger.warning(f"🚫 Upload abortado após {received} bytes em {scope['path']}")
+                    raise ClientDisconnect()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Depois de abortar, a resposta de erro do parser é descartada
+            if exceeded:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except ClientDisconnect:
+            if not exceeded:
+                raise
+
+        if exceeded and not response_started:
+            await self._send_too_large(send, max_body_size)
+
+    async def _send_too_large(self, send, max_body_size: int):
+        # Limite por arquivo na mensagem; nos lotes, o limite do corpo inteiro
+        limit = max_body_size if max_body_size != self.max_body_size else settings.MAX_FILE_SIZE
+        size_mb = limit // (1024 * 1024)
+        body = json.dumps({
+            "detail": f"Arquivo muito grande. Tamanho máximo permitido: {size_mb}MB"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+async def read_upload(file: UploadFile, max_bytes: Optional[int] = None) -> bytearray:
+    """
+    Lê o upload em blocos, abortando assim que o limite é ultrapassado
+
+    Quando o tamanho é conhecido o buffer é alocado uma única vez com o
+    tamanho exato e preenchido bloco a bloco; o bytearray vai direto para o
+    decoder (np.frombuffer), sem a cópia extra de juntar os blocos em bytes.
+
+    Args:
+        file: Arquivo enviado via upload
+        max_bytes: Limite em bytes (padrão: MAX_FILE_SIZE)
+
+    Returns:
+        bytearray: Conteúdo do arquivo
+
+    Raises:
+        HTTPException: 413 se o arquivo passar do limite
+    """
+    max_bytes = max_bytes or settings.MAX_FILE_SIZE
+    size_mb = max_bytes // (1024 * 1024)
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Arquivo muito grande. Tamanho máximo permitido: {size_mb}MB"
+    )
+
+    expected = file.size
+    if expected is not None and expected > max_bytes:
+        raise too_large
+
+    buffer = bytearray(expected or 0)
+    view = memoryview(buffer)
+    received = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        end = received + len(chunk)
+        if end > max_bytes:
+            logger.warning(f"🚫 Upload {file.filename} passou de {max_bytes} bytes durante a leitura")
+            raise too_large
+        if end <= len(buffer):
+            view[received:end] = chunk
+        else:
+            # Tamanho desconhecido (ou maior que o anunciado): crescer o buffer
+            view.release()
+            buffer[received:] = chunk
+            view = memoryview(buffer)
+        received = end
+
+    view.release()
+    if received < len(buffer):
+        del buffer[received:]
+    return buffer
+
+
+async def save_upload(file: UploadFile, path: str, max_bytes: int) -> int:
+    """
+    Copia o upload para um arquivo em blocos, sem carregar tudo em memória
+
+    Args:
+        file: Arquivo enviado via upload
+        path: Destino no disco
+        max_bytes: Limite em bytes
+
+    Returns:
+        int: Bytes gravados
+
+    Raises:
+        HTTPException: 413 se o arquivo passar do limite (o destino é removido)
+    """
+    written = 0
+    try:
+        async with aiofiles.open(path, 'wb') as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    logger.warning(f"🚫 Upload {file.filename} passou de {max_bytes} bytes durante a cópia")
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Arquivo muito grande. Tamanho máximo permitido: {max_bytes // (1024 * 1024)}MB"
+                    )
+                await f.write(chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return written
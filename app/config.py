@@ -28,6 +28,112 @@ class Settings(BaseSettings):
     FACE_TOLERANCE: float = 0.6  # Ajuste conforme necessário (0.6 é padrão)
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: Set[str] = {"jpg", "jpeg", "png", "webp"}
+    MIN_IMAGE_DIMENSION: int = 50  # Menor largura/altura aceita (px)
+    MAX_IMAGE_PIXELS: int = 50_000_000  # Acima disso: bomba de descompressão
+    PRELOAD_ENCODINGS: bool = True  # Carregar todos os encodings em memória na inicialização
+    # Matriz em memória: float64, float32, float16 ou int8 (compactos: varredura 1:N + reordenação exata)
+    ENCODING_MATRIX_DTYPE: str = "float64"
+    # Encoding no JSON: list (floats), float32 ou float16 (base64); arquivos antigos continuam legíveis
+    ENCODING_DISK_FORMAT: str = "list"
+    ENCODING_SEARCH_SHORTLIST: int = 50  # Candidatos da varredura aproximada reordenados em float32
+    # Migração de motor/modelo: lê {id}_encoding.{versão}.json quando existe (senão o original) e grava nele
+    ENCODING_MODEL_VERSION: str = ""
+    
+    # Pipeline decode → detect → encode (workers por estágio)
+    PIPELINE_ENABLED: bool = True
+    PIPELINE_DECODE_WORKERS: int = 2
+    PIPELINE_DETECT_WORKERS: int = 1
+    PIPELINE_ENCODE_WORKERS: int = 1
+    PIPELINE_QUEUE_SIZE: int = 4  # Capacidade das filas entre estágios
+    
+    # Deadline padrão por endpoint (sobrescrito pelo cabeçalho X-Request-Deadline)
+    VERIFY_DEADLINE_SECONDS: float = 10.0
+    REGISTER_DEADLINE_SECONDS: float = 30.0
+    BATCH_VERIFY_DEADLINE_SECONDS: float = 120.0
+    
+    # Verificação em lote (/api/v1/verify-batch): itens, corpo total e verificações simultâneas
+    BATCH_VERIFY_MAX_ITEMS: int = 100
+    BATCH_VERIFY_MAX_BYTES: int = 100 * 1024 * 1024  # 100MB
+    BATCH_VERIFY_CONCURRENCY: int = 4
+    
+    # Cadastro em massa (/api/v1/bulk-enroll): tamanho do .zip, processos do pool e cadastros por lote gravado
+    BULK_ENROLL_MAX_BYTES: int = 500 * 1024 * 1024  # 500MB
+    BULK_ENROLL_WORKERS: int = 2
+    BULK_ENROLL_BATCH_SIZE: int = 50
+    BULK_ENROLL_BATCH_MAX_BYTES: int = 64 * 1024 * 1024  # Fotos retidas por lote antes de gravar
+    
+    # Cadastro assíncrono: /register-employee?background=true responde 202 e o job roda na fila SQLite
+    REGISTER_BACKGROUND_DEFAULT: bool = False  # true = assíncrono mesmo sem ?background
+    JOB_QUEUE_PATH: str = "app/storage/jobs.db"
+    JOB_WORKERS: int = 1  # Cadastros simultâneos por processo (0 = só enfileira; ver enrollment-worker.py)
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 300.0  # Job "running" volta para a fila se o worker sumir por esse tempo
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETENTION_HOURS: int = 72
+    JOB_CALLBACK_TIMEOUT_SECONDS: float = 5.0
+    JOB_CALLBACK_RETRIES: int = 3
+    JOB_CALLBACK_ALLOWED_HOSTS: str = ""  # Hosts aceitos no callback_url, separados por vírgula (vazio = qualquer host público)
+    
+    # Cadastro em dois níveis: template rápido na requisição, refinado depois pela fila de jobs
+    TEMPLATE_REFINE_ENABLED: bool = False  # Desligado: o cadastro usa REGISTER_PROFILE, como antes
+    TEMPLATE_FAST_PROFILE: str = "fast"  # Perfil padrão do cadastro quando o refinamento está ativo
+    TEMPLATE_REFINE_JITTERS: int = 20
+    TEMPLATE_REFINE_FACE_SIZE: int = 300  # Rosto ampliado até esse lado (px) no recorte do refinamento
+    TEMPLATE_REFINE_MARGIN: float = 0.5  # Margem do recorte em cada lado (fração do rosto)
+    
+    # Cadastro duplicado (mesma pessoa com outro ID): busca 1:N do encoding novo no cadastro
+    DUPLICATE_CHECK_MODE: str = "off"  # off, flag (registra e avisa) ou reject (recusa o cadastro)
+    DUPLICATE_MAX_DISTANCE: float = 0.0  # Distância máxima para considerar duplicado (0 = FACE_TOLERANCE)
+    DUPLICATE_CHECK_CANDIDATES: int = 3  # Funcionários mais próximos informados
+    
+    # Orçamento de memória para decodificação, por worker (0 = sem limite)
+    MEMORY_BUDGET_MB: int = 512
+    MAX_DECODE_MEGAPIXELS: float = 12.0  # Acima disso o JPEG é decodificado reduzido
+    
+    # Filtro de qualidade antes da detecção (0 desativa cada limiar)
+    QUALITY_GATE_ENABLED: bool = True
+    QUALITY_MIN_SHARPNESS: float = 25.0  # Variância do Laplaciano (borrão)
+    QUALITY_MIN_BRIGHTNESS: float = 40.0
+    QUALITY_MAX_BRIGHTNESS: float = 220.0
+    QUALITY_MIN_CONTRAST: float = 15.0
+    QUALITY_MAX_CLIPPED_FRACTION: float = 0.6  # Fração de pixels pretos/estourados
+    
+    # Pré-filtro cascade (Haar/LBP) antes do HOG
+    CASCADE_PREFILTER_ENABLED: bool = False
+    CASCADE_PREFILTER_PATH: str = ""  # Vazio = haarcascade_frontalface_default.xml do OpenCV
+    CASCADE_MIN_NEIGHBORS: int = 2  # Baixo = permissivo (menos falsos "no_face")
+    
+    # Motor facial: dlib (face_recognition), opencv (YuNet + SFace, modelos ONNX locais), onnx (ONNX Runtime) ou mock
+    # Com opencv/onnx use FACE_TOLERANCE≈0.637 (distância de cosseno do SFace)
+    # Sem as dependências do motor configurado o serviço usa o motor "simulated" (modo limitado)
+    FACE_ENGINE: str = "dlib"
+    FACE_YUNET_MODEL: str = "models/face_detection_yunet_2023mar.onnx"
+    FACE_SFACE_MODEL: str = "models/face_recognition_sface_2021dec.onnx"
+    # Backend onnx: reconhecedor quantizado int8 e threads intra-op (0 = núcleos / processos / workers do motor)
+    FACE_ORT_RECOGNIZER_MODEL: str = "models/face_recognition_sface_2021dec_int8.onnx"
+    FACE_ORT_THREADS: int = 0
+    
+    # Escada de detecção na verificação: reduzido sem upsample → padrão → CNN (opcional)
+    DETECTION_ESCALATION_ENABLED: bool = True
+    DETECTION_FAST_MAX_SIDE: int = 640
+    DETECTION_CNN_FALLBACK: bool = False  # CNN em CPU custa segundos por imagem
+    
+    # Verificação em dois níveis: recodifica com mais jitters só perto da tolerância (landmarks do template)
+    PROGRESSIVE_VERIFY_ENABLED: bool = True
+    VERIFY_AMBIGUOUS_MARGIN: float = 0.05
+    VERIFY_RECHECK_JITTERS: int = 5
+    VERIFY_RECHECK_MODEL: str = "large"
+    
+    # Perfis de precisão/latência (fast, balanced, accurate); ?profile= sobrescreve por requisição
+    VERIFY_PROFILE: str = "balanced"
+    REGISTER_PROFILE: str = "accurate"  # Cadastro paga mais uma vez por um template melhor
+    
+    # Rostos codificados na verificação: "largest", "central" ou "all"; limite = top-N
+    FACE_SELECTION_POLICY: str = "largest"
+    FACE_SELECTION_LIMIT: int = 1
+    
+    # Dicas de caixa do cliente (campo face_box): validadas por landmarks, evitam o face_locations
+    FACE_HINTS_ENABLED: bool = True
     
     # Paths de armazenamento
     STORAGE_PATH: str = "app/storage/employee_photos"
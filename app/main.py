@@ -9,7 +9,11 @@ import os
 import sys
 
 from app.config import settings, create_directories
-from app.api.facial import router as facial_router
+from app.api.facial import router as facial_router, facial_service
+from app.api.uploads import UploadSizeLimitMiddleware
+from app.services.encoding_store import encoding_store
+from app.services.enrollment_jobs import enrollment_jobs
+from utils.warmup import record_request_latency, get_rss_bytes
 
 # Configurar logging avançado
 logger.remove()  # Remover logger padrão
@@ -102,6 +106,12 @@ app.add_middleware(
     allowed_hosts=["*"] if settings.DEBUG else ["seudominio.com", "*.seudominio.com"]
 )
 
+# Limite de tamanho do corpo aplicado enquanto o upload chega (lotes têm limite próprio)
+app.add_middleware(UploadSizeLimitMiddleware, path_limits={
+    "/api/v1/verify-batch": settings.BATCH_VERIFY_MAX_BYTES,
+    "/api/v1/bulk-enroll": settings.BULK_ENROLL_MAX_BYTES
+})
+
 # Middleware personalizado para logging de requisições
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -126,6 +136,11 @@ async def log_requests(request: Request, call_next):
         
         # Calcular tempo de processamento
         process_time = time.time() - start_time
+        if record_request_latency(process_time):
+            logger.info(
+                f"⏱️ Primeira requisição do processo {os.getpid()}: {process_time:.4f}s "
+                f"(RSS={get_rss_bytes() // (1024 * 1024)}MB)"
+            )
         
         # Determinar emoji baseado no status
         if response.status_code < 300:
@@ -294,6 +309,15 @@ async def startup_event():
     Executado quando a aplicação inicia
     """
     logger.info("🎬 API inicializada com sucesso!")
+    
+    # Carregado uma única vez: no master do gunicorn (preload_app, herdado pelos
+    # workers via copy-on-write) ou aqui, quando não houve pré-carregamento
+    if settings.PRELOAD_ENCODINGS and not encoding_store.loaded:
+        encoding_store.load_all()
+    
+    # Workers do cadastro assíncrono (fila SQLite compartilhada entre processos)
+    enrollment_jobs.start(facial_service)
+    
     logger.info(f"🌐 Documentação disponível em: /docs")
     logger.info(f"🔍 Health check disponível em: /health")
     logger.info(f"📊 Estatísticas disponíveis em: /api/v1/statistics")
@@ -304,6 +328,7 @@ async def shutdown_event():
     Executado quando a aplicação é encerrada
     """
     logger.info("🛑 API sendo encerrada...")
+    await enrollment_jobs.stop()
     logger.info("👋 Até logo!")
 
 # Executar aplicação (apenas para desenvolvimento)
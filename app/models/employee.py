@@ -1,6 +1,6 @@
 # Modelo de dados para funcionário
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class Employee(BaseModel):
@@ -18,6 +18,16 @@ class Employee(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
+class FaceSelectionInfo(BaseModel):
+    """
+    Rostos encontrados na imagem e quais foram codificados
+    """
+    faces_detected: int
+    faces_encoded: int
+    selection: Optional[str] = None            # Política aplicada quando havia mais de um rosto
+    face_location: Optional[List[int]] = None  # Rosto usado na decisão (top, right, bottom, left)
+    hint: Optional[str] = None                 # Dica de caixa do cliente: accepted ou rejected
+
 class FacialVerificationResult(BaseModel):
     """
     Resultado da verificação facial
@@ -27,6 +37,7 @@ class FacialVerificationResult(BaseModel):
     similarity: float  # Porcentagem de similaridade
     confidence: str    # high, medium, low
     timestamp: datetime
+    faces: Optional[FaceSelectionInfo] = None
     
 class FacialRegistrationResult(BaseModel):
     """
@@ -36,4 +47,22 @@ class FacialRegistrationResult(BaseModel):
     success: bool
     message: str
     photo_path: Optional[str] = None
-    encoding_path: Optional[str] = None 
\ No newline at end of file
+    encoding_path: Optional[str] = None 
+
+class EnrollmentJobStatus(BaseModel):
+    """
+    Estado de um cadastro assíncrono (também enviado ao callback_url)
+    """
+    job_id: str
+    kind: str
+    employee_id: Optional[str] = None
+    status: str                              # queued, running, succeeded, failed
+    message: Optional[str] = None
+    attempts: int = 0
+    created_at: float                        # Unix epoch
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    callback_url: Optional[str] = None
+    callback_status: Optional[str] = None    # delivered ou failed: ...
+    result: Optional[dict] = None
+    status_url: Optional[str] = None
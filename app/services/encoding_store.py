@@ -0,0 +1,468 @@
+# Armazenamento em memória dos encodings faciais
+import os
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiofiles
+from loguru import logger
+
+from app.config import settings
+from utils.encoding_files import encoding_filename, employee_id_from_filename, encoding_versions, validate_model_version
+
+try:
+    import numpy as np
+    from utils.encoding_codec import QuantizedMatrix, pack_encoding, unpack_encoding
+except ImportError:
+    np = None
+
+ENCODING_DIMENSIONS = 128
+
+# Leituras paralelas dos vetores exatos da lista curta (matriz compacta)
+EXACT_READ_THREADS = 8
+
+
+class EncodingStore:
+    """
+    Cache em memória dos arquivos {employee_id}_encoding.json
+
+    Os vetores reais ficam numa única matriz numpy contígua (uma linha por
+    funcionário) e os metadados num dicionário sem listas de floats. Assim,
+    quando o master do gunicorn carrega o store antes do fork, os workers
+    leem a matriz sem tocar em milhares de objetos float (copy-on-write).
+
+    O arquivo JSON continua sendo a fonte da verdade: cada leitura compara o
+    mtime do arquivo e recarrega se outro worker o alterou.
+
+    Com matrix_dtype float16/int8 a matriz serve só para as varreduras 1:N
+    (search); o vetor exato da verificação 1:1 e da reordenação da lista
+    curta é lido do arquivo (a lista curta em um lote de leituras paralelas).
+    A escala do int8 é calibrada uma única vez (ver QuantizedMatrix).
+
+    Com model_version (migração de motor/modelo) a leitura é dupla: o
+    arquivo {id}_encoding.{versão}.json quando existe, senão o original; as
+    gravações vão para o arquivo da versão. Quando a migração grava a
+    versão nova de um funcionário, o caminho muda e o cache recarrega.
+    """
+
+    def __init__(self, storage_path: str, matrix_dtype: str = "float64", disk_format: str = "list",
+                 shortlist: int = 50, model_version: str = ""):
+        validate_model_version(model_version)
+        self.storage_path = storage_path
+        self.disk_format = disk_format
+        self.shortlist = shortlist
+        self.model_version = model_version
+        self._lock = threading.Lock()
+        self._meta: Dict[str, dict] = {}
+        self._mtimes: Dict[str, Tuple[str, int]] = {}  # (arquivo lido, mtime)
+        self._rows: Dict[str, int] = {}
+        self._row_ids: List[Optional[str]] = []
+        self._free_rows: List[int] = []
+        self._matrix = QuantizedMatrix(matrix_dtype, ENCODING_DIMENSIONS) if np is not None else None
+        self._engine_codes: Dict[str, int] = {}
+        self._row_engines = np.zeros(0, dtype=np.int16) if np is not None else None  # Motor de cada linha
+        self._size = 0
+        self._read_pool = None
+        self._write_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}  # funcionário → (lock, usuários)
+        self.loaded = False  # load_all já rodou neste processo (ou no master, antes do fork)
+        if np is not None:
+            pack_encoding([], disk_format)  # Formato inválido falha já na inicialização
+
+    def encoding_path(self, employee_id: str) -> str:
+        """Arquivo de encoding lido para o funcionário (versão nova se existir, senão o original)"""
+        if self.model_version:
+            path = self.write_path(employee_id)
+            if os.path.exists(path):
+                return path
+        return os.path.join(self.storage_path, encoding_filename(employee_id))
+
+    def write_path(self, employee_id: str) -> str:
+        """Arquivo onde novos encodings do funcionário são gravados"""
+        return os.path.join(self.storage_path, encoding_filename(employee_id, self.model_version))
+
+    def all_paths(self, employee_id: str) -> List[str]:
+        """Todos os arquivos de encoding do funcionário (original e versões)"""
+        return list(encoding_versions(self.storage_path, employee_id).values())
+
+    def employee_ids(self) -> List[str]:
+        """Funcionários com encoding legível (original ou da versão configurada)"""
+        if not os.path.exists(self.storage_path):
+            return []
+        ids = set()
+        for file in os.listdir(self.storage_path):
+            employee_id = employee_id_from_filename(file)
+            if employee_id is None and self.model_version:
+                employee_id = employee_id_from_filename(file, self.model_version)
+            if employee_id is not None:
+                ids.add(employee_id)
+        return sorted(ids)
+
+    def load_all(self) -> int:
+        """
+        Carrega todos os encodings do diretório de armazenamento
+
+        Returns:
+            int: Quantidade de encodings carregados
+        """
+        records = []
+        for employee_id in self.employee_ids():
+            try:
+                path = self.encoding_path(employee_id)
+                mtime = os.stat(path).st_mtime_ns
+                with open(path, 'r') as f:
+                    data = json.loads(f.read())
+                records.append((employee_id, self._decode(data), (path, mtime)))
+            except Exception as e:
+                logger.warning(f"⚠️ Encoding ignorado no pré-carregamento ({employee_id}): {e}")
+
+        # Escala do int8 calibrada com os encodings reais antes de quantizar (só na primeira carga;
+        # linhas já inseridas com a escala padrão são requantizadas)
+        if self._matrix is not None:
+            with self._lock:
+                self._matrix.calibrate([
+                    data["encoding"] for _, data, _ in records
+                    if len(data.get("encoding", [])) == ENCODING_DIMENSIONS and data.get("mode") != "simulated"
+                ])
+
+        loaded = 0
+        for employee_id, data, version in records:
+            self._insert(employee_id, data, version)
+            loaded += 1
+
+        logger.info(f"📦 {loaded} encodings carregados em memória")
+        if self.model_version:
+            suffix = encoding_filename("", self.model_version)
+            migrated = sum(1 for _, _, (path, _) in records if path.endswith(suffix))
+            logger.info(f"🔀 Leitura dupla: {migrated} na versão {self.model_version}, {loaded - migrated} no arquivo original")
+        self.loaded = True
+        return loaded
+
+    def sync(self) -> int:
+        """
+        Alinha o cache com o diretório: encodings gravados, alterados ou
+        removidos por outros processos (workers do gunicorn, enrollment-worker,
+        bulk-enroll) desde o carregamento
+
+        Uma varredura do diretório (scandir, sem ler arquivos inalterados);
+        usada antes das buscas 1:N, que não passam pelo get() de cada funcionário.
+
+        Returns:
+            int: Quantidade de funcionários recarregados ou removidos do cache
+        """
+        if not os.path.exists(self.storage_path):
+            return 0
+        files: Dict[str, int] = {}
+        ids = set()
+        with os.scandir(self.storage_path) as entries:
+            for entry in entries:
+                employee_id = employee_id_from_filename(entry.name)
+                if employee_id is None and self.model_version:
+                    employee_id = employee_id_from_filename(entry.name, self.model_version)
+                if employee_id is None:
+                    continue
+                try:
+                    files[entry.path] = entry.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                ids.add(employee_id)
+
+        changed = 0
+        for employee_id in ids:
+            path = self.write_path(employee_id) if self.model_version else None
+            if path not in files:
+                path = os.path.join(self.storage_path, encoding_filename(employee_id))
+            if path not in files:
+                continue
+            version = (path, files[path])
+            with self._lock:
+                current = self._mtimes.get(employee_id) == version
+            if current:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    data = json.loads(f.read())
+                self._insert(employee_id, self._decode(data), version)
+                changed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Encoding ignorado na sincronização ({employee_id}): {e}")
+
+        with self._lock:
+            removed = [employee_id for employee_id in self._meta if employee_id not in ids]
+        for employee_id in removed:
+            self.remove(employee_id)
+        if changed or removed:
+            logger.debug(f"🔄 Cache de encodings sincronizado: {changed} atualizados, {len(removed)} removidos")
+        return changed + len(removed)
+
+    def get(self, employee_id: str) -> Optional[dict]:
+        """
+        Retorna os dados do encoding do funcionário
+
+        Args:
+            employee_id: ID do funcionário
+
+        Returns:
+            Optional[dict]: Dados do JSON com "encoding" como numpy array
+            (ou lista, no modo limitado), ou None se não cadastrado
+        """
+        path = self.encoding_path(employee_id)
+        try:
+            version = (path, os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            self.remove(employee_id)
+            return None
+
+        with self._lock:
+            cached = self._mtimes.get(employee_id) == version
+            if cached:
+                data = self._materialize(employee_id)
+                if data is None or "encoding" in data:
+                    return data
+
+        # Cache desatualizado ou matriz compacta: vetor exato vem do arquivo
+        with open(path, 'r') as f:
+            data = self._decode(json.loads(f.read()))
+        if not cached:
+            self._insert(employee_id, data, version)
+        return data
+
+    def search(self, query, k: int = 5, shortlist: Optional[int] = None, distance=None,
+               engine: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Funcionários mais próximos do encoding (1:N)
+
+        A varredura usa a matriz no dtype configurado e devolve `shortlist`
+        candidatos; estes são reordenados em float32 com os vetores exatos.
+
+        Args:
+            query: Encoding de consulta
+            k: Quantidade de resultados
+            shortlist: Candidatos da varredura aproximada (padrão: ENCODING_SEARCH_SHORTLIST)
+            distance: Função (encodings, referência) → distâncias; padrão euclidiana
+            engine: Considera só encodings deste motor (padrão: todos)
+
+        Returns:
+            List[Tuple[str, float]]: (employee_id, distância) do mais próximo ao mais distante
+        """
+        if np is None:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            if not self._rows:
+                return []
+            approx = self._matrix.squared_distances(query, self._size)
+            free = [row for row in self._free_rows if row < self._size]
+            approx[free] = np.inf
+            # Linhas de outros motores saem antes da lista curta (não ocupam as vagas)
+            if engine is not None:
+                code = self._engine_codes.get(engine)
+                if code is None:
+                    return []
+                approx[self._row_engines[:self._size] != code] = np.inf
+            valid = int(np.count_nonzero(np.isfinite(approx)))
+            if not valid:
+                return []
+            count = min(max(k, shortlist or self.shortlist), valid)
+            rows = np.argpartition(approx, count - 1)[:count] if count < self._size else np.arange(self._size)
+            rows = rows[np.isfinite(approx[rows])]
+            candidates = [self._row_ids[row] for row in rows[np.argsort(approx[rows])] if self._row_ids[row]]
+            exact = {eid: self._matrix.row(self._rows[eid]) for eid in candidates} if self._matrix.exact else {}
+
+        if not self._matrix.exact:
+            exact = self._read_exact(candidates)
+
+        vectors, ids = [], []
+        for employee_id in candidates:
+            vector = exact.get(employee_id)
+            if vector is not None and len(vector) == ENCODING_DIMENSIONS:
+                vectors.append(vector)
+                ids.append(employee_id)
+        if not ids:
+            return []
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if distance is not None:
+            distances = np.asarray(distance(vectors, query), dtype=np.float32)
+        else:
+            distances = np.linalg.norm(vectors - query, axis=1)
+        order = np.argsort(distances)[:k]
+        return [(ids[i], float(distances[i])) for i in order]
+
+    def _read_exact(self, employee_ids: List[str]) -> Dict[str, "np.ndarray"]:
+        """
+        Vetores exatos da lista curta lidos dos arquivos num único lote paralelo
+
+        Não altera o cache: a reordenação só precisa do vetor em float32.
+        """
+        def read(employee_id):
+            try:
+                data = self._read_raw(employee_id)
+                if data is None or data.get("mode") == "simulated":
+                    return employee_id, None
+                return employee_id, unpack_encoding(data["encoding"])
+            except (OSError, ValueError, KeyError):
+                return employee_id, None
+
+        if len(employee_ids) <= 1:
+            return dict(map(read, employee_ids))
+        if self._read_pool is None:
+            self._read_pool = ThreadPoolExecutor(EXACT_READ_THREADS, thread_name_prefix="encoding-read")
+        return dict(self._read_pool.map(read, employee_ids))
+
+    async def save(self, employee_id: str, encoding_data: dict,
+                   only_if: Optional[Callable[[Optional[dict]], bool]] = None) -> Optional[str]:
+        """
+        Grava o encoding no disco (de forma atômica) e atualiza o cache
+
+        As gravações do mesmo funcionário neste processo são serializadas. Com
+        only_if, o arquivo atual é relido imediatamente antes do rename e a
+        gravação só acontece se only_if(dados atuais) for verdadeiro
+        (compare-and-swap contra recadastros de outros processos).
+
+        Args:
+            employee_id: ID do funcionário
+            encoding_data: Dados do encoding (lista de floats em "encoding")
+            only_if: Condição sobre o JSON atual (None se não existir) para gravar
+
+        Returns:
+            Optional[str]: Caminho do arquivo gravado, ou None se only_if recusou
+        """
+        path = self.write_path(employee_id)
+        stored = dict(encoding_data)
+        if self.model_version:
+            stored["model_version"] = self.model_version
+        if np is not None and self.disk_format != "list" and stored.get("mode") != "simulated":
+            stored["encoding"] = pack_encoding(stored["encoding"], self.disk_format)
+
+        lock, users = self._write_locks.get(employee_id, (asyncio.Lock(), 0))
+        self._write_locks[employee_id] = (lock, users + 1)
+        try:
+            async with lock:
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                async with aiofiles.open(tmp_path, 'w') as f:
+                    await f.write(json.dumps(stored, indent=2))
+                if only_if is not None and not only_if(self._read_raw(employee_id)):
+                    os.remove(tmp_path)
+                    return None
+                os.replace(tmp_path, path)
+                self._insert(employee_id, self._decode(stored), (path, os.stat(path).st_mtime_ns))
+        finally:
+            lock, users = self._write_locks[employee_id]
+            if users == 1:
+                del self._write_locks[employee_id]
+            else:
+                self._write_locks[employee_id] = (lock, users - 1)
+        return path
+
+    def _read_raw(self, employee_id: str) -> Optional[dict]:
+        """JSON atual do funcionário direto do disco (sem cache), ou None"""
+        try:
+            with open(self.encoding_path(employee_id), 'r') as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def remove(self, employee_id: str) -> None:
+        """Remove o funcionário do cache (não apaga arquivos)"""
+        with self._lock:
+            self._meta.pop(employee_id, None)
+            self._mtimes.pop(employee_id, None)
+            row = self._rows.pop(employee_id, None)
+            if row is not None:
+                self._release_row(row)
+
+    def stats(self) -> dict:
+        """Estatísticas do cache de encodings"""
+        with self._lock:
+            matrix_bytes = self._matrix.nbytes if self._matrix is not None else 0
+            return {
+                "cached_employees": len(self._meta),
+                "matrix_rows": len(self._rows),
+                "matrix_capacity": self._matrix.capacity if self._matrix is not None else 0,
+                "matrix_mb": round(matrix_bytes / (1024 * 1024), 2),
+                "matrix_dtype": self._matrix.dtype if self._matrix is not None else None,
+                "int8_clipped_rows": self._matrix.clipped_rows if self._matrix is not None else 0,
+                "int8_calibrated": self._matrix.calibrated if self._matrix is not None else None,
+                "disk_format": self.disk_format,
+                "model_version": self.model_version or None
+            }
+
+    def _decode(self, data: dict) -> dict:
+        """Encoding gravado em qualquer formato → numpy float64 (lista no modo limitado)"""
+        encoding = data.get("encoding")
+        if np is None or encoding is None or data.get("mode") == "simulated":
+            return data
+        data = dict(data)
+        data["encoding"] = unpack_encoding(encoding)
+        return data
+
+    def _insert(self, employee_id: str, data: dict, version: Tuple[str, int]) -> None:
+        meta = {key: value for key, value in data.items() if key != "encoding"}
+        encoding = data.get("encoding")
+        encoding = [] if encoding is None else encoding
+
+        with self._lock:
+            # Vetores reais vão para a matriz; simulados ficam nos metadados
+            if np is not None and len(encoding) == ENCODING_DIMENSIONS and meta.get("mode") != "simulated":
+                row = self._rows.get(employee_id)
+                if row is None:
+                    row = self._allocate_row()
+                    self._rows[employee_id] = row
+                    self._row_ids[row] = employee_id
+                self._matrix.set_row(row, encoding)
+                self._row_engines[row] = self._engine_code(meta.get("engine", "dlib"))
+            else:
+                row = self._rows.pop(employee_id, None)
+                if row is not None:
+                    self._release_row(row)
+                meta["encoding"] = list(encoding)
+
+            self._meta[employee_id] = meta
+            self._mtimes[employee_id] = version
+
+    def _engine_code(self, engine: str) -> int:
+        return self._engine_codes.setdefault(engine, len(self._engine_codes))
+
+    def _release_row(self, row: int) -> None:
+        self._row_ids[row] = None
+        self._free_rows.append(row)
+        self._matrix.release_row(row)
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+
+        capacity = self._matrix.capacity
+        if self._size >= capacity:
+            self._matrix.grow(max(64, capacity * 2))
+            row_engines = np.zeros(self._matrix.capacity, dtype=np.int16)
+            row_engines[:len(self._row_engines)] = self._row_engines
+            self._row_engines = row_engines
+
+        row = self._size
+        self._size += 1
+        self._row_ids.append(None)
+        return row
+
+    def _materialize(self, employee_id: str) -> Optional[dict]:
+        meta = self._meta.get(employee_id)
+        if meta is None:
+            return None
+
+        data = dict(meta)
+        row = self._rows.get(employee_id)
+        if row is not None and self._matrix.exact:
+            data["encoding"] = self._matrix.row(row)
+        return data
+
+
+# Instância global do store de encodings
+encoding_store = EncodingStore(
+    settings.STORAGE_PATH,
+    matrix_dtype=settings.ENCODING_MATRIX_DTYPE,
+    disk_format=settings.ENCODING_DISK_FORMAT,
+    shortlist=settings.ENCODING_SEARCH_SHORTLIST,
+    model_version=settings.ENCODING_MODEL_VERSION
+)
@@ -0,0 +1,317 @@
+# Cadastro assíncrono e refinamento de templates: fila SQLite consumida por workers em segundo plano
+import os
+import socket
+import asyncio
+import ipaddress
+import time
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from app.config import settings
+from app.services.encoding_store import encoding_store
+from utils.deadline import Deadline
+from utils.job_queue import JobQueue
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def _internal_address(address: str) -> bool:
+    """Endereço de rede interna: loopback, privado (RFC1918/ULA), link-local (ex.: 169.254.169.254) etc."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved
+            or ip.is_multicast or ip.is_unspecified)
+
+
+def validate_callback_url(url: str) -> None:
+    """
+    Valida a URL de callback informada pelo cliente (proteção contra SSRF)
+
+    Com JOB_CALLBACK_ALLOWED_HOSTS o host precisa estar na lista, e só hosts
+    listados podem apontar para a rede interna. Sem a lista, qualquer host
+    público é aceito: o nome é resolvido e endereços de loopback, privados e
+    link-local são recusados. Faz resolução DNS (bloqueante): no event loop,
+    chame via run_in_executor.
+
+    Raises:
+        ValueError: Se não for http(s), se o host não estiver em JOB_CALLBACK_ALLOWED_HOSTS
+            ou se resolver para a rede interna
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url deve ser uma URL http(s) completa")
+    host = parsed.hostname.lower()
+    allowed = {item.strip().lower() for item in settings.JOB_CALLBACK_ALLOWED_HOSTS.split(",") if item.strip()}
+    if allowed:
+        if host not in allowed:
+            raise ValueError(f"Host do callback_url não permitido: {parsed.hostname}")
+        return
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or None, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise ValueError(f"Host do callback_url não resolvido: {parsed.hostname}")
+    if any(_internal_address(address) for address in addresses):
+        raise ValueError(
+            f"Host do callback_url aponta para a rede interna: {parsed.hostname} "
+            "(inclua-o em JOB_CALLBACK_ALLOWED_HOSTS para permitir)"
+        )
+
+
+def job_view(job: dict) -> dict:
+    """Job da fila no formato de /api/v1/jobs/{job_id} (também enviado ao callback)"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "employee_id": job["employee_id"],
+        "status": job["status"],
+        "message": job.get("message"),
+        "attempts": job.get("attempts", 0),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "callback_url": job.get("callback_url"),
+        "callback_status": job.get("callback_status"),
+        "result": job.get("result")
+    }
+
+
+class EnrollmentJobRunner:
+    """
+    Workers que executam os cadastros enfileirados por /register-employee?background=true
+
+    A requisição do RH só valida o upload e grava o job; o processamento
+    (detecção, encoding, gravação) acontece aqui, com no máximo JOB_WORKERS
+    cadastros por processo, sem ocupar as requisições de batida de ponto.
+
+    Todos os processos leem o mesmo arquivo SQLite: qualquer um pode
+    consumir o job, e JOB_WORKERS=0 deixa o processo só enfileirando
+    (ex.: API de ponto + enrollment-worker.py dedicado).
+    
+    Tipos de job:
+    - register: cadastro completo (save_employee_photo)
+    - refine: segunda etapa do cadastro em dois níveis (refine_employee_template)
+    """
+
+    def __init__(self, queue: JobQueue):
+        self.queue = queue
+        self.service = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_purge = 0.0
+
+    def start(self, service, workers: Optional[int] = None) -> None:
+        """
+        Inicia os workers no event loop atual
+
+        Args:
+            service: Serviço facial (save_employee_photo / employee_has_photo)
+            workers: Quantidade de workers (padrão JOB_WORKERS)
+        """
+        self.service = service
+        self._wakeup = asyncio.Event()
+        workers = settings.JOB_WORKERS if workers is None else workers
+        for index in range(workers):
+            self._tasks.append(asyncio.create_task(self._worker(f"{os.getpid()}:{index}")))
+        if workers:
+            logger.info(f"🗃️ {workers} worker(s) de cadastro assíncrono iniciados (fila {self.queue.path})")
+
+    async def stop(self) -> None:
+        """Cancela os workers; jobs em execução voltam para a fila quando o lease vence"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Acorda os workers deste processo (job recém-enfileirado)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def submit(self, employee_id: str, image_bytes: bytes, profile: str,
+                     callback_url: Optional[str] = None) -> dict:
+        """
+        Enfileira um cadastro
+
+        Returns:
+            dict: Job no formato de job_view
+
+        Raises:
+            JobAlreadyPending: Se o funcionário já tem um cadastro na fila ou em execução
+        """
+        loop = asyncio.get_running_loop()
+        job_id = await loop.run_in_executor(
+            None,
+            lambda: self.queue.enqueue(
+                "register", image_bytes, employee_id=employee_id,
+                payload={"profile": profile}, callback_url=callback_url, unique=True
+            )
+        )
+        self.notify()
+        logger.info(f"🗃️ Cadastro do funcionário {employee_id} enfileirado: job {job_id}")
+        return await self.get(job_id)
+
+    async def schedule_refinement(self, employee_id: str, base_created_at: str) -> str:
+        """
+        Enfileira o refinamento do template rápido recém-gravado
+
+        Args:
+            employee_id: ID do funcionário
+            base_created_at: created_at do template rápido (detecta recadastro no meio do caminho)
+
+        Returns:
+            str: ID do job
+        """
+        loop = asyncio.get_running_loop()
+        job_id = await loop.run_in_executor(
+            None,
+            lambda: self.queue.enqueue("refine", employee_id=employee_id, payload={"base_created_at": base_created_at})
+        )
+        self.notify()
+        logger.info(f"🔬 Refinamento do template de {employee_id} enfileirado: job {job_id}")
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Estado do job no formato de job_view (None se não existir)"""
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(None, self.queue.get, job_id)
+        return job_view(job) if job else None
+
+    async def pending_for(self, employee_id: str) -> Optional[str]:
+        """ID do cadastro do funcionário ainda na fila ou em execução"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.queue.pending_for, employee_id, "register")
+
+    def pending_count(self, kind: Optional[str] = None) -> int:
+        return self.queue.pending_count(kind)
+
+    def stats(self) -> dict:
+        stats = self.queue.stats()
+        stats["workers_in_process"] = len(self._tasks)
+        return stats
+
+    async def _worker(self, name: str) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await self._purge_if_due()
+                job = await loop.run_in_executor(None, self.queue.claim, name)
+                if job is None:
+                    # Fila vazia: espera um job novo deste processo ou o próximo ciclo
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._execute(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro no worker de cadastro {name}: {e}")
+                await asyncio.sleep(settings.JOB_POLL_SECONDS)
+
+    async def _execute(self, job: dict) -> None:
+        employee_id = job["employee_id"]
+        logger.info(f"⚙️ Job {job['id']}: {job['kind']} do funcionário {employee_id} (tentativa {job['attempts']})")
+        handler = self._register if job["kind"] == "register" else self._refine
+        try:
+            success, message, result = await handler(job)
+        except Exception as e:
+            logger.error(f"❌ Job {job['id']} falhou: {e}")
+            success, message, result = False, "Erro interno ao processar o job", {}
+
+        loop = asyncio.get_running_loop()
+        owned = await loop.run_in_executor(
+            None, lambda: self.queue.finish(job["id"], job["worker"], success, message, result)
+        )
+        if not owned:
+            logger.warning(f"♻️ Job {job['id']} retomado por outro worker após o lease: resultado descartado")
+            return
+        logger.info(f"{'✅' if success else '❌'} Job {job['id']} concluído: {message}")
+
+        if job.get("callback_url"):
+            await self._send_callback(job["id"], job["callback_url"])
+
+    async def _register(self, job: dict):
+        employee_id = job["employee_id"]
+        if self.service.employee_has_photo(employee_id):
+            return False, f"Funcionário {employee_id} já possui foto registrada. Use o endpoint de atualização.", {}
+
+        start = time.perf_counter()
+        deadline = Deadline(settings.REGISTER_DEADLINE_SECONDS)
+        success, message = await self.service.save_employee_photo(
+            employee_id, job["image"], deadline, job["payload"].get("profile")
+        )
+        result = {"processing_ms": round((time.perf_counter() - start) * 1000, 1)}
+        if success:
+            result.update(
+                photo_path=f"{settings.STORAGE_PATH}/{employee_id}.jpg",
+                encoding_path=encoding_store.encoding_path(employee_id)
+            )
+        return success, message, result
+
+    async def _refine(self, job: dict):
+        if not hasattr(self.service, "refine_employee_template"):
+            return False, "Serviço facial sem suporte a refinamento de template", {}
+        return await self.service.refine_employee_template(job["employee_id"], job["payload"].get("base_created_at"))
+
+    async def _send_callback(self, job_id: str, url: str) -> None:
+        """POST com o estado final do job; tenta JOB_CALLBACK_RETRIES vezes com espera crescente"""
+        loop = asyncio.get_running_loop()
+        # Revalida no envio: o DNS do host pode ter mudado desde o enfileiramento
+        try:
+            await loop.run_in_executor(None, validate_callback_url, url)
+        except ValueError as e:
+            logger.warning(f"🚫 Callback do job {job_id} recusado: {e}")
+            await loop.run_in_executor(None, self.queue.set_callback_status, job_id, "refused")
+            return
+
+        if httpx is None:
+            logger.warning(f"⚠️ httpx não instalado: callback do job {job_id} não enviado")
+            await loop.run_in_executor(None, self.queue.set_callback_status, job_id, "skipped: httpx")
+            return
+
+        payload = await self.get(job_id)
+        status = "failed"
+        async with httpx.AsyncClient(timeout=settings.JOB_CALLBACK_TIMEOUT_SECONDS) as client:
+            for attempt in range(1, max(1, settings.JOB_CALLBACK_RETRIES) + 1):
+                try:
+                    response = await client.post(url, json=payload)
+                    if response.status_code < 300:
+                        status = "delivered"
+                        break
+                    status = f"failed: HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    status = f"failed: {type(e).__name__}"
+                logger.warning(f"⚠️ Callback do job {job_id} (tentativa {attempt}): {status}")
+                if attempt < settings.JOB_CALLBACK_RETRIES:
+                    await asyncio.sleep(2 ** (attempt - 1))
+
+        await loop.run_in_executor(None, self.queue.set_callback_status, job_id, status)
+        logger.info(f"📣 Callback do job {job_id}: {status}")
+
+    async def _purge_if_due(self) -> None:
+        # Jobs concluídos são apagados depois de JOB_RETENTION_HOURS (verificado a cada hora)
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        loop = asyncio.get_running_loop()
+        removed = await loop.run_in_executor(None, self.queue.purge, settings.JOB_RETENTION_HOURS * 3600)
+        if removed:
+            logger.info(f"🧹 {removed} jobs antigos removidos da fila")
+
+
+# Instância global da fila de cadastros
+enrollment_jobs = EnrollmentJobRunner(JobQueue(
+    settings.JOB_QUEUE_PATH,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS
+))
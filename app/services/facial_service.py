@@ -1,29 +1,72 @@
 # Serviço de reconhecimento facial
 import os
-from typing import Optional, Tuple
+import asyncio
+import time
+from typing import List, Optional, Tuple
 import aiofiles
 from loguru import logger
-import hashlib
 import json
 from datetime import datetime
 
 from app.config import settings
+from app.services.encoding_store import encoding_store
+from app.services.enrollment_jobs import enrollment_jobs
+from utils.warmup import get_process_report
+from utils.face_pipeline import (
+    FaceJob, StagedPipeline, run_inline, get_cancellation_stats,
+    configure_memory_limits, get_memory_stats,
+    configure_quality_gate, get_quality_stats,
+    configure_prefilter, get_prefilter_stats,
+    configure_detection_ladder, get_detection_stats,
+    configure_hint_validation, get_hint_stats
+)
+from utils.image_quality import QualityGate
+from utils.cascade_prefilter import CascadePrefilter
+from utils.detection_ladder import DetectionLadder, build_detection_ladder
+from utils.progressive_verify import ProgressiveVerifier, template_landmark_model
+from utils.face_profiles import get_profile
+from utils.face_selection import select_faces
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.singleflight import AsyncSingleFlight
+from utils.engines import create_engine, configure_engine, default_ort_threads, EngineUnavailable
 
-# Imports opcionais para reconhecimento facial
+# Motor facial escolhido por configuração (FACE_ENGINE: dlib, opencv, onnx ou mock);
+# sem as dependências, o motor simulado assume (modo limitado) pela mesma interface
 try:
-    import face_recognition
-    import cv2
     import numpy as np
-    FACIAL_RECOGNITION_AVAILABLE = True
-    logger.info("✅ Dependências de reconhecimento facial carregadas com sucesso")
-except ImportError as e:
+except ImportError:
+    np = None
+try:
+    import cv2  # noqa: F401 - decodificação no pipeline
+    if np is None:
+        raise ImportError("numpy não está instalado")
+    face_engine = create_engine(
+        settings.FACE_ENGINE,
+        yunet_model=settings.FACE_YUNET_MODEL,
+        sface_model=settings.FACE_SFACE_MODEL,
+        ort_recognizer_model=settings.FACE_ORT_RECOGNIZER_MODEL,
+        ort_threads=settings.FACE_ORT_THREADS or default_ort_threads(
+            settings.PIPELINE_DETECT_WORKERS + settings.PIPELINE_ENCODE_WORKERS
+        )
+    )
+    logger.info(f"✅ Motor de reconhecimento facial carregado: {face_engine.name}")
+except (ImportError, EngineUnavailable) as e:
     logger.warning(f"⚠️ Dependências de reconhecimento facial não disponíveis: {e}")
     logger.warning("📦 Para instalar: pip install face-recognition opencv-python-headless numpy")
-    FACIAL_RECOGNITION_AVAILABLE = False
-    # Criar objetos mock para evitar erros
-    face_recognition = None
-    cv2 = None
-    np = None
+    face_engine = create_engine("simulated")
+configure_engine(face_engine)
+FACIAL_RECOGNITION_AVAILABLE = not face_engine.simulated
+
+# Mensagens para as reprovações do filtro de qualidade
+QUALITY_MESSAGES = {
+    "too_dark": "Imagem muito escura. Tire a foto em um local bem iluminado.",
+    "overexposed": "Imagem muito clara ou estourada. Evite luz forte diretamente na câmera.",
+    "low_contrast": "Imagem com pouco contraste. Verifique a iluminação e a lente da câmera.",
+    "too_blurry": "Imagem desfocada. Mantenha a câmera parada e o rosto em foco."
+}
+
+# Modos da busca de cadastro duplicado (DUPLICATE_CHECK_MODE)
+DUPLICATE_CHECK_MODES = ("off", "flag", "reject")
 
 class FacialService:
     """
@@ -35,8 +78,8 @@ class FacialService:
     - Verificar identidade facial
     - Gerenciar armazenamento de dados faciais
     
-    Nota: Se as dependências de CV não estiverem disponíveis,
-    o serviço funcionará em modo básico (salvamento de imagens apenas)
+    Nota: Se as dependências de CV não estiverem disponíveis, o motor
+    simulado assume (modo limitado): mesmo fluxo, resultados fictícios
     """
     
     def __init__(self):
@@ -44,6 +87,7 @@ class FacialService:
         self.storage_path = settings.STORAGE_PATH
         self.temp_path = settings.TEMP_PATH
         self.facial_recognition_available = FACIAL_RECOGNITION_AVAILABLE
+        self.engine = face_engine
         
         # Configurar logger específico para o serviço facial
         logger.add(
@@ -54,18 +98,153 @@ class FacialService:
             format="{time:YYYY-MM-DD HH:mm:ss} | FACIAL | {level} | {message}"
         )
         
+        # Orçamento de memória das decodificações (por processo)
+        if self.facial_recognition_available:
+            configure_memory_limits(settings.MEMORY_BUDGET_MB, settings.MAX_DECODE_MEGAPIXELS)
+        
+        # Fotos borradas/escuras/estouradas são recusadas antes da detecção
+        if self.facial_recognition_available and settings.QUALITY_GATE_ENABLED:
+            configure_quality_gate(QualityGate(
+                min_sharpness=settings.QUALITY_MIN_SHARPNESS,
+                min_brightness=settings.QUALITY_MIN_BRIGHTNESS,
+                max_brightness=settings.QUALITY_MAX_BRIGHTNESS,
+                min_contrast=settings.QUALITY_MIN_CONTRAST,
+                max_clipped_fraction=settings.QUALITY_MAX_CLIPPED_FRACTION
+            ))
+        
+        # Pré-filtro cascade: imagens sem candidato a rosto não pagam o HOG
+        if self.facial_recognition_available and settings.CASCADE_PREFILTER_ENABLED:
+            configure_prefilter(CascadePrefilter(
+                cascade_path=settings.CASCADE_PREFILTER_PATH or None,
+                min_neighbors=settings.CASCADE_MIN_NEIGHBORS
+            ))
+        
+        # Escada de detecção da verificação (o registro mantém a detecção completa)
+        if self.facial_recognition_available and settings.DETECTION_ESCALATION_ENABLED:
+            configure_detection_ladder(DetectionLadder(build_detection_ladder(
+                fast_max_side=settings.DETECTION_FAST_MAX_SIDE,
+                cnn_fallback=settings.DETECTION_CNN_FALLBACK
+            )))
+        
+        # Perfis padrão e política de seleção (valor inválido na configuração falha já na inicialização)
+        get_profile(settings.VERIFY_PROFILE)
+        get_profile(settings.REGISTER_PROFILE)
+        get_profile(settings.TEMPLATE_FAST_PROFILE)
+        select_faces([], (0, 0), settings.FACE_SELECTION_POLICY)
+        if settings.DUPLICATE_CHECK_MODE not in DUPLICATE_CHECK_MODES:
+            raise ValueError(f"DUPLICATE_CHECK_MODE inválido: {settings.DUPLICATE_CHECK_MODE}. Use: {', '.join(DUPLICATE_CHECK_MODES)}")
+        
+        # Verificação em dois níveis: encoding caro só quando a distância fica perto da tolerância
+        self.progressive = None
+        if self.facial_recognition_available and settings.PROGRESSIVE_VERIFY_ENABLED:
+            self.progressive = ProgressiveVerifier(
+                margin=settings.VERIFY_AMBIGUOUS_MARGIN,
+                recheck_jitters=settings.VERIFY_RECHECK_JITTERS,
+                recheck_model=settings.VERIFY_RECHECK_MODEL
+            )
+        
+        # Dicas de caixa do cliente (detector no aparelho) substituem a detecção se passarem nos landmarks
+        configure_hint_validation(settings.FACE_HINTS_ENABLED and self.facial_recognition_available)
+        
+        # Pipeline decode → detect → encode (threads criadas no primeiro uso)
+        self.pipeline = None
+        if settings.PIPELINE_ENABLED:
+            self.pipeline = StagedPipeline(
+                decode_workers=settings.PIPELINE_DECODE_WORKERS,
+                detect_workers=settings.PIPELINE_DETECT_WORKERS,
+                encode_workers=settings.PIPELINE_ENCODE_WORKERS,
+                queue_size=settings.PIPELINE_QUEUE_SIZE
+            )
+        
+        # Atraso entre o cadastro rápido e o template refinado (neste processo)
+        self._refinements = {"refined": 0, "lag_s_total": 0.0, "lag_s_max": 0.0, "last_lag_s": None}
+        
+        # Busca de cadastro duplicado (neste processo)
+        self._duplicates = {"checked": 0, "flagged": 0, "rejected": 0}
+        
+        # Coalescência de requisições duplicadas (toque duplo, retries)
+        self._encoding_loads = AsyncSingleFlight("encoding_loads")
+        self._face_jobs = AsyncSingleFlight("face_jobs")
+        
         if not self.facial_recognition_available:
             logger.warning("🎭 Serviço facial iniciado em MODO LIMITADO (sem CV libs)")
         else:
             logger.info("🎯 Serviço facial iniciado com reconhecimento REAL")
+    
+    async def _load_encoding(self, employee_id: str) -> Optional[dict]:
+        """
+        Carrega o encoding do funcionário fora do event loop
+        
+        Verificações simultâneas do mesmo funcionário compartilham a mesma leitura.
+        """
+        loop = asyncio.get_running_loop()
+        return await self._encoding_loads.do(
+            employee_id,
+            lambda: loop.run_in_executor(None, encoding_store.get, employee_id)
+        )
+    
+    async def _run_face_job(self, job: FaceJob) -> FaceJob:
+        """
+        Executa decode → detect → encode fora do event loop
+        
+        Capturas idênticas em andamento (mesmo hash de conteúdo e parâmetros)
+        compartilham um único processamento: o job compartilhado é uma cópia
+        que roda até o deadline mais longo entre as requisições que esperam.
+        Cada requisição espera no máximo o próprio deadline; ao expirar, só o
+        job dela recebe reason "deadline_exceeded".
+        
+        Args:
+            job: Trabalho com os bytes da imagem e as restrições da requisição
+            
+        Returns:
+            FaceJob: Job preenchido (rgb, locations, encodings ou reason)
+        """
+        key = job.coalesce_key()
+        if key is None:
+            if job.deadline is None:
+                return await self._execute_face_job(job)
+            # Não esperar além do deadline; o pipeline aborta o job no próximo estágio
+            try:
+                return await asyncio.wait_for(self._execute_face_job(job), timeout=job.deadline.remaining())
+            except asyncio.TimeoutError:
+                job.reason = "deadline_exceeded"
+                return job
         
-    async def save_employee_photo(self, employee_id: str, image_bytes: bytes) -> Tuple[bool, str]:
+        try:
+            return await self._face_jobs.do_with_deadline(
+                key, lambda shared: self._execute_face_job(job.detached(shared)), job.deadline
+            )
+        except DeadlineExceeded:
+            job.reason = "deadline_exceeded"
+            return job
+    
+    async def _execute_face_job(self, job: FaceJob) -> FaceJob:
+        """
+        Usa o pipeline em estágios quando habilitado; caso contrário roda os
+        estágios em sequência no executor padrão.
+        """
+        if self.pipeline is not None:
+            return await asyncio.wrap_future(self.pipeline.submit(job))
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, run_inline, job)
+        
+    async def save_employee_photo(self, employee_id: str, image_bytes: bytes, deadline: Optional[Deadline] = None,
+                                  profile: Optional[str] = None, replace: bool = False) -> Tuple[bool, str]:
         """
         Salva a foto do funcionário e gera encoding facial
         
+        Nada é gravado antes de o rosto ser validado e o encoding gerado; foto e
+        encoding entram com arquivo temporário + os.replace. Com replace=True
+        (atualização de foto), o cadastro anterior só deixa de valer quando o
+        novo já está gravado: qualquer falha no caminho mantém o antigo.
+        
         Args:
             employee_id: ID único do funcionário
             image_bytes: Bytes da imagem
+            deadline: Deadline da requisição (opcional)
+            profile: Perfil fast/balanced/accurate (padrão REGISTER_PROFILE)
+            replace: Substitui um cadastro existente (remove versões antigas do encoding no fim)
             
         Returns:
             Tuple[bool, str]: (sucesso, mensagem)
@@ -73,185 +252,317 @@ class FacialService:
         try:
             logger.info(f"📷 Iniciando salvamento de foto para funcionário {employee_id}")
             
+            # Detectar e gerar o encoding uma única vez (validação e salvamento usam o mesmo job)
+            job = await self._run_face_job(
+                get_profile(profile, settings.REGISTER_PROFILE).job(
+                    image_bytes=image_bytes, max_faces=1, min_face_size=50, deadline=deadline
+                )
+            )
+            
             # Validar se a imagem contém um rosto válido
-            is_valid, validation_message = await self._validate_face_image(image_bytes)
+            is_valid, validation_message = await self._validate_face_image(image_bytes, job)
             if not is_valid:
                 logger.warning(f"⚠️ Imagem inválida para funcionário {employee_id}: {validation_message}")
                 return False, validation_message
             
-            # Caminhos para salvar a foto e encoding
+            # Mesmo rosto já cadastrado com outro ID
+            duplicates = []
+            if job.encodings and settings.DUPLICATE_CHECK_MODE != "off":
+                duplicates = await self._find_duplicates(employee_id, job.encodings[0])
+                if duplicates and settings.DUPLICATE_CHECK_MODE == "reject":
+                    self._duplicates["rejected"] += 1
+                    closest = duplicates[0]
+                    return False, (f"Rosto já cadastrado para o funcionário {closest['employee_id']} "
+                                   f"(distância {closest['distance']:.3f}). Cadastro duplicado recusado.")
+            
+            # Foto nova num temporário: a anterior (atualização) continua valendo até o fim
             photo_path = os.path.join(self.storage_path, f"{employee_id}.jpg")
-            encoding_path = os.path.join(self.storage_path, f"{employee_id}_encoding.json")
-            
-            # Salvar a imagem original
-            async with aiofiles.open(photo_path, 'wb') as f:
+            tmp_photo_path = f"{photo_path}.{os.getpid()}.tmp"
+            async with aiofiles.open(tmp_photo_path, 'wb') as f:
                 await f.write(image_bytes)
             
-            # Gerar e salvar o encoding facial
-            success, encoding_message = await self._generate_and_save_encoding(employee_id, image_bytes)
-            
-            if success:
-                logger.info(f"✅ Foto e encoding salvos com sucesso para funcionário {employee_id}")
-                return True, f"Foto do funcionário {employee_id} registrada com sucesso"
-            else:
-                # Remover foto se não conseguiu gerar encoding
-                if os.path.exists(photo_path):
-                    os.remove(photo_path)
-                    logger.info(f"🗑️ Foto removida devido a falha no encoding: {employee_id}")
+            # Gerar e salvar o encoding facial (gravação atômica no encoding_store)
+            try:
+                success, encoding_message, encoding_data = await self._generate_and_save_encoding(
+                    employee_id, image_bytes, job, duplicates
+                )
+            except BaseException:
+                os.remove(tmp_photo_path)
+                raise
+            if not success:
+                os.remove(tmp_photo_path)
+                logger.info(f"🗑️ Foto nova descartada devido a falha no encoding: {employee_id}")
                 return False, encoding_message
+            os.replace(tmp_photo_path, photo_path)
+            
+            # Atualização: versões antigas do encoding (outro modelo/migração) descrevem a foto anterior
+            if replace:
+                current = encoding_store.write_path(employee_id)
+                for path in encoding_store.all_paths(employee_id):
+                    if path != current:
+                        os.remove(path)
+                        logger.info(f"🗑️ Encoding anterior removido: {os.path.basename(path)}")
+            
+            # Cadastro em dois níveis: o refinamento só é agendado com a foto nova no lugar
+            if encoding_data["template"] == "fast":
+                try:
+                    await enrollment_jobs.schedule_refinement(employee_id, encoding_data["created_at"])
+                except Exception as e:
+                    logger.warning(f"⚠️ Refinamento do template de {employee_id} não agendado: {e}")
+            
+            logger.info(f"✅ Foto e encoding salvos com sucesso para funcionário {employee_id}")
+            if duplicates:
+                similar = ", ".join(d["employee_id"] for d in duplicates)
+                return True, (f"Foto do funcionário {employee_id} registrada com sucesso "
+                              f"(atenção: rosto parecido com o(s) funcionário(s) {similar})")
+            return True, f"Foto do funcionário {employee_id} registrada com sucesso"
                 
         except Exception as e:
             logger.error(f"❌ Erro crítico ao salvar foto do funcionário {employee_id}: {e}")
             return False, f"Erro interno ao processar imagem: {str(e)}"
     
-    async def _validate_face_image(self, image_bytes: bytes) -> Tuple[bool, str]:
+    async def _validate_face_image(self, image_bytes: bytes, job: Optional[FaceJob] = None) -> Tuple[bool, str]:
         """
         Valida se a imagem contém exatamente um rosto detectável
         
         Args:
             image_bytes: Bytes da imagem
+            job: Resultado do pipeline já executado (opcional)
             
         Returns:
             Tuple[bool, str]: (é_válida, mensagem)
         """
         try:
-            # Se não temos bibliotecas CV, fazer validação básica
-            if not self.facial_recognition_available:
-                # Validação básica de tamanho e formato
-                if len(image_bytes) < 1000:
-                    return False, "Arquivo muito pequeno. Certifique-se de enviar uma imagem válida."
-                if len(image_bytes) > settings.MAX_FILE_SIZE:
-                    return False, f"Arquivo muito grande. Máximo: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
-                
-                # Tentar verificar se é uma imagem válida (headers básicos)
-                image_headers = {
-                    b'\xff\xd8\xff': 'jpg',
-                    b'\x89PNG\r\n\x1a\n': 'png',
-                    b'RIFF': 'webp'
-                }
-                
-                is_valid_image = any(image_bytes.startswith(header) for header in image_headers.keys())
-                if not is_valid_image:
-                    return False, "Formato de imagem não reconhecido. Use JPG, PNG ou WEBP."
-                
-                logger.info("✅ Validação básica da imagem aprovada (modo limitado)")
-                return True, "Imagem válida (validação básica - reconhecimento facial não disponível)"
+            if job is None:
+                job = await self._run_face_job(
+                    FaceJob(image_bytes=image_bytes, max_faces=1, min_face_size=50)
+                )
             
-            # Validação completa com reconhecimento facial
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None:
+            if job.reason == "invalid_image":
                 return False, "Não foi possível decodificar a imagem"
             
-            # Converter para RGB (necessário para face_recognition)
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            if job.reason == "image_too_large":
+                return False, "Resolução da imagem muito alta para processamento. Envie uma foto menor."
             
-            # Detectar rostos na imagem
-            face_locations = face_recognition.face_locations(rgb_image)
+            if job.reason in QUALITY_MESSAGES:
+                return False, QUALITY_MESSAGES[job.reason]
             
-            if len(face_locations) == 0:
+            if job.reason == "no_face":
                 return False, "Nenhum rosto foi detectado na imagem. Certifique-se de que há um rosto claro e bem iluminado."
             
-            if len(face_locations) > 1:
-                return False, f"Múltiplos rostos detectados ({len(face_locations)}). A imagem deve conter apenas um rosto."
-            
-            # Verificar qualidade do rosto detectado
-            top, right, bottom, left = face_locations[0]
-            face_width = right - left
-            face_height = bottom - top
+            if job.reason == "multiple_faces":
+                return False, f"Múltiplos rostos detectados ({len(job.locations)}). A imagem deve conter apenas um rosto."
             
             # Verificar se o rosto não é muito pequeno
-            if face_width < 50 or face_height < 50:
+            if job.reason == "face_too_small":
                 return False, "O rosto detectado é muito pequeno. Use uma imagem com rosto maior e mais próximo."
             
+            if job.reason == "deadline_exceeded":
+                return False, "Tempo limite da requisição excedido antes do processamento da imagem."
+            
+            if job.reason == "error":
+                return False, f"Erro ao validar imagem: {job.metadata.get('error')}"
+            
+            # Falhas de encoding são reportadas por _generate_and_save_encoding
             return True, "Imagem válida com um rosto detectado"
             
         except Exception as e:
             logger.error(f"❌ Erro na validação da imagem: {e}")
             return False, f"Erro ao validar imagem: {str(e)}"
     
-    async def _generate_and_save_encoding(self, employee_id: str, image_bytes: bytes) -> Tuple[bool, str]:
+    async def _find_duplicates(self, employee_id: str, encoding) -> List[dict]:
+        """
+        Funcionários já cadastrados com rosto a até DUPLICATE_MAX_DISTANCE do encoding novo
+        
+        Busca 1:N vetorizada na matriz do encoding_store (só encodings do
+        motor atual); o próprio funcionário é ignorado. O store é sincronizado
+        com o diretório antes, para incluir cadastros feitos por outros processos.
+        
+        Args:
+            employee_id: ID do funcionário sendo cadastrado
+            encoding: Encoding novo
+            
+        Returns:
+            List[dict]: {"employee_id", "distance"} do mais próximo ao mais distante
+        """
+        max_distance = settings.DUPLICATE_MAX_DISTANCE or self.tolerance
+        loop = asyncio.get_running_loop()
+        
+        def search():
+            encoding_store.sync()
+            return encoding_store.search(
+                encoding, k=settings.DUPLICATE_CHECK_CANDIDATES + 1,
+                distance=self.engine.distance, engine=self.engine.name
+            )
+        
+        matches = await loop.run_in_executor(None, search)
+        self._duplicates["checked"] += 1
+        duplicates = [
+            {"employee_id": other, "distance": round(distance, 4)}
+            for other, distance in matches if other != employee_id and distance <= max_distance
+        ][:settings.DUPLICATE_CHECK_CANDIDATES]
+        if duplicates:
+            self._duplicates["flagged"] += 1
+            logger.warning(
+                f"👥 Possível cadastro duplicado: {employee_id} parecido com "
+                + ", ".join(f"{d['employee_id']} ({d['distance']:.3f})" for d in duplicates)
+            )
+        return duplicates
+    
+    async def _generate_and_save_encoding(self, employee_id: str, image_bytes: bytes, job: Optional[FaceJob] = None,
+                                          duplicates: Optional[List[dict]] = None) -> Tuple[bool, str, Optional[dict]]:
         """
         Gera encoding facial e salva como arquivo JSON
         
         Args:
             employee_id: ID do funcionário
             image_bytes: Bytes da imagem
+            job: Resultado do pipeline já executado (opcional)
+            duplicates: Funcionários parecidos encontrados no cadastro (gravados para auditoria)
             
         Returns:
-            Tuple[bool, str]: (sucesso, mensagem)
+            Tuple[bool, str, Optional[dict]]: (sucesso, mensagem, dados gravados)
         """
         try:
-            # Se não temos bibliotecas CV, criar encoding simulado
-            if not self.facial_recognition_available:
-                logger.warning(f"⚠️ Gerando encoding simulado para funcionário {employee_id} (modo limitado)")
-                
-                # Criar hash único baseado na imagem para simulação
-                image_hash = hashlib.md5(image_bytes).hexdigest()
-                
-                encoding_data = {
-                    "employee_id": employee_id,
-                    "encoding": [float(int(c, 16) / 255.0) for c in image_hash[:128]],  # Encoding simulado baseado no hash
-                    "face_location": [50, 100, 150, 200],  # Localização simulada
-                    "created_at": datetime.now().isoformat(),
-                    "tolerance": self.tolerance,
-                    "version": "1.0-LIMITED",
-                    "mode": "simulated",
-                    "note": "Encoding simulado - instale face_recognition para reconhecimento real"
-                }
-                
-                encoding_path = os.path.join(self.storage_path, f"{employee_id}_encoding.json")
-                async with aiofiles.open(encoding_path, 'w') as f:
-                    await f.write(json.dumps(encoding_data, indent=2))
-                
-                logger.info(f"💾 Encoding simulado salvo: {encoding_path}")
-                return True, "Encoding simulado gerado (modo limitado - instale dependências para reconhecimento real)"
-            
-            # Processamento completo com reconhecimento facial
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            if job is None:
+                job = await self._run_face_job(FaceJob(image_bytes=image_bytes))
             
-            # Encontrar localizações dos rostos
-            face_locations = face_recognition.face_locations(rgb_image)
+            if not job.encodings:
+                return False, "Não foi possível gerar encoding facial. Tente uma imagem com melhor qualidade.", None
             
-            # Gerar encodings faciais
-            face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
-            
-            if not face_encodings:
-                return False, "Não foi possível gerar encoding facial. Tente uma imagem com melhor qualidade."
+            # Cadastro em dois níveis: só templates abaixo do perfil accurate vão para o refinamento
+            profile = job.metadata.get("profile")
+            refine = settings.TEMPLATE_REFINE_ENABLED and profile != "accurate" and not self.engine.simulated
             
             # Preparar dados do encoding para salvar
             encoding_data = {
                 "employee_id": employee_id,
-                "encoding": face_encodings[0].tolist(),  # Converter numpy array para lista
-                "face_location": face_locations[0],      # Localização do rosto na imagem
+                "encoding": [float(v) for v in job.encodings[0]],  # numpy array (ou lista, motor simulado) → lista
+                "face_location": list(job.locations[0]),           # Localização do rosto na imagem
                 "created_at": datetime.now().isoformat(),
                 "tolerance": self.tolerance,
                 "version": "1.0",
-                "mode": "real"
+                "mode": "simulated" if self.engine.simulated else "real",
+                "profile": profile,  # Perfil efetivamente usado no cadastro
+                "landmark_model": job.landmark_model,  # A reavaliação da verificação usa o mesmo modelo
+                "engine": self.engine.name,  # Encodings de motores diferentes não são comparáveis
+                "template": "fast" if refine else "standard",
+                "template_version": 1,
+                "decode_scale": job.metadata.get("decode_scale", 1)  # face_location está nessa escala
             }
+            if duplicates:
+                encoding_data["duplicate_candidates"] = duplicates
             
-            # Salvar encoding como arquivo JSON
-            encoding_path = os.path.join(self.storage_path, f"{employee_id}_encoding.json")
-            async with aiofiles.open(encoding_path, 'w') as f:
-                await f.write(json.dumps(encoding_data, indent=2))
+            # Salvar encoding como arquivo JSON (e atualizar o cache em memória)
+            encoding_path = await encoding_store.save(employee_id, encoding_data)
             
-            logger.info(f"💾 Encoding facial real salvo: {encoding_path}")
-            return True, "Encoding facial gerado com sucesso"
+            logger.info(f"💾 Encoding facial salvo ({encoding_data['mode']}, motor {self.engine.name}): {encoding_path}")
+            return True, "Encoding facial gerado com sucesso", encoding_data
             
         except Exception as e:
             logger.error(f"❌ Erro ao gerar encoding para funcionário {employee_id}: {e}")
-            return False, f"Erro ao gerar encoding facial: {str(e)}"
+            return False, f"Erro ao gerar encoding facial: {str(e)}", None
     
-    async def verify_face(self, employee_id: str, image_bytes: bytes) -> Tuple[bool, float, str]:
+    async def refine_employee_template(self, employee_id: str, base_created_at: Optional[str] = None) -> Tuple[bool, str, dict]:
+        """
+        Recalcula o template do funcionário a partir da foto guardada (segunda etapa do cadastro)
+        
+        Resolução cheia, recorte ampliado do rosto, 68 landmarks e
+        TEMPLATE_REFINE_JITTERS jitters. O encoding novo substitui o rápido de
+        forma atômica (arquivo temporário + rename no encoding_store), e só se
+        o arquivo ainda contém o template rápido de origem no momento da troca.
+        
+        Args:
+            employee_id: ID do funcionário
+            base_created_at: created_at do template rápido que originou o job; se
+                o funcionário foi recadastrado depois, o refinamento é descartado
+            
+        Returns:
+            Tuple[bool, str, dict]: (sucesso, mensagem, detalhes)
+        """
+        from utils.template_refinement import build_refinement_job
+        
+        if self.engine.simulated:
+            return False, "Refinamento requer o reconhecimento facial disponível", {}
+        
+        def superseded(data):
+            return data is None or data.get("created_at") != base_created_at or data.get("template") == "refined"
+        
+        current = await self._load_encoding(employee_id)
+        photo_path = os.path.join(self.storage_path, f"{employee_id}.jpg")
+        if superseded(current) or not os.path.exists(photo_path):
+            return True, "Template substituído ou removido antes do refinamento; nada a fazer", {"superseded": True}
+        if current.get("engine", "dlib") != self.engine.name:
+            return False, f"Template gerado com o motor {current.get('engine', 'dlib')}, processo usa {self.engine.name}", {}
+        
+        async with aiofiles.open(photo_path, 'rb') as f:
+            image_bytes = await f.read()
+        
+        # Fora do pipeline: muitos jitters no estágio de encode atrasariam as verificações da fila
+        def refine():
+            job = build_refinement_job(
+                image_bytes, current["face_location"], current.get("decode_scale", 1),
+                num_jitters=settings.TEMPLATE_REFINE_JITTERS,
+                margin=settings.TEMPLATE_REFINE_MARGIN,
+                face_size=settings.TEMPLATE_REFINE_FACE_SIZE
+            )
+            return run_inline(job) if job is not None else None
+        
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(None, refine)
+        if job is None or not job.encodings:
+            return False, f"Não foi possível refinar o template: {job.reason if job else 'invalid_image'}", {}
+        
+        # Recadastro durante o cálculo: o template novo prevalece
+        current = await self._load_encoding(employee_id)
+        if superseded(current):
+            return True, "Template substituído durante o refinamento; resultado descartado", {"superseded": True}
+        
+        refined_at = datetime.now()
+        lag = (refined_at - datetime.fromisoformat(current["created_at"])).total_seconds()
+        refined = {key: value for key, value in current.items() if key != "encoding"}
+        refined.update(
+            encoding=job.encodings[0].tolist(),
+            template="refined",
+            template_version=current.get("template_version", 1) + 1,
+            refined_at=refined_at.isoformat(),
+            refinement_lag_s=round(lag, 2),
+            refine_jitters=settings.TEMPLATE_REFINE_JITTERS,
+            refine_landmarks="large",
+            landmark_model="large"
+        )
+        # Compare-and-swap: um recadastro gravado desde a leitura acima não é sobrescrito
+        if await encoding_store.save(employee_id, refined, only_if=lambda data: not superseded(data)) is None:
+            return True, "Template substituído durante o refinamento; resultado descartado", {"superseded": True}
+        
+        drift = float(np.linalg.norm(np.asarray(current["encoding"]) - job.encodings[0]))
+        self._refinements["refined"] += 1
+        self._refinements["lag_s_total"] += lag
+        self._refinements["lag_s_max"] = max(self._refinements["lag_s_max"], lag)
+        self._refinements["last_lag_s"] = round(lag, 2)
+        logger.info(f"🔬 Template de {employee_id} refinado (v{refined['template_version']}, atraso {lag:.1f}s, "
+                    f"distância do rápido {drift:.3f})")
+        return True, "Template refinado com sucesso", {
+            "template_version": refined["template_version"],
+            "refinement_lag_s": refined["refinement_lag_s"],
+            "distance_from_fast": round(drift, 4),
+            "processing_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+    
+    async def verify_face(self, employee_id: str, image_bytes: bytes, deadline: Optional[Deadline] = None,
+                          profile: Optional[str] = None, details: Optional[dict] = None,
+                          face_hint: Optional[tuple] = None) -> Tuple[bool, float, str]:
         """
         Verifica se o rosto na imagem pertence ao funcionário especificado
         
         Args:
             employee_id: ID do funcionário para verificar
             image_bytes: Bytes da imagem para verificação
+            deadline: Deadline da requisição; expirado, retorna "deadline_exceeded"
+            profile: Perfil fast/balanced/accurate (padrão VERIFY_PROFILE)
+            details: Preenchido com os rostos detectados/codificados (opcional)
+            face_hint: Caixa (top, right, bottom, left) detectada no aparelho (opcional)
             
         Returns:
             Tuple[bool, float, str]: (é_mesmo_funcionário, similaridade, confiança)
@@ -259,69 +570,71 @@ class FacialService:
         try:
             logger.info(f"🔍 Iniciando verificação facial para funcionário {employee_id}")
             
-            # Verificar se existe encoding salvo para o funcionário
-            encoding_path = os.path.join(self.storage_path, f"{employee_id}_encoding.json")
+            # Carregar encoding conhecido do funcionário (cache em memória)
+            encoding_data = await self._load_encoding(employee_id)
             
-            if not os.path.exists(encoding_path):
+            if encoding_data is None:
                 logger.warning(f"⚠️ Encoding não encontrado para funcionário {employee_id}")
                 return False, 0.0, "not_registered"
             
-            # Carregar encoding conhecido do funcionário
-            async with aiofiles.open(encoding_path, 'r') as f:
-                content = await f.read()
-                encoding_data = json.loads(content)
-                known_encoding = encoding_data["encoding"]
-                is_simulated = encoding_data.get("mode") == "simulated"
-            
-            # Se não temos bibliotecas CV ou é encoding simulado, fazer verificação simulada
-            if not self.facial_recognition_available or is_simulated:
-                logger.warning(f"⚠️ Verificação simulada para funcionário {employee_id} (modo limitado)")
-                
-                # Validação básica da imagem
-                if len(image_bytes) < 1000:
-                    return False, 0.0, "invalid_image"
-                
-                # Simular verificação baseada em hash
-                image_hash = hashlib.md5(image_bytes).hexdigest()
-                stored_hash = hashlib.md5(str(known_encoding).encode()).hexdigest()
-                
-                # Simular similaridade baseada na diferença de hash
-                similarity = 0.85 if image_hash == stored_hash else 0.75
-                is_match = similarity >= (self.tolerance * 0.8)  # Tolerância mais baixa para simulação
-                confidence = "medium" if is_match else "low"
-                
-                logger.info(f"🎯 [SIMULADO] Funcionário {employee_id}: Match={is_match}, Similaridade={similarity:.2%}")
-                return is_match, similarity, confidence
-            
-            # Processamento completo com reconhecimento facial
-            known_encoding_array = np.array(known_encoding)
-            
-            # Processar imagem de verificação
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            unknown_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if unknown_image is None:
-                return False, 0.0, "invalid_image"
-            
-            rgb_image = cv2.cvtColor(unknown_image, cv2.COLOR_BGR2RGB)
-            
-            # Encontrar rostos na imagem de verificação
-            face_locations = face_recognition.face_locations(rgb_image)
-            
-            if not face_locations:
+            known_encoding = encoding_data["encoding"]
+            
+            # Encodings antigos (sem o campo) foram gerados pelo dlib, ou pelo modo limitado se simulados
+            stored_engine = encoding_data.get("engine", "simulated" if encoding_data.get("mode") == "simulated" else "dlib")
+            if stored_engine != self.engine.name:
+                logger.warning(
+                    f"⚠️ Encoding do funcionário {employee_id} gerado pelo motor {stored_engine}, "
+                    f"incompatível com o motor atual {self.engine.name}"
+                )
+                return False, 0.0, "engine_mismatch"
+            
+            # Processar imagem de verificação (decode → detect → encode); o encoding usa o
+            # mesmo modelo de landmarks do template, para comparar vetores do mesmo espaço
+            face_profile = get_profile(profile, settings.VERIFY_PROFILE)
+            landmark_model = template_landmark_model(encoding_data)
+            job = await self._run_face_job(face_profile.job(
+                image_bytes=image_bytes,
+                deadline=deadline,
+                landmark_model=landmark_model,
+                face_selection=settings.FACE_SELECTION_POLICY,
+                encode_limit=settings.FACE_SELECTION_LIMIT,
+                face_hint=face_hint
+            ))
+            if details is not None:
+                details.update(
+                    faces_detected=job.metadata.get("faces_detected", 0),
+                    faces_encoded=job.metadata.get("faces_encoded", 0),
+                    selection=job.metadata.get("face_selection"),
+                    hint=job.metadata.get("face_hint")
+                )
+            
+            if job.reason == "deadline_exceeded":
+                logger.info(f"⏳ Verificação do funcionário {employee_id} abortada: deadline excedido")
+                return False, 0.0, "deadline_exceeded"
+            
+            if job.reason == "no_face":
                 logger.info(f"ℹ️ Nenhum rosto encontrado na verificação para funcionário {employee_id}")
                 return False, 0.0, "no_face"
             
-            # Gerar encodings dos rostos encontrados
-            unknown_encodings = face_recognition.face_encodings(rgb_image, face_locations)
-            
-            if not unknown_encodings:
+            if job.reason == "encoding_failed":
                 logger.info(f"ℹ️ Não foi possível gerar encoding da imagem de verificação para funcionário {employee_id}")
                 return False, 0.0, "encoding_failed"
             
-            # Calcular distância entre os encodings (menor distância = maior similaridade)
-            distances = face_recognition.face_distance([known_encoding_array], unknown_encodings[0])
-            distance = distances[0]
+            if job.failed:
+                return False, 0.0, job.reason
+            
+            # Calcular distância entre os encodings (menor distância = maior similaridade);
+            # com top-N selecionados vale o rosto mais parecido
+            distances = self.engine.distance(job.encodings, known_encoding)
+            best = min(range(len(distances)), key=lambda i: distances[i])
+            distance = distances[best]
+            if details is not None:
+                details["face_location"] = list(job.locations[best])
+            
+            # Perto da tolerância: recodificar com mais jitters antes de decidir
+            if self.progressive is not None and face_profile.progressive:
+                distance = await self._recheck_ambiguous(employee_id, job, known_encoding, distance, deadline, best,
+                                                         landmark_model)
             
             # Converter distância em porcentagem de similaridade
             similarity = max(0, 1 - distance)  # Garantir que não seja negativo
@@ -340,7 +653,7 @@ class FacialService:
             logger.info(
                 f"🎯 Verificação facial funcionário {employee_id}: "
                 f"Match={is_match}, Similaridade={similarity:.2%}, "
-                f"Distância={distance:.3f}, Confiança={confidence}"
+                f"Distância={distance:.3f}, Confiança={confidence}, Perfil={face_profile.name}"
             )
             
             return is_match, similarity, confidence
@@ -349,6 +662,46 @@ class FacialService:
             logger.error(f"❌ Erro crítico na verificação facial do funcionário {employee_id}: {e}")
             return False, 0.0, "error"
     
+    async def _recheck_ambiguous(self, employee_id: str, job: FaceJob, known_encoding, distance: float,
+                                 deadline: Optional[Deadline] = None, face_index: int = 0,
+                                 landmark_model: str = "small") -> float:
+        """
+        Recodifica a captura quando a distância barata está na faixa ambígua
+        
+        Reaproveita as caixas do job barato e usa o modelo de landmarks do
+        template gravado (só os jitters mudam). Se o deadline expirar ou a
+        reavaliação falhar, mantém a distância barata.
+        
+        Returns:
+            float: Distância usada na decisão
+        """
+        if not self.progressive.is_ambiguous(distance, self.tolerance):
+            self.progressive.record(ambiguous=False)
+            return distance
+        
+        if deadline is not None and deadline.expired():
+            self.progressive.record(ambiguous=True)
+            return distance
+        
+        start = time.perf_counter()
+        recheck = await self._run_face_job(self.progressive.recheck_job(
+            job, deadline, face_index=face_index, landmark_model=landmark_model
+        ))
+        elapsed = time.perf_counter() - start
+        if recheck.failed:
+            logger.info(f"ℹ️ Reavaliação do funcionário {employee_id} não concluída ({recheck.reason}); mantendo distância barata")
+            self.progressive.record(ambiguous=True)
+            return distance
+        
+        refined = self.engine.distance([recheck.encodings[0]], known_encoding)[0]
+        flipped = (refined <= self.tolerance) != (distance <= self.tolerance)
+        self.progressive.record(ambiguous=True, rechecked=True, flipped=flipped, seconds=elapsed)
+        logger.info(
+            f"🎚️ Reavaliação do funcionário {employee_id}: distância {distance:.3f} → {refined:.3f} "
+            f"({elapsed * 1000:.0f}ms{', decisão alterada' if flipped else ''})"
+        )
+        return refined
+    
     def employee_has_photo(self, employee_id: str) -> bool:
         """
         Verifica se o funcionário possui foto e encoding cadastrados
@@ -360,7 +713,7 @@ class FacialService:
             bool: True se possui foto e encoding
         """
         photo_path = os.path.join(self.storage_path, f"{employee_id}.jpg")
-        encoding_path = os.path.join(self.storage_path, f"{employee_id}_encoding.json")
+        encoding_path = encoding_store.encoding_path(employee_id)  # Versão nova ou original
         
         has_both = os.path.exists(photo_path) and os.path.exists(encoding_path)
         
@@ -383,7 +736,6 @@ class FacialService:
         """
         try:
             photo_path = os.path.join(self.storage_path, f"{employee_id}.jpg")
-            encoding_path = os.path.join(self.storage_path, f"{employee_id}_encoding.json")
             
             removed_files = []
             
@@ -391,9 +743,11 @@ class FacialService:
                 os.remove(photo_path)
                 removed_files.append("foto")
             
-            if os.path.exists(encoding_path):
+            # Original e versões gravadas por migrações
+            for encoding_path in encoding_store.all_paths(employee_id):
                 os.remove(encoding_path)
-                removed_files.append("encoding")
+                removed_files.append(os.path.basename(encoding_path))
+            encoding_store.remove(employee_id)
             
             if removed_files:
                 logger.info(f"🗑️ Dados removidos para funcionário {employee_id}: {', '.join(removed_files)}")
@@ -406,6 +760,19 @@ class FacialService:
             logger.error(f"❌ Erro ao remover dados do funcionário {employee_id}: {e}")
             return False
     
+    def _template_stats(self, templates: dict) -> dict:
+        """Templates por tipo (fast, refined, standard) e atraso do refinamento neste processo"""
+        refined = self._refinements["refined"]
+        return {
+            "refine_enabled": settings.TEMPLATE_REFINE_ENABLED,
+            "by_type": templates,
+            "pending_refinements": enrollment_jobs.pending_count("refine"),
+            "refined_in_process": refined,
+            "refinement_lag_s_avg": round(self._refinements["lag_s_total"] / refined, 2) if refined else None,
+            "refinement_lag_s_max": round(self._refinements["lag_s_max"], 2),
+            "last_refinement_lag_s": self._refinements["last_lag_s"]
+        }
+    
     def get_statistics(self) -> dict:
         """
         Retorna estatísticas do sistema de reconhecimento facial
@@ -418,12 +785,13 @@ class FacialService:
             files = os.listdir(self.storage_path) if os.path.exists(self.storage_path) else []
             
             photos = len([f for f in files if f.endswith('.jpg')])
-            encodings = len([f for f in files if f.endswith('_encoding.json')])
+            encodings = len(encoding_store.employee_ids())
             
             # Funcionários com dados completos
             complete_employees = 0
             simulated_encodings = 0
             real_encodings = 0
+            templates = {}
             
             for file in files:
                 if file.endswith('.jpg'):
@@ -432,7 +800,7 @@ class FacialService:
                         complete_employees += 1
                         
                         # Verificar se é encoding real ou simulado
-                        encoding_path = os.path.join(self.storage_path, f"{employee_id}_encoding.json")
+                        encoding_path = encoding_store.encoding_path(employee_id)
                         try:
                             with open(encoding_path, 'r') as f:
                                 encoding_data = json.loads(f.read())
@@ -440,6 +808,8 @@ class FacialService:
                                     simulated_encodings += 1
                                 else:
                                     real_encodings += 1
+                                    template = encoding_data.get("template", "standard")
+                                    templates[template] = templates.get(template, 0) + 1
                         except:
                             pass
             
@@ -452,7 +822,28 @@ class FacialService:
                 "storage_path": self.storage_path,
                 "tolerance": self.tolerance,
                 "facial_recognition_available": self.facial_recognition_available,
-                "mode": "real" if self.facial_recognition_available else "limited"
+                "mode": "real" if self.facial_recognition_available else "limited",
+                "engine": self.engine.describe() if self.engine else None,
+                "encoding_cache": encoding_store.stats(),
+                "pipeline": self.pipeline.stats() if self.pipeline else {"enabled": False},
+                "cancellations": get_cancellation_stats(),
+                "memory": get_memory_stats(),
+                "quality": get_quality_stats(),
+                "prefilter": get_prefilter_stats(),
+                "detection": get_detection_stats(),
+                "hints": get_hint_stats(),
+                "progressive": self.progressive.stats() if self.progressive else {"enabled": False},
+                "templates": self._template_stats(templates),
+                "duplicate_check": dict(
+                    self._duplicates,
+                    mode=settings.DUPLICATE_CHECK_MODE,
+                    max_distance=settings.DUPLICATE_MAX_DISTANCE or self.tolerance
+                ),
+                "coalescing": {
+                    "encoding_loads": self._encoding_loads.stats(),
+                    "face_jobs": self._face_jobs.stats()
+                },
+                "process": get_process_report()
             }
             
             if not self.facial_recognition_available:
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+👥 Auditoria de cadastros duplicados no STORAGE_PATH
+Lista os pares de funcionários com rostos a até --max-distance (mesma
+pessoa cadastrada com dois IDs), comparando todos com todos em blocos.
+Pode rodar com a API no ar (só lê os encodings).
+
+Uso: python audit-duplicates.py [--max-distance 0.45] [--output logs/duplicados.json]
+
+Sai com código 1 quando encontra algum par (útil em cron/alerta).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.duplicate_audit import audit_duplicates, AUDIT_BLOCK_ROWS  # noqa: E402
+
+
+def main():
+    default_distance = float(os.getenv("DUPLICATE_MAX_DISTANCE", "0")) or float(os.getenv("FACE_TOLERANCE", "0.6"))
+    parser = argparse.ArgumentParser(description="Encontra pares de funcionários com o mesmo rosto")
+    parser.add_argument("--storage", default=os.getenv("STORAGE_PATH", "app/storage/employee_photos"))
+    parser.add_argument("--max-distance", type=float, default=default_distance,
+                        help="Distância máxima do par (padrão DUPLICATE_MAX_DISTANCE ou FACE_TOLERANCE)")
+    parser.add_argument("--model-version", default=os.getenv("ENCODING_MODEL_VERSION", ""),
+                        help="Versão lida, como na API (ENCODING_MODEL_VERSION)")
+    parser.add_argument("--block-rows", type=int, default=AUDIT_BLOCK_ROWS, help="Linhas por bloco do produto")
+    parser.add_argument("--output", default=None, help="Grava o resultado completo em JSON")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.storage):
+        print(f"❌ Pasta não encontrada: {args.storage}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    result = audit_duplicates(args.storage, args.max_distance, args.model_version, max(1, args.block_rows))
+    elapsed = time.perf_counter() - start
+    total = sum(result["employees"].values())
+    comparisons = sum(n * (n - 1) // 2 for n in result["employees"].values())
+
+    print(f"👥 {total} funcionários ({', '.join(f'{e}: {n}' for e, n in result['employees'].items()) or 'nenhum'})")
+    print(f"🔎 {comparisons} comparações em {elapsed:.2f}s | distância máxima {args.max_distance}\n")
+    for pair in result["pairs"]:
+        print(f"⚠️ {pair['employee_a']} ↔ {pair['employee_b']}  distância {pair['distance']:.4f} ({pair['engine']})")
+    for group in result["groups"]:
+        if len(group) > 2:
+            print(f"🔗 Grupo: {', '.join(group)}")
+    if result["pairs"]:
+        print(f"\n❌ {len(result['pairs'])} par(es) suspeito(s)")
+    else:
+        print("\n✅ Nenhum cadastro duplicado")
+
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(dict(result, max_distance=args.max_distance, elapsed_s=round(elapsed, 2)), f, indent=2, ensure_ascii=False)
+        print(f"📝 Resultado: {args.output}")
+    sys.exit(1 if result["pairs"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+📊 Avaliação do pré-filtro cascade num conjunto local de imagens
+Usa o HOG na imagem inteira como referência e mede:
+- falsos "no_face" (o HOG acha rosto, o cascade não acha nada)
+- concordância da busca delimitada pelas caixas do cascade
+- CPU do HOG puro vs cascade + HOG delimitado (com fallback para a imagem inteira)
+
+Uso: python benchmark-cascade-prefilter.py pasta_de_imagens [--min-neighbors 2]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import face_recognition
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.face_pipeline import decode_image  # noqa: E402
+from utils.cascade_prefilter import CascadePrefilter, union_box  # noqa: E402
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def list_images(root):
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(directory, name)
+
+
+def seeded_hog(rgb, boxes):
+    top, right, bottom, left = union_box(boxes)
+    crop = np.ascontiguousarray(rgb[top:bottom, left:right])
+    return face_recognition.face_locations(crop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taxa de falsos no_face e CPU poupada pelo pré-filtro cascade")
+    parser.add_argument("images", help="Pasta com as imagens (busca recursiva)")
+    parser.add_argument("--cascade", default=None, help="XML Haar/LBP (padrão: frontal do OpenCV)")
+    parser.add_argument("--min-neighbors", type=int, default=2)
+    parser.add_argument("--analysis-size", type=int, default=400)
+    parser.add_argument("--verbose", action="store_true", help="Listar os falsos no_face")
+    args = parser.parse_args()
+
+    prefilter = CascadePrefilter(
+        cascade_path=args.cascade,
+        analysis_size=args.analysis_size,
+        min_neighbors=args.min_neighbors
+    )
+
+    totals = {
+        "images": 0, "with_face": 0, "without_face": 0,
+        "false_rejects": 0, "true_rejects": 0,
+        "seeded_hits": 0, "seeded_misses": 0,
+        "hog_seconds": 0.0, "prefilter_seconds": 0.0,
+    }
+    false_rejects = []
+
+    for path in list_images(args.images):
+        with open(path, "rb") as f:
+            rgb = decode_image(f.read())
+        if rgb is None:
+            continue
+        totals["images"] += 1
+
+        # Referência: HOG na imagem inteira
+        start = time.perf_counter()
+        reference = face_recognition.face_locations(rgb)
+        totals["hog_seconds"] += time.perf_counter() - start
+        has_face = bool(reference)
+        totals["with_face" if has_face else "without_face"] += 1
+
+        # Com pré-filtro: cascade → HOG delimitado → HOG inteiro se o recorte falhar
+        start = time.perf_counter()
+        boxes = prefilter.find(rgb)
+        if boxes:
+            found = seeded_hog(rgb, boxes)
+            if found:
+                totals["seeded_hits"] += 1
+            else:
+                totals["seeded_misses"] += 1
+                found = face_recognition.face_locations(rgb)
+        else:
+            found = []
+        totals["prefilter_seconds"] += time.perf_counter() - start
+
+        if not boxes:
+            if has_face:
+                totals["false_rejects"] += 1
+                false_rejects.append(path)
+            else:
+                totals["true_rejects"] += 1
+
+    if not totals["images"]:
+        print("❌ Nenhuma imagem encontrada")
+        return
+
+    with_face = max(totals["with_face"], 1)
+    without_face = max(totals["without_face"], 1)
+    saved = totals["hog_seconds"] - totals["prefilter_seconds"]
+
+    print(f"🖼️ Imagens: {totals['images']} ({totals['with_face']} com rosto, {totals['without_face']} sem rosto pelo HOG)")
+    print(f"❌ Falsos no_face: {totals['false_rejects']} ({totals['false_rejects'] / with_face:.2%} das imagens com rosto)")
+    print(f"✅ Rejeições corretas: {totals['true_rejects']} ({totals['true_rejects'] / without_face:.2%} das imagens sem rosto)")
+    print(f"🎯 HOG delimitado: {totals['seeded_hits']} acertos, {totals['seeded_misses']} fallbacks para a imagem inteira")
+    print(f"⏱️ CPU HOG puro: {totals['hog_seconds']:.2f}s | com pré-filtro: {totals['prefilter_seconds']:.2f}s "
+          f"| poupado: {saved:.2f}s ({saved / max(totals['hog_seconds'], 1e-9):.1%})")
+    print(f"📊 Cascade: {prefilter.stats()}")
+
+    if args.verbose and false_rejects:
+        print("\nFalsos no_face:")
+        for path in false_rejects:
+            print(f"  - {path}")
+
+
+if __name__ == "__main__":
+    main()
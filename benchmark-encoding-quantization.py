@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark: encodings em float64 x float32 x float16 x int8
+Para cada dtype da matriz em memória mede o tamanho, o tempo de uma
+varredura 1:N e a concordância com o face_distance exato em float64:
+
+- top-1 e decisão (distância <= tolerância) só com a distância aproximada
+- top-1 e decisão depois de reordenar a lista curta em float32
+
+Também compara o tamanho do JSON com a lista de floats e com os formatos
+float32/float16 em base64.
+
+Uso: python benchmark-encoding-quantization.py [pasta_de_encodings] [--synthetic 20000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.encoding_codec import MATRIX_DTYPES, DISK_FORMATS, QuantizedMatrix, pack_encoding, unpack_encoding  # noqa: E402
+
+try:
+    from face_recognition import face_distance
+except ImportError:
+    def face_distance(face_encodings, face_to_compare):
+        return np.linalg.norm(face_encodings - face_to_compare, axis=1)
+
+
+def load_encodings(folder):
+    vectors = []
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith("_encoding.json"):
+            continue
+        with open(os.path.join(folder, name)) as f:
+            data = json.load(f)
+        if data.get("mode") != "simulated" and data.get("encoding") is not None:
+            vectors.append(unpack_encoding(data["encoding"]))
+    return np.array(vectors)
+
+
+def synthetic_encodings(count, seed):
+    """Encodings com a escala típica do dlib (componentes em ±0.3)"""
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 0.09, (count, 128))
+
+
+def make_queries(known, count, noise, seed):
+    """Metade são fotos novas de funcionários cadastrados (ruído), metade de desconhecidos"""
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(known), count)
+    queries = known[picks] + rng.normal(0, noise, (count, known.shape[1]))
+    strangers = count // 2
+    queries[:strangers] = rng.normal(0, known.std(), (strangers, known.shape[1]))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória, velocidade e concordância dos encodings quantizados")
+    parser.add_argument("encodings", nargs="?", help="Pasta com {employee_id}_encoding.json")
+    parser.add_argument("--synthetic", type=int, default=20000, help="Encodings sintéticos quando não há pasta")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.03, help="Ruído das consultas de funcionários cadastrados")
+    parser.add_argument("--tolerance", type=float, default=0.6)
+    parser.add_argument("--shortlist", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    known = load_encodings(args.encodings) if args.encodings else synthetic_encodings(args.synthetic, args.seed)
+    if not len(known):
+        print("❌ Nenhum encoding encontrado")
+        return
+    queries = make_queries(known, args.queries, args.noise, args.seed)
+    exact = [face_distance(known, q) for q in queries]
+    exact_top = np.array([d.argmin() for d in exact])
+    exact_match = np.array([d.min() <= args.tolerance for d in exact])
+
+    print(f"🗂️ Encodings: {len(known)} | consultas: {len(queries)} | tolerância: {args.tolerance} "
+          f"| lista curta: {args.shortlist}\n")
+
+    sizes = {fmt: len(json.dumps(pack_encoding(known[0], fmt))) for fmt in DISK_FORMATS}
+    print("💾 JSON por encoding: " + " | ".join(f"{fmt}: {size} B" for fmt, size in sizes.items()) + "\n")
+
+    reference = known.astype(np.float32)  # Vetores exatos da reordenação (lidos do arquivo no store)
+    print(f"{'dtype':<8} {'MB':>8} {'varredura ms':>13} {'top-1 aprox':>12} {'decisão aprox':>14} "
+          f"{'top-1 final':>12} {'decisão final':>14} {'Δ dist máx':>11}")
+    for dtype in MATRIX_DTYPES:
+        matrix = QuantizedMatrix(dtype, known.shape[1])
+        matrix.calibrate(known)
+        matrix.grow(len(known))
+        for row, vector in enumerate(known):
+            matrix.set_row(row, vector)
+
+        approx_top, approx_match, final_top, final_match, drift = [], [], [], [], []
+        scan_seconds = 0.0
+        for q, distances in zip(queries, exact):
+            start = time.perf_counter()
+            approx = matrix.squared_distances(q)
+            scan_seconds += time.perf_counter() - start
+
+            approx_top.append(approx.argmin())
+            approx_match.append(np.sqrt(approx.min()) <= args.tolerance)
+
+            count = min(args.shortlist, len(known))
+            shortlist = np.argpartition(approx, count - 1)[:count]
+            reranked = np.linalg.norm(reference[shortlist] - q.astype(np.float32), axis=1)
+            best = reranked.argmin()
+            final_top.append(shortlist[best])
+            final_match.append(reranked[best] <= args.tolerance)
+            drift.append(abs(float(reranked[best]) - float(distances.min())))
+
+        def agreement(values, expected):
+            return f"{np.mean(np.array(values) == expected):.2%}"
+
+        print(f"{dtype:<8} {matrix.nbytes / 1024 / 1024:8.2f} {scan_seconds / len(queries) * 1000:13.2f} "
+              f"{agreement(approx_top, exact_top):>12} {agreement(approx_match, exact_match):>14} "
+              f"{agreement(final_top, exact_top):>12} {agreement(final_match, exact_match):>14} {max(drift):11.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+📊 Conformidade e desempenho dos motores faciais (dlib, opencv, onnx, mock)
+Roda o mesmo conjunto de verificações em cada backend disponível neste host
+e mede o custo de detect / landmarks / encode, para escolher o FACE_ENGINE
+mais rápido que passa em tudo.
+
+Verificações de conformidade:
+- imagem lisa não tem rosto
+- caixas (top, right, bottom, left) inteiras, ordenadas e dentro da imagem
+- landmarks com left_eye, right_eye e nose_tip para cada caixa
+- um encoding finito de embedding_size por caixa; nenhum para lista vazia
+- encoding determinístico (num_jitters=1) e distância zero para si mesmo
+
+Uso: python benchmark-face-engines.py [pasta_de_imagens] [--engines dlib,opencv,onnx,mock]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.face_pipeline import decode_image  # noqa: E402
+from utils.engines import ENGINE_NAMES, EngineUnavailable, create_engine  # noqa: E402
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def list_images(root):
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(directory, name)
+
+
+def check_boxes(boxes, shape):
+    height, width = shape[:2]
+    for box in boxes:
+        if len(box) != 4 or not all(isinstance(v, (int, np.integer)) for v in box):
+            return f"caixa com formato inválido: {box}"
+        top, right, bottom, left = box
+        if not (0 <= top < bottom <= height and 0 <= left < right <= width):
+            return f"caixa fora da imagem ou invertida: {box}"
+    return None
+
+
+def run_conformance(engine, images):
+    """Lista de falhas de conformidade (vazia = passou)"""
+    failures = []
+    blank = np.full((240, 320, 3), 128, dtype=np.uint8)
+    if engine.detect(blank):
+        failures.append("detectou rosto numa imagem lisa")
+    if engine.encode(blank, []) != []:
+        failures.append("encode com lista vazia de caixas não devolveu []")
+
+    for path, rgb in images:
+        boxes = engine.detect(rgb)
+        problem = check_boxes(boxes, rgb.shape)
+        if problem:
+            failures.append(f"{os.path.basename(path)}: {problem}")
+            continue
+        if not boxes:
+            continue
+
+        landmarks = engine.landmarks(rgb, boxes)
+        if len(landmarks) != len(boxes) or not all(
+            {"left_eye", "right_eye", "nose_tip"} <= set(points) for points in landmarks
+        ):
+            failures.append(f"{os.path.basename(path)}: landmarks incompletos")
+
+        encodings = engine.encode(rgb, boxes)
+        if len(encodings) != len(boxes):
+            failures.append(f"{os.path.basename(path)}: {len(encodings)} encodings para {len(boxes)} caixas")
+            continue
+        if any(np.shape(e) != (engine.embedding_size,) or not np.all(np.isfinite(e)) for e in encodings):
+            failures.append(f"{os.path.basename(path)}: encoding com dimensão errada ou não finito")
+            continue
+
+        again = engine.encode(rgb, boxes[:1])
+        if engine.distance(again, encodings[0])[0] > 1e-4:
+            failures.append(f"{os.path.basename(path)}: encoding não determinístico")
+        distances = engine.distance(encodings, encodings[0])
+        if np.shape(distances) != (len(encodings),) or distances[0] > 1e-4:
+            failures.append(f"{os.path.basename(path)}: distância para si mesmo diferente de zero")
+    return failures
+
+
+def run_timing(engine, images, repeats):
+    """Média em ms de cada operação e quantidade de imagens com rosto"""
+    seconds = {"detect": 0.0, "landmarks": 0.0, "encode": 0.0}
+    counts = {"detect": 0, "landmarks": 0, "encode": 0}
+    with_face = 0
+    for _, rgb in images:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            boxes = engine.detect(rgb)
+            seconds["detect"] += time.perf_counter() - start
+            counts["detect"] += 1
+            if not boxes:
+                continue
+            start = time.perf_counter()
+            engine.landmarks(rgb, boxes[:1])
+            seconds["landmarks"] += time.perf_counter() - start
+            counts["landmarks"] += 1
+            start = time.perf_counter()
+            engine.encode(rgb, boxes[:1])
+            seconds["encode"] += time.perf_counter() - start
+            counts["encode"] += 1
+        with_face += bool(engine.detect(rgb))
+    averages = {op: seconds[op] / counts[op] * 1000 if counts[op] else 0.0 for op in seconds}
+    return averages, with_face
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conformidade e custo por motor facial")
+    parser.add_argument("images", nargs="?", help="Pasta com imagens de rostos (busca recursiva)")
+    parser.add_argument("--engines", default=",".join(ENGINE_NAMES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--yunet-model", default=None)
+    parser.add_argument("--sface-model", default=None)
+    parser.add_argument("--onnx-model", default=None, help="Reconhecedor do backend onnx (padrão: SFace int8)")
+    args = parser.parse_args()
+
+    images = []
+    if args.images:
+        for path in list_images(args.images):
+            with open(path, "rb") as f:
+                rgb = decode_image(f.read())
+            if rgb is not None:
+                images.append((path, rgb))
+    if not images:
+        # Sem pasta: só a conformidade estrutural com uma imagem sintética
+        rng = np.random.default_rng(0)
+        images = [("sintetica.png", rng.integers(0, 255, (480, 360, 3), dtype=np.uint8))]
+
+    print(f"🖼️ Imagens: {len(images)} | repetições: {args.repeats}\n")
+    print(f"{'motor':<8} {'conformidade':<14} {'com rosto':>9} {'detect ms':>10} {'landmarks ms':>13} {'encode ms':>10}")
+    failures_by_engine = {}
+    for name in args.engines.split(","):
+        try:
+            engine = create_engine(
+                name.strip(), yunet_model=args.yunet_model, sface_model=args.sface_model,
+                ort_recognizer_model=args.onnx_model
+            )
+        except (EngineUnavailable, ValueError) as e:
+            print(f"{name:<8} indisponível: {e}")
+            continue
+        engine.warmup()
+        failures = run_conformance(engine, images)
+        averages, with_face = run_timing(engine, images, args.repeats)
+        failures_by_engine[name] = failures
+        status = "✅ ok" if not failures else f"❌ {len(failures)} falhas"
+        print(f"{name:<8} {status:<14} {with_face:>9} {averages['detect']:10.2f} "
+              f"{averages['landmarks']:13.2f} {averages['encode']:10.2f}")
+
+    for name, failures in failures_by_engine.items():
+        for failure in failures:
+            print(f"  - [{name}] {failure}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark: latência com e sem dicas de caixa do cliente
+Para cada imagem a caixa de referência vem do face_locations; a dica
+simula o detector do aparelho deslocando e redimensionando essa caixa em
+até --noise (fração do tamanho do rosto). Mede a latência de
+decode → detect → encode nos dois modos, a taxa de aceitação das dicas e a
+distância entre o encoding com dica e o encoding da detecção normal.
+
+Uso: python benchmark-face-hints.py pasta_de_imagens [--noise 0.1]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.face_pipeline import FaceJob, run_inline, configure_detection_ladder, get_hint_stats  # noqa: E402
+from utils.detection_ladder import DetectionLadder, build_detection_ladder  # noqa: E402
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def list_images(root):
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(directory, name)
+
+
+def client_hint(box, scale, noise):
+    """Caixa na escala original com o erro típico de outro detector"""
+    top, right, bottom, left = (v * scale for v in box)
+    width, height = right - left, bottom - top
+    dx, dy = (random.uniform(-noise, noise) * width for _ in range(2))
+    grow = 1 + random.uniform(-noise, noise)
+    x = max(0, left + dx - (grow - 1) * width / 2)
+    y = max(0, top + dy - (grow - 1) * height / 2)
+    return (int(y), int(x + width * grow), int(y + height * grow), int(x))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência da verificação com e sem dicas de caixa")
+    parser.add_argument("images", help="Pasta com as imagens (busca recursiva)")
+    parser.add_argument("--noise", type=float, default=0.1, help="Erro máximo da dica (fração do rosto)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # Mesmo caminho da verificação: escada de detecção quando não há dica
+    configure_detection_ladder(DetectionLadder(build_detection_ladder()))
+
+    without_hint, with_hint, distances = [], [], []
+    for path in list_images(args.images):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        start = time.perf_counter()
+        baseline = run_inline(FaceJob(image_bytes=data, escalate=True, face_selection="largest"))
+        elapsed = time.perf_counter() - start
+        if baseline.failed:
+            continue
+        without_hint.append(elapsed * 1000)
+
+        hint = client_hint(baseline.locations[0], baseline.metadata.get("decode_scale", 1), args.noise)
+        start = time.perf_counter()
+        hinted = run_inline(FaceJob(image_bytes=data, escalate=True, face_selection="largest", face_hint=hint))
+        with_hint.append((time.perf_counter() - start) * 1000)
+        if not hinted.failed:
+            distances.append(float(np.linalg.norm(hinted.encodings[0] - baseline.encodings[0])))
+
+    if not without_hint:
+        print("❌ Nenhuma imagem com rosto encontrada")
+        return
+
+    print(f"🖼️ Imagens com rosto: {len(without_hint)} | erro da dica: ±{args.noise:.0%}")
+    print(f"⏱️ Sem dica: p50 {np.percentile(without_hint, 50):.1f}ms | p95 {np.percentile(without_hint, 95):.1f}ms")
+    print(f"⏱️ Com dica: p50 {np.percentile(with_hint, 50):.1f}ms | p95 {np.percentile(with_hint, 95):.1f}ms")
+    print(f"📍 Dicas: {get_hint_stats()}")
+    if distances:
+        print(f"📏 Distância até o encoding sem dica: média {np.mean(distances):.4f} | máx {max(distances):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark dos perfis fast / balanced / accurate num conjunto local de imagens
+Para cada perfil mede a latência de decode → detect → encode e a
+estabilidade do encoding:
+- distância até o encoding do perfil accurate da mesma imagem (referência)
+- dispersão entre execuções repetidas (jitters são aleatórios)
+
+Uso: python benchmark-face-profiles.py pasta_de_imagens [--repeats 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.face_pipeline import run_inline, configure_detection_ladder  # noqa: E402
+from utils.detection_ladder import DetectionLadder, build_detection_ladder  # noqa: E402
+from utils.face_profiles import PROFILES  # noqa: E402
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def list_images(root):
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(directory, name)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência e estabilidade do encoding por perfil")
+    parser.add_argument("images", help="Pasta com as imagens (busca recursiva)")
+    parser.add_argument("--repeats", type=int, default=3, help="Execuções por imagem e perfil")
+    parser.add_argument("--reference", default="accurate", choices=list(PROFILES),
+                        help="Perfil usado como referência de distância")
+    args = parser.parse_args()
+
+    # Mesma escada de detecção que a API usa no perfil balanced
+    configure_detection_ladder(DetectionLadder(build_detection_ladder()))
+
+    images = []
+    for path in list_images(args.images):
+        with open(path, "rb") as f:
+            images.append((path, f.read()))
+    if not images:
+        print("❌ Nenhuma imagem encontrada")
+        return
+
+    results = {name: {"latencies": [], "encodings": {}, "failed": 0} for name in PROFILES}
+    for path, data in images:
+        for name, profile in PROFILES.items():
+            runs = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                job = run_inline(profile.job(image_bytes=data))
+                results[name]["latencies"].append((time.perf_counter() - start) * 1000)
+                if job.failed:
+                    results[name]["failed"] += 1
+                    continue
+                runs.append(job.encodings[0])
+            if runs:
+                results[name]["encodings"][path] = runs
+
+    reference = results[args.reference]["encodings"]
+    print(f"🖼️ Imagens: {len(images)} | repetições: {args.repeats} | referência: {args.reference}\n")
+    print(f"{'perfil':<10} {'p50 ms':>8} {'p95 ms':>8} {'falhas':>7} "
+          f"{'dist. ref média':>16} {'dist. ref máx':>14} {'dispersão':>10}")
+    for name, data in results.items():
+        to_reference = []
+        spread = []
+        for path, runs in data["encodings"].items():
+            if path in reference:
+                ref_vector = np.mean(reference[path], axis=0)
+                to_reference.extend(float(np.linalg.norm(run - ref_vector)) for run in runs)
+            mean_vector = np.mean(runs, axis=0)
+            spread.extend(float(np.linalg.norm(run - mean_vector)) for run in runs)
+
+        print(f"{name:<10} {percentile(data['latencies'], 50):8.1f} {percentile(data['latencies'], 95):8.1f} "
+              f"{data['failed']:7d} {np.mean(to_reference) if to_reference else 0.0:16.4f} "
+              f"{max(to_reference) if to_reference else 0.0:14.4f} {np.mean(spread) if spread else 0.0:10.4f}")
+
+    print("\nConfiguração dos perfis:")
+    for profile in PROFILES.values():
+        print(f"  - {profile.describe()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark: pico de RSS com uploads grandes concorrentes
+Compara o pipeline sem limite, com orçamento de memória e com orçamento +
+decodificação reduzida. Cada cenário roda num processo novo para que o
+pico de um não contamine o outro.
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import threading
+import multiprocessing as mp
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.warmup import get_rss_bytes  # noqa: E402
+from utils.face_pipeline import FaceJob, run_inline, configure_memory_limits, get_memory_stats  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def make_jpeg(width, height, quality):
+    """JPEG grande com ruído (comprime mal, como uma foto de celular ruidosa)"""
+    image = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+def run_scenario(image_bytes, concurrency, budget_mb, max_megapixels, results):
+    configure_memory_limits(budget_mb, max_megapixels)
+    baseline = get_rss_bytes()
+    peak = {"rss": baseline}
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak["rss"] = max(peak["rss"], get_rss_bytes())
+            time.sleep(0.005)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    jobs = [FaceJob(image_bytes=image_bytes) for _ in range(concurrency)]
+    threads = [threading.Thread(target=run_inline, args=(job,)) for job in jobs]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    results.put({
+        "baseline_mb": baseline / MB,
+        "peak_mb": peak["rss"] / MB,
+        "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "seconds": elapsed,
+        "reasons": sorted({job.reason for job in jobs if job.reason}),
+        "memory": get_memory_stats(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de RSS com decodificações grandes concorrentes")
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--quality", type=int, default=95)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--budget-mb", type=int, default=512)
+    parser.add_argument("--max-megapixels", type=float, default=3.0)
+    args = parser.parse_args()
+
+    image_bytes = make_jpeg(args.width, args.height, args.quality)
+    print(f"📦 JPEG {args.width}x{args.height}: {len(image_bytes) / MB:.1f}MB "
+          f"| {args.concurrency} requisições simultâneas")
+
+    scenarios = [
+        ("sem limite", 0, 0),
+        (f"orçamento {args.budget_mb}MB", args.budget_mb, 0),
+        (f"orçamento + redução {args.max_megapixels}MP", args.budget_mb, args.max_megapixels),
+    ]
+
+    ctx = mp.get_context("spawn")
+    for label, budget_mb, max_megapixels in scenarios:
+        results = ctx.Queue()
+        process = ctx.Process(
+            target=run_scenario,
+            args=(image_bytes, args.concurrency, budget_mb, max_megapixels, results)
+        )
+        process.start()
+        result = results.get()
+        process.join()
+        print(f"🧪 {label:<32} pico RSS {result['peak_mb']:7.0f}MB "
+              f"(base {result['baseline_mb']:.0f}MB, maxrss {result['maxrss_mb']:.0f}MB) "
+              f"| {result['seconds']:.2f}s | falhas: {result['reasons'] or '-'}")
+        if budget_mb:
+            print(f"   🧮 {result['memory']}")
+
+
+if __name__ == "__main__":
+    main()
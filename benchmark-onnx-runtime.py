@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark: ONNX Runtime (SFace int8) x dlib — vazão e precisão
+Pasta com uma subpasta por pessoa (pessoa/foto.jpg). Para cada motor:
+
+- vazão de detect + encode em imagens/s, serial e com --workers threads
+  simultâneas (o layout do pipeline na VPS)
+- taxa de detecção e precisão nos pares mesma pessoa / pessoas diferentes
+  com o limiar padrão do motor e com o melhor limiar da amostra
+- com --fp32-model, a distância entre os encodings do SFace int8 e float32
+  do mesmo rosto (compatibilidade das distâncias dentro do backend)
+
+Uso: python benchmark-onnx-runtime.py pasta_por_pessoa [--engines dlib,onnx] [--workers 2]
+"""
+
+import os
+import sys
+import time
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.face_pipeline import decode_image  # noqa: E402
+from utils.engines import EngineUnavailable, create_engine  # noqa: E402
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def load_people(root):
+    """[(pessoa, caminho, rgb)] a partir das subpastas"""
+    samples = []
+    for person in sorted(os.listdir(root)):
+        folder = os.path.join(root, person)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(folder, name), "rb") as f:
+                    rgb = decode_image(f.read())
+                if rgb is not None:
+                    samples.append((person, name, rgb))
+    return samples
+
+
+def encode_first(engine, rgb):
+    boxes = engine.detect(rgb)
+    if not boxes:
+        return None
+    encodings = engine.encode(rgb, boxes[:1])
+    return encodings[0] if encodings else None
+
+
+def throughput(engine, samples, workers):
+    """Imagens/s de detect + encode, serial e com `workers` threads"""
+    start = time.perf_counter()
+    for _, _, rgb in samples:
+        encode_first(engine, rgb)
+    serial = len(samples) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda sample: encode_first(engine, sample[2]), samples))
+    parallel = len(samples) / (time.perf_counter() - start)
+    return serial, parallel
+
+
+def pair_accuracy(engine, people, encodings):
+    """Precisão no limiar padrão e no melhor limiar da amostra"""
+    distances, same = [], []
+    for i, j in itertools.combinations(range(len(encodings)), 2):
+        distances.append(engine.distance([encodings[i]], encodings[j])[0])
+        same.append(people[i] == people[j])
+    if not distances:
+        return None
+    distances, same = np.array(distances), np.array(same)
+
+    def accuracy(threshold):
+        return float(np.mean((distances <= threshold) == same))
+
+    best = max(np.unique(distances), key=accuracy)
+    return {
+        "pairs": len(distances),
+        "genuine": int(same.sum()),
+        "default_threshold": engine.default_tolerance,
+        "default_accuracy": accuracy(engine.default_tolerance),
+        "best_threshold": float(best),
+        "best_accuracy": accuracy(best)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão e precisão do backend ONNX Runtime contra o dlib")
+    parser.add_argument("images", help="Pasta com uma subpasta por pessoa")
+    parser.add_argument("--engines", default="dlib,onnx")
+    parser.add_argument("--workers", type=int, default=2, help="Threads simultâneas chamando o motor")
+    parser.add_argument("--threads", type=int, default=0, help="Threads intra-op do ONNX Runtime (0 = automático)")
+    parser.add_argument("--yunet-model", default=None)
+    parser.add_argument("--onnx-model", default=None, help="Reconhecedor do backend onnx (padrão: SFace int8)")
+    parser.add_argument("--fp32-model", default=None, help="SFace float32 para medir a diferença do int8")
+    args = parser.parse_args()
+
+    samples = load_people(args.images)
+    if not samples:
+        print("❌ Nenhuma imagem encontrada (esperado pasta/pessoa/foto.jpg)")
+        return
+    print(f"🖼️ Imagens: {len(samples)} de {len({s[0] for s in samples})} pessoas | workers: {args.workers}\n")
+
+    for name in args.engines.split(","):
+        try:
+            engine = create_engine(
+                name.strip(), yunet_model=args.yunet_model,
+                ort_recognizer_model=args.onnx_model, ort_threads=args.threads
+            )
+        except (EngineUnavailable, ValueError) as e:
+            print(f"⚠️ {name}: indisponível ({e})")
+            continue
+        engine.warmup()
+
+        serial, parallel = throughput(engine, samples, args.workers)
+        encoded = [(person, encode_first(engine, rgb)) for person, _, rgb in samples]
+        encoded = [(person, encoding) for person, encoding in encoded if encoding is not None]
+        report = pair_accuracy(engine, [p for p, _ in encoded], [e for _, e in encoded])
+
+        print(f"🧩 {engine.describe()}")
+        print(f"   ⏱️ {serial:.1f} img/s serial | {parallel:.1f} img/s com {args.workers} workers")
+        print(f"   🔍 Detecção: {len(encoded)}/{len(samples)}")
+        if report:
+            print(f"   🎯 {report['pairs']} pares ({report['genuine']} mesma pessoa): "
+                  f"{report['default_accuracy']:.2%} no limiar {report['default_threshold']} | "
+                  f"{report['best_accuracy']:.2%} no melhor limiar {report['best_threshold']:.3f}")
+
+        if name.strip() == "onnx" and args.fp32_model:
+            reference = create_engine(
+                "onnx", yunet_model=args.yunet_model,
+                ort_recognizer_model=args.fp32_model, ort_threads=args.threads
+            )
+            drift = []
+            for _, _, rgb in samples:
+                boxes = engine.detect(rgb)
+                if boxes:
+                    drift.append(engine.distance(engine.encode(rgb, boxes[:1]), reference.encode(rgb, boxes[:1])[0])[0])
+            if drift:
+                print(f"   📏 int8 x float32 no mesmo rosto: média {np.mean(drift):.4f} | máx {max(drift):.4f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark: transporte de imagens por pickle (Pipe) vs memória compartilhada
+Simula a API enviando uploads e arrays RGB decodificados para um processo de engine
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.shm_transport import SharedMemoryRing  # noqa: E402
+
+
+def engine_pickle(conn):
+    """Processo de engine recebendo os dados completos via pickle"""
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        upload, rgb = message
+        # Trabalho mínimo: tocar os dados como o decoder/detector faria
+        conn.send((len(upload), int(rgb[::64, ::64].sum())))
+
+
+def engine_shm(conn, ring_name, slot_count, slot_size):
+    """Processo de engine recebendo apenas descritores"""
+    ring = SharedMemoryRing.attach(ring_name, slot_count, slot_size)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        upload_desc, rgb_desc = message
+        upload = ring.view_bytes(upload_desc)
+        rgb = ring.view_array(rgb_desc)
+        result = (upload.nbytes, int(rgb[::64, ::64].sum()))
+        del upload, rgb
+        # O slot pode ter sido recuperado durante a leitura das views
+        ring.verify(upload_desc)
+        ring.verify(rgb_desc)
+        conn.send(result)
+    ring.close()
+
+
+def run_pickle(upload, rgb, iterations):
+    parent, child = mp.Pipe()
+    process = mp.Process(target=engine_pickle, args=(child,))
+    process.start()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parent.send((upload, rgb))
+        parent.recv()
+    elapsed = time.perf_counter() - start
+
+    parent.send(None)
+    process.join()
+    return elapsed
+
+
+def run_shm(upload, rgb, iterations):
+    slot_size = max(len(upload), rgb.nbytes)
+    ring = SharedMemoryRing(slot_count=4, slot_size=slot_size)
+    parent, child = mp.Pipe()
+    process = mp.Process(target=engine_shm, args=(child, ring.name, ring.slot_count, ring.slot_size))
+    process.start()
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        upload_desc = ring.put_bytes(upload, tag=f"upload-{i}")
+        rgb_desc = ring.put_array(rgb, tag=f"rgb-{i}")
+        parent.send((upload_desc, rgb_desc))
+        parent.recv()
+        ring.release(upload_desc)
+        ring.release(rgb_desc)
+    elapsed = time.perf_counter() - start
+
+    parent.send(None)
+    process.join()
+    leaks = ring.check_leaks(max_age=0)
+    stats = ring.stats()
+    ring.close()
+    return elapsed, leaks, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de transporte de imagens entre processos")
+    parser.add_argument("--upload-mb", type=float, default=5.0, help="Tamanho do upload simulado (MB)")
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    upload = os.urandom(int(args.upload_mb * 1024 * 1024))
+    rgb = np.random.randint(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+
+    print(f"📦 Upload: {len(upload) / 1024 / 1024:.1f}MB | RGB: {rgb.nbytes / 1024 / 1024:.1f}MB "
+          f"| {args.iterations} iterações")
+
+    pickle_time = run_pickle(upload, rgb, args.iterations)
+    shm_time, leaks, stats = run_shm(upload, rgb, args.iterations)
+
+    payload_mb = (len(upload) + rgb.nbytes) / 1024 / 1024
+    print(f"🥒 pickle: {pickle_time:.3f}s total | {pickle_time / args.iterations * 1000:.2f}ms/req "
+          f"| {payload_mb * args.iterations / pickle_time:.0f}MB/s")
+    print(f"🧠 shm:    {shm_time:.3f}s total | {shm_time / args.iterations * 1000:.2f}ms/req "
+          f"| {payload_mb * args.iterations / shm_time:.0f}MB/s")
+    print(f"⚡ Speedup: {pickle_time / shm_time:.2f}x")
+    print(f"🔍 Slots vazados: {len(leaks)} | Anel: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark: pico de memória do servidor com uploads grandes e maliciosos
+Sobe a API FastAPI com uvicorn num processo novo para cada cenário e mede o
+pico de RSS (VmHWM) do servidor depois de enviar o upload.
+
+Cenários:
+- upload válido (dentro do limite)
+- upload grande com Content-Length honesto (recusado sem ler o corpo)
+- upload grande em chunked, sem Content-Length (abortado durante o streaming)
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import subprocess
+import http.client
+
+MB = 1024 * 1024
+CHUNK = 256 * 1024
+
+
+def read_peak_rss(pid):
+    """Pico de RSS (VmHWM) do processo em MB"""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def multipart_body(size_bytes, boundary):
+    """Gera o corpo multipart em blocos, sem materializar o arquivo"""
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="foto.jpg"\r\n'
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode()
+    # Cabeçalho JPEG válido seguido de lixo
+    yield b"\xff\xd8\xff\xe0"
+    block = os.urandom(CHUNK)
+    sent = 4
+    while sent < size_bytes:
+        piece = block[:min(CHUNK, size_bytes - sent)]
+        sent += len(piece)
+        yield piece
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def send_upload(port, size_bytes, chunked, host):
+    boundary = uuid.uuid4().hex
+    headers = {
+        "Host": host,
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+    }
+    if not chunked:
+        overhead = sum(len(part) for part in multipart_body(0, boundary))
+        headers["Content-Length"] = str(size_bytes + overhead - 4)
+
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    start = time.perf_counter()
+    try:
+        connection.request(
+            "POST", f"/api/v1/register-employee/benchmark-{boundary[:8]}",
+            body=multipart_body(size_bytes, boundary),
+            headers=headers,
+            encode_chunked=chunked
+        )
+        response = connection.getresponse()
+        status = response.status
+        response.read()
+    except (BrokenPipeError, ConnectionResetError):
+        # O servidor respondeu e fechou a conexão antes de receber tudo
+        status = "conexão encerrada pelo servidor"
+    finally:
+        connection.close()
+    return status, time.perf_counter() - start
+
+
+def wait_for_server(port, host, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health", headers={"Host": host})
+            connection.getresponse().read()
+            connection.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_scenario(label, size_bytes, chunked, port, host):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    try:
+        if not wait_for_server(port, host):
+            print(f"❌ Servidor não subiu para o cenário {label}")
+            return
+        baseline = read_peak_rss(server.pid)
+        status, elapsed = send_upload(port, size_bytes, chunked, host)
+        time.sleep(0.2)
+        peak = read_peak_rss(server.pid)
+        print(f"🧪 {label:<34} {size_bytes / MB:6.0f}MB → {status} em {elapsed:.2f}s "
+              f"| pico RSS {peak:.0f}MB (+{peak - baseline:.0f}MB)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de memória do servidor com uploads grandes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--host", default="seudominio.com", help="Host aceito pelo TrustedHostMiddleware")
+    parser.add_argument("--valid-mb", type=float, default=5)
+    parser.add_argument("--oversized-mb", type=float, default=200)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("upload válido", int(args.valid_mb * MB), False),
+        ("grande com Content-Length", int(args.oversized_mb * MB), False),
+        ("grande em chunked (sem tamanho)", int(args.oversized_mb * MB), True),
+    ]
+    for label, size_bytes, chunked in scenarios:
+        run_scenario(label, size_bytes, chunked, args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
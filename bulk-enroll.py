@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+📥 Cadastro em massa de funcionários a partir de uma pasta ou .zip
+Cada arquivo {employee_id}.jpg vira foto + encoding no STORAGE_PATH, no
+mesmo formato do /register-employee. O relatório JSONL tem uma linha por
+arquivo (enrolled, failed ou skipped); rodar de novo com o mesmo relatório
+retoma de onde parou.
+
+Uso: python bulk-enroll.py fotos.zip [--workers 4] [--report logs/bulk.jsonl] [--retry-failed]
+
+Com a API rodando, os workers recarregam os encodings novos na próxima
+leitura (o mtime do arquivo muda); as buscas 1:N só os enxergam depois
+dessa leitura ou de um restart.
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.bulk_enrollment import BATCH_MAX_BYTES, BulkEnrollment  # noqa: E402
+from utils.encoding_codec import DISK_FORMATS  # noqa: E402
+from utils.engines import ENGINE_NAMES  # noqa: E402
+from utils.face_profiles import PROFILES  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cadastro em massa a partir de uma pasta ou .zip de {employee_id}.jpg")
+    parser.add_argument("source", help="Pasta ou arquivo .zip com as fotos")
+    parser.add_argument("--storage", default=os.getenv("STORAGE_PATH", "app/storage/employee_photos"))
+    parser.add_argument("--report", default=None, help="Relatório JSONL (padrão: logs/bulk_enroll_<data>.jsonl)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BULK_ENROLL_WORKERS", "2")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("BULK_ENROLL_BATCH_SIZE", "50")))
+    parser.add_argument("--batch-max-bytes", type=int,
+                        default=int(os.getenv("BULK_ENROLL_BATCH_MAX_BYTES", str(BATCH_MAX_BYTES))),
+                        help="Bytes de fotos retidas que também fecham o lote")
+    parser.add_argument("--profile", default=os.getenv("REGISTER_PROFILE", "accurate"), choices=sorted(PROFILES))
+    parser.add_argument("--engine", default=os.getenv("FACE_ENGINE", "dlib"), choices=ENGINE_NAMES)
+    parser.add_argument("--yunet-model", default=os.getenv("FACE_YUNET_MODEL") or None)
+    parser.add_argument("--sface-model", default=os.getenv("FACE_SFACE_MODEL") or None)
+    parser.add_argument("--onnx-model", default=os.getenv("FACE_ORT_RECOGNIZER_MODEL") or None,
+                        help="Reconhecedor do backend onnx (padrão: SFace int8)")
+    parser.add_argument("--disk-format", default=os.getenv("ENCODING_DISK_FORMAT", "list"), choices=DISK_FORMATS)
+    parser.add_argument("--model-version", default=os.getenv("ENCODING_MODEL_VERSION", ""),
+                        help="Grava {id}_encoding.{versão}.json (mesma versão da API)")
+    parser.add_argument("--tolerance", type=float, default=float(os.getenv("FACE_TOLERANCE", "0.6")))
+    parser.add_argument("--overwrite", action="store_true", help="Recadastrar quem já tem foto e encoding")
+    parser.add_argument("--retry-failed", action="store_true", help="Tentar de novo as falhas do relatório")
+    parser.add_argument("--quiet", action="store_true", help="Sem uma linha por arquivo, só o resumo")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ Não encontrado: {args.source}")
+        sys.exit(1)
+
+    report = args.report or os.path.join("logs", f"bulk_enroll_{datetime.now():%Y%m%d_%H%M%S}.jsonl")
+    enrollment = BulkEnrollment(
+        args.storage, report,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        batch_max_bytes=args.batch_max_bytes,
+        profile=args.profile,
+        engine_options={
+            "name": args.engine,
+            "yunet_model": args.yunet_model,
+            "sface_model": args.sface_model,
+            "ort_recognizer_model": args.onnx_model,
+            "ort_threads": int(os.getenv("FACE_ORT_THREADS", "0")),
+        },
+        overwrite=args.overwrite,
+        retry_failed=args.retry_failed,
+        tolerance=args.tolerance,
+        disk_format=args.disk_format,
+        min_dimension=int(os.getenv("MIN_IMAGE_DIMENSION", "50")),
+        max_pixels=int(os.getenv("MAX_IMAGE_PIXELS", "50000000")),
+        model_version=args.model_version
+    )
+
+    icons = {"enrolled": "✅", "failed": "❌", "skipped": "⏭️"}
+    done = [0]
+
+    def progress(entry):
+        done[0] += 1
+        if not args.quiet:
+            detail = entry.get("message") or entry.get("reason") or ""
+            print(f"{icons[entry['status']]} [{done[0]}] {entry['employee_id']} ({entry['file']}) {detail}".rstrip())
+
+    print(f"📥 {args.source} → {args.storage} | {args.workers} processos | motor {args.engine} | perfil {args.profile}")
+    print(f"📝 Relatório: {report}\n")
+    summary = enrollment.run(args.source, progress=progress)
+    print("\n" + json.dumps(summary, indent=2, ensure_ascii=False))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+🗃️ Worker dedicado do cadastro assíncrono
+Consome a mesma fila SQLite (JOB_QUEUE_PATH) da API. Com JOB_WORKERS=0 nos
+processos da API, os cadastros do RH rodam só aqui e a CPU da API fica
+para as batidas de ponto.
+
+Uso: python enrollment-worker.py [--workers 2]
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loguru import logger  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services.facial_service import facial_service  # noqa: E402
+from app.services.enrollment_jobs import enrollment_jobs  # noqa: E402
+from app.services.encoding_store import encoding_store  # noqa: E402
+
+
+async def run(workers):
+    # Matriz completa para a busca de duplicados (e calibração do int8) antes do primeiro job
+    encoding_store.load_all()
+    enrollment_jobs.start(facial_service, workers=workers)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await enrollment_jobs.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa os cadastros enfileirados em JOB_QUEUE_PATH")
+    parser.add_argument("--workers", type=int, default=max(1, settings.JOB_WORKERS), help="Cadastros simultâneos")
+    args = parser.parse_args()
+
+    if not facial_service.facial_recognition_available:
+        logger.warning("⚠️ Reconhecimento facial indisponível: os cadastros serão feitos em modo limitado")
+    try:
+        asyncio.run(run(args.workers))
+    except KeyboardInterrupt:
+        logger.info("👋 Worker de cadastro encerrado")
+
+
+if __name__ == "__main__":
+    main()
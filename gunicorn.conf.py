@@ -6,14 +6,25 @@ Otimizado para VPS KingHost com 4GB RAM
 
 import multiprocessing
 import os
+import sys
+import time
+
+# Os hooks importam utils/ do projeto (pré-carregamento e aquecimento dos modelos)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.warmup import (  # noqa: E402
+    preload_face_models, freeze_gc, warmup_inference,
+    record_request_latency, get_rss_bytes
+)
 
 # Configurações do servidor
 bind = "0.0.0.0:8000"
 workers = multiprocessing.cpu_count() * 2 + 1  # Fórmula recomendada
 worker_class = "sync"  # Para aplicações com CPU intensiva (reconhecimento facial)
 worker_connections = 1000
-max_requests = 1000  # Reinicia worker após N requests (previne memory leaks)
-max_requests_jitter = 50  # Adiciona variação aleatória ao max_requests
+# Reinicia worker após N requests (previne memory leaks). Os modelos e encodings
+# vivem no master (preload_app), então reciclar custa apenas o aquecimento do post_fork
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '500'))  # Variação aleatória
 
 # Timeouts
 timeout = 60  # Timeout para requests (reconhecimento facial pode demorar)
@@ -53,7 +64,6 @@ worker_tmp_dir = '/dev/shm'  # Usar RAM para arquivos temporários (se disponív
 if os.getenv('ENVIRONMENT') == 'production':
     workers = 4  # 4 workers para 4GB RAM
     worker_class = "sync"
-    max_requests = 500  # Menor para reciclar workers mais frequentemente
     timeout = 45  # Timeout menor em produção
 else:
     # Configurações de desenvolvimento
@@ -61,6 +71,9 @@ else:
     reload = True
     loglevel = 'debug'
 
+# Quantidade de processos visível para o motor facial (threads do ONNX Runtime por worker)
+os.environ.setdefault('WEB_CONCURRENCY', str(workers))
+
 # Funções de callback para monitoramento
 def on_starting(server):
     """Executado quando o master process inicia"""
@@ -81,15 +94,38 @@ def pre_fork(server, worker):
     server.log.info(f"🍴 Iniciando worker {worker.age}")
 
 def post_fork(server, worker):
-    """Executado após fork de cada worker"""
+    """Executado após fork de cada worker (antes de aceitar tráfego)"""
+    warmup_seconds = warmup_inference()
+    rss_mb = get_rss_bytes() // (1024 * 1024)
+    if warmup_seconds is not None:
+        server.log.info(f"🔥 Worker {worker.pid} aquecido em {warmup_seconds:.3f}s (RSS={rss_mb}MB)")
     server.log.info(f"✅ Worker {worker.pid} iniciado (worker {worker.age})")
 
 def pre_exec(server):
     """Executado antes de exec() durante reload"""
     server.log.info("🔄 Preparando reload...")
 
+def _preload_encoding_store(server):
+    """Carrega os encodings da API FastAPI no master (ignorado na versão Flask)"""
+    try:
+        from app.config import settings
+        from app.services.encoding_store import encoding_store
+    except ImportError:
+        return
+    if not settings.PRELOAD_ENCODINGS:
+        server.log.info("📦 PRELOAD_ENCODINGS=false: encodings lidos sob demanda em cada worker")
+        return
+    loaded = encoding_store.load_all()
+    server.log.info(f"📦 {loaded} encodings pré-carregados no master")
+
 def when_ready(server):
-    """Executado quando servidor está pronto para aceitar conexões"""
+    """Executado quando servidor está pronto para aceitar conexões (no master, antes do fork)"""
+    if preload_app:
+        preload_face_models()
+        _preload_encoding_store(server)
+        # Congelar depois de carregar tudo: as páginas ficam compartilhadas entre os workers
+        frozen = freeze_gc()
+        server.log.info(f"🧊 Master pronto para fork: {frozen} objetos congelados, RSS={get_rss_bytes() // (1024 * 1024)}MB")
     server.log.info("🎯 API pronta para receber requisições!")
     server.log.info("📚 Documentação: consulte README.md")
 
@@ -99,10 +135,17 @@ def worker_abort(worker):
 
 def pre_request(worker, req):
     """Executado antes de cada request"""
+    req.start_time = time.perf_counter()
     worker.log.debug(f"📨 {req.method} {req.path}")
 
 def post_request(worker, req, environ, resp):
     """Executado após cada request"""
+    elapsed = time.perf_counter() - getattr(req, 'start_time', time.perf_counter())
+    if record_request_latency(elapsed):
+        worker.log.info(
+            f"⏱️ Primeira requisição do worker {worker.pid}: {elapsed:.4f}s "
+            f"(RSS={get_rss_bytes() // (1024 * 1024)}MB)"
+        )
     worker.log.debug(f"📤 {req.method} {req.path} - {resp.status}")
 
 # Configurações SSL (para HTTPS com certificado)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+🔀 Re-encoding das fotos guardadas para uma versão nova de motor/modelo
+Grava {employee_id}_encoding.{versão}.json ao lado de cada encoding
+original, usando um pool de processos. Pode rodar com a API no ar e ser
+interrompido: rodar de novo refaz só o que falta (ou o que foi
+recadastrado depois).
+
+Uso: python reencode-encodings.py --version sface-int8 --engine onnx [--workers 4]
+
+Virada: com a migração concluída, configure o motor novo + ENCODING_MODEL_VERSION
+na API e reinicie; rode o comando mais uma vez para cobrir quem foi
+cadastrado entre o fim da migração e a virada.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.bulk_enrollment import employee_id_from_name  # noqa: E402
+from utils.encoding_codec import DISK_FORMATS  # noqa: E402
+from utils.encoding_migration import EncodingMigration  # noqa: E402
+from utils.engines import ENGINE_NAMES  # noqa: E402
+from utils.face_profiles import PROFILES  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula os encodings do STORAGE_PATH numa versão de modelo nova")
+    parser.add_argument("--version", required=True, help="Versão gravada no nome do arquivo (ENCODING_MODEL_VERSION)")
+    parser.add_argument("--storage", default=os.getenv("STORAGE_PATH", "app/storage/employee_photos"))
+    parser.add_argument("--report", default=None, help="Relatório JSONL (padrão: logs/reencode_<versão>.jsonl)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BULK_ENROLL_WORKERS", "2")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("BULK_ENROLL_BATCH_SIZE", "50")))
+    parser.add_argument("--profile", default=os.getenv("REGISTER_PROFILE", "accurate"), choices=sorted(PROFILES))
+    parser.add_argument("--engine", default=os.getenv("FACE_ENGINE", "dlib"), choices=ENGINE_NAMES)
+    parser.add_argument("--yunet-model", default=os.getenv("FACE_YUNET_MODEL") or None)
+    parser.add_argument("--sface-model", default=os.getenv("FACE_SFACE_MODEL") or None)
+    parser.add_argument("--onnx-model", default=os.getenv("FACE_ORT_RECOGNIZER_MODEL") or None,
+                        help="Reconhecedor do backend onnx (padrão: SFace int8)")
+    parser.add_argument("--disk-format", default=os.getenv("ENCODING_DISK_FORMAT", "list"), choices=DISK_FORMATS)
+    parser.add_argument("--tolerance", type=float, default=float(os.getenv("FACE_TOLERANCE", "0.6")))
+    parser.add_argument("--force", action="store_true", help="Refazer também quem já tem a versão nova")
+    parser.add_argument("--retry-failed", action="store_true", help="Tentar de novo as falhas do relatório")
+    parser.add_argument("--quiet", action="store_true", help="Sem uma linha por foto, só o progresso e o resumo")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.storage):
+        print(f"❌ Pasta não encontrada: {args.storage}")
+        sys.exit(1)
+
+    report = args.report or os.path.join("logs", f"reencode_{args.version}.jsonl")
+    try:
+        migration = EncodingMigration(
+            args.storage, report, args.version,
+            force=args.force,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            profile=args.profile,
+            engine_options={
+                "name": args.engine,
+                "yunet_model": args.yunet_model,
+                "sface_model": args.sface_model,
+                "ort_recognizer_model": args.onnx_model,
+                "ort_threads": int(os.getenv("FACE_ORT_THREADS", "0")),
+            },
+            retry_failed=args.retry_failed,
+            tolerance=args.tolerance,
+            disk_format=args.disk_format,
+            min_dimension=int(os.getenv("MIN_IMAGE_DIMENSION", "50")),
+            max_pixels=int(os.getenv("MAX_IMAGE_PIXELS", "50000000"))
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    total = sum(1 for name in os.listdir(args.storage) if employee_id_from_name(name))
+    icons = {"reencoded": "✅", "failed": "❌", "skipped": "⏭️"}
+    done, encoded, start = [0], [0], time.perf_counter()
+
+    def progress(entry):
+        done[0] += 1
+        if entry["status"] != "skipped":
+            encoded[0] += 1
+        if not args.quiet:
+            detail = entry.get("message") or entry.get("reason") or ""
+            print(f"{icons[entry['status']]} [{done[0]}/{total}] {entry['employee_id']} {detail}".rstrip())
+        elif done[0] % 100 == 0 or done[0] == total:
+            # Taxa e previsão contam só as fotos processadas (as puladas não custam)
+            rate = encoded[0] / max(time.perf_counter() - start, 1e-9)
+            eta = (total - done[0]) / rate if rate else 0
+            print(f"⏳ {done[0]}/{total} | {rate:.1f} fotos/s | faltam ~{eta:.0f}s")
+
+    print(f"🔀 {args.storage} → versão {args.version} | {args.workers} processos | motor {args.engine} | perfil {args.profile}")
+    print(f"📝 Relatório: {report} ({total} fotos)\n")
+    summary = migration.run(progress=progress)
+    summary["finished_at"] = datetime.now().isoformat()
+    print("\n" + json.dumps(summary, indent=2, ensure_ascii=False))
+    print(f"\n➡️ Para virar: ENCODING_MODEL_VERSION={args.version} e FACE_ENGINE={args.engine} na API")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
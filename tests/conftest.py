@@ -0,0 +1,59 @@
+"""
+Configuração comum dos testes
+
+Os módulos de app/ leem as Settings na importação, então o ambiente é
+preparado aqui, antes de qualquer import da aplicação: motor mock (sem
+dlib nem modelos) e pastas temporárias para fotos, encodings e fila.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_WORKDIR = tempfile.mkdtemp(prefix="api-facial-tests-")
+os.environ.update(
+    FACE_ENGINE="mock",
+    DEBUG="false",
+    STORAGE_PATH=os.path.join(_WORKDIR, "employee_photos"),
+    TEMP_PATH=os.path.join(_WORKDIR, "temp"),
+    JOB_QUEUE_PATH=os.path.join(_WORKDIR, "jobs.db"),
+    JOB_WORKERS="0",
+    QUALITY_GATE_ENABLED="false",
+    FACE_QUALITY_GATE_ENABLED="false",
+    TEMPLATE_REFINE_ENABLED="false",
+)
+os.makedirs(os.environ["STORAGE_PATH"], exist_ok=True)
+os.makedirs(os.environ["TEMP_PATH"], exist_ok=True)
+
+import pytest  # noqa: E402
+
+
+def make_image(seed, size=256, fmt=".jpg"):
+    """Imagem sintética com textura suave (o motor mock a trata como rosto)"""
+    np = pytest.importorskip("numpy")
+    cv2 = pytest.importorskip("cv2")
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    image = cv2.resize(small, (size, size), interpolation=cv2.INTER_CUBIC)
+    ok, encoded = cv2.imencode(fmt, image)
+    assert ok
+    return encoded.tobytes()
+
+
+@pytest.fixture
+def image_factory():
+    return make_image
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    """Cliente da API FastAPI sem os eventos de inicialização (sem pré-carga nem workers)"""
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    # Host aceito pelo TrustedHostMiddleware fora do modo DEBUG
+    return TestClient(app, base_url="http://api.seudominio.com")
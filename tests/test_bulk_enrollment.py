@@ -0,0 +1,64 @@
+"""Cadastro em massa: retomada pelo relatório e memória retida pelos lotes"""
+
+import json
+
+import pytest
+
+from conftest import make_image
+from utils.bulk_enrollment import BulkEnrollment, read_report
+
+
+def write_report(path, entries):
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def test_duplicate_in_source_skip_is_not_terminal(tmp_path):
+    report = tmp_path / "report.jsonl"
+    write_report(report, [
+        {"employee_id": "a", "status": "skipped", "reason": "duplicate_in_source"},  # Antes do resultado da 1ª
+        {"employee_id": "b", "status": "enrolled"},
+        {"employee_id": "b", "status": "skipped", "reason": "duplicate_in_source"},
+        {"employee_id": "c", "status": "skipped", "reason": "already_enrolled"},
+    ])
+    assert read_report(str(report)) == {"b": "enrolled", "c": "skipped"}
+
+
+def test_interrupted_duplicate_is_processed_on_resume(tmp_path):
+    pytest.importorskip("cv2")
+    source, storage = tmp_path / "fotos", tmp_path / "storage"
+    source.mkdir()
+    (source / "a.jpg").write_bytes(make_image(60))
+    report = tmp_path / "report.jsonl"
+    # Execução interrompida: só o pulo do duplicado chegou ao relatório
+    write_report(report, [{"employee_id": "a", "status": "skipped", "reason": "duplicate_in_source"}])
+
+    summary = BulkEnrollment(str(storage), str(report), workers=1, engine_options={"name": "mock"}).run(str(source))
+    assert summary["enrolled"] == 1
+    assert (storage / "a_encoding.json").exists()
+
+
+def test_batches_keep_only_successful_photos_and_are_bounded_by_bytes(tmp_path, monkeypatch):
+    pytest.importorskip("cv2")
+    source = tmp_path / "fotos"
+    source.mkdir()
+    for index in range(3):
+        (source / f"ok{index}.jpg").write_bytes(make_image(61 + index))
+    (source / "bad.jpg").write_bytes(b"not an image" * 1000)
+
+    enrollment = BulkEnrollment(str(tmp_path / "storage"), str(tmp_path / "report.jsonl"), workers=1,
+                                batch_size=50, batch_max_bytes=1, engine_options={"name": "mock"})
+    commits = []
+    commit = enrollment._commit
+
+    def spy_commit(batch, report):
+        commits.append([(entry["status"], image_bytes is not None) for entry, image_bytes, _ in batch])
+        commit(batch, report)
+
+    monkeypatch.setattr(enrollment, "_commit", spy_commit)
+    summary = enrollment.run(str(source))
+    assert (summary["enrolled"], summary["failed"]) == (3, 1)
+    # Falha sem bytes retidos; cada sucesso passa do limite de bytes e fecha o lote
+    assert all(has_bytes == (status == "enrolled") for batch in commits for status, has_bytes in batch)
+    assert all(sum(has_bytes for _, has_bytes in batch) <= 1 for batch in commits)
@@ -0,0 +1,84 @@
+"""Cadastro duplicado: busca no cadastro e auditoria em blocos"""
+
+import os
+import json
+import asyncio
+import itertools
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import make_image  # noqa: E402
+from utils.duplicate_audit import audit_duplicates, duplicate_pairs  # noqa: E402
+
+
+def brute_force_pairs(matrix, max_distance, metric):
+    pairs = []
+    for i, j in itertools.combinations(range(len(matrix)), 2):
+        a, b = matrix[i], matrix[j]
+        if metric == "cosine":
+            distance = 1.0 - float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+        else:
+            distance = float(np.linalg.norm(a - b))
+        if distance <= max_distance:
+            pairs.append((i, j, distance))
+    return pairs
+
+
+@pytest.mark.parametrize("metric,max_distance", [("euclidean", 0.3), ("cosine", 0.05)])
+@pytest.mark.parametrize("block_rows", [1, 7, 64, 1024])
+def test_blocked_pairs_match_brute_force(metric, max_distance, block_rows):
+    rng = np.random.default_rng(5)
+    matrix = rng.normal(0, 0.1, (60, 128)).astype(np.float32)
+    # Duplicados plantados, inclusive atravessando a fronteira entre blocos
+    for source, target in ((0, 6), (3, 50), (10, 11), (50, 59)):
+        matrix[target] = matrix[source] + rng.normal(0, 0.005, 128)
+
+    expected = brute_force_pairs(matrix.astype(np.float64), max_distance, metric)
+    result = sorted(duplicate_pairs(matrix, max_distance, metric, block_rows))
+    assert [(i, j) for i, j, _ in result] == [(i, j) for i, j, _ in expected]
+    assert np.allclose([d for _, _, d in result], [d for _, _, d in expected], atol=1e-4)
+    assert len(expected) >= 4
+
+
+def test_audit_groups_pairs_per_engine(tmp_path):
+    rng = np.random.default_rng(6)
+    base = rng.normal(0, 0.1, (4, 128))
+    records = {
+        "a": (base[0], "dlib"), "b": (base[0] + 0.001, "dlib"), "c": (base[0] + 0.002, "dlib"),
+        "d": (base[1], "dlib"),
+        "e": (base[1] + 0.001, "opencv"),  # Mesmo rosto de "d", mas motor diferente: não compara
+        "f": (base[2], "opencv"), "g": (base[2] + 0.001, "opencv"),
+    }
+    for employee_id, (encoding, engine) in records.items():
+        with open(tmp_path / f"{employee_id}_encoding.json", "w") as f:
+            json.dump({"encoding": list(encoding), "engine": engine}, f)
+
+    result = audit_duplicates(str(tmp_path), 0.1, block_rows=2)
+    pairs = {(pair["employee_a"], pair["employee_b"]) for pair in result["pairs"]}
+    assert pairs == {("a", "b"), ("a", "c"), ("b", "c"), ("f", "g")}
+    assert result["groups"] == [["a", "b", "c"], ["f", "g"]]
+    assert result["employees"] == {"dlib": 4, "opencv": 3}
+
+
+def test_registration_catches_duplicate_written_by_another_process(monkeypatch):
+    pytest.importorskip("cv2")
+    from app.config import settings
+    from app.services.encoding_store import encoding_store
+    from app.services.facial_service import facial_service
+    from utils.face_pipeline import FaceJob
+
+    monkeypatch.setattr(settings, "DUPLICATE_CHECK_MODE", "reject")
+    image = make_image(40)
+    job = asyncio.run(facial_service._run_face_job(FaceJob(image_bytes=image)))
+
+    # Outro processo cadastrou o mesmo rosto: só o arquivo existe, este cache não o conhece
+    with open(os.path.join(settings.STORAGE_PATH, "dup-original_encoding.json"), "w") as f:
+        json.dump({"employee_id": "dup-original", "encoding": [float(v) for v in job.encodings[0]],
+                   "engine": facial_service.engine.name, "mode": "real"}, f)
+    assert "dup-original" not in dict(encoding_store.search(job.encodings[0], k=50))
+
+    ok, message = asyncio.run(facial_service.save_employee_photo("dup-copy", image))
+    assert not ok
+    assert "dup-original" in message
@@ -0,0 +1,127 @@
+"""Retomada do re-encoding (reencode-encodings.py): o que é refeito e o que é pulado"""
+
+import os
+import json
+
+import pytest
+
+from conftest import make_image
+from utils.bulk_enrollment import read_report
+from utils.encoding_migration import EncodingMigration
+
+VERSION = "v2"
+
+
+def touch(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    path = tmp_path / "photos"
+    path.mkdir()
+    return path
+
+
+def migration(storage, tmp_path, **kwargs):
+    return EncodingMigration(str(storage), str(tmp_path / "report.jsonl"), VERSION,
+                             engine_options={"name": "mock"}, workers=1, **kwargs)
+
+
+def add_employee(storage, employee_id, photo_mtime, migrated_mtime=None):
+    """Foto + encoding original; com migrated_mtime, também a versão nova"""
+    photo = storage / f"{employee_id}.jpg"
+    photo.write_bytes(b"jpg")
+    (storage / f"{employee_id}_encoding.json").write_text(json.dumps({"encoding": [0.0] * 128, "engine": "dlib"}))
+    touch(photo, photo_mtime)
+    if migrated_mtime is not None:
+        migrated = storage / f"{employee_id}_encoding.{VERSION}.json"
+        migrated.write_text("{}")
+        touch(migrated, migrated_mtime)
+
+
+def test_requires_model_version(storage, tmp_path):
+    with pytest.raises(ValueError):
+        EncodingMigration(str(storage), str(tmp_path / "report.jsonl"), "")
+
+
+def test_is_current_compares_photo_and_new_version(storage, tmp_path):
+    add_employee(storage, "pending", 1_000)
+    add_employee(storage, "done", 1_000, migrated_mtime=2_000)
+    add_employee(storage, "reregistered", 3_000, migrated_mtime=2_000)  # Foto trocada depois da migração
+    runner = migration(storage, tmp_path)
+    assert not runner._is_current("pending")
+    assert runner._is_current("done")
+    assert not runner._is_current("reregistered")
+    assert not runner._is_current("missing")
+
+
+def test_skip_reasons(storage, tmp_path):
+    add_employee(storage, "done", 1_000, migrated_mtime=2_000)
+    add_employee(storage, "pending", 1_000)
+    runner = migration(storage, tmp_path)
+    previous = {"pending": "failed", "done": "reencoded"}
+
+    assert runner._skip_reason("done", previous, {"done"}) == "duplicate_in_source"
+    assert runner._skip_reason("done", previous, set()) == "already_migrated"
+    assert runner._skip_reason("pending", previous, set()) == "already_in_report"
+    assert runner._skip_reason("pending", {}, set()) is None
+    # Sucesso no relatório não basta: vale o arquivo (recadastro refaz)
+    add_employee(storage, "done", 3_000, migrated_mtime=2_000)
+    assert runner._skip_reason("done", previous, set()) is None
+
+
+def test_force_and_retry_failed(storage, tmp_path):
+    add_employee(storage, "done", 1_000, migrated_mtime=2_000)
+    add_employee(storage, "failed", 1_000)
+    previous = {"failed": "failed"}
+
+    forced = migration(storage, tmp_path, force=True)
+    assert forced._skip_reason("done", previous, set()) is None
+    assert forced._skip_reason("failed", previous, set()) == "already_in_report"
+
+    retry = migration(storage, tmp_path, retry_failed=True)
+    assert retry._skip_reason("failed", previous, set()) is None
+    assert retry._skip_reason("done", previous, set()) == "already_migrated"
+
+
+def test_rerun_only_redoes_changed_photos(storage, tmp_path):
+    pytest.importorskip("cv2")
+    for index, employee_id in enumerate(("a", "b")):
+        (storage / f"{employee_id}.jpg").write_bytes(make_image(30 + index))
+        (storage / f"{employee_id}_encoding.json").write_text(json.dumps({"engine": "dlib", "profile": "fast"}))
+
+    summary = migration(storage, tmp_path).run()
+    assert (summary["reencoded"], summary["skipped"]) == (2, 0)
+    migrated = json.loads((storage / f"a_encoding.{VERSION}.json").read_text())
+    assert (migrated["source"], migrated["model_version"]) == ("reencode", VERSION)
+    assert migrated["migrated_from"]["profile"] == "fast"
+
+    # Foto de "b" trocada depois da migração: só ela é refeita
+    photo = storage / "b.jpg"
+    touch(photo, os.stat(storage / f"b_encoding.{VERSION}.json").st_mtime_ns + 1_000_000)
+    summary = migration(storage, tmp_path).run()
+    assert (summary["reencoded"], summary["skipped"]) == (1, 1)
+    assert read_report(str(tmp_path / "report.jsonl")) == {"a": "skipped", "b": "reencoded"}
+
+
+def test_result_discarded_when_photo_changes_before_commit(storage, tmp_path):
+    add_employee(storage, "changed", 1_000)
+    add_employee(storage, "steady", 1_000)
+    runner = migration(storage, tmp_path)
+    versions = {employee_id: runner._source_version(employee_id) for employee_id in ("changed", "steady")}
+    touch(storage / "changed.jpg", 5_000)  # Recadastro entre a leitura e o fim do lote
+
+    result = {"encoding": [0.1] * 128, "face_location": [0, 1, 1, 0], "profile": "accurate", "engine": "mock"}
+    batch = [({"employee_id": employee_id, "status": "reencoded", "result": dict(result)}, None, versions[employee_id])
+             for employee_id in ("changed", "steady")]
+    with open(tmp_path / "report.jsonl", "a") as report:
+        runner._commit(batch, report)
+
+    assert [(entry["status"], entry.get("reason")) for entry, _, _ in batch] == [
+        ("skipped", "source_changed"), ("reencoded", None)
+    ]
+    assert not (storage / f"changed_encoding.{VERSION}.json").exists()
+    assert (storage / f"steady_encoding.{VERSION}.json").exists()
+    # A próxima execução refaz o item descartado
+    assert runner._skip_reason("changed", read_report(str(tmp_path / "report.jsonl")), set()) is None
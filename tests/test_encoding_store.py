@@ -0,0 +1,179 @@
+"""Matriz de encodings em memória: busca 1:N, cache por mtime e quantização"""
+
+import os
+import json
+import asyncio
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services.encoding_store import EncodingStore  # noqa: E402
+from utils.encoding_codec import INT8_CALIBRATION_ROWS, QuantizedMatrix  # noqa: E402
+
+
+def random_encodings(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 0.1, (count, 128))
+
+
+def write_encoding(store, employee_id, encoding, engine="dlib"):
+    """Grava o arquivo direto no disco, como outro processo faria"""
+    path = store.write_path(employee_id)
+    with open(path, "w") as f:
+        json.dump({"employee_id": employee_id, "encoding": [float(v) for v in encoding], "engine": engine}, f)
+    return path
+
+
+def fill(store, encodings, engine="dlib", prefix="emp"):
+    for i, encoding in enumerate(encodings):
+        asyncio.run(store.save(f"{prefix}{i}", {"encoding": list(encoding), "engine": engine}))
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32", "float16", "int8"])
+def test_search_matches_brute_force(tmp_path, dtype):
+    encodings = random_encodings(200)
+    for i, encoding in enumerate(encodings):
+        write_encoding(EncodingStore(str(tmp_path)), f"emp{i}", encoding)
+    store = EncodingStore(str(tmp_path), matrix_dtype=dtype, shortlist=20)
+    assert store.load_all() == 200
+
+    query = encodings[17] + 0.01
+    distances = np.linalg.norm(encodings - query, axis=1)
+    expected = [f"emp{i}" for i in np.argsort(distances)[:5]]
+    result = store.search(query, k=5)
+    assert [employee_id for employee_id, _ in result] == expected
+    # Reordenação com os vetores exatos: distância igual à força bruta
+    assert result[0][1] == pytest.approx(distances[17], abs=1e-5)
+
+
+def test_search_masks_other_engines_before_shortlist(tmp_path):
+    store = EncodingStore(str(tmp_path), shortlist=5)
+    encodings = random_encodings(40)
+    fill(store, encodings[:20], engine="opencv", prefix="cv")
+    # Os mais próximos da consulta são todos de outro motor
+    fill(store, encodings[:20] + 1e-4, engine="dlib", prefix="dlib")
+
+    result = store.search(encodings[3], k=3, engine="opencv")
+    assert [employee_id for employee_id, _ in result][0] == "cv3"
+    assert len(result) == 3 and all(employee_id.startswith("cv") for employee_id, _ in result)
+    assert store.search(encodings[3], engine="onnx") == []
+
+
+def test_removed_rows_are_not_returned(tmp_path):
+    store = EncodingStore(str(tmp_path))
+    encodings = random_encodings(10)
+    fill(store, encodings)
+    store.remove("emp4")
+    assert "emp4" not in [employee_id for employee_id, _ in store.search(encodings[4], k=10)]
+
+
+def test_get_reloads_file_changed_by_another_process(tmp_path):
+    store = EncodingStore(str(tmp_path))
+    first, second = random_encodings(2)
+    asyncio.run(store.save("emp", {"encoding": list(first)}))
+    assert np.allclose(store.get("emp")["encoding"], first)
+
+    path = write_encoding(store, "emp", second)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # mtime diferente mesmo no mesmo tick
+    assert np.allclose(store.get("emp")["encoding"], second)
+    assert store.search(second, k=1)[0][0] == "emp"
+
+    os.remove(path)
+    assert store.get("emp") is None
+    assert store.search(second) == []
+
+
+@pytest.mark.parametrize("dtype,tolerance", [("float32", 1e-6), ("float16", 1e-3), ("int8", 2e-3)])
+def test_quantization_round_trip(dtype, tolerance):
+    encodings = random_encodings(10)
+    matrix = QuantizedMatrix(dtype, 128)
+    matrix.calibrate(encodings)
+    matrix.grow(10)
+    for row, encoding in enumerate(encodings):
+        matrix.set_row(row, encoding)
+    for row, encoding in enumerate(encodings):
+        assert np.abs(matrix.row(row) - encoding).max() < tolerance
+    expected = np.sum((encodings - encodings[0]) ** 2, axis=1)
+    assert np.allclose(matrix.squared_distances(encodings[0]), expected, atol=tolerance * 10)
+
+
+def test_int8_calibrates_once_without_preload_and_requantizes():
+    # Encodings com faixa bem menor que a padrão (±0.5): sem calibrar, poucos níveis
+    encodings = random_encodings(INT8_CALIBRATION_ROWS, seed=1) * 0.05
+    matrix = QuantizedMatrix("int8", 128)
+    matrix.grow(INT8_CALIBRATION_ROWS)
+    for row, encoding in enumerate(encodings[:-1]):
+        matrix.set_row(row, encoding)
+    assert not matrix.calibrated
+    coarse = np.abs(matrix.row(0) - encodings[0]).max()
+
+    matrix.set_row(INT8_CALIBRATION_ROWS - 1, encodings[-1])
+    assert matrix.calibrated
+    # Todas as linhas anteriores foram requantizadas na escala nova
+    errors = [np.abs(matrix.row(row) - encoding).max() for row, encoding in enumerate(encodings)]
+    assert max(errors) < coarse / 4
+    assert not matrix.calibrate(encodings * 10)  # Só uma vez
+
+
+def test_second_load_all_keeps_int8_scale(tmp_path):
+    encodings = random_encodings(20)
+    for i, encoding in enumerate(encodings):
+        write_encoding(EncodingStore(str(tmp_path)), f"emp{i}", encoding)
+    store = EncodingStore(str(tmp_path), matrix_dtype="int8")
+    store.load_all()
+    scale = store._matrix.scale.copy()
+
+    write_encoding(store, "big", encodings[0] * 3)
+    store.load_all()
+    assert np.array_equal(store._matrix.scale, scale)
+    assert store.stats()["int8_calibrated"] is True
+    assert store.search(encodings[5], k=1)[0][0] == "emp5"
+
+
+def test_int8_calibrated_by_load_all_requantizes_earlier_saves(tmp_path):
+    store = EncodingStore(str(tmp_path), matrix_dtype="int8")
+    encodings = random_encodings(10, seed=2) * 0.05
+    fill(store, encodings[:1], prefix="early")  # Gravado antes do pré-carregamento (escala padrão)
+    for i, encoding in enumerate(encodings[1:]):
+        write_encoding(store, f"emp{i}", encoding)
+    store.load_all()
+    assert store._matrix.calibrated
+    assert np.abs(store._matrix.row(store._rows["early0"]) - encodings[0]).max() < 1e-3
+
+
+def test_conditional_save_refuses_when_file_changed(tmp_path):
+    store = EncodingStore(str(tmp_path))
+    first, second, refined = random_encodings(3)
+    asyncio.run(store.save("emp", {"encoding": list(first), "created_at": "t1"}))
+
+    def unchanged(data):
+        return data is not None and data["created_at"] == "t1"
+
+    assert asyncio.run(store.save("emp", {"encoding": list(refined), "created_at": "t1"}, only_if=unchanged))
+    # Recadastro gravado por outro processo: a troca condicional não o sobrescreve
+    with open(store.write_path("emp"), "w") as f:
+        json.dump({"encoding": list(second), "created_at": "t2"}, f)
+    assert asyncio.run(store.save("emp", {"encoding": list(refined), "created_at": "t1"}, only_if=unchanged)) is None
+    assert store.get("emp")["created_at"] == "t2"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_sync_picks_up_files_from_other_processes(tmp_path):
+    store = EncodingStore(str(tmp_path))
+    encodings = random_encodings(3)
+    fill(store, encodings[:1])
+    write_encoding(store, "external", encodings[1])
+    assert [employee_id for employee_id, _ in store.search(encodings[1], k=1)] == ["emp0"]
+
+    assert store.sync() == 1
+    assert store.search(encodings[1], k=1)[0][0] == "external"
+    assert store.sync() == 0  # Nada mudou: nenhum arquivo relido
+
+    path = write_encoding(store, "external", encodings[2])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    os.remove(store.write_path("emp0"))
+    assert store.sync() == 2
+    assert [employee_id for employee_id, _ in store.search(encodings[2], k=5)] == ["external"]
@@ -0,0 +1,140 @@
+"""
+Conformidade dos motores faciais com a interface FaceEngine
+
+Roda para cada motor que carrega neste host (dlib, opencv e onnx exigem as
+dependências e os modelos; mock e simulated sempre carregam).
+"""
+
+import asyncio
+
+import pytest
+
+from conftest import make_image
+from utils.engines import ENGINE_NAMES, EngineUnavailable, configure_engine, create_engine, get_engine
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+
+def _load(name):
+    try:
+        return create_engine(name)
+    except (ImportError, EngineUnavailable) as e:
+        pytest.skip(f"Motor {name} indisponível: {e}")
+
+
+@pytest.fixture(params=ENGINE_NAMES)
+def engine(request):
+    return _load(request.param)
+
+
+def _decoded(engine, seed):
+    return engine.decode(make_image(seed, size=320))
+
+
+def _one_face(engine, rgb):
+    boxes = engine.detect(rgb)
+    if not boxes:
+        pytest.skip(f"{engine.name} não vê rosto nas imagens sintéticas")
+    return boxes[:1]
+
+
+def test_decode_contract(engine):
+    rgb = _decoded(engine, 1)
+    assert tuple(rgb.shape) == (320, 320, 3)
+    if not engine.simulated:
+        assert isinstance(rgb, np.ndarray) and rgb.dtype == np.uint8
+    assert engine.decode(b"nao e uma imagem") is None
+
+
+def test_detect_contract(engine):
+    rgb = _decoded(engine, 2)
+    for box in engine.detect(rgb):
+        top, right, bottom, left = box
+        assert all(int(v) == v for v in box)
+        assert 0 <= top < bottom <= rgb.shape[0] and 0 <= left < right <= rgb.shape[1]
+
+
+def test_landmarks_contract(engine):
+    rgb = _decoded(engine, 3)
+    boxes = _one_face(engine, rgb)
+    landmarks = engine.landmarks(rgb, boxes)
+    assert len(landmarks) == 1
+    for feature in ("left_eye", "right_eye", "nose_tip"):
+        assert landmarks[0][feature]
+
+
+def test_encode_contract(engine):
+    rgb = _decoded(engine, 4)
+    boxes = _one_face(engine, rgb)
+    encodings = engine.encode(rgb, boxes)
+    assert len(encodings) == 1
+    vector = np.asarray(encodings[0], dtype=np.float64)
+    assert vector.shape == (engine.embedding_size,)
+    assert np.all(np.isfinite(vector))
+    if not engine.simulated:
+        assert isinstance(encodings[0], np.ndarray) and encodings[0].dtype.kind == "f"
+    # Determinístico: a mesma imagem gera o mesmo encoding
+    assert np.allclose(vector, np.asarray(engine.encode(rgb, boxes)[0], dtype=np.float64))
+
+
+def test_distance_contract(engine):
+    vectors = []
+    for seed in (5, 6, 7):
+        rgb = _decoded(engine, seed)
+        vectors.append(engine.encode(rgb, _one_face(engine, rgb))[0])
+    a, b, c = vectors
+
+    distances = np.asarray(engine.distance([b, c], a), dtype=np.float64)
+    assert distances.shape == (2,)
+    assert np.all(distances >= 0)
+    assert float(engine.distance([a], a)[0]) == pytest.approx(0.0, abs=1e-6)
+    assert float(engine.distance([a], b)[0]) == pytest.approx(float(engine.distance([b], a)[0]), abs=1e-6)
+    assert len(engine.distance([], a)) == 0
+
+
+def test_same_face_closer_than_different_face(engine):
+    image = make_image(8, size=320)
+    reference = engine.decode(image)
+    box = _one_face(engine, reference)
+    reference_encoding = engine.encode(reference, box)[0]
+
+    if engine.simulated:
+        # Sem decodificação real: "mesmo rosto" é a mesma foto
+        same = engine.decode(image)
+    else:
+        # A mesma foto recomprimida com perda
+        ok, encoded = cv2.imencode(".jpg", cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR),
+                                   [cv2.IMWRITE_JPEG_QUALITY, 70])
+        assert ok
+        same = engine.decode(encoded.tobytes())
+    different = _decoded(engine, 9)
+
+    same_distance = engine.distance([engine.encode(same, _one_face(engine, same))[0]], reference_encoding)[0]
+    different_distance = engine.distance([engine.encode(different, _one_face(engine, different))[0]], reference_encoding)[0]
+    assert same_distance < different_distance
+    assert same_distance <= engine.default_tolerance < different_distance
+
+
+def test_limited_mode_uses_the_same_service_flow(monkeypatch):
+    from app.services.facial_service import facial_service
+    from app.services.encoding_store import encoding_store
+
+    simulated = create_engine("simulated")
+    previous = get_engine()
+    monkeypatch.setattr(facial_service, "engine", simulated)
+    configure_engine(simulated)
+    try:
+        image = make_image(10)
+        ok, _ = asyncio.run(facial_service.save_employee_photo("limited-1", image))
+        assert ok
+        stored = encoding_store.get("limited-1")
+        assert (stored["mode"], stored["engine"]) == ("simulated", "simulated")
+
+        assert asyncio.run(facial_service.verify_face("limited-1", image))[0]
+        assert not asyncio.run(facial_service.verify_face("limited-1", make_image(11)))[0]
+    finally:
+        configure_engine(previous)
+        monkeypatch.setattr(facial_service, "engine", previous)
+    # Template simulado nunca é comparado com um motor real
+    assert asyncio.run(facial_service.verify_face("limited-1", image))[2] == "engine_mismatch"
@@ -0,0 +1,97 @@
+"""Cadastro assíncrono: validação do callback_url (SSRF) e limpeza da fila"""
+
+import socket
+import asyncio
+import threading
+
+import pytest
+
+from app.config import settings
+from app.services import enrollment_jobs as jobs_module
+from app.services.enrollment_jobs import EnrollmentJobRunner, validate_callback_url
+from utils.job_queue import JobQueue
+
+
+@pytest.fixture
+def resolve(monkeypatch):
+    """DNS falso: host → lista de endereços"""
+    table = {}
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host not in table:
+            raise socket.gaierror("unknown host")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port or 0)) for address in table[host]]
+
+    monkeypatch.setattr(jobs_module.socket, "getaddrinfo", getaddrinfo)
+    monkeypatch.setattr(settings, "JOB_CALLBACK_ALLOWED_HOSTS", "")
+    return table
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/hook",
+    "http://localhost:8000/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/hook",
+    "http://192.168.1.10/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://internal.empresa.com/hook",
+])
+def test_internal_callbacks_are_refused_by_default(resolve, url):
+    resolve.update({
+        "127.0.0.1": ["127.0.0.1"], "localhost": ["127.0.0.1"], "169.254.169.254": ["169.254.169.254"],
+        "10.0.0.5": ["10.0.0.5"], "192.168.1.10": ["192.168.1.10"], "::1": ["::1"],
+        "::ffff:127.0.0.1": ["::ffff:127.0.0.1"],
+        "internal.empresa.com": ["203.0.113.7", "10.1.2.3"],  # Um dos endereços é interno
+    })
+    with pytest.raises(ValueError):
+        validate_callback_url(url)
+
+
+def test_public_callback_is_accepted(resolve):
+    resolve["rh.empresa.com"] = ["93.184.216.34"]
+    validate_callback_url("https://rh.empresa.com/hooks/facial")
+
+
+@pytest.mark.parametrize("url", ["ftp://rh.empresa.com/x", "https:///sem-host", "https://nao-existe.invalid/x"])
+def test_invalid_callbacks_are_refused(resolve, url):
+    with pytest.raises(ValueError):
+        validate_callback_url(url)
+
+
+def test_allowlist_is_exclusive_and_permits_internal_hosts(resolve, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_CALLBACK_ALLOWED_HOSTS", "hooks.intranet, rh.empresa.com")
+    resolve.update({"hooks.intranet": ["10.0.0.9"], "outro.com": ["93.184.216.34"]})
+    validate_callback_url("http://hooks.intranet/cb")  # Interno, mas listado
+    with pytest.raises(ValueError):
+        validate_callback_url("https://outro.com/cb")
+
+
+def test_callback_revalidated_before_sending(resolve, tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    runner = EnrollmentJobRunner(queue)
+    job_id = queue.enqueue("register", employee_id="a", callback_url="http://rebind.example/cb")
+    resolve["rebind.example"] = ["127.0.0.1"]  # DNS passou a apontar para a própria máquina
+
+    asyncio.run(runner._send_callback(job_id, "http://rebind.example/cb"))
+    assert queue.get(job_id)["callback_status"] == "refused"
+
+
+def test_purge_runs_off_the_event_loop(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    runner = EnrollmentJobRunner(queue)
+    threads = []
+
+    def purge(max_age_seconds):
+        threads.append(threading.current_thread())
+        return 0
+
+    monkeypatch.setattr(queue, "purge", purge)
+
+    async def scenario():
+        await runner._purge_if_due()
+        await runner._purge_if_due()  # Menos de uma hora depois: não roda de novo
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 1 and threads[0] is not loop_thread
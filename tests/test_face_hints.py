@@ -0,0 +1,60 @@
+"""Validação das dicas de caixa enviadas pelo cliente"""
+
+import pytest
+
+from utils.face_hints import HintValidator, box_iou, landmarks_look_like_face, parse_face_box
+from utils.engines import get_engine
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+FACE = (100, 300, 300, 100)          # Região com textura (o motor mock a trata como rosto)
+
+
+def scene():
+    """Fundo liso 640x480 com uma única região texturizada"""
+    rgb = np.full((480, 640, 3), 128, dtype=np.uint8)
+    rng = np.random.default_rng(3)
+    texture = cv2.resize(rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8), (200, 200), interpolation=cv2.INTER_CUBIC)
+    top, right, bottom, left = FACE
+    rgb[top:bottom, left:right] = texture
+    return rgb
+
+
+def test_box_iou():
+    assert box_iou(FACE, FACE) == 1.0
+    assert box_iou(FACE, (400, 600, 460, 500)) == 0.0
+    assert box_iou((0, 10, 10, 0), (0, 20, 10, 10)) == 0.0
+    assert box_iou((0, 10, 10, 0), (0, 10, 10, 5)) == 0.5
+
+
+def test_hint_on_face_is_accepted():
+    assert HintValidator().check(scene(), FACE)
+
+
+@pytest.mark.parametrize("box", [
+    (300, 600, 460, 440),             # Fundo liso no canto
+    (20, 620, 90, 540),               # Faixa do topo, longe do rosto
+])
+def test_off_face_box_is_rejected(box):
+    rgb = scene()
+    # A geometria dos landmarks sozinha aceitaria a caixa
+    assert landmarks_look_like_face(get_engine().landmarks(rgb, [box])[0], box)
+    validator = HintValidator()
+    assert not validator.check(rgb, box)
+    assert validator.stats()["rejected"] == 1
+
+
+def test_tiny_box_is_rejected_without_detection():
+    assert not HintValidator().check(scene(), (100, 110, 110, 100))
+
+
+def test_pipeline_falls_back_to_detection_for_off_face_hint():
+    from utils.face_pipeline import FaceJob, run_inline
+
+    ok, encoded = cv2.imencode(".png", scene())
+    assert ok
+    job = run_inline(FaceJob(image_bytes=encoded.tobytes(), check_quality=False, use_prefilter=False,
+                             face_hint=parse_face_box("440,300,160,160")))
+    assert job.metadata["face_hint"] == "rejected"
+    assert job.locations and job.locations[0] != (300, 600, 460, 440)
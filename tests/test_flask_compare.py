@@ -0,0 +1,82 @@
+"""API Flask (app.py): /api/compare no modo lote ("captured_images")"""
+
+import time
+import base64
+import importlib.util
+
+import pytest
+
+from conftest import ROOT, make_image
+
+pytest.importorskip("cv2")
+pytest.importorskip("flask_cors")
+
+
+@pytest.fixture(scope="module")
+def client():
+    # app.py divide o nome com o pacote app/ (FastAPI): carregado pelo caminho
+    spec = importlib.util.spec_from_file_location("flask_app", f"{ROOT}/app.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app.test_client()
+
+
+def data_url(image_bytes):
+    return "data:image/jpeg;base64," + base64.b64encode(image_bytes).decode()
+
+
+def compare_many(client, reference, captures, headers=None):
+    return client.post("/api/compare", json={
+        "reference_image": data_url(reference),
+        "captured_images": captures,
+    }, headers=headers)
+
+
+def test_results_follow_request_order(client):
+    reference, other = make_image(90), make_image(91)
+    captures = [data_url(other), data_url(reference), data_url(other), data_url(reference)]
+    response = compare_many(client, reference, captures)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["success"]
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3]
+    assert [result["match"] for result in body["results"]] == [False, True, False, True]
+    assert body["matches"] == 2
+
+
+def test_capture_failures_become_result_lines(client):
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    reference = make_image(92)
+    _, flat = cv2.imencode(".jpg", np.full((256, 256, 3), 128, dtype=np.uint8))
+    captures = [
+        "data:image/jpeg;base64,bm90IGFuIGltYWdl",  # Base64 válido que não é imagem
+        data_url(flat.tobytes()),  # Sem rosto para o motor mock
+        data_url(reference),
+    ]
+    response = compare_many(client, reference, captures)
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert not results[0]["success"] and "processar" in results[0]["reason"]
+    assert not results[1]["success"] and "Nenhum rosto" in results[1]["reason"]
+    assert results[2]["success"] and results[2]["match"]
+
+
+def test_expired_deadline_returns_504(client):
+    reference = make_image(93)
+    expired = {"X-Request-Deadline": str(time.time() - 1)}
+    response = compare_many(client, reference, [data_url(reference)], headers=expired)
+    assert response.status_code == 504
+    body = response.get_json()
+    assert not body["success"]
+    assert "Tempo limite" in body["reason"]
+
+
+def test_batch_validation(client):
+    reference = data_url(make_image(94))
+    response = client.post("/api/compare", json={"reference_image": reference, "captured_images": []})
+    assert response.status_code == 400
+    response = client.post("/api/compare", json={"reference_image": reference, "captured_images": ["texto"]})
+    assert response.status_code == 400
+    assert "captured_images[0]" in response.get_json()["error"]
@@ -0,0 +1,65 @@
+"""Inspeção de imagens pelo cabeçalho (formato, dimensões e bombas)"""
+
+import struct
+import zlib
+
+import pytest
+
+from conftest import make_image
+from utils.image_inspector import ImageRejected, inspect_image, normalize_format, read_header, sniff_format
+
+
+def png_header(width, height):
+    """Só assinatura + IHDR: o suficiente para o inspetor, sem pixels"""
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr
+    return b"\x89PNG\r\n\x1a\n" + chunk + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+
+
+def jpeg_header(width, height, sof=0xC0):
+    """SOI + APP0 + SOF com as dimensões pedidas"""
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof_segment = bytes([0xFF, sof]) + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof_segment
+
+
+@pytest.mark.parametrize("fmt, expected", [(".jpg", "jpeg"), (".png", "png"), (".webp", "webp")])
+def test_reads_real_encoded_images(fmt, expected):
+    info = read_header(make_image(0, size=120, fmt=fmt))
+    assert info is not None
+    assert (info.format, info.width, info.height) == (expected, 120, 120)
+
+
+def test_reads_progressive_jpeg_sof():
+    info = read_header(jpeg_header(640, 480, sof=0xC2))
+    assert (info.format, info.width, info.height) == ("jpeg", 640, 480)
+
+
+def test_rejects_decompression_bomb_without_decoding():
+    with pytest.raises(ImageRejected) as error:
+        inspect_image(png_header(100_000, 100_000), max_pixels=50_000_000)
+    assert error.value.reason == "too_many_pixels"
+    # Sem limite (0) o mesmo cabeçalho passa
+    assert inspect_image(png_header(100_000, 100_000), max_pixels=0).pixels == 10_000_000_000
+
+
+@pytest.mark.parametrize("data, declared, reason", [
+    (b"GIF89a" + b"\x00" * 32, None, "unknown_format"),
+    (png_header(200, 200), "image/jpeg", "format_mismatch"),
+    (png_header(200, 200), "foto.webp", "format_mismatch"),
+    (png_header(200, 200)[:20], None, "invalid_header"),
+    (b"\xff\xd8\xff\xda" + b"\x00" * 16, None, "invalid_header"),  # SOS antes do SOF
+    (png_header(40, 300), "png", "image_too_small"),
+])
+def test_rejection_reasons(data, declared, reason):
+    with pytest.raises(ImageRejected) as error:
+        inspect_image(data, expected_format=declared, min_dimension=50)
+    assert error.value.reason == reason
+
+
+def test_declared_format_aliases():
+    assert normalize_format("image/JPEG") == "jpeg"
+    assert normalize_format(".jpg") == "jpeg"
+    assert normalize_format("gif") is None
+    assert inspect_image(jpeg_header(100, 100), expected_format="JPG").format == "jpeg"
+    assert sniff_format(memoryview(png_header(10, 10))) == "png"
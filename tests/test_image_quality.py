@@ -0,0 +1,101 @@
+"""Portão de qualidade: limiares em imagens sintéticas e rejeição antes da detecção"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from utils import face_pipeline  # noqa: E402
+from utils.engines import get_engine  # noqa: E402
+from utils.face_pipeline import FaceJob, run_inline  # noqa: E402
+from utils.image_quality import QualityGate, measure_quality  # noqa: E402
+
+
+def noise(low, high, size=320, seed=0):
+    """Ruído RGB uniforme entre low e high (textura nítida)"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(low, high, size=(size, size, 3), dtype=np.uint8)
+
+
+def blurred(size=320):
+    """Manchas grandes desfocadas: bom contraste, sem bordas"""
+    small = noise(0, 256, size=8)
+    return cv2.GaussianBlur(cv2.resize(small, (size, size), interpolation=cv2.INTER_CUBIC), (0, 0), sigmaX=4)
+
+
+def test_sharp_image_passes():
+    gate = QualityGate()
+    reason, metrics = gate.check(noise(0, 256))
+    assert reason is None
+    assert metrics["sharpness"] > gate.min_sharpness
+    assert gate.min_brightness < metrics["brightness"] < gate.max_brightness
+
+
+@pytest.mark.parametrize("image, expected", [
+    (noise(0, 20), "too_dark"),
+    (noise(236, 256), "overexposed"),
+    (noise(126, 131), "low_contrast"),
+])
+def test_exposure_thresholds(image, expected):
+    reason, _ = QualityGate().check(image)
+    assert reason == expected
+
+
+def test_blurred_image_rejected():
+    gate = QualityGate()
+    metrics = measure_quality(blurred())
+    assert metrics["sharpness"] < gate.min_sharpness
+    assert metrics["contrast"] > gate.min_contrast  # Exposição ok: o borrão é o motivo
+    assert gate.evaluate(metrics) == "too_blurry"
+
+
+def test_clipped_fraction_flags_dark_image_with_bright_mean():
+    # Dois terços pretos e o resto cinza claro: brilho médio aceitável, mas pixels pretos demais
+    image = noise(180, 200)
+    image[:, :208] = 0
+    reason, metrics = QualityGate(max_clipped_fraction=0.6).check(image)
+    assert metrics["brightness"] > 40
+    assert metrics["dark_fraction"] > 0.6
+    assert reason == "too_dark"
+
+
+def test_zero_disables_threshold():
+    image = noise(0, 20)
+    assert QualityGate(min_brightness=0, max_clipped_fraction=0, min_contrast=0, min_sharpness=0).check(image)[0] is None
+
+
+def test_large_image_is_analysed_reduced():
+    metrics = measure_quality(noise(0, 256, size=2000))
+    assert metrics["sharpness"] > 25
+
+
+def test_stats_count_rejections_by_reason():
+    gate = QualityGate()
+    gate.check(noise(0, 256))
+    gate.check(noise(0, 20))
+    gate.check(noise(0, 20, seed=1))
+    stats = gate.stats()
+    assert stats["checked"] == 3 and stats["passed"] == 1
+    assert stats["rejected"]["too_dark"] == 2
+    assert stats["reject_rate"]["too_dark"] == round(2 / 3, 4)
+    assert stats["thresholds"]["min_sharpness"] == gate.min_sharpness
+
+
+def test_pipeline_rejects_blurry_image_without_detection(monkeypatch):
+    # conftest desliga o portão globalmente: ligado só neste teste
+    monkeypatch.setattr(face_pipeline, "_quality_gate", QualityGate())
+    engine = get_engine()
+    calls = []
+    original = engine.detect
+    monkeypatch.setattr(engine, "detect", lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs))
+
+    ok, encoded = cv2.imencode(".png", blurred())
+    assert ok
+    job = run_inline(FaceJob(image_bytes=encoded.tobytes()))
+    assert job.reason == "too_blurry"
+    assert job.metadata["quality"]["sharpness"] < 25
+    assert calls == []
+
+    sharp = run_inline(FaceJob(image_bytes=cv2.imencode(".png", noise(0, 256))[1].tobytes()))
+    assert sharp.reason != "too_blurry"
+    assert calls
@@ -0,0 +1,119 @@
+"""Fila de jobs em SQLite: claim exclusivo, lease, novas tentativas e job único por funcionário"""
+
+import time
+import threading
+
+import pytest
+
+from utils.job_queue import JobAlreadyPending, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), lease_seconds=60, max_attempts=2)
+
+
+def test_claim_returns_oldest_job_with_image_and_payload(queue):
+    first = queue.enqueue("register", b"img1", employee_id="a", payload={"profile": "fast"})
+    queue.enqueue("register", b"img2", employee_id="b")
+
+    job = queue.claim("w1")
+    assert job["id"] == first
+    assert job["image"] == b"img1"
+    assert job["payload"] == {"profile": "fast"}
+    assert (job["status"], job["worker"], job["attempts"]) == ("running", "w1", 1)
+    assert queue.claim("w2")["employee_id"] == "b"
+    assert queue.claim("w3") is None
+
+
+def test_claim_filters_kinds(queue):
+    queue.enqueue("refine", employee_id="a")
+    assert queue.claim("w1", kinds=("register",)) is None
+    assert queue.claim("w1", kinds=("refine",))["kind"] == "refine"
+
+
+def test_concurrent_claims_never_share_a_job(queue):
+    ids = {queue.enqueue("register", employee_id=str(i)) for i in range(20)}
+    claimed, lock = [], threading.Lock()
+
+    def work(name):
+        while True:
+            job = queue.claim(name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_expired_lease_is_retried_and_old_worker_cannot_finish(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.05, max_attempts=3)
+    job_id = queue.enqueue("register", b"img", employee_id="a")
+    assert queue.claim("lost")["id"] == job_id
+    assert queue.claim("other") is None  # Lease ainda vale
+
+    time.sleep(0.1)
+    retried = queue.claim("other")
+    assert (retried["id"], retried["attempts"], retried["image"]) == (job_id, 2, b"img")
+
+    # O worker antigo terminou depois do lease: o resultado dele é descartado
+    assert not queue.finish(job_id, "lost", False, "stale")
+    assert queue.get(job_id)["status"] == "running"
+    assert queue.finish(job_id, "other", True, "ok", {"x": 1})
+    job = queue.get(job_id)
+    assert (job["status"], job["message"], job["result"]) == ("succeeded", "ok", {"x": 1})
+    assert not queue.finish(job_id, "other", False, "again")  # Já concluído
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.05, max_attempts=2)
+    job_id = queue.enqueue("register", b"img", employee_id="a")
+    for worker in ("w1", "w2"):
+        assert queue.claim(worker)["id"] == job_id
+        time.sleep(0.1)
+
+    assert queue.claim("w3") is None
+    job = queue.get(job_id)
+    assert (job["status"], job["message"], job["attempts"]) == ("failed", "worker_lost", 2)
+
+
+def test_unique_enqueue_allows_one_pending_job_per_employee(queue):
+    job_id = queue.enqueue("register", b"img", employee_id="a", unique=True)
+    with pytest.raises(JobAlreadyPending) as error:
+        queue.enqueue("register", b"img", employee_id="a", unique=True)
+    assert error.value.job_id == job_id
+    queue.enqueue("refine", employee_id="a", unique=True)  # Outro tipo não conflita
+
+    job = queue.claim("w1", kinds=("register",))
+    with pytest.raises(JobAlreadyPending):
+        queue.enqueue("register", b"img", employee_id="a", unique=True)  # Em execução também conta
+    queue.finish(job["id"], "w1", True)
+    assert queue.enqueue("register", b"img", employee_id="a", unique=True) != job_id
+
+
+def test_concurrent_unique_enqueues_keep_one_job(queue):
+    results, lock = [], threading.Lock()
+    barrier = threading.Barrier(8)
+
+    def submit():
+        barrier.wait()
+        try:
+            outcome = queue.enqueue("register", b"img", employee_id="a", unique=True)
+        except JobAlreadyPending:
+            outcome = None
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(1 for outcome in results if outcome) == 1
+    assert queue.pending_count("register") == 1
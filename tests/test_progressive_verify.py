@@ -0,0 +1,78 @@
+"""Reavaliação da faixa ambígua com o modelo de landmarks do template"""
+
+import asyncio
+
+import pytest
+
+from utils.face_pipeline import FaceJob
+from utils.progressive_verify import ProgressiveVerifier, template_landmark_model
+
+
+@pytest.mark.parametrize("template, expected", [
+    ({"landmark_model": "small", "profile": "accurate"}, "small"),
+    ({"profile": "accurate"}, "large"),
+    ({"profile": "balanced"}, "small"),
+    ({"profile": None}, "small"),                       # Cadastro antigo, sem perfil
+    ({"landmark_model": "small", "template": "refined", "refine_landmarks": "large"}, "large"),
+])
+def test_template_landmark_model(template, expected):
+    assert template_landmark_model(template) == expected
+
+
+def test_recheck_job_changes_only_jitters_and_keeps_template_landmarks():
+    verifier = ProgressiveVerifier(recheck_jitters=7, recheck_model="large")
+    cheap = FaceJob(image_bytes=b"jpeg", locations=[(1, 2, 3, 4), (5, 6, 7, 8)])
+    job = verifier.recheck_job(cheap, face_index=1, landmark_model="small")
+    assert (job.landmark_model, job.num_jitters, job.locations) == ("small", 7, [(5, 6, 7, 8)])
+    # Sem template (duas fotos recodificadas) vale o modelo configurado
+    assert verifier.recheck_job(cheap).landmark_model == "large"
+
+
+def test_verify_recheck_uses_stored_template_landmarks(monkeypatch, image_factory):
+    from app.services.facial_service import facial_service
+    from utils.engines import get_engine
+
+    engine = get_engine()
+    encode = engine.encode
+    calls = []
+
+    def spy_encode(rgb, boxes, num_jitters=1, landmark_model="small"):
+        calls.append((num_jitters, landmark_model))
+        return encode(rgb, boxes, num_jitters=num_jitters, landmark_model=landmark_model)
+
+    image = image_factory(37)
+    assert asyncio.run(facial_service.save_employee_photo("recheck-1", image, profile="balanced"))[0]
+    monkeypatch.setattr(engine, "encode", spy_encode)
+    monkeypatch.setattr(facial_service.progressive, "is_ambiguous", lambda distance, tolerance: True)
+
+    asyncio.run(facial_service.verify_face("recheck-1", image, profile="balanced"))
+    assert calls[-1] == (facial_service.progressive.recheck_jitters, "small")
+
+
+def test_first_pass_uses_template_landmarks(monkeypatch, image_factory):
+    from app.services.facial_service import facial_service
+    from utils.engines import get_engine
+
+    engine = get_engine()
+    encode = engine.encode
+    calls = []
+
+    def spy_encode(rgb, boxes, num_jitters=1, landmark_model="small"):
+        calls.append((num_jitters, landmark_model))
+        return encode(rgb, boxes, num_jitters=num_jitters, landmark_model=landmark_model)
+
+    image = image_factory(38)
+    assert asyncio.run(facial_service.save_employee_photo("recheck-large", image, profile="accurate"))[0]
+    monkeypatch.setattr(engine, "encode", spy_encode)
+    monkeypatch.setattr(facial_service.progressive, "is_ambiguous", lambda distance, tolerance: True)
+
+    # Perfil balanced (5 pontos), template accurate (68): as duas passagens usam 68, só os jitters mudam
+    asyncio.run(facial_service.verify_face("recheck-large", image, profile="balanced"))
+    assert calls == [(1, "large"), (facial_service.progressive.recheck_jitters, "large")]
+
+
+def test_profile_job_accepts_landmark_override():
+    from utils.face_profiles import PROFILES
+
+    job = PROFILES["balanced"].job(image_bytes=b"jpeg", landmark_model="large")
+    assert (job.landmark_model, job.num_jitters, job.metadata["profile"]) == ("large", 1, "balanced")
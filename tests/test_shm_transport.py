@@ -0,0 +1,113 @@
+"""Anel de memória compartilhada: reserva, liberação, descritores antigos e vazamentos"""
+
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.shm_transport import (  # noqa: E402
+    SLOT_FREE, SLOT_LEASED, RingFullError, SharedMemoryRing, StaleDescriptorError
+)
+
+
+@pytest.fixture
+def ring():
+    ring = SharedMemoryRing(slot_count=2, slot_size=4096, leak_timeout=60.0)
+    yield ring
+    ring.close()
+
+
+def test_put_and_release_round_trip(ring):
+    desc = ring.put_bytes(b"upload", tag="a")
+    assert ring.slot_state(desc.slot) == SLOT_LEASED
+    assert ring.read_bytes(desc) == b"upload"
+
+    rgb = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+    array_desc = ring.put_array(rgb, tag="b")
+    assert np.array_equal(ring.read_array(array_desc), rgb)
+
+    assert ring.release(desc)
+    assert not ring.release(desc)  # Segunda liberação é ignorada
+    assert ring.slot_state(desc.slot) == SLOT_FREE
+    stats = ring.stats()
+    assert stats["leased"] == 2 and stats["released"] == 1 and stats["in_use"] == 1
+
+
+def test_attached_reader_sees_owner_data(ring):
+    desc = ring.put_bytes(b"compartilhado")
+    reader = SharedMemoryRing.attach(ring.name, ring.slot_count, ring.slot_size)
+    try:
+        assert reader.read_bytes(desc) == b"compartilhado"
+        with pytest.raises(RuntimeError):
+            reader.put_bytes(b"x")
+    finally:
+        reader.close()
+
+
+def test_stale_descriptor_rejected_after_reuse(ring):
+    first = ring.put_bytes(b"old")
+    ring.release(first)
+    second = ring.put_bytes(b"new")
+    assert second.slot == first.slot and second.generation != first.generation
+
+    with pytest.raises(StaleDescriptorError):
+        ring.view_bytes(first)
+    with pytest.raises(StaleDescriptorError):
+        ring.read_bytes(first)
+    assert not ring.release(first)
+    assert ring.read_bytes(second) == b"new"
+
+
+def test_ring_full_without_and_with_timeout(ring):
+    ring.put_bytes(b"1")
+    held = ring.put_bytes(b"2")
+    with pytest.raises(RingFullError):
+        ring.put_bytes(b"3")
+
+    threading.Timer(0.05, ring.release, args=(held,)).start()
+    desc = ring.put_bytes(b"3", timeout=2)
+    assert ring.read_bytes(desc) == b"3"
+    assert ring.stats()["full_waits"] == 2
+
+
+def test_oversized_payload_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.put_bytes(b"x" * (ring.slot_size + 1))
+
+
+def test_reclaim_leaks_frees_old_slots(ring):
+    desc = ring.put_bytes(b"leak", tag="esquecido")
+    assert ring.check_leaks() == []
+
+    leaks = ring.check_leaks(max_age=0)
+    assert [leak["tag"] for leak in leaks] == ["esquecido"]
+    assert ring.reclaim_leaks(max_age=0) == 1
+    assert ring.slot_state(desc.slot) == SLOT_FREE
+    assert ring.stats()["reclaimed"] == 1
+    assert not ring.release(desc)
+
+
+def test_reader_detects_reclaim_during_zero_copy_read(ring):
+    desc = ring.put_bytes(b"A" * 64)
+    view = ring.view_bytes(desc)  # Leitor lento segura a view sem cópia
+
+    ring.reclaim_leaks(max_age=0)
+    ring.put_bytes(b"B" * 64)  # Slot reutilizado enquanto a view está aberta
+    assert bytes(view) == b"B" * 64
+    view.release()
+
+    with pytest.raises(StaleDescriptorError):
+        ring.verify(desc)
+
+
+def test_view_array_verified_after_use(ring):
+    desc, target = ring.allocate_array((2, 2, 3))
+    target[...] = 7
+    array = ring.view_array(desc)
+    assert int(array.sum()) == 7 * 12
+    ring.verify(desc)
+    del array, target
+    assert ring.release(desc)
+    with pytest.raises(StaleDescriptorError):
+        ring.verify(desc)
@@ -0,0 +1,188 @@
+"""Coalescência de jobs idênticos e deadline compartilhado (single-flight)"""
+
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from utils.deadline import Deadline, DeadlineExceeded, SharedDeadline
+from utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_shared_deadline_uses_latest_waiter():
+    shared = SharedDeadline()
+    short, long = Deadline(0.01), Deadline(5)
+    shared.join(short)
+    shared.join(long)
+    time.sleep(0.02)
+    assert short.expired()
+    assert not shared.expired()
+    assert shared.remaining() > 4
+
+    shared.leave(long)
+    assert shared.expired()
+
+
+def test_shared_deadline_ignores_cancelled_member():
+    shared = SharedDeadline()
+    gone, waiting = Deadline(5), Deadline(5)
+    shared.join(gone)
+    shared.join(waiting)
+    gone.cancel()  # Cliente desconectou
+    assert not shared.expired()
+    waiting.cancel()
+    assert shared.expired()
+
+
+def test_async_waiter_times_out_alone_and_retry_gets_result():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        runs = []
+
+        async def work(shared):
+            runs.append(shared)
+            await asyncio.sleep(0.2)
+            if shared.expired():
+                return "aborted"
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do_with_deadline("k", work, Deadline(0.05)))
+        await asyncio.sleep(0.01)
+        retry = asyncio.ensure_future(flight.do_with_deadline("k", work, Deadline(5)))
+
+        with pytest.raises(DeadlineExceeded):
+            await leader
+        assert await retry == "result"
+        assert len(runs) == 1
+        assert flight.stats()["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_async_abandoned_work_is_not_reused():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        started = []
+
+        async def work(shared):
+            started.append(shared)
+            await asyncio.sleep(0.2)
+            return len(started)
+
+        with pytest.raises(DeadlineExceeded):
+            await flight.do_with_deadline("k", work, Deadline(0.02))
+        # O único chamador desistiu: o trabalho foi cancelado e a chave liberada
+        assert started[0].expired()
+        assert await flight.do_with_deadline("k", work, Deadline(5)) == 2
+        assert flight.stats()["abandoned"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_thread_ticket_times_out_without_touching_shared_future():
+    flight = SingleFlight("test")
+    future = Future()
+    shared_deadlines = []
+
+    def submit(shared):
+        shared_deadlines.append(shared)
+        return future
+
+    leader = flight.submit_with_deadline("k", submit, Deadline(0.02))
+    retry = flight.submit_with_deadline("k", submit, Deadline(5))
+    with pytest.raises(DeadlineExceeded):
+        leader.result()
+    assert not future.cancelled()
+    assert not shared_deadlines[0].expired()
+
+    threading.Timer(0.05, future.set_result, args=("result",)).start()
+    assert retry.result() == "result"
+
+
+def test_thread_last_waiter_cancels_shared_future():
+    flight = SingleFlight("test")
+    future = Future()
+    ticket = flight.submit_with_deadline("k", lambda shared: future, Deadline(0.01))
+    with pytest.raises(DeadlineExceeded):
+        ticket.result()
+    assert future.cancelled()
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_service_retry_after_leader_timeout_gets_real_result(monkeypatch, image_factory):
+    pytest.importorskip("cv2")
+    from app.services.facial_service import facial_service
+    from utils.engines import get_engine
+    from utils.face_pipeline import FaceJob
+
+    engine = get_engine()
+    detect = engine.detect
+
+    def slow_detect(*args, **kwargs):
+        time.sleep(0.3)
+        return detect(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "detect", slow_detect)
+    image = image_factory(1)
+
+    async def scenario():
+        leader = asyncio.ensure_future(facial_service._run_face_job(FaceJob(image_bytes=image, deadline=Deadline(0.1))))
+        await asyncio.sleep(0.02)
+        retry = asyncio.ensure_future(facial_service._run_face_job(FaceJob(image_bytes=image, deadline=Deadline(5))))
+        return await leader, await retry
+
+    leader_job, retry_job = asyncio.run(scenario())
+    assert leader_job.reason == "deadline_exceeded"
+    assert retry_job.reason is None
+    assert len(retry_job.encodings) == 1
+
+
+def test_async_disconnect_leaves_without_cancelling_shared_work():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        shared_deadlines = []
+
+        async def work(shared):
+            shared_deadlines.append(shared)
+            await asyncio.sleep(0.3)
+            return "result"
+
+        gone, waiting = Deadline(5), Deadline(5)
+        first = asyncio.ensure_future(flight.do_with_deadline("k", work, gone))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(flight.do_with_deadline("k", work, waiting))
+        await asyncio.sleep(0.01)
+
+        gone.cancel()  # Cliente desconectou
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await first
+        assert time.monotonic() - started < 0.25  # Sai da espera sem aguardar o trabalho
+        assert not shared_deadlines[0].expired()
+        assert await second == "result"
+        assert flight.stats()["abandoned"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_last_disconnect_cancels_shared_work():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        shared_deadlines = []
+
+        async def work(shared):
+            shared_deadlines.append(shared)
+            await asyncio.sleep(5)
+
+        deadline = Deadline(5)
+        waiter = asyncio.ensure_future(flight.do_with_deadline("k", work, deadline))
+        await asyncio.sleep(0.01)
+        deadline.cancel()
+        with pytest.raises(DeadlineExceeded):
+            await waiter
+        assert shared_deadlines[0].expired()
+        assert flight.stats() == dict(flight.stats(), abandoned=1, in_flight=0)
+
+    asyncio.run(scenario())
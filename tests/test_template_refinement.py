@@ -0,0 +1,58 @@
+"""Cadastro em dois níveis: rótulo do template, agendamento e troca pelo refinado"""
+
+import asyncio
+
+import pytest
+
+from conftest import make_image
+
+pytest.importorskip("cv2")
+
+from app.config import settings  # noqa: E402
+from app.services.encoding_store import encoding_store  # noqa: E402
+from app.services.enrollment_jobs import enrollment_jobs  # noqa: E402
+from app.services.facial_service import facial_service  # noqa: E402
+
+
+@pytest.fixture
+def refine_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "TEMPLATE_REFINE_ENABLED", True)
+
+
+def register(employee_id, seed, profile):
+    ok, message = asyncio.run(facial_service.save_employee_photo(employee_id, make_image(seed), profile=profile))
+    assert ok, message
+    return encoding_store.get(employee_id)
+
+
+def test_accurate_registration_is_final_and_not_refined(refine_enabled):
+    pending = enrollment_jobs.pending_count("refine")
+    stored = register("refine-accurate", 20, "accurate")
+    assert (stored["profile"], stored["template"]) == ("accurate", "standard")
+    assert enrollment_jobs.pending_count("refine") == pending
+
+
+def test_fast_registration_schedules_refinement(refine_enabled):
+    pending = enrollment_jobs.pending_count("refine")
+    stored = register("refine-fast", 21, "fast")
+    assert (stored["profile"], stored["template"]) == ("fast", "fast")
+    assert enrollment_jobs.pending_count("refine") == pending + 1
+
+
+def test_refinement_replaces_fast_template_once(refine_enabled):
+    stored = register("refine-swap", 22, "fast")
+    ok, _, details = asyncio.run(facial_service.refine_employee_template("refine-swap", stored["created_at"]))
+    assert ok and not details.get("superseded")
+    refined = encoding_store.get("refine-swap")
+    assert (refined["template"], refined["template_version"]) == ("refined", 2)
+
+    # Job repetido (retomado após o lease) não refina de novo
+    ok, _, details = asyncio.run(facial_service.refine_employee_template("refine-swap", stored["created_at"]))
+    assert ok and details["superseded"]
+
+
+def test_refinement_of_replaced_template_is_discarded(refine_enabled):
+    first = register("refine-stale", 23, "fast")
+    ok, _, details = asyncio.run(facial_service.refine_employee_template("refine-stale", "outro-cadastro"))
+    assert ok and details["superseded"]
+    assert encoding_store.get("refine-stale")["created_at"] == first["created_at"]
@@ -0,0 +1,77 @@
+"""Atualização de foto: o cadastro anterior só é substituído depois que o novo está gravado"""
+
+import os
+import asyncio
+
+import pytest
+
+from conftest import make_image
+
+pytest.importorskip("cv2")
+
+from app.config import settings  # noqa: E402
+from app.services.encoding_store import encoding_store  # noqa: E402
+from app.services.facial_service import facial_service  # noqa: E402
+from utils.deadline import Deadline  # noqa: E402
+
+def register(employee_id, seed):
+    ok, message = asyncio.run(facial_service.save_employee_photo(employee_id, make_image(seed)))
+    assert ok, message
+    return encoding_store.get(employee_id)
+
+
+def photo_bytes(employee_id):
+    with open(os.path.join(settings.STORAGE_PATH, f"{employee_id}.jpg"), "rb") as f:
+        return f.read()
+
+
+def update(client, employee_id, image):
+    return client.put(f"/api/v1/update-employee/{employee_id}", files={"file": ("foto.jpg", image, "image/jpeg")})
+
+
+def test_update_replaces_photo_and_encoding(api_client):
+    before = register("update-ok", 50)
+    new_image = make_image(51)
+    response = update(api_client, "update-ok", new_image)
+    assert response.status_code == 200, response.text
+    assert photo_bytes("update-ok") == new_image
+    assert encoding_store.get("update-ok")["created_at"] != before["created_at"]
+    assert not [name for name in os.listdir(settings.STORAGE_PATH) if name.endswith(".tmp")]
+
+
+def test_failed_update_keeps_previous_enrollment(api_client, monkeypatch):
+    before = register("update-kept", 52)
+    old_photo = photo_bytes("update-kept")
+
+    async def expired_save(employee_id, image_bytes, deadline, profile, replace=False):
+        assert replace
+        return await save(employee_id, image_bytes, Deadline(0), profile, replace)
+
+    save = facial_service.save_employee_photo
+    monkeypatch.setattr(facial_service, "save_employee_photo", expired_save)
+    response = update(api_client, "update-kept", make_image(53))
+    assert response.status_code in (400, 504)
+    assert photo_bytes("update-kept") == old_photo
+    assert encoding_store.get("update-kept")["created_at"] == before["created_at"]
+
+
+def test_rejected_duplicate_update_keeps_previous_enrollment(api_client, monkeypatch):
+    register("update-other", 54)
+    before = register("update-dup", 55)
+    monkeypatch.setattr(settings, "DUPLICATE_CHECK_MODE", "reject")
+
+    response = update(api_client, "update-dup", make_image(54))  # Rosto de outro funcionário
+    assert response.status_code == 400
+    assert "update-other" in response.json()["detail"]
+    assert encoding_store.get("update-dup")["created_at"] == before["created_at"]
+    assert photo_bytes("update-dup") == make_image(55)
+
+
+def test_replace_removes_stale_encoding_versions():
+    register("update-versions", 56)
+    stale = os.path.join(settings.STORAGE_PATH, "update-versions_encoding.v9.json")
+    with open(stale, "w") as f:
+        f.write("{}")
+    ok, _ = asyncio.run(facial_service.save_employee_photo("update-versions", make_image(57), replace=True))
+    assert ok
+    assert not os.path.exists(stale)
@@ -0,0 +1,112 @@
+"""Limite de tamanho dos uploads aplicado durante o streaming"""
+
+import io
+import json
+import asyncio
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.requests import Request
+
+from app.api.uploads import UploadSizeLimitMiddleware, read_upload, save_upload
+
+CHUNK = 1024
+
+
+def run_middleware(middleware, body_chunks, content_length=None, path="/api/v1/verify"):
+    """Executa o middleware com um corpo em blocos; devolve (status, corpo, blocos lidos)"""
+    headers = [(b"content-type", b"application/octet-stream")]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+    pending = list(body_chunks)
+    pulled = []
+    sent = []
+
+    async def receive():
+        chunk = pending.pop(0) if pending else b""
+        pulled.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(pending)}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return status, body, len(pulled)
+
+
+async def echo_app(scope, receive, send):
+    """App que lê o corpo inteiro (como o parser do multipart) e responde o tamanho"""
+    body = await Request(scope, receive).body()
+    payload = json.dumps({"received": len(body)}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": payload})
+
+
+def test_body_within_limit_passes_through():
+    status, body, _ = run_middleware(UploadSizeLimitMiddleware(echo_app, max_body_size=4 * CHUNK),
+                                     [b"x" * CHUNK] * 3, content_length=3 * CHUNK)
+    assert status == 200
+    assert json.loads(body) == {"received": 3 * CHUNK}
+
+
+def test_content_length_over_limit_is_refused_without_reading():
+    called = []
+
+    async def app(scope, receive, send):
+        called.append(scope)
+
+    status, body, pulled = run_middleware(UploadSizeLimitMiddleware(app, max_body_size=CHUNK),
+                                          [b"x" * CHUNK] * 4, content_length=4 * CHUNK)
+    assert status == 413
+    assert "detail" in json.loads(body)
+    assert not called and pulled == 0
+
+
+@pytest.mark.parametrize("content_length", [None, CHUNK])  # Chunked, ou Content-Length falso
+def test_streamed_body_is_aborted_once_limit_is_passed(content_length):
+    status, _, pulled = run_middleware(UploadSizeLimitMiddleware(echo_app, max_body_size=2 * CHUNK),
+                                       [b"x" * CHUNK] * 50, content_length=content_length)
+    assert status == 413
+    assert pulled == 3  # Parou no primeiro bloco além do limite
+
+
+def test_path_limits_override_default():
+    middleware = UploadSizeLimitMiddleware(echo_app, max_body_size=CHUNK, path_limits={"/api/v1/verify-batch": 8 * CHUNK})
+    assert middleware.limit_for("/api/v1/verify-batch") == 8 * CHUNK
+    assert middleware.limit_for("/api/v1/verify/123") == CHUNK
+    status, _, _ = run_middleware(middleware, [b"x" * CHUNK] * 4, path="/api/v1/verify-batch")
+    assert status == 200
+
+
+def upload(data, size=None):
+    return UploadFile(io.BytesIO(data), filename="foto.jpg", size=size)
+
+
+def test_read_upload_known_and_unknown_size():
+    data = bytes(range(256)) * 1000
+    assert bytes(asyncio.run(read_upload(upload(data, size=len(data)), max_bytes=len(data)))) == data
+    assert bytes(asyncio.run(read_upload(upload(data), max_bytes=len(data)))) == data
+
+
+@pytest.mark.parametrize("size", [None, 10])  # Tamanho desconhecido ou anunciado menor que o real
+def test_read_upload_aborts_past_limit(size):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_upload(upload(b"x" * 5000, size=size), max_bytes=4096))
+    assert error.value.status_code == 413
+
+
+def test_read_upload_refuses_declared_size_up_front():
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_upload(upload(b"", size=10_000), max_bytes=4096))
+    assert error.value.status_code == 413
+
+
+def test_save_upload_removes_partial_file(tmp_path):
+    path = str(tmp_path / "grande.zip")
+    with pytest.raises(HTTPException):
+        asyncio.run(save_upload(upload(b"x" * 600_000), path, max_bytes=300_000))
+    assert not (tmp_path / "grande.zip").exists()
+    assert asyncio.run(save_upload(upload(b"y" * 1000), path, max_bytes=300_000)) == 1000
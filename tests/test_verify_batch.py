@@ -0,0 +1,145 @@
+"""Verificação em lote (/verify-batch): linhas NDJSON por item, resumo e cancelamento"""
+
+import json
+import asyncio
+
+import pytest
+
+from conftest import make_image
+
+pytest.importorskip("cv2")
+
+from app.api import facial  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.facial_service import facial_service  # noqa: E402
+
+
+def register(employee_id, seed):
+    ok, message = asyncio.run(facial_service.save_employee_photo(employee_id, make_image(seed)))
+    assert ok, message
+
+
+def post_batch(client, pairs):
+    data = {"employee_ids": [employee_id for employee_id, _ in pairs]}
+    files = [("files", (f"{index}.jpg", image, "image/jpeg")) for index, (_, image) in enumerate(pairs)]
+    return client.post("/api/v1/verify-batch", data=data, files=files)
+
+
+def parse(response):
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    return sorted(lines[:-1], key=lambda line: line["index"]), lines[-1]["summary"]
+
+
+def test_mismatched_counts_rejected(api_client):
+    response = api_client.post(
+        "/api/v1/verify-batch",
+        data={"employee_ids": ["a", "b"]},
+        files=[("files", ("0.jpg", make_image(80), "image/jpeg"))]
+    )
+    assert response.status_code == 400
+    assert "diferente" in response.json()["detail"]
+
+
+def test_item_failures_do_not_fail_the_batch(api_client, monkeypatch):
+    register("batch-ok", 81)
+    register("batch-big", 82)
+    valid = make_image(81)
+    oversized = make_image(82) + b"\0" * 4096
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", len(valid) + 1024)
+
+    response = post_batch(api_client, [
+        ("batch-ok", valid),
+        ("batch-missing", make_image(83)),
+        ("batch-big", oversized),
+    ])
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines, summary = parse(response)
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert lines[0]["status_code"] == 200 and lines[0]["result"]["verified"]
+    assert lines[0]["employee_id"] == "batch-ok"
+    assert lines[1]["status_code"] == 404 and "batch-missing" in lines[1]["error"]
+    assert lines[2]["status_code"] == 413
+    assert summary["total"] == 3
+    assert summary["verified"] == 1 and summary["not_verified"] == 0 and summary["errors"] == 2
+    assert "elapsed_ms" in summary
+
+
+def test_summary_counts_not_verified(api_client):
+    register("batch-a", 84)
+    register("batch-b", 85)
+    response = post_batch(api_client, [("batch-a", make_image(84)), ("batch-b", make_image(84))])
+    lines, summary = parse(response)
+    assert all(line["status_code"] == 200 for line in lines)
+    assert [line["result"]["verified"] for line in lines] == [True, False]
+    assert summary == dict(summary, total=2, verified=1, not_verified=1, errors=0)
+
+
+class DisconnectingRequest:
+    """Requisição falsa cujo cliente desconecta logo após o início do lote"""
+
+    class url:
+        path = "/api/v1/verify-batch"
+
+    headers = {}
+
+    async def is_disconnected(self):
+        return True
+
+
+def test_disconnect_cancels_pending_items(monkeypatch):
+    started = []
+
+    async def slow_verify(employee_id, image_bytes, deadline, profile, details):
+        started.append(employee_id)
+        while not deadline.expired():
+            await asyncio.sleep(0.01)
+        return False, 0.0, "deadline_exceeded"
+
+    monkeypatch.setattr(facial_service, "employee_has_photo", lambda employee_id: True)
+    monkeypatch.setattr(facial_service, "verify_face", slow_verify)
+    items = [(index, f"batch-slow-{index}", b"img", None) for index in range(3)]
+
+    async def scenario():
+        stream = facial._stream_batch(DisconnectingRequest(), items, "fast")
+        return [json.loads(chunk) async for chunk in stream]
+
+    # O watcher de desconexão cancela o deadline: nenhum item chega à engine e todos viram 504
+    lines = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    assert len(started) == 0
+    assert [line["status_code"] for line in lines[:-1]] == [504, 504, 504]
+    assert lines[-1]["summary"]["errors"] == 3
+
+
+def test_closing_stream_cancels_running_tasks(monkeypatch):
+    cancelled = []
+
+    async def slow_verify(employee_id, image_bytes, deadline, profile, details):
+        if employee_id == "batch-fast":
+            return True, 0.9, "high"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(employee_id)
+            raise
+
+    class ConnectedRequest(DisconnectingRequest):
+        async def is_disconnected(self):
+            return False
+
+    monkeypatch.setattr(facial_service, "employee_has_photo", lambda employee_id: True)
+    monkeypatch.setattr(facial_service, "verify_face", slow_verify)
+    items = [(0, "batch-fast", b"img", None), (1, "batch-hang", b"img", None)]
+
+    async def scenario():
+        stream = facial._stream_batch(ConnectedRequest(), items, "fast")
+        first = json.loads(await stream.__anext__())
+        # Servidor fecha o gerador quando o cliente some no meio do streaming
+        await stream.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    first = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    assert first["employee_id"] == "batch-fast" and first["result"]["verified"]
+    assert cancelled == ["batch-hang"]
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+📥 Cadastro em massa a partir de uma pasta ou de um arquivo .zip
+Cada arquivo {employee_id}.jpg (ou .jpeg/.png/.webp) vira um cadastro com
+foto e encoding, no mesmo formato do /register-employee.
+
+- o .zip é lido membro a membro (zipfile.open), sem extrair para o disco
+- detecção + encoding rodam num pool de processos, com no máximo
+  2 × workers imagens em voo (memória limitada mesmo com milhares de fotos)
+- fotos e encodings são gravados em lotes; o lote só conta como concluído
+  quando suas linhas chegam ao relatório (JSONL com fsync). O lote fecha
+  em batch_size itens ou batch_max_bytes de fotos retidas (só as de
+  sucesso ficam na memória até a gravação)
+- rodar de novo com o mesmo relatório retoma de onde parou: IDs já no
+  relatório (e funcionários já cadastrados, sem overwrite) são pulados
+
+Os processos do pool usam o motor e o perfil informados, mas não o filtro
+de qualidade nem o pré-filtro do servidor: o lote vem do RH, já curado.
+"""
+
+import os
+import json
+import time
+import zipfile
+import logging
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from utils.image_inspector import inspect_image, ImageRejected
+from utils.encoding_files import encoding_filename, validate_model_version
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Bytes de fotos retidas num lote antes de gravá-lo (além de batch_size)
+BATCH_MAX_BYTES = 64 * 1024 * 1024
+
+# Pulos que não encerram o item: a retomada usa o status anterior a eles
+NON_TERMINAL_SKIPS = ("duplicate_in_source", "source_changed")
+
+# Mensagens das falhas do pipeline no cadastro (mesmas regras do /register-employee)
+ENROLLMENT_MESSAGES = {
+    "invalid_image": "Não foi possível decodificar a imagem",
+    "image_too_large": "Resolução da imagem muito alta para processamento",
+    "image_too_small": "Imagem pequena demais",
+    "no_face": "Nenhum rosto foi detectado na imagem",
+    "multiple_faces": "Múltiplos rostos detectados; a imagem deve conter apenas um rosto",
+    "face_too_small": "O rosto detectado é muito pequeno",
+    "encoding_failed": "Não foi possível gerar encoding facial",
+}
+
+
+def employee_id_from_name(name):
+    """
+    ID do funcionário a partir do nome do arquivo ("fotos/123.jpg" → "123")
+
+    Returns:
+        str: ID, ou None se não for uma imagem aceita (ou for lixo de sistema)
+    """
+    base = os.path.basename(name)
+    stem, extension = os.path.splitext(base)
+    if extension.lower() not in IMAGE_EXTENSIONS or not stem or base.startswith(".") or "__MACOSX" in name:
+        return None
+    return stem
+
+
+def iter_sources(source):
+    """
+    Arquivos de uma pasta ou de um .zip, sem carregar o conteúdo
+
+    Args:
+        source: Caminho de pasta, caminho de .zip ou arquivo .zip já aberto (file-like)
+
+    Yields:
+        tuple: (nome do arquivo, employee_id, função que lê os bytes)
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        for directory, _, files in os.walk(source):
+            for name in sorted(files):
+                employee_id = employee_id_from_name(name)
+                if employee_id is None:
+                    continue
+                path = os.path.join(directory, name)
+
+                def read(path=path):
+                    with open(path, "rb") as f:
+                        return f.read()
+                yield os.path.relpath(path, source), employee_id, read
+        return
+
+    with zipfile.ZipFile(source) as archive:
+        for member in archive.infolist():
+            if member.is_dir():
+                continue
+            employee_id = employee_id_from_name(member.filename)
+            if employee_id is None:
+                continue
+            yield member.filename, employee_id, (lambda member=member: archive.read(member))
+
+
+# Estado dos processos do pool (preenchido pelo initializer)
+_worker = {}
+
+
+def _init_worker(engine_options, workers, profile_name, min_dimension, max_pixels):
+    """Carrega o motor uma vez por processo do pool"""
+    from utils.engines import create_engine, create_engine_from_env, configure_engine
+    if engine_options:
+        options = dict(engine_options)
+        if options.get("name") == "onnx" and not options.get("ort_threads"):
+            # Cada processo do pool chama o motor de uma única thread
+            from utils.engines.onnx_runtime import intra_op_threads
+            options["ort_threads"] = intra_op_threads(workers, 1)
+        engine = create_engine(**options)
+    else:
+        engine = create_engine_from_env()
+    configure_engine(engine)
+    _worker.update(engine=engine.name, profile=profile_name, min_dimension=min_dimension, max_pixels=max_pixels)
+
+
+def encode_for_enrollment(employee_id, image_bytes):
+    """
+    Valida a imagem e gera o encoding (executa dentro do pool)
+
+    Returns:
+        dict: {"employee_id", "ok", ...}; com sucesso traz encoding,
+        face_location, profile e engine; com falha, reason e message
+    """
+    from utils.face_pipeline import run_inline
+    from utils.face_profiles import get_profile
+
+    try:
+        inspect_image(image_bytes, min_dimension=_worker["min_dimension"], max_pixels=_worker["max_pixels"])
+    except ImageRejected as e:
+        return {"employee_id": employee_id, "ok": False, "reason": e.reason, "message": e.message}
+
+    profile = get_profile(_worker["profile"])
+    job = run_inline(profile.job(image_bytes=image_bytes, max_faces=1, min_face_size=50))
+    if job.failed or not job.encodings:
+        reason = job.reason or "encoding_failed"
+        message = ENROLLMENT_MESSAGES.get(reason) or job.metadata.get("error") or reason
+        return {"employee_id": employee_id, "ok": False, "reason": reason, "message": message}
+    return {
+        "employee_id": employee_id,
+        "ok": True,
+        "encoding": job.encodings[0].tolist(),
+        "face_location": [int(v) for v in job.locations[0]],
+        "profile": profile.name,
+        "engine": _worker["engine"],
+    }
+
+
+def read_report(report_path):
+    """
+    Status mais recente de cada employee_id num relatório existente
+
+    Pulos de NON_TERMINAL_SKIPS são ignorados: um duplicado na origem pode
+    ter sido registrado antes do resultado da primeira ocorrência, que a
+    interrupção pode ter impedido de chegar ao relatório.
+    """
+    done = {}
+    if not report_path or not os.path.exists(report_path):
+        return done
+    with open(report_path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Última linha truncada por uma interrupção
+            if entry.get("status") == "skipped" and entry.get("reason") in NON_TERMINAL_SKIPS:
+                continue
+            if entry.get("employee_id"):
+                done[entry["employee_id"]] = entry.get("status")
+    return done
+
+
+class BulkEnrollment:
+    """
+    Executa um cadastro em massa
+
+    Args:
+        storage_path (str): Pasta das fotos e encodings (STORAGE_PATH)
+        report_path (str): Relatório JSONL (também usado para retomar)
+        workers (int): Processos do pool
+        batch_size (int): Cadastros gravados por lote
+        batch_max_bytes (int): Bytes de fotos retidas que também fecham o lote
+        profile (str): Perfil de detecção/encoding (fast, balanced, accurate)
+        engine_options (dict): Argumentos de create_engine (None = variáveis FACE_ENGINE*)
+        overwrite (bool): Recadastrar funcionários que já têm foto e encoding
+        retry_failed (bool): Tentar de novo IDs que falharam numa execução anterior
+        tolerance (float): Tolerância gravada no encoding
+        disk_format (str): Formato do encoding no JSON (list, float32, float16)
+        min_dimension (int): Menor largura/altura aceita
+        max_pixels (int): Maior número de pixels aceito
+        model_version (str): Grava {id}_encoding.{versão}.json (ENCODING_MODEL_VERSION); vazio = original
+    """
+
+    # Status do relatório para um item processado com sucesso
+    SUCCESS_STATUS = "enrolled"
+
+    def __init__(self, storage_path, report_path, workers=2, batch_size=50, profile="accurate",
+                 engine_options=None, overwrite=False, retry_failed=False, tolerance=0.6,
+                 disk_format="list", min_dimension=50, max_pixels=50_000_000, model_version="",
+                 batch_max_bytes=BATCH_MAX_BYTES):
+        validate_model_version(model_version)
+        self.storage_path = storage_path
+        self.report_path = report_path
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_max_bytes = batch_max_bytes
+        self.profile = profile
+        self.engine_options = engine_options
+        self.overwrite = overwrite
+        self.retry_failed = retry_failed
+        self.tolerance = tolerance
+        self.disk_format = disk_format
+        self.min_dimension = min_dimension
+        self.max_pixels = max_pixels
+        self.model_version = model_version
+
+    def encoding_path(self, employee_id):
+        """Arquivo de encoding gravado para o funcionário"""
+        return os.path.join(self.storage_path, encoding_filename(employee_id, self.model_version))
+
+    def _already_enrolled(self, employee_id):
+        encodings = {encoding_filename(employee_id), encoding_filename(employee_id, self.model_version)}
+        return (os.path.exists(os.path.join(self.storage_path, f"{employee_id}.jpg"))
+                and any(os.path.exists(os.path.join(self.storage_path, name)) for name in encodings))
+
+    def _skip_reason(self, employee_id, previous, seen):
+        if employee_id in seen:
+            return "duplicate_in_source"
+        status = previous.get(employee_id)
+        if status in (self.SUCCESS_STATUS, "skipped") or (status == "failed" and not self.retry_failed):
+            return "already_in_report"
+        if not self.overwrite and self._already_enrolled(employee_id):
+            return "already_enrolled"
+        return None
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _encoding_data(self, employee_id, result):
+        from utils.encoding_codec import pack_encoding
+
+        data = {
+            "employee_id": employee_id,
+            "encoding": pack_encoding(result["encoding"], self.disk_format),
+            "face_location": result["face_location"],
+            "created_at": datetime.now().isoformat(),
+            "tolerance": self.tolerance,
+            "version": "1.0",
+            "mode": "real",
+            "profile": result["profile"],
+            "engine": result["engine"],
+            "source": "bulk"
+        }
+        if self.model_version:
+            data["model_version"] = self.model_version
+        return data
+
+    def _source_version(self, employee_id):
+        """Estado do destino no momento da leitura da foto (conferido por _write_result; None = não confere)"""
+        return None
+
+    def _write_result(self, employee_id, result, image_bytes, version=None):
+        """
+        Grava foto e encoding de um item processado com sucesso
+
+        Returns:
+            bool: False se o item foi descartado (destino mudou desde a leitura)
+        """
+        self._write_atomic(os.path.join(self.storage_path, f"{employee_id}.jpg"), bytes(image_bytes))
+        self._write_atomic(
+            self.encoding_path(employee_id),
+            json.dumps(self._encoding_data(employee_id, result), indent=2).encode()
+        )
+        return True
+
+    def _commit(self, batch, report):
+        """Grava os resultados do lote e só então registra o lote no relatório"""
+        lines = []
+        for entry, image_bytes, version in batch:
+            if entry["status"] == self.SUCCESS_STATUS:
+                if not self._write_result(entry["employee_id"], entry.pop("result"), image_bytes, version):
+                    entry.update(status="skipped", reason="source_changed")
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        report.write("".join(lines))
+        report.flush()
+        os.fsync(report.fileno())
+
+    def run(self, source, progress=None):
+        """
+        Processa a pasta ou o .zip
+
+        Args:
+            source: Caminho de pasta/.zip ou .zip aberto (file-like)
+            progress: Chamada com cada entrada do relatório assim que o lote é gravado
+
+        Returns:
+            dict: Resumo (enrolled, failed, skipped, elapsed_s, images_per_s, report)
+        """
+        os.makedirs(self.storage_path, exist_ok=True)
+        if os.path.dirname(self.report_path):
+            os.makedirs(os.path.dirname(self.report_path), exist_ok=True)
+        previous = read_report(self.report_path)
+        summary = {self.SUCCESS_STATUS: 0, "failed": 0, "skipped": 0}
+        start = time.perf_counter()
+        seen, batch, pending = set(), [], {}
+        batch_bytes = [0]
+
+        def record(entry, image_bytes=None, version=None):
+            # Só sucessos precisam da foto na gravação; falhas e pulos não retêm bytes
+            if entry["status"] != self.SUCCESS_STATUS:
+                image_bytes = None
+            batch.append((entry, image_bytes, version))
+            batch_bytes[0] += len(image_bytes) if image_bytes is not None else 0
+
+        def flush():
+            if not batch:
+                return
+            self._commit(batch, report)
+            # Contagem depois da gravação: _commit pode descartar um resultado
+            for entry, _, _ in batch:
+                summary[entry["status"]] += 1
+                if progress is not None:
+                    progress(entry)
+            batch.clear()
+            batch_bytes[0] = 0
+
+        def collect(futures):
+            for future in futures:
+                name, image_bytes, version = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"employee_id": None, "ok": False, "reason": "error", "message": str(e)}
+                entry = {"file": name, "employee_id": employee_id_from_name(name)}
+                if result["ok"]:
+                    entry.update(status=self.SUCCESS_STATUS, result=result)
+                else:
+                    entry.update(status="failed", reason=result["reason"], message=result["message"])
+                record(entry, image_bytes, version)
+                if len(batch) >= self.batch_size or batch_bytes[0] >= self.batch_max_bytes:
+                    flush()
+
+        context = multiprocessing.get_context("spawn")  # O processo pai pode ter threads (pipeline, servidor)
+        with open(self.report_path, "a") as report, ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context, initializer=_init_worker,
+            initargs=(self.engine_options, self.workers, self.profile, self.min_dimension, self.max_pixels)
+        ) as pool:
+            for name, employee_id, read in iter_sources(source):
+                skip = self._skip_reason(employee_id, previous, seen)
+                seen.add(employee_id)
+                if skip:
+                    record({"file": name, "employee_id": employee_id, "status": "skipped", "reason": skip})
+                    continue
+
+                # Memória limitada: no máximo 2 imagens em voo por processo
+                while len(pending) >= self.workers * 2:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+
+                version = self._source_version(employee_id)  # Antes da leitura: mudança depois dela é detectada
+                image_bytes = read()
+                pending[pool.submit(encode_for_enrollment, employee_id, image_bytes)] = (name, image_bytes, version)
+
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            flush()
+
+        elapsed = time.perf_counter() - start
+        processed = summary[self.SUCCESS_STATUS] + summary["failed"]
+        summary.update(
+            elapsed_s=round(elapsed, 2),
+            images_per_s=round(processed / elapsed, 2) if elapsed else 0.0,
+            report=self.report_path
+        )
+        logger.info(f"📥 {type(self).__name__} concluído: {summary}")
+        return summary
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+⏳ Deadlines de requisição e cancelamento cooperativo
+O cliente informa até quando ainda espera a resposta (cabeçalho
+X-Request-Deadline) e o pipeline facial consulta o deadline entre os
+estágios, abortando o trabalho que ninguém mais vai receber
+"""
+
+import time
+import logging
+import threading
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+DEADLINE_HEADER = "X-Request-Deadline"
+
+
+class DeadlineExceeded(Exception):
+    """O deadline da requisição passou (ou o cliente desconectou)"""
+
+
+class Deadline:
+    """
+    Instante limite de uma requisição, medido no relógio monotônico
+
+    Também pode ser cancelado explicitamente (ex.: cliente desconectou).
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.cancelled = False
+
+    @classmethod
+    def from_header(cls, value, default_seconds):
+        """
+        Cria o deadline a partir do cabeçalho X-Request-Deadline
+
+        O cabeçalho contém o instante limite como Unix epoch em segundos
+        (ex.: "1760850000.25", o que o PHP gera com microtime(true) + 5).
+        Sem cabeçalho, ou com valor inválido, usa o padrão do endpoint.
+
+        Args:
+            value (str): Valor do cabeçalho (ou None)
+            default_seconds (float): Tempo padrão do endpoint
+
+        Returns:
+            Deadline: Deadline da requisição
+        """
+        if value:
+            try:
+                return cls(float(value) - time.time())
+            except ValueError:
+                logger.warning(f"⚠️ {DEADLINE_HEADER} inválido: {value!r}. Usando padrão de {default_seconds}s")
+        return cls(default_seconds)
+
+    def remaining(self):
+        """Segundos restantes (0 se expirado ou cancelado)"""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        """True se o deadline passou ou foi cancelado"""
+        return self.cancelled or time.monotonic() >= self.expires_at
+
+    def cancel(self):
+        """Cancela o trabalho pendente (ex.: cliente desconectou)"""
+        self.cancelled = True
+
+    def check(self, stage=None):
+        """
+        Lança DeadlineExceeded se o deadline passou
+
+        Args:
+            stage (str): Estágio atual, apenas para a mensagem
+        """
+        if self.expired():
+            where = f" antes de {stage}" if stage else ""
+            raise DeadlineExceeded(f"Deadline excedido{where}")
+
+
+class SharedDeadline:
+    """
+    Deadline de um trabalho compartilhado por várias requisições (coalescência)
+
+    Cada requisição que espera o trabalho entra com o próprio Deadline
+    (join) e sai quando recebe a resposta ou desiste (leave). O trabalho só
+    expira quando nenhum participante ainda espera: o prazo efetivo é o mais
+    longo entre os presentes, e o timeout ou a desconexão de um deles nunca
+    aborta o trabalho dos demais. Participante sem deadline (None) mantém o
+    trabalho vivo até sair.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._members = []
+        self.cancelled = False
+
+    def join(self, deadline):
+        """Adiciona um participante (Deadline da requisição ou None)"""
+        with self._lock:
+            self._members.append(deadline)
+
+    def leave(self, deadline):
+        """Remove o participante (mesmo objeto passado em join)"""
+        with self._lock:
+            for index, member in enumerate(self._members):
+                if member is deadline:
+                    del self._members[index]
+                    break
+
+    def waiters(self):
+        """Participantes que ainda não saíram"""
+        with self._lock:
+            return len(self._members)
+
+    def remaining(self):
+        """Segundos restantes do participante com o prazo mais longo"""
+        with self._lock:
+            if self.cancelled or not self._members:
+                return 0.0
+            if any(member is None for member in self._members):
+                return float("inf")
+            return max(member.remaining() for member in self._members)
+
+    def expired(self):
+        """True se foi cancelado ou se todos os participantes expiraram ou saíram"""
+        with self._lock:
+            if self.cancelled or not self._members:
+                return True
+            return all(member is not None and member.expired() for member in self._members)
+
+    def cancel(self):
+        """Abandona o trabalho (ninguém mais espera)"""
+        self.cancelled = True
+
+    def check(self, stage=None):
+        """Lança DeadlineExceeded se o trabalho expirou (ver Deadline.check)"""
+        if self.expired():
+            where = f" antes de {stage}" if stage else ""
+            raise DeadlineExceeded(f"Deadline excedido{where}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+🪜 Escada de detecção: configurações baratas primeiro, caras só na falha
+O face_locations padrão (HOG, upsample=1, resolução cheia) é o degrau mais
+caro que a maioria das selfies não precisa. A escada tenta primeiro numa
+cópia reduzida sem upsample e só sobe de degrau quando nenhum rosto é
+encontrado; o CNN é um último degrau opcional.
+"""
+
+import time
+import logging
+import threading
+from typing import NamedTuple, Optional
+
+from utils.engines import get_engine
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+
+class DetectionRung(NamedTuple):
+    """Um degrau da escada"""
+    name: str
+    max_side: Optional[int] = None   # Reduzir a imagem até este lado maior (None = original)
+    upsample: int = 1                # number_of_times_to_upsample
+    model: str = "hog"               # "hog" ou "cnn"
+
+
+def build_detection_ladder(fast_max_side=640, cnn_fallback=False):
+    """
+    Monta a escada padrão
+
+    1. fast: lado maior fast_max_side, sem upsample
+    2. default: resolução original, upsample=1 (o comportamento anterior)
+    3. cnn: resolução original, modelo CNN (opcional, muito mais lento em CPU)
+
+    Args:
+        fast_max_side (int): Lado maior do primeiro degrau
+        cnn_fallback (bool): Adicionar o degrau CNN
+
+    Returns:
+        tuple: Degraus em ordem de custo
+    """
+    rungs = [
+        DetectionRung("fast", max_side=fast_max_side, upsample=0),
+        DetectionRung("default", max_side=None, upsample=1),
+    ]
+    if cnn_fallback:
+        rungs.append(DetectionRung("cnn", max_side=None, upsample=0, model="cnn"))
+    return tuple(rungs)
+
+
+def locate_on_rung(image, rung: DetectionRung):
+    """
+    Executa um degrau
+
+    Args:
+        image (numpy.ndarray): Imagem RGB
+        rung (DetectionRung): Configuração do degrau
+
+    Returns:
+        list: Caixas (top, right, bottom, left) na escala de `image`
+    """
+    height, width = image.shape[:2]
+    scale = 1.0
+    if rung.max_side and max(height, width) > rung.max_side:
+        scale = rung.max_side / max(height, width)
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    locations = get_engine().detect(image, upsample=rung.upsample, model=rung.model)
+    if scale == 1.0:
+        return locations
+
+    # Voltar as caixas para a escala original
+    return [
+        (
+            max(0, int(top / scale)),
+            min(width, int(right / scale)),
+            min(height, int(bottom / scale)),
+            max(0, int(left / scale)),
+        )
+        for (top, right, bottom, left) in locations
+    ]
+
+
+class DetectionLadder:
+    """
+    Escada de degraus com contadores de quantas vezes cada um resolve
+
+    Args:
+        rungs (tuple): Degraus em ordem (ver build_detection_ladder)
+    """
+
+    def __init__(self, rungs):
+        self.rungs = tuple(rungs)
+        self._lock = threading.Lock()
+        self._attempts = {rung.name: 0 for rung in self.rungs}
+        self._resolved = {rung.name: 0 for rung in self.rungs}
+        self._seconds = {rung.name: 0.0 for rung in self.rungs}
+        self._exhausted = 0
+
+    def locate(self, image, deadline=None):
+        """
+        Sobe a escada até algum degrau encontrar rostos
+
+        Args:
+            image (numpy.ndarray): Imagem RGB
+            deadline (Deadline): Não sobe de degrau depois que expirar (opcional)
+
+        Returns:
+            tuple: (caixas, nome do degrau que resolveu ou None)
+        """
+        for rung in self.rungs:
+            if deadline is not None and deadline.expired():
+                break
+            start = time.perf_counter()
+            locations = locate_on_rung(image, rung)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._attempts[rung.name] += 1
+                self._seconds[rung.name] += elapsed
+                if locations:
+                    self._resolved[rung.name] += 1
+            if locations:
+                return locations, rung.name
+            logger.debug(f"🪜 Nenhum rosto no degrau {rung.name}, subindo")
+
+        with self._lock:
+            self._exhausted += 1
+        return [], None
+
+    def stats(self):
+        """Tentativas, resoluções e custo médio por degrau"""
+        with self._lock:
+            resolved_total = sum(self._resolved.values())
+            requests = resolved_total + self._exhausted
+            return {
+                "rungs": {
+                    rung.name: {
+                        "max_side": rung.max_side,
+                        "upsample": rung.upsample,
+                        "model": rung.model,
+                        "attempts": self._attempts[rung.name],
+                        "resolved": self._resolved[rung.name],
+                        "resolved_share": round(self._resolved[rung.name] / requests, 4) if requests else 0.0,
+                        "avg_ms": round(
+                            self._seconds[rung.name] / self._attempts[rung.name] * 1000, 2
+                        ) if self._attempts[rung.name] else 0.0
+                    }
+                    for rung in self.rungs
+                },
+                "requests": requests,
+                "exhausted": self._exhausted
+            }
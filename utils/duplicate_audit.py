@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+👥 Auditoria de cadastros duplicados (mesma pessoa com dois IDs)
+Compara todos os encodings gravados entre si e lista os pares a até uma
+distância máxima. A matriz de distâncias N×N nunca é montada: o produto
+X·Xᵀ é feito em blocos de block_rows × block_rows (triângulo superior),
+então a memória extra fica em block_rows² floats para qualquer N.
+
+Encodings de motores diferentes não são comparáveis: cada motor é
+auditado separadamente, com a métrica de FaceEngine.distance dele.
+"""
+
+import os
+import json
+import logging
+
+import numpy as np
+
+from utils.encoding_codec import unpack_encoding
+from utils.encoding_files import encoding_filename, employee_id_from_filename, validate_model_version
+from utils.engines import ENGINE_METRICS
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Linhas por bloco do produto (1024² float32 = 4 MB por bloco)
+AUDIT_BLOCK_ROWS = 1024
+
+
+def load_encodings(storage_path, model_version=""):
+    """
+    Encodings reais do STORAGE_PATH agrupados por motor
+
+    Com model_version segue a leitura dupla da API: a versão nova quando
+    existe, senão o arquivo original.
+
+    Returns:
+        dict: motor → (lista de employee_id, matriz float32 (N, dimensões))
+    """
+    validate_model_version(model_version)
+    ids = set()
+    for name in os.listdir(storage_path):
+        employee_id = employee_id_from_filename(name)
+        if employee_id is None and model_version:
+            employee_id = employee_id_from_filename(name, model_version)
+        if employee_id is not None:
+            ids.add(employee_id)
+
+    groups = {}
+    for employee_id in sorted(ids):
+        path = os.path.join(storage_path, encoding_filename(employee_id, model_version))
+        if not os.path.exists(path):
+            path = os.path.join(storage_path, encoding_filename(employee_id))
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            encoding = unpack_encoding(data["encoding"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Encoding ignorado na auditoria ({employee_id}): {e}")
+            continue
+        if data.get("mode") == "simulated" or not len(encoding):
+            continue
+        ids_, vectors = groups.setdefault(data.get("engine", "dlib"), ([], []))
+        if vectors and len(encoding) != len(vectors[0]):
+            logger.warning(f"⚠️ Encoding ignorado na auditoria ({employee_id}): dimensão {len(encoding)}")
+            continue
+        ids_.append(employee_id)
+        vectors.append(encoding)
+
+    return {engine: (ids_, np.asarray(vectors, dtype=np.float32)) for engine, (ids_, vectors) in groups.items()}
+
+
+def duplicate_pairs(matrix, max_distance, metric="euclidean", block_rows=AUDIT_BLOCK_ROWS):
+    """
+    Pares de linhas a até max_distance, com o produto em blocos
+
+    Args:
+        matrix (numpy.ndarray): Encodings (N, D)
+        max_distance (float): Distância máxima (na métrica do motor)
+        metric (str): euclidean (||a - b||) ou cosine (1 - cos)
+        block_rows (int): Linhas por bloco
+
+    Yields:
+        tuple: (linha i, linha j, distância) com i < j
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if metric == "cosine":
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1.0)
+    row_norms = np.einsum("ij,ij->i", matrix, matrix)
+    count = matrix.shape[0]
+
+    for i0 in range(0, count, block_rows):
+        left = matrix[i0:i0 + block_rows]
+        for j0 in range(i0, count, block_rows):
+            product = left @ matrix[j0:j0 + block_rows].T
+            if metric == "cosine":
+                distances = 1.0 - product
+            else:
+                # ||a - b||² = ||a||² + ||b||² - 2·a·b (no próprio buffer do produto)
+                product *= -2.0
+                product += row_norms[i0:i0 + block_rows, None]
+                product += row_norms[None, j0:j0 + block_rows]
+                np.maximum(product, 0.0, out=product)
+                distances = np.sqrt(product, out=product)
+            close = distances <= max_distance
+            if j0 == i0:
+                close = np.triu(close, k=1)  # Sem a diagonal e sem repetir o par (j, i)
+            for i, j in zip(*np.nonzero(close)):
+                yield i0 + int(i), j0 + int(j), float(distances[i, j])
+
+
+def audit_duplicates(storage_path, max_distance, model_version="", block_rows=AUDIT_BLOCK_ROWS):
+    """
+    Pares suspeitos do cadastro inteiro
+
+    Args:
+        storage_path (str): Pasta dos encodings (STORAGE_PATH)
+        max_distance (float): Distância máxima para considerar duplicado
+        model_version (str): Versão lida (ENCODING_MODEL_VERSION)
+        block_rows (int): Linhas por bloco do produto
+
+    Returns:
+        dict: {"pairs": [...], "groups": [...], "employees": {motor: N}}; pares do
+        mais próximo ao mais distante, grupos = funcionários ligados por algum par
+    """
+    pairs, employees = [], {}
+    for engine, (ids, matrix) in load_encodings(storage_path, model_version).items():
+        employees[engine] = len(ids)
+        metric = ENGINE_METRICS.get(engine, "euclidean")
+        for i, j, distance in duplicate_pairs(matrix, max_distance, metric, block_rows):
+            pairs.append({"employee_a": ids[i], "employee_b": ids[j], "distance": round(distance, 4), "engine": engine})
+    pairs.sort(key=lambda pair: pair["distance"])
+
+    # Componentes ligados (A~B e B~C viram um grupo só)
+    parent = {}
+
+    def find(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for pair in pairs:
+        parent[find(pair["employee_a"])] = find(pair["employee_b"])
+    groups = {}
+    for node in list(parent):
+        groups.setdefault(find(node), []).append(node)
+
+    return {
+        "pairs": pairs,
+        "groups": sorted((sorted(group) for group in groups.values()), key=len, reverse=True),
+        "employees": employees
+    }
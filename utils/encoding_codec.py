@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+🗜️ Representações compactas dos encodings faciais
+- em memória: matriz float64, float32, float16 ou int8 (escala por dimensão)
+  para varreduras 1:N; a distância na matriz compacta só escolhe a lista
+  curta, que é reordenada com os vetores exatos em float32
+- no disco: lista de floats no JSON (formato original) ou bytes float32 /
+  float16 em base64 (~4-8x menor, útil também para Redis e SQLite)
+"""
+
+import base64
+
+import numpy as np
+
+MATRIX_DTYPES = ("float64", "float32", "float16", "int8")
+DISK_FORMATS = ("list", "float32", "float16")
+
+# Faixa inicial do int8 antes da calibração (componentes do dlib ficam em ±0.5)
+INT8_DEFAULT_RANGE = 0.5
+# Sem calibração explícita (load_all), a escala int8 é calibrada uma vez ao
+# atingir este número de linhas; até lá vale a faixa padrão
+INT8_CALIBRATION_ROWS = 64
+# Linhas convertidas para float32 por bloco na varredura (memória limitada)
+SCAN_BLOCK_ROWS = 4096
+
+
+def pack_encoding(vector, disk_format="list"):
+    """
+    Serializa o encoding para o JSON do funcionário
+
+    Args:
+        vector: Encoding (lista ou numpy array)
+        disk_format (str): list, float32 ou float16
+
+    Returns:
+        list | dict: Lista de floats ou {"dtype": ..., "data": base64}
+    """
+    if disk_format == "list":
+        return [float(v) for v in vector]
+    if disk_format not in DISK_FORMATS:
+        raise ValueError(f"Formato de encoding desconhecido: {disk_format}. Use: {', '.join(DISK_FORMATS)}")
+    data = np.asarray(vector, dtype=disk_format).tobytes()
+    return {"dtype": disk_format, "data": base64.b64encode(data).decode("ascii")}
+
+
+def unpack_encoding(value):
+    """
+    Encoding gravado (qualquer formato de pack_encoding) como numpy float64
+
+    Raises:
+        ValueError: Se o dtype gravado não for suportado
+    """
+    if isinstance(value, dict):
+        dtype = value.get("dtype")
+        if dtype not in DISK_FORMATS[1:]:
+            raise ValueError(f"dtype de encoding não suportado: {dtype}")
+        return np.frombuffer(base64.b64decode(value["data"]), dtype=dtype).astype(np.float64)
+    return np.asarray(value, dtype=np.float64)
+
+
+def blocked_squared_distances(codes, query, row_norms, scale=None, block_rows=SCAN_BLOCK_ROWS):
+    """
+    Distâncias euclidianas ao quadrado entre a consulta e cada linha de `codes`
+
+    ||x - q||² = ||x||² - 2·x·q + ||q||², com o produto em blocos de
+    `block_rows` linhas convertidas para float32 (o numpy não tem BLAS para
+    float16/int8; converter tudo de uma vez anularia a economia de memória).
+
+    Args:
+        codes (numpy.ndarray): Matriz (linhas, dimensões) em qualquer dtype
+        query (numpy.ndarray): Vetor de consulta
+        row_norms (numpy.ndarray): ||x||² de cada linha (já dequantizada)
+        scale (numpy.ndarray): Escala por dimensão (int8) ou None
+        block_rows (int): Linhas por bloco
+
+    Returns:
+        numpy.ndarray: float32 com uma distância ao quadrado por linha
+    """
+    query = np.asarray(query, dtype=np.float32)
+    # Com escala por dimensão: x·q = c·(escala*q), sem dequantizar a matriz
+    weighted = query * scale if scale is not None else query
+    result = np.empty(codes.shape[0], dtype=np.float32)
+    for start in range(0, codes.shape[0], block_rows):
+        block = codes[start:start + block_rows].astype(np.float32)
+        result[start:start + block_rows] = block @ weighted
+    result *= -2.0
+    result += row_norms[:codes.shape[0]]
+    result += float(query @ query)
+    np.maximum(result, 0.0, out=result)
+    return result
+
+
+class QuantizedMatrix:
+    """
+    Matriz de encodings (uma linha por funcionário) no dtype escolhido
+
+    No int8 a escala por dimensão é calibrada uma única vez: por calibrate()
+    (pré-carregamento) ou, sem ele, automaticamente quando a matriz atinge
+    INT8_CALIBRATION_ROWS linhas. Até a calibração as linhas usam a faixa
+    padrão (±INT8_DEFAULT_RANGE) e guardam o vetor exato, então mudar a
+    escala requantiza todas elas sem acumular erro.
+
+    Args:
+        dtype (str): float64, float32, float16 ou int8
+        dimensions (int): Dimensão dos encodings
+    """
+
+    def __init__(self, dtype="float64", dimensions=128):
+        if dtype not in MATRIX_DTYPES:
+            raise ValueError(f"dtype da matriz desconhecido: {dtype}. Use: {', '.join(MATRIX_DTYPES)}")
+        self.dtype = dtype
+        self.dimensions = dimensions
+        self.codes = np.zeros((0, dimensions), dtype=dtype)
+        self.row_norms = np.zeros(0, dtype=np.float32)
+        self.scale = np.full(dimensions, INT8_DEFAULT_RANGE / 127, dtype=np.float32) if dtype == "int8" else None
+        self.calibrated = dtype != "int8"
+        self.clipped_rows = 0
+        self._uncalibrated = {}  # linha → vetor exato, enquanto vale a escala padrão
+
+    @property
+    def exact(self):
+        """As linhas guardam o vetor sem perda relevante (float64/float32)?"""
+        return self.dtype in ("float64", "float32")
+
+    @property
+    def capacity(self):
+        return self.codes.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.row_norms.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def calibrate(self, vectors):
+        """
+        Escala int8 por dimensão a partir dos encodings conhecidos (uma única vez)
+
+        As linhas gravadas antes, com a escala padrão, são requantizadas a
+        partir dos vetores exatos.
+
+        Args:
+            vectors: Encodings de referência (lista ou matriz)
+
+        Returns:
+            bool: True se a escala foi calibrada agora
+        """
+        if self.calibrated or not len(vectors):
+            return False
+        peak = np.abs(np.asarray(vectors, dtype=np.float32)).max(axis=0)
+        # Folga de 5% para encodings novos um pouco fora da faixa observada
+        self.scale = np.maximum(peak * 1.05, 1e-6).astype(np.float32) / 127
+        self.calibrated = True
+
+        pending, self._uncalibrated = self._uncalibrated, {}
+        self.clipped_rows = 0
+        for row, vector in pending.items():
+            self.set_row(row, vector)
+        return True
+
+    def release_row(self, row):
+        """A linha foi liberada (funcionário removido): não requantizar na calibração"""
+        self._uncalibrated.pop(row, None)
+
+    def grow(self, capacity):
+        """Aumenta a capacidade preservando as linhas existentes"""
+        codes = np.zeros((capacity, self.dimensions), dtype=self.dtype)
+        codes[:self.capacity] = self.codes
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[:self.capacity] = self.row_norms
+        self.codes, self.row_norms = codes, norms
+
+    def set_row(self, row, vector):
+        vector = np.asarray(vector, dtype=np.float64)
+        if self.dtype == "int8":
+            if not self.calibrated:
+                self._uncalibrated[row] = vector
+                if len(self._uncalibrated) >= INT8_CALIBRATION_ROWS:
+                    self.calibrate(list(self._uncalibrated.values()))
+                    return
+            scaled = np.rint(vector / self.scale)
+            if np.abs(scaled).max() > 127:
+                self.clipped_rows += 1
+            self.codes[row] = np.clip(scaled, -127, 127)
+        else:
+            self.codes[row] = vector
+        # Norma do vetor como ficou guardado, para a distância da varredura ser coerente
+        self.row_norms[row] = float(np.sum(self.row(row) ** 2))
+
+    def row(self, row):
+        """Linha dequantizada como float64"""
+        values = self.codes[row].astype(np.float64)
+        return values * self.scale if self.scale is not None else values
+
+    def squared_distances(self, query, rows=None):
+        """Distâncias ao quadrado aproximadas até as primeiras `rows` linhas (todas por padrão)"""
+        codes = self.codes if rows is None else self.codes[:rows]
+        return blocked_squared_distances(codes, query, self.row_norms, self.scale)
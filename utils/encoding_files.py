@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+🗂️ Arquivos de encoding no STORAGE_PATH
+- {employee_id}_encoding.json: arquivo original
+- {employee_id}_encoding.{versão}.json: gravado lado a lado por uma migração
+  de motor/modelo (reencode-encodings.py); com ENCODING_MODEL_VERSION o
+  store lê a versão nova quando existe e cai no original quando não
+"""
+
+import os
+import re
+
+ENCODING_SUFFIX = "_encoding.json"
+
+# Versão de modelo no nome do arquivo
+MODEL_VERSION_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def validate_model_version(model_version):
+    """
+    Raises:
+        ValueError: Se a versão tiver caracteres fora de [A-Za-z0-9_-]
+    """
+    if model_version and not MODEL_VERSION_PATTERN.match(model_version):
+        raise ValueError(f"Versão de modelo inválida: {model_version!r} (use letras, números, _ ou -)")
+
+
+def encoding_filename(employee_id, model_version=None):
+    """Nome do arquivo de encoding do funcionário (original sem versão)"""
+    if not model_version:
+        return f"{employee_id}{ENCODING_SUFFIX}"
+    validate_model_version(model_version)
+    return f"{employee_id}_encoding.{model_version}.json"
+
+
+def employee_id_from_filename(name, model_version=None):
+    """
+    ID do funcionário se `name` for um arquivo de encoding da versão pedida
+
+    Returns:
+        str: ID, ou None se o arquivo for de outra versão (ou não for de encoding)
+    """
+    suffix = ENCODING_SUFFIX if not model_version else f"_encoding.{model_version}.json"
+    if name.endswith(suffix) and len(name) > len(suffix):
+        return name[:-len(suffix)]
+    return None
+
+
+def encoding_versions(storage_path, employee_id):
+    """
+    Arquivos de encoding existentes do funcionário
+
+    Returns:
+        dict: versão → caminho ("" = arquivo original)
+    """
+    versions = {}
+    legacy = os.path.join(storage_path, encoding_filename(employee_id))
+    if os.path.exists(legacy):
+        versions[""] = legacy
+    prefix = f"{employee_id}_encoding."
+    for name in os.listdir(storage_path) if os.path.isdir(storage_path) else []:
+        if name.startswith(prefix) and name.endswith(".json") and name != encoding_filename(employee_id):
+            version = name[len(prefix):-len(".json")]
+            if MODEL_VERSION_PATTERN.match(version):
+                versions[version] = os.path.join(storage_path, name)
+    return versions
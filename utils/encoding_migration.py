@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+🔀 Migração de motor/modelo: re-encoding das fotos guardadas
+Cada {employee_id}.jpg do STORAGE_PATH ganha um {employee_id}_encoding.{versão}.json
+ao lado do arquivo original, calculado com o motor/perfil novos. Nada é
+apagado: a API continua lendo o original até ENCODING_MODEL_VERSION
+apontar para a versão nova, e a partir daí lê a versão nova quando existe
+(leitura dupla), então a migração roda com o serviço no ar.
+
+Reaproveita o cadastro em massa (pool de processos, lotes, relatório JSONL
+com fsync). A retomada olha os próprios arquivos: a versão nova só é
+refeita quando a foto é mais recente que ela (recadastro durante a
+migração) ou com force.
+
+A versão nova é gravada só no fim do lote: se a foto (ou a própria versão
+nova, gravada pela API) mudou desde a leitura, o resultado é descartado
+(status skipped, reason source_changed) e a próxima execução refaz o item.
+"""
+
+import os
+import json
+import logging
+
+from utils.bulk_enrollment import BulkEnrollment
+from utils.encoding_files import encoding_filename
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class EncodingMigration(BulkEnrollment):
+    """
+    Recalcula os encodings do STORAGE_PATH numa versão de modelo nova
+
+    Args:
+        storage_path (str): Pasta das fotos e encodings (origem e destino)
+        report_path (str): Relatório JSONL
+        model_version (str): Versão gravada ({id}_encoding.{versão}.json)
+        force (bool): Refazer também quem já tem a versão nova atualizada
+        **kwargs: Demais argumentos de BulkEnrollment (workers, profile, engine_options, ...)
+    """
+
+    SUCCESS_STATUS = "reencoded"
+
+    def __init__(self, storage_path, report_path, model_version, force=False, **kwargs):
+        if not model_version:
+            raise ValueError("A migração precisa de uma versão de modelo")
+        super().__init__(storage_path, report_path, model_version=model_version, **kwargs)
+        self.force = force
+
+    def run(self, source=None, progress=None):
+        """Processa as fotos do próprio STORAGE_PATH (ver BulkEnrollment.run)"""
+        return super().run(source or self.storage_path, progress)
+
+    def _is_current(self, employee_id):
+        # Versão nova gravada depois da última alteração da foto
+        try:
+            photo_mtime = os.stat(os.path.join(self.storage_path, f"{employee_id}.jpg")).st_mtime_ns
+            return os.stat(self.encoding_path(employee_id)).st_mtime_ns >= photo_mtime
+        except FileNotFoundError:
+            return False
+
+    def _source_version(self, employee_id):
+        # mtime da foto e da versão nova (ausente = None) no momento da leitura
+        return (_mtime(os.path.join(self.storage_path, f"{employee_id}.jpg")), _mtime(self.encoding_path(employee_id)))
+
+    def _skip_reason(self, employee_id, previous, seen):
+        if employee_id in seen:
+            return "duplicate_in_source"
+        if previous.get(employee_id) == "failed" and not self.retry_failed:
+            return "already_in_report"
+        if not self.force and self._is_current(employee_id):
+            return "already_migrated"
+        return None
+
+    def _previous_encoding(self, employee_id):
+        try:
+            with open(os.path.join(self.storage_path, encoding_filename(employee_id)), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return {key: data.get(key) for key in ("engine", "profile", "created_at", "template")}
+
+    def _encoding_data(self, employee_id, result):
+        data = super()._encoding_data(employee_id, result)
+        data["source"] = "reencode"
+        data["migrated_from"] = self._previous_encoding(employee_id)
+        return data
+
+    def _write_result(self, employee_id, result, image_bytes, version=None):
+        # Recadastro desde a leitura: o encoding calculado é da foto antiga
+        if version is not None and self._source_version(employee_id) != version:
+            logger.warning(f"⚠️ {employee_id}: foto alterada durante a migração, resultado descartado")
+            return False
+        # A foto já está no STORAGE_PATH: só o encoding da versão nova é gravado
+        self._write_atomic(
+            self.encoding_path(employee_id),
+            json.dumps(self._encoding_data(employee_id, result), indent=2).encode()
+        )
+        return True
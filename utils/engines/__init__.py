@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+🧩 Motores de reconhecimento facial plugáveis
+O backend do processo é escolhido por configuração (FACE_ENGINE):
+
+- dlib: face_recognition (padrão)
+- opencv: YuNet + SFace via OpenCV DNN, modelos ONNX locais
+- onnx: YuNet + SFace (int8) no ONNX Runtime em CPU
+- mock: determinístico, sem modelos (testes e desenvolvimento)
+- simulated: sem dependências; usado no modo limitado quando o motor configurado não carrega
+"""
+
+import os
+import logging
+import threading
+
+from utils.engines.base import FaceEngine, EngineUnavailable
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+ENGINE_NAMES = ("dlib", "opencv", "onnx", "mock", "simulated")
+
+# Métrica de FaceEngine.distance em cada motor (para comparar encodings gravados sem carregar modelos)
+ENGINE_METRICS = {"dlib": "euclidean", "opencv": "cosine", "onnx": "cosine", "mock": "euclidean",
+                  "simulated": "euclidean"}
+
+DEFAULT_YUNET_MODEL = "models/face_detection_yunet_2023mar.onnx"
+DEFAULT_SFACE_MODEL = "models/face_recognition_sface_2021dec.onnx"
+DEFAULT_SFACE_INT8_MODEL = "models/face_recognition_sface_2021dec_int8.onnx"
+
+
+def create_engine(name="dlib", yunet_model=None, sface_model=None, ort_recognizer_model=None, ort_threads=0):
+    """
+    Instancia um backend pelo nome
+
+    Args:
+        name (str): dlib, opencv, onnx, mock ou simulated
+        yunet_model (str): Modelo do detector YuNet (backends opencv e onnx)
+        sface_model (str): Modelo do reconhecedor SFace (backend opencv)
+        ort_recognizer_model (str): Modelo do reconhecedor no ONNX Runtime (padrão: SFace int8)
+        ort_threads (int): Threads intra-op do ONNX Runtime (0 = derivado do layout de workers)
+
+    Returns:
+        FaceEngine: Backend pronto para uso
+
+    Raises:
+        ValueError: Se o nome não existir
+        EngineUnavailable: Se a dependência ou o modelo não estiver disponível
+    """
+    name = (name or "dlib").strip().lower()
+    if name == "dlib":
+        from utils.engines.dlib_engine import DlibEngine
+        return DlibEngine()
+    if name == "opencv":
+        from utils.engines.opencv_dnn import OpenCVDnnEngine
+        return OpenCVDnnEngine(yunet_model or DEFAULT_YUNET_MODEL, sface_model or DEFAULT_SFACE_MODEL)
+    if name == "onnx":
+        from utils.engines.onnx_runtime import OnnxRuntimeEngine
+        return OnnxRuntimeEngine(
+            yunet_model or DEFAULT_YUNET_MODEL,
+            ort_recognizer_model or DEFAULT_SFACE_INT8_MODEL,
+            threads=ort_threads or default_ort_threads()
+        )
+    if name == "mock":
+        from utils.engines.mock_engine import MockEngine
+        return MockEngine()
+    if name == "simulated":
+        from utils.engines.simulated import SimulatedEngine
+        return SimulatedEngine()
+    raise ValueError(f"Motor facial desconhecido: {name}. Use: {', '.join(ENGINE_NAMES)}")
+
+
+def default_ort_threads(engine_workers=None):
+    """
+    Threads intra-op do ONNX Runtime para o layout de workers deste host
+
+    Núcleos divididos pelos processos do servidor (WEB_CONCURRENCY, que o
+    gunicorn.conf.py exporta) e pelas threads do pipeline que chamam o motor.
+
+    Args:
+        engine_workers (int): Workers de detecção + encoding (padrão: FACE_PIPELINE_*_WORKERS)
+    """
+    from utils.engines.onnx_runtime import intra_op_threads
+    if engine_workers is None:
+        engine_workers = (int(os.getenv("FACE_PIPELINE_DETECT_WORKERS", "1"))
+                          + int(os.getenv("FACE_PIPELINE_ENCODE_WORKERS", "1")))
+    return intra_op_threads(int(os.getenv("WEB_CONCURRENCY", "1")), engine_workers)
+
+
+def create_engine_from_env():
+    """Backend definido pelas variáveis FACE_ENGINE, FACE_YUNET_MODEL, FACE_SFACE_MODEL e FACE_ORT_*"""
+    return create_engine(
+        os.getenv("FACE_ENGINE", "dlib"),
+        yunet_model=os.getenv("FACE_YUNET_MODEL") or None,
+        sface_model=os.getenv("FACE_SFACE_MODEL") or None,
+        ort_recognizer_model=os.getenv("FACE_ORT_RECOGNIZER_MODEL") or None,
+        ort_threads=int(os.getenv("FACE_ORT_THREADS", "0"))
+    )
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def configure_engine(engine):
+    """
+    Define o backend usado pelo pipeline deste processo
+
+    Args:
+        engine (FaceEngine): Backend instanciado por create_engine
+    """
+    global _engine
+    with _engine_lock:
+        _engine = engine
+    logger.info(f"🧩 Motor facial: {engine.name}")
+
+
+def get_engine():
+    """
+    Backend do processo; sem configuração explícita, criado pelas variáveis de ambiente
+
+    Raises:
+        EngineUnavailable: Se o backend configurado não puder ser carregado
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine_from_env()
+                logger.info(f"🧩 Motor facial: {_engine.name}")
+    return _engine
+
+
+__all__ = [
+    "FaceEngine", "EngineUnavailable", "ENGINE_NAMES", "ENGINE_METRICS",
+    "create_engine", "create_engine_from_env", "default_ort_threads", "configure_engine", "get_engine",
+]
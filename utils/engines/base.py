@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+🧩 Interface comum dos motores de reconhecimento facial
+Detecção, landmarks, encoding e distância. O pipeline, os serviços e o
+Flask falam só com esta interface; o backend é escolhido por configuração.
+
+Convenções de todos os motores:
+- imagens RGB uint8 (H, W, 3)
+- caixas (top, right, bottom, left) em pixels da imagem recebida
+- landmarks de 5 pontos como dict com "left_eye", "right_eye" e "nose_tip"
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class EngineUnavailable(RuntimeError):
+    """O backend não pode ser usado neste host (dependência ou modelo ausente)"""
+
+
+class FaceEngine:
+    """
+    Contrato de um motor facial
+
+    Atributos:
+        name (str): Nome do backend (gravado junto dos encodings)
+        embedding_size (int): Dimensão dos encodings
+        default_tolerance (float): Limiar de distância recomendado para "mesma pessoa"
+        simulated (bool): Resultados fictícios (modo limitado); os encodings são gravados como mode="simulated"
+    """
+
+    name = "base"
+    embedding_size = 128
+    default_tolerance = 0.6
+    simulated = False
+
+    def decode(self, image_bytes, reduce_factor=1):
+        """
+        Decodifica os bytes da imagem para o formato que detect/encode recebem
+
+        Args:
+            image_bytes: bytes/bytearray/memoryview da imagem
+            reduce_factor (int): 1, 2, 4 ou 8 (o JPEG é decodificado já reduzido)
+
+        Returns:
+            Imagem RGB uint8 (H, W, 3) ou None se não decodificável
+        """
+        from utils.face_pipeline import decode_image
+        return decode_image(image_bytes, reduce_factor)
+
+    def detect(self, rgb, upsample=1, model="hog"):
+        """
+        Localiza rostos
+
+        Args:
+            rgb (numpy.ndarray): Imagem RGB
+            upsample (int): Ampliações da imagem antes da busca (backends que suportam)
+            model (str): Variante do detector ("hog"/"cnn" no dlib; ignorado nos demais)
+
+        Returns:
+            list: Caixas (top, right, bottom, left)
+        """
+        raise NotImplementedError
+
+    def landmarks(self, rgb, boxes, model="small"):
+        """
+        Landmarks de cada caixa
+
+        Returns:
+            list: Um dict por caixa (ao menos left_eye, right_eye e nose_tip)
+        """
+        raise NotImplementedError
+
+    def encode(self, rgb, boxes, num_jitters=1, landmark_model="small"):
+        """
+        Encodings das caixas informadas
+
+        Args:
+            rgb (numpy.ndarray): Imagem RGB
+            boxes (list): Caixas (top, right, bottom, left)
+            num_jitters (int): Reamostragens (backends que suportam)
+            landmark_model (str): "small" ou "large" (backends que suportam)
+
+        Returns:
+            list: embedding_size floats por rosto codificado (numpy.ndarray; lista no motor simulado)
+        """
+        raise NotImplementedError
+
+    def distance(self, encodings, reference):
+        """
+        Distância de cada encoding até a referência (menor = mais parecido)
+
+        Args:
+            encodings: Lista/matriz de encodings
+            reference: Encoding de referência
+
+        Returns:
+            numpy.ndarray: Uma distância por encoding
+        """
+        encodings = np.asarray(encodings, dtype=np.float64)
+        if encodings.size == 0:
+            return np.empty(0)
+        return np.linalg.norm(encodings - np.asarray(reference, dtype=np.float64), axis=1)
+
+    def warmup(self):
+        """Executa uma inferência descartável para alocar os buffers internos"""
+        image = np.full((160, 160, 3), 128, dtype=np.uint8)
+        self.detect(image)
+        self.encode(image, [(20, 140, 140, 20)])
+
+    def describe(self):
+        """Identificação do backend para estatísticas e /service-info"""
+        return {
+            "name": self.name,
+            "embedding_size": self.embedding_size,
+            "default_tolerance": self.default_tolerance,
+            "simulated": self.simulated
+        }
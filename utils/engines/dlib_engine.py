@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+🧠 Motor dlib (face_recognition): HOG/CNN, landmarks de 5/68 pontos e ResNet de 128 dimensões
+É o backend original da API e continua sendo o padrão.
+"""
+
+from utils.engines.base import FaceEngine, EngineUnavailable
+
+try:
+    import face_recognition
+except ImportError:
+    face_recognition = None
+
+
+class DlibEngine(FaceEngine):
+    """Backend face_recognition/dlib"""
+
+    name = "dlib"
+    embedding_size = 128
+    default_tolerance = 0.6
+
+    def __init__(self):
+        if face_recognition is None:
+            raise EngineUnavailable("face_recognition não está instalado (pip install face-recognition)")
+
+    def detect(self, rgb, upsample=1, model="hog"):
+        return face_recognition.face_locations(rgb, number_of_times_to_upsample=upsample, model=model)
+
+    def landmarks(self, rgb, boxes, model="small"):
+        return face_recognition.face_landmarks(rgb, boxes, model=model)
+
+    def encode(self, rgb, boxes, num_jitters=1, landmark_model="small"):
+        return face_recognition.face_encodings(rgb, boxes, num_jitters=num_jitters, model=landmark_model)
+
+    def distance(self, encodings, reference):
+        if len(encodings) == 0:
+            return super().distance(encodings, reference)
+        return face_recognition.face_distance(encodings, reference)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+🎭 Motor determinístico para testes e desenvolvimento sem dlib
+Só depende do numpy. A mesma imagem sempre gera a mesma caixa e o mesmo
+encoding, e imagens parecidas geram encodings próximos, então o fluxo
+completo (registro, verificação, limiares) pode ser exercitado em CI.
+
+- detect: caixa central (metade da imagem); imagens lisas não têm rosto
+- encode: miniatura 8x16 em cinza da caixa, centrada e normalizada
+"""
+
+from utils.engines.base import FaceEngine
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Desvio padrão mínimo dos níveis de cinza para haver "rosto"
+_FLAT_STD = 5.0
+
+
+def _gray(rgb):
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+class MockEngine(FaceEngine):
+    """Backend determinístico (sem modelos)"""
+
+    name = "mock"
+    embedding_size = 128
+    default_tolerance = 0.6
+
+    def detect(self, rgb, upsample=1, model="hog"):
+        height, width = rgb.shape[:2]
+        step = max(1, max(height, width) // 64)
+        if _gray(rgb[::step, ::step]).std() < _FLAT_STD:
+            return []
+        return [(height // 4, 3 * width // 4, 3 * height // 4, width // 4)]
+
+    def landmarks(self, rgb, boxes, model="small"):
+        result = []
+        for top, right, bottom, left in boxes:
+            width, height = right - left, bottom - top
+            result.append({
+                "left_eye": [(int(left + 0.32 * width), int(top + 0.40 * height))],
+                "right_eye": [(int(left + 0.68 * width), int(top + 0.40 * height))],
+                "nose_tip": [(int(left + 0.50 * width), int(top + 0.58 * height))],
+            })
+        return result
+
+    def encode(self, rgb, boxes, num_jitters=1, landmark_model="small"):
+        encodings = []
+        for top, right, bottom, left in boxes:
+            if bottom - top < 8 or right - left < 16:
+                continue
+            rows = np.linspace(top, bottom - 1, 8).astype(int)
+            cols = np.linspace(left, right - 1, 16).astype(int)
+            thumbnail = _gray(rgb[np.ix_(rows, cols)]).astype(np.float64).ravel()
+            thumbnail -= thumbnail.mean()
+            norm = np.linalg.norm(thumbnail)
+            encodings.append(thumbnail / norm if norm else thumbnail)
+        return encodings
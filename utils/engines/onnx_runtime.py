@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+⚡ Motor ONNX Runtime (CPU): YuNet + SFace com reconhecedor quantizado int8
+Os mesmos modelos do backend opencv, executados pelo ONNX Runtime. O
+encoder do dlib (ResNet) é o maior custo por requisição na VPS sem GPU; o
+SFace int8 (face_recognition_sface_2021dec_int8.onnx) roda com kernels
+inteiros do ONNX Runtime e uma fração da memória.
+
+- o número de threads intra-op acompanha o layout de workers: núcleos
+  divididos pelos processos (WEB_CONCURRENCY) e pelos workers de
+  detecção + encoding do pipeline, para não disputar CPU entre si
+- as sessões são criadas no primeiro uso de cada processo (os pools de
+  threads do ONNX Runtime não sobrevivem ao fork do gunicorn)
+- encodings normalizados e distância de cosseno, como no backend opencv;
+  int8 e float32 ficam próximos mas não idênticos, por isso o motor é
+  gravado como "onnx" e não se mistura com "opencv"
+"""
+
+import os
+import threading
+
+from utils.engines.base import EngineUnavailable
+from utils.engines.opencv_dnn import OpenCVDnnEngine, cv2, np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+# Pontos de destino do alinhamento 112x112 do SFace (olho direito, olho esquerdo, nariz, boca)
+_SFACE_TEMPLATE = (
+    (38.2946, 51.6963), (73.5318, 51.5014), (56.0252, 71.7366),
+    (41.5493, 92.3655), (70.7299, 92.2041)
+)
+_YUNET_STRIDES = (8, 16, 32)
+
+
+def intra_op_threads(processes=1, engine_workers=2, cpu_count=None):
+    """
+    Threads intra-op por sessão para o layout de workers informado
+
+    Args:
+        processes (int): Processos do servidor (workers do gunicorn/uvicorn)
+        engine_workers (int): Threads do pipeline que chamam o motor (detect + encode)
+        cpu_count (int): Núcleos disponíveis (padrão: os.cpu_count())
+
+    Returns:
+        int: Threads por sessão, no mínimo 1
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // (max(1, processes) * max(1, engine_workers)))
+
+
+def _similarity_transform(src, dst):
+    """Matriz 2x3 de similaridade (Umeyama) que leva os landmarks `src` ao modelo `dst`"""
+    src_mean, dst_mean = src.mean(axis=0), dst.mean(axis=0)
+    src_c, dst_c = src - src_mean, dst - dst_mean
+    u, s, vt = np.linalg.svd(dst_c.T @ src_c / len(src))
+    d = np.ones(2)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        d[1] = -1
+    rotation = u @ np.diag(d) @ vt
+    scale = (s * d).sum() / src_c.var(axis=0).sum()
+    matrix = np.zeros((2, 3))
+    matrix[:, :2] = scale * rotation
+    matrix[:, 2] = dst_mean - scale * rotation @ src_mean
+    return matrix
+
+
+class OnnxRuntimeEngine(OpenCVDnnEngine):
+    """
+    Backend YuNet + SFace no ONNX Runtime (CPUExecutionProvider)
+
+    Args:
+        detector_model (str): Caminho do face_detection_yunet_*.onnx (float32 ou int8)
+        recognizer_model (str): Caminho do face_recognition_sface_*.onnx (int8 recomendado)
+        threads (int): Threads intra-op por sessão
+        score_threshold (float): Confiança mínima do YuNet
+        nms_threshold (float): IoU do non-maximum suppression
+        crop_margin (float): Margem do recorte em volta de caixas externas (fração do rosto)
+    """
+
+    name = "onnx"
+
+    def __init__(self, detector_model, recognizer_model, threads=1,
+                 score_threshold=0.7, nms_threshold=0.3, crop_margin=0.3):
+        if ort is None:
+            raise EngineUnavailable("onnxruntime não instalado (pip install onnxruntime)")
+        if cv2 is None:
+            raise EngineUnavailable("opencv-python é necessário para o backend onnx")
+        for path in (detector_model, recognizer_model):
+            if not path or not os.path.exists(path):
+                raise EngineUnavailable(f"Modelo ONNX não encontrado: {path}")
+        self.detector_model = detector_model
+        self.recognizer_model = recognizer_model
+        self.threads = max(1, int(threads))
+        self.score_threshold = score_threshold
+        self.nms_threshold = nms_threshold
+        self.crop_margin = crop_margin
+        self._template = np.array(_SFACE_TEMPLATE, dtype=np.float64)
+        self._sessions = None
+        self._sessions_pid = None
+        self._sessions_lock = threading.Lock()
+
+    def _session_options(self):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        # O paralelismo entre requisições já vem dos workers do pipeline
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return options
+
+    def _get_sessions(self):
+        """(detector, reconhecedor) deste processo; run() é thread-safe e a sessão é compartilhada"""
+        pid = os.getpid()
+        if self._sessions is None or self._sessions_pid != pid:
+            with self._sessions_lock:
+                if self._sessions is None or self._sessions_pid != pid:
+                    providers = ["CPUExecutionProvider"]
+                    self._sessions = (
+                        ort.InferenceSession(self.detector_model, self._session_options(), providers=providers),
+                        ort.InferenceSession(self.recognizer_model, self._session_options(), providers=providers)
+                    )
+                    self._sessions_pid = pid
+        return self._sessions
+
+    def _detect_rows(self, bgr):
+        """Linhas no formato do FaceDetectorYN: x, y, w, h, 5 landmarks (x, y), score"""
+        detector, _ = self._get_sessions()
+        model_input = detector.get_inputs()[0]
+        height, width = bgr.shape[:2]
+        fixed_h, fixed_w = model_input.shape[2:4]
+
+        if isinstance(fixed_h, int) and isinstance(fixed_w, int):
+            # Modelo exportado com entrada fixa: redimensiona e volta as coordenadas depois
+            scale_x, scale_y = width / fixed_w, height / fixed_h
+            image = cv2.resize(bgr, (fixed_w, fixed_h))
+        else:
+            # Entrada dinâmica: completa até múltiplo de 32 como o FaceDetectorYN
+            scale_x = scale_y = 1.0
+            pad_h, pad_w = -height % 32, -width % 32
+            image = cv2.copyMakeBorder(bgr, 0, pad_h, 0, pad_w, cv2.BORDER_CONSTANT, value=0)
+
+        blob = image.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+        outputs = dict(zip(
+            (output.name for output in detector.get_outputs()),
+            detector.run(None, {model_input.name: blob})
+        ))
+        rows = self._decode_yunet(outputs, image.shape[1])
+        if not len(rows):
+            return rows
+        rows[:, [0, 2, 4, 6, 8, 10, 12]] *= scale_x
+        rows[:, [1, 3, 5, 7, 9, 11, 13]] *= scale_y
+        return rows
+
+    def _decode_yunet(self, outputs, width):
+        """Decodifica as saídas cls/obj/bbox/kps por stride e aplica o NMS"""
+        candidates = []
+        for stride in _YUNET_STRIDES:
+            cols_n = width // stride
+            cls = outputs[f"cls_{stride}"].reshape(-1)
+            obj = outputs[f"obj_{stride}"].reshape(-1)
+            bbox = outputs[f"bbox_{stride}"].reshape(-1, 4)
+            kps = outputs[f"kps_{stride}"].reshape(-1, 10)
+
+            scores = np.sqrt(np.clip(cls, 0, 1) * np.clip(obj, 0, 1))
+            keep = np.nonzero(scores >= self.score_threshold)[0]
+            if not len(keep):
+                continue
+            col = (keep % cols_n).astype(np.float32)
+            row = (keep // cols_n).astype(np.float32)
+            cx = (col + bbox[keep, 0]) * stride
+            cy = (row + bbox[keep, 1]) * stride
+            w = np.exp(bbox[keep, 2]) * stride
+            h = np.exp(bbox[keep, 3]) * stride
+
+            decoded = np.zeros((len(keep), 15), dtype=np.float32)
+            decoded[:, 0], decoded[:, 1] = cx - w / 2, cy - h / 2
+            decoded[:, 2], decoded[:, 3] = w, h
+            decoded[:, 4:14:2] = (kps[keep, 0::2] + col[:, None]) * stride
+            decoded[:, 5:14:2] = (kps[keep, 1::2] + row[:, None]) * stride
+            decoded[:, 14] = scores[keep]
+            candidates.append(decoded)
+
+        if not candidates:
+            return np.empty((0, 15), dtype=np.float32)
+        rows = np.concatenate(candidates)
+        kept = cv2.dnn.NMSBoxes(
+            rows[:, :4].tolist(), rows[:, 14].tolist(), self.score_threshold, self.nms_threshold
+        )
+        return rows[np.asarray(kept, dtype=int).reshape(-1)]
+
+    def _features(self, bgr, rows):
+        if not rows:
+            return []
+        _, recognizer = self._get_sessions()
+        model_input = recognizer.get_inputs()[0]
+        faces = []
+        for row in rows:
+            matrix = _similarity_transform(np.asarray(row[4:14], dtype=np.float64).reshape(5, 2), self._template)
+            aligned = cv2.warpAffine(bgr, matrix, (112, 112))
+            # Mesma entrada do FaceRecognizerSF: RGB, float, sem normalização
+            faces.append(aligned[:, :, ::-1].transpose(2, 0, 1).astype(np.float32))
+
+        if isinstance(model_input.shape[0], int):
+            # Lote fixo (1): uma execução por rosto
+            return [recognizer.run(None, {model_input.name: face[np.newaxis]})[0][0] for face in faces]
+        return list(recognizer.run(None, {model_input.name: np.stack(faces)})[0])
+
+    def describe(self):
+        info = super().describe()
+        info.update(threads=self.threads, runtime=f"onnxruntime {ort.__version__}")
+        return info
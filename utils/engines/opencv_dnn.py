@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+🛰️ Motor OpenCV DNN: detector YuNet + reconhecedor SFace (ONNX)
+Roda só com o opencv-python (>= 4.5.4), sem dlib. Os modelos são arquivos
+locais distribuídos junto da aplicação (FACE_YUNET_MODEL, FACE_SFACE_MODEL).
+
+Diferenças em relação ao dlib:
+- o YuNet já devolve 5 landmarks por rosto; para caixas vindas de fora
+  (escada, dicas) ele roda de novo num recorte com margem em volta da caixa
+- upsample, model, num_jitters e landmark_model são ignorados
+- a distância é a de cosseno (1 - similaridade) entre encodings normalizados
+"""
+
+import os
+import threading
+
+from utils.engines.base import FaceEngine, EngineUnavailable
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+# Posição relativa dos landmarks numa caixa frontal, usada quando o YuNet não
+# confirma o rosto dentro do recorte (olho direito, olho esquerdo, nariz, boca)
+_DEFAULT_LANDMARKS = ((0.32, 0.40), (0.68, 0.40), (0.50, 0.58), (0.36, 0.78), (0.64, 0.78))
+
+
+class OpenCVDnnEngine(FaceEngine):
+    """
+    Backend YuNet + SFace
+
+    Args:
+        detector_model (str): Caminho do face_detection_yunet_*.onnx
+        recognizer_model (str): Caminho do face_recognition_sface_*.onnx
+        score_threshold (float): Confiança mínima do YuNet
+        crop_margin (float): Margem do recorte em volta de caixas externas (fração do rosto)
+    """
+
+    name = "opencv"
+    embedding_size = 128
+    default_tolerance = 0.637  # 1 - 0.363, limiar de cosseno recomendado para o SFace
+
+    def __init__(self, detector_model, recognizer_model, score_threshold=0.7, crop_margin=0.3):
+        if cv2 is None or not hasattr(cv2, "FaceDetectorYN"):
+            raise EngineUnavailable("OpenCV >= 4.5.4 é necessário para o backend YuNet/SFace")
+        for path in (detector_model, recognizer_model):
+            if not path or not os.path.exists(path):
+                raise EngineUnavailable(f"Modelo ONNX não encontrado: {path}")
+        self.detector_model = detector_model
+        self.recognizer_model = recognizer_model
+        self.score_threshold = score_threshold
+        self.crop_margin = crop_margin
+        # Objetos DNN do OpenCV não são thread-safe: uma instância por thread do pipeline
+        self._local = threading.local()
+
+    def _detector(self):
+        detector = getattr(self._local, "detector", None)
+        if detector is None:
+            detector = cv2.FaceDetectorYN.create(self.detector_model, "", (320, 320), self.score_threshold)
+            self._local.detector = detector
+        return detector
+
+    def _recognizer(self):
+        recognizer = getattr(self._local, "recognizer", None)
+        if recognizer is None:
+            recognizer = cv2.FaceRecognizerSF.create(self.recognizer_model, "")
+            self._local.recognizer = recognizer
+        return recognizer
+
+    def _detect_rows(self, bgr):
+        """Linhas do YuNet: x, y, w, h, 5 landmarks (x, y), score"""
+        height, width = bgr.shape[:2]
+        detector = self._detector()
+        detector.setInputSize((width, height))
+        _, faces = detector.detect(bgr)
+        return faces if faces is not None else np.empty((0, 15), dtype=np.float32)
+
+    def _row_for_box(self, bgr, box):
+        """Linha do YuNet para uma caixa externa: detecção no recorte ou landmarks padrão"""
+        top, right, bottom, left = box
+        height, width = bgr.shape[:2]
+        pad_x = int((right - left) * self.crop_margin)
+        pad_y = int((bottom - top) * self.crop_margin)
+        y0, y1 = max(0, top - pad_y), min(height, bottom + pad_y)
+        x0, x1 = max(0, left - pad_x), min(width, right + pad_x)
+
+        rows = self._detect_rows(np.ascontiguousarray(bgr[y0:y1, x0:x1]))
+        if len(rows):
+            # Detecção mais próxima do centro da caixa
+            cx, cy = (left + right) / 2 - x0, (top + bottom) / 2 - y0
+            row = min(rows, key=lambda r: (r[0] + r[2] / 2 - cx) ** 2 + (r[1] + r[3] / 2 - cy) ** 2).copy()
+            # Coordenadas do recorte → imagem (x, y e os 5 landmarks; w e h não mudam)
+            row[[0, 4, 6, 8, 10, 12]] += x0
+            row[[1, 5, 7, 9, 11, 13]] += y0
+            return row, True
+
+        row = np.zeros(15, dtype=np.float32)
+        row[:4] = (left, top, right - left, bottom - top)
+        for index, (fx, fy) in enumerate(_DEFAULT_LANDMARKS):
+            row[4 + index * 2] = left + fx * (right - left)
+            row[5 + index * 2] = top + fy * (bottom - top)
+        return row, False
+
+    def detect(self, rgb, upsample=1, model="hog"):
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        height, width = rgb.shape[:2]
+        return [
+            (max(0, int(y)), min(width, int(x + w)), min(height, int(y + h)), max(0, int(x)))
+            for x, y, w, h in self._detect_rows(bgr)[:, :4]
+        ]
+
+    def landmarks(self, rgb, boxes, model="small"):
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        result = []
+        for box in boxes:
+            row, detected = self._row_for_box(bgr, box)
+            if not detected:
+                # Sem confirmação do YuNet não há landmarks reais para conferir
+                continue
+            result.append({
+                "right_eye": [(int(row[4]), int(row[5]))],
+                "left_eye": [(int(row[6]), int(row[7]))],
+                "nose_tip": [(int(row[8]), int(row[9]))],
+                "mouth": [(int(row[10]), int(row[11])), (int(row[12]), int(row[13]))],
+            })
+        return result
+
+    def encode(self, rgb, boxes, num_jitters=1, landmark_model="small"):
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        rows = [self._row_for_box(bgr, box)[0] for box in boxes]
+        encodings = []
+        for feature in self._features(bgr, rows):
+            feature = np.asarray(feature, dtype=np.float64).flatten()
+            norm = np.linalg.norm(feature)
+            encodings.append(feature / norm if norm else feature)
+        return encodings
+
+    def _features(self, bgr, rows):
+        """Vetor do SFace para cada linha (rosto alinhado pelos 5 landmarks)"""
+        recognizer = self._recognizer()
+        return [recognizer.feature(recognizer.alignCrop(bgr, row)) for row in rows]
+
+    def distance(self, encodings, reference):
+        encodings = np.asarray(encodings, dtype=np.float64)
+        if encodings.size == 0:
+            return np.empty(0)
+        reference = np.asarray(reference, dtype=np.float64)
+        return 1.0 - encodings @ (reference / (np.linalg.norm(reference) or 1.0))
+
+    def describe(self):
+        info = super().describe()
+        info.update(
+            detector_model=os.path.basename(self.detector_model),
+            recognizer_model=os.path.basename(self.recognizer_model)
+        )
+        return info
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+🎭 Motor simulado do modo limitado (sem face_recognition, OpenCV ou numpy)
+Usado automaticamente quando o motor configurado não pode ser carregado.
+Cadastro e verificação seguem o mesmo fluxo dos motores reais; só os
+resultados são fictícios.
+
+- decode: com OpenCV, a decodificação normal; sem ele, só o cabeçalho (SimulatedImage)
+- detect: um rosto central (metade da imagem) em qualquer imagem
+- encode: 128 valores derivados do hash do conteúdo (mesma imagem → mesmo encoding)
+- distance: euclidiana em Python puro
+
+Os encodings gravados levam mode="simulated" e engine="simulated" e nunca
+são comparados com os de motores reais.
+"""
+
+import math
+import hashlib
+
+from utils.engines.base import FaceEngine
+from utils.image_inspector import read_header
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+class SimulatedImage:
+    """Imagem não decodificada: bytes originais e dimensões lidas do cabeçalho"""
+    __slots__ = ("data", "shape")
+
+    def __init__(self, data, width, height):
+        self.data = bytes(data)
+        self.shape = (height, width, 3)
+
+
+class SimulatedEngine(FaceEngine):
+    """Backend sem dependências (modo limitado)"""
+
+    name = "simulated"
+    embedding_size = 128
+    default_tolerance = 0.6
+    simulated = True
+
+    def decode(self, image_bytes, reduce_factor=1):
+        if cv2 is not None:
+            return super().decode(image_bytes, reduce_factor)
+        info = read_header(image_bytes)
+        if info is None:
+            return None
+        return SimulatedImage(image_bytes, max(1, info.width // reduce_factor), max(1, info.height // reduce_factor))
+
+    def detect(self, rgb, upsample=1, model="hog"):
+        height, width = rgb.shape[:2]
+        return [(height // 4, 3 * width // 4, 3 * height // 4, width // 4)]
+
+    def landmarks(self, rgb, boxes, model="small"):
+        result = []
+        for top, right, bottom, left in boxes:
+            width, height = right - left, bottom - top
+            result.append({
+                "left_eye": [(int(left + 0.32 * width), int(top + 0.40 * height))],
+                "right_eye": [(int(left + 0.68 * width), int(top + 0.40 * height))],
+                "nose_tip": [(int(left + 0.50 * width), int(top + 0.58 * height))],
+            })
+        return result
+
+    def encode(self, rgb, boxes, num_jitters=1, landmark_model="small"):
+        content = rgb.data if isinstance(rgb, SimulatedImage) else rgb.tobytes()
+        encodings = []
+        for box in boxes:
+            digest = hashlib.shake_128(content + repr(tuple(box)).encode()).digest(self.embedding_size)
+            encodings.append([byte / 255.0 for byte in digest])
+        return encodings
+
+    def distance(self, encodings, reference):
+        reference = [float(v) for v in reference]
+        return [math.sqrt(sum((float(a) - b) ** 2 for a, b in zip(encoding, reference))) for encoding in encodings]
+
+    def warmup(self):
+        """Nada a aquecer"""
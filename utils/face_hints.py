@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+📍 Dicas de caixa do rosto enviadas pelo cliente
+Os apps de ponto já rodam um detector no aparelho e sabem onde está o
+rosto. A caixa enviada é conferida em vez do face_locations na imagem
+inteira, em duas etapas baratas:
+
+1. geometria dos landmarks de 5 pontos (~1ms), que descarta caixas tortas;
+2. o detector do motor num recorte pequeno em volta da dica (~160px, sem
+   upsample), que precisa achar um rosto sobreposto à caixa.
+
+O preditor de landmarks sempre devolve pontos plausíveis, mesmo numa caixa
+sem rosto; só a confirmação do detector rejeita parede, ombro ou fundo. Se
+qualquer etapa falhar, o pipeline volta para a detecção normal.
+"""
+
+import time
+import logging
+import threading
+
+from utils.engines import get_engine
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Menor lado aceito para a caixa da dica (px na imagem decodificada)
+MIN_HINT_SIDE = 20
+
+# Recorte conferido pelo detector: margem em volta da dica (fração do lado) e
+# lado do recorte redimensionado (rosto com ~100px, visível ao HOG sem upsample)
+CONFIRM_MARGIN = 0.25
+CONFIRM_CROP_SIDE = 160
+
+# Sobreposição mínima (IoU) entre a dica e o rosto achado no recorte
+CONFIRM_MIN_IOU = 0.3
+
+
+def parse_face_box(value):
+    """
+    Converte a dica do cliente em (top, right, bottom, left)
+
+    Aceita "x,y,largura,altura", [x, y, largura, altura] ou
+    {"x": .., "y": .., "width": .., "height": ..}, em pixels da imagem original.
+
+    Args:
+        value: Dica recebida na requisição
+
+    Returns:
+        tuple: Caixa (top, right, bottom, left)
+
+    Raises:
+        ValueError: Se o formato ou os valores forem inválidos
+    """
+    try:
+        if isinstance(value, dict):
+            x, y, width, height = (value[key] for key in ("x", "y", "width", "height"))
+        elif isinstance(value, str):
+            x, y, width, height = value.split(",")
+        else:
+            x, y, width, height = value
+        x, y, width, height = (int(round(float(v))) for v in (x, y, width, height))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Caixa do rosto inválida. Use x,y,largura,altura em pixels")
+    if x < 0 or y < 0 or width <= 0 or height <= 0:
+        raise ValueError("Caixa do rosto inválida: coordenadas negativas ou tamanho zero")
+    return (y, x + width, y + height, x)
+
+
+def scale_box(box, scale, shape):
+    """Leva a caixa da imagem original para a decodificada (reduzida por `scale`) e limita às bordas"""
+    height, width = shape[:2]
+    top, right, bottom, left = (int(v / scale) for v in box)
+    return (max(0, top), min(width, right), min(height, bottom), max(0, left))
+
+
+def _center(points):
+    return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+
+def landmarks_look_like_face(landmarks, box):
+    """
+    Confere a geometria dos 5 landmarks dentro da caixa
+
+    O preditor sempre devolve pontos, mesmo numa caixa sem rosto; num rosto
+    de verdade os olhos ficam acima do nariz, o nariz entre os olhos e a
+    distância entre os olhos é uma fração razoável da largura da caixa.
+    """
+    top, right, bottom, left = box
+    width, height = right - left, bottom - top
+    pad_x, pad_y = width * 0.1, height * 0.1
+    points = [point for feature in landmarks.values() for point in feature]
+    if not all(left - pad_x <= x <= right + pad_x and top - pad_y <= y <= bottom + pad_y for x, y in points):
+        return False
+
+    left_eye = _center(landmarks["left_eye"])
+    right_eye = _center(landmarks["right_eye"])
+    nose_x, nose_y = _center(landmarks["nose_tip"])
+    eye_distance = ((left_eye[0] - right_eye[0]) ** 2 + (left_eye[1] - right_eye[1]) ** 2) ** 0.5
+
+    return (
+        0.2 * width <= eye_distance <= 0.8 * width
+        and nose_y > max(left_eye[1], right_eye[1])
+        and min(left_eye[0], right_eye[0]) < nose_x < max(left_eye[0], right_eye[0])
+    )
+
+
+def box_iou(a, b):
+    """Interseção sobre união de duas caixas (top, right, bottom, left)"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    intersection = max(0, bottom - top) * max(0, right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    union = area_a + area_b - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def detector_confirms(rgb, box, min_iou=CONFIRM_MIN_IOU):
+    """
+    Roda o detector do motor num recorte pequeno em volta da dica
+
+    Args:
+        rgb (numpy.ndarray): Imagem RGB decodificada
+        box (tuple): Caixa (top, right, bottom, left) na escala de `rgb`
+        min_iou (float): Sobreposição mínima entre a dica e o rosto achado
+
+    Returns:
+        bool: True se há um rosto no recorte sobreposto à dica
+    """
+    height, width = rgb.shape[:2]
+    top, right, bottom, left = box
+    pad = int(max(bottom - top, right - left) * CONFIRM_MARGIN)
+    y0, y1 = max(0, top - pad), min(height, bottom + pad)
+    x0, x1 = max(0, left - pad), min(width, right + pad)
+    crop = rgb[y0:y1, x0:x1]
+    if crop.size == 0:
+        return False
+
+    scale = CONFIRM_CROP_SIDE / max(crop.shape[:2])
+    if cv2 is not None and scale != 1.0:
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        crop = cv2.resize(crop, (max(1, int(crop.shape[1] * scale)), max(1, int(crop.shape[0] * scale))),
+                          interpolation=interpolation)
+    else:
+        scale = 1.0
+
+    hint = tuple(int(v * scale) for v in (top - y0, right - x0, bottom - y0, left - x0))
+    return any(box_iou(found, hint) >= min_iou for found in get_engine().detect(crop, upsample=0))
+
+
+class HintValidator:
+    """
+    Valida dicas de caixa e conta aceitações e rejeições
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._received = 0
+        self._accepted = 0
+        self._seconds = 0.0
+
+    def check(self, rgb, box):
+        """
+        A caixa contém um rosto? (landmarks + confirmação do detector no recorte)
+
+        Args:
+            rgb (numpy.ndarray): Imagem RGB decodificada
+            box (tuple): Caixa (top, right, bottom, left) na escala de `rgb`
+
+        Returns:
+            bool: True se a dica pode substituir a detecção
+        """
+        start = time.perf_counter()
+        top, right, bottom, left = box
+        accepted = False
+        if min(right - left, bottom - top) >= MIN_HINT_SIDE:
+            landmarks = get_engine().landmarks(rgb, [box], model="small")
+            accepted = bool(landmarks) and landmarks_look_like_face(landmarks[0], box) and detector_confirms(rgb, box)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._received += 1
+            self._seconds += elapsed
+            if accepted:
+                self._accepted += 1
+        if not accepted:
+            logger.info(f"📍 Dica de caixa rejeitada {box}; usando a detecção completa")
+        return accepted
+
+    def stats(self):
+        """Dicas recebidas, aceitas e custo médio da validação"""
+        with self._lock:
+            received = self._received
+            accepted = self._accepted
+            seconds = self._seconds
+        return {
+            "received": received,
+            "accepted": accepted,
+            "rejected": received - accepted,
+            "accept_rate": round(accepted / received, 4) if received else 0.0,
+            "avg_ms": round(seconds / received * 1000, 3) if received else 0.0
+        }
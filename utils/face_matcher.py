@@ -4,32 +4,126 @@
 Compara duas imagens base64 diretamente
 """
 
-import face_recognition
+import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import numpy as np
 import base64
 import logging
-from io import BytesIO
-from PIL import Image
+
+from utils.face_pipeline import (
+    StagedPipeline, run_inline, get_cancellation_stats,
+    configure_memory_limits, get_memory_stats, decode_image,
+    configure_quality_gate, get_quality_stats,
+    configure_prefilter, get_prefilter_stats,
+    configure_detection_ladder, get_detection_stats,
+    configure_hint_validation, get_hint_stats
+)
+from utils.image_quality import QualityGate
+from utils.cascade_prefilter import CascadePrefilter
+from utils.detection_ladder import DetectionLadder, build_detection_ladder
+from utils.progressive_verify import ProgressiveVerifier
+from utils.face_profiles import get_profile
+from utils.face_selection import select_faces
+from utils.image_inspector import inspect_image, ImageRejected
+from utils.singleflight import SingleFlight
+from utils.deadline import DeadlineExceeded
+from utils.engines import get_engine
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
 # Configurações
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
+MIN_IMAGE_DIMENSION = 50  # px
+MAX_IMAGE_PIXELS = int(os.getenv('FACE_MAX_IMAGE_PIXELS', '50000000'))  # Acima disso: bomba de descompressão
 
-def load_image_from_base64(b64_string):
+# Motor facial (FACE_ENGINE: dlib, opencv ou mock), carregado já na importação
+get_engine()
+
+# Pipeline em estágios: o decode da imagem capturada acontece enquanto a
+# imagem de referência está na detecção
+PIPELINE_ENABLED = os.getenv('FACE_PIPELINE_ENABLED', 'true').lower() == 'true'
+_pipeline = StagedPipeline(
+    decode_workers=int(os.getenv('FACE_PIPELINE_DECODE_WORKERS', '2')),
+    detect_workers=int(os.getenv('FACE_PIPELINE_DETECT_WORKERS', '1')),
+    encode_workers=int(os.getenv('FACE_PIPELINE_ENCODE_WORKERS', '1')),
+    queue_size=int(os.getenv('FACE_PIPELINE_QUEUE_SIZE', '4'))
+) if PIPELINE_ENABLED else None
+
+# Orçamento de memória das decodificações (por worker)
+configure_memory_limits(
+    budget_mb=int(os.getenv('FACE_MEMORY_BUDGET_MB', '512')),
+    max_decode_megapixels=float(os.getenv('FACE_MAX_DECODE_MEGAPIXELS', '12'))
+)
+
+# Filtro de qualidade antes da detecção (0 desativa cada limiar)
+if os.getenv('FACE_QUALITY_GATE_ENABLED', 'true').lower() == 'true':
+    configure_quality_gate(QualityGate(
+        min_sharpness=float(os.getenv('FACE_QUALITY_MIN_SHARPNESS', '25')),
+        min_brightness=float(os.getenv('FACE_QUALITY_MIN_BRIGHTNESS', '40')),
+        max_brightness=float(os.getenv('FACE_QUALITY_MAX_BRIGHTNESS', '220')),
+        min_contrast=float(os.getenv('FACE_QUALITY_MIN_CONTRAST', '15')),
+        max_clipped_fraction=float(os.getenv('FACE_QUALITY_MAX_CLIPPED_FRACTION', '0.6'))
+    ))
+
+# Pré-filtro cascade antes do HOG (opcional)
+if os.getenv('FACE_CASCADE_PREFILTER_ENABLED', 'false').lower() == 'true':
+    configure_prefilter(CascadePrefilter(
+        cascade_path=os.getenv('FACE_CASCADE_PATH') or None,
+        min_neighbors=int(os.getenv('FACE_CASCADE_MIN_NEIGHBORS', '2'))
+    ))
+
+# Escada de detecção: reduzido sem upsample primeiro, degraus caros só na falha
+if os.getenv('FACE_DETECTION_ESCALATION_ENABLED', 'true').lower() == 'true':
+    configure_detection_ladder(DetectionLadder(build_detection_ladder(
+        fast_max_side=int(os.getenv('FACE_DETECTION_FAST_MAX_SIDE', '640')),
+        cnn_fallback=os.getenv('FACE_DETECTION_CNN_FALLBACK', 'false').lower() == 'true'
+    )))
+
+# Comparação em dois níveis: encoding caro só quando a distância fica perto do limiar
+_progressive = ProgressiveVerifier(
+    margin=float(os.getenv('FACE_VERIFY_AMBIGUOUS_MARGIN', '0.05')),
+    recheck_jitters=int(os.getenv('FACE_VERIFY_RECHECK_JITTERS', '5')),
+    recheck_model=os.getenv('FACE_VERIFY_RECHECK_MODEL', 'large')
+) if os.getenv('FACE_PROGRESSIVE_VERIFY_ENABLED', 'true').lower() == 'true' else None
+
+# Perfil de detecção/encoding quando a requisição não informa um (fast, balanced, accurate)
+COMPARE_PROFILE = get_profile(os.getenv('FACE_COMPARE_PROFILE', 'balanced')).name
+
+# Dicas de caixa do cliente (detector no aparelho), conferidas por landmarks
+configure_hint_validation(os.getenv('FACE_HINTS_ENABLED', 'true').lower() == 'true')
+
+# Rostos codificados por imagem: só os selecionados pagam o encoding
+FACE_SELECTION_POLICY = os.getenv('FACE_SELECTION_POLICY', 'largest')
+FACE_SELECTION_LIMIT = int(os.getenv('FACE_SELECTION_LIMIT', '1'))
+select_faces([], (0, 0), FACE_SELECTION_POLICY)  # Política inválida falha na importação
+
+# Mensagens para as reprovações do filtro de qualidade
+QUALITY_REASONS = {
+    "too_dark": "muito escura",
+    "overexposed": "muito clara ou estourada",
+    "low_contrast": "com pouco contraste",
+    "too_blurry": "desfocada"
+}
+
+# Imagens idênticas em andamento (mesmo hash) compartilham o processamento
+_face_jobs = SingleFlight("face_jobs")
+
+def decode_base64_image(b64_string):
     """
-    Carrega uma imagem a partir de string base64
+    Valida o data URI e o cabeçalho da imagem e retorna os bytes
+    
+    O conteúdo precisa bater com o MIME declarado e respeitar as dimensões
+    mínimas e o limite de pixels (verificado sem decodificar).
     
     Args:
         b64_string (str): String base64 no formato data:image/jpeg;base64,/9j/4AAQ...
         
     Returns:
-        numpy.ndarray: Imagem carregada ou None em caso de erro
+        bytes: Bytes da imagem ou None em caso de erro
     """
     try:
-        logger.debug("📷 Processando imagem base64")
-        
         # Validar formato
         if not b64_string.startswith('data:image/'):
             logger.error("❌ Formato base64 inválido - deve começar com 'data:image/'")
@@ -66,104 +160,283 @@ def load_image_from_base64(b64_string):
             logger.error(f"❌ Imagem muito grande: {len(img_data)} bytes")
             return None
         
-        # Verificar se é uma imagem válida
+        # Validar o cabeçalho (formato real, dimensões e pixels) sem decodificar
         try:
-            image_buffer = BytesIO(img_data)
-            
-            with Image.open(image_buffer) as pil_img:
-                # Converter para RGB se necessário
-                if pil_img.mode != 'RGB':
-                    pil_img = pil_img.convert('RGB')
-                
-                # Verificar dimensões mínimas
-                if pil_img.width < 50 or pil_img.height < 50:
-                    logger.error(f"❌ Imagem muito pequena: {pil_img.width}x{pil_img.height}")
-                    return None
-                
-                logger.debug(f"✅ Imagem processada: {pil_img.width}x{pil_img.height}")
-                
-                # Reset para o início do buffer
-                image_buffer.seek(0)
-                
-                # Carregar com face_recognition
-                img = face_recognition.load_image_file(image_buffer)
-                return img
-                
-        except Exception as e:
-            logger.error(f"❌ Erro ao processar imagem: {e}")
+            inspect_image(
+                img_data,
+                expected_format=header[len('data:'):].split(';')[0],
+                min_dimension=MIN_IMAGE_DIMENSION,
+                max_pixels=MAX_IMAGE_PIXELS
+            )
+        except ImageRejected as e:
+            logger.error(f"❌ Imagem rejeitada ({e.reason}): {e.message}")
             return None
         
+        return img_data
+        
     except Exception as e:
-        logger.error(f"❌ Erro inesperado ao carregar imagem base64: {e}")
+        logger.error(f"❌ Erro inesperado ao decodificar base64: {e}")
         return None
 
-def perform_face_comparison(reference_img, captured_img, threshold=0.6):
+def load_image_from_base64(b64_string):
     """
-    Realiza a comparação facial entre duas imagens já carregadas
+    Carrega uma imagem a partir de string base64
     
     Args:
-        reference_img (numpy.ndarray): Imagem de referência
-        captured_img (numpy.ndarray): Imagem capturada
-        threshold (float): Limiar para considerar match (padrão 0.6)
+        b64_string (str): String base64 no formato data:image/jpeg;base64,/9j/4AAQ...
         
     Returns:
-        dict: Resultado da comparação
+        numpy.ndarray: Imagem carregada ou None em caso de erro
     """
     try:
-        # Extrair encodings faciais da imagem de referência
-        logger.debug("🔍 Extraindo encoding da imagem de referência...")
-        ref_encodings = face_recognition.face_encodings(reference_img)
-        
-        if not ref_encodings:
-            logger.warning("⚠️ Nenhum rosto encontrado na imagem de referência")
-            return {
-                "success": False,
-                "reason": "Nenhum rosto encontrado na imagem de referência"
-            }
-        
-        if len(ref_encodings) > 1:
-            logger.warning(f"⚠️ Múltiplos rostos encontrados na imagem de referência ({len(ref_encodings)}). Usando o primeiro.")
-        
-        # Extrair encodings faciais da imagem capturada
-        logger.debug("🔍 Extraindo encoding da imagem capturada...")
-        cap_encodings = face_recognition.face_encodings(captured_img)
-        
-        if not cap_encodings:
-            logger.warning("⚠️ Nenhum rosto encontrado na imagem capturada")
-            return {
-                "success": False,
-                "reason": "Nenhum rosto encontrado na imagem capturada"
-            }
-        
-        if len(cap_encodings) > 1:
-            logger.warning(f"⚠️ Múltiplos rostos encontrados na imagem capturada ({len(cap_encodings)}). Usando o primeiro.")
-        
-        # Usar o primeiro encoding de cada imagem
-        ref_vector = ref_encodings[0]
-        cap_vector = cap_encodings[0]
-        
-        # Calcular distância euclidiana
-        distance = np.linalg.norm(ref_vector - cap_vector)
+        logger.debug("📷 Processando imagem base64")
         
-        # Determinar match baseado no threshold
-        match = distance < threshold
+        img_data = decode_base64_image(b64_string)
+        if img_data is None:
+            return None
         
-        # Calcular confiança (aproximação)
-        # Confiança = 1 - distância, limitada entre 0 e 1
-        confidence = max(0.0, min(1.0, 1.0 - distance))
+        # Uma única decodificação, já em RGB (sem a cópia extra do PIL)
+        img = decode_image(img_data)
+        if img is None:
+            logger.error("❌ Erro ao processar imagem: falha na decodificação")
+            return None
         
-        # Log do resultado
-        match_emoji = "✅" if match else "❌"
-        logger.info(f"{match_emoji} Resultado: distância={distance:.4f}, threshold={threshold}, match={match}")
-        logger.info(f"📊 Confiança: {confidence:.3f} ({confidence*100:.1f}%)")
+        logger.debug(f"✅ Imagem processada: {img.shape[1]}x{img.shape[0]}")
+        return img
         
+    except Exception as e:
+        logger.error(f"❌ Erro inesperado ao carregar imagem base64: {e}")
+        return None
+
+def _run_jobs(*jobs):
+    """
+    Processa os jobs (decode → detect → encode) no pipeline em estágios
+
+    Todos são submetidos antes de esperar o primeiro, então os estágios se
+    sobrepõem entre as imagens da mesma requisição. Imagens idênticas em
+    andamento (coalescência) rodam uma cópia do job com o deadline mais longo
+    entre as requisições que esperam; cada requisição espera no máximo o
+    próprio deadline e, ao expirar, só o job dela recebe "deadline_exceeded".
+    """
+    keys = [job.coalesce_key() for job in jobs]
+    
+    if _pipeline is None:
+        results = []
+        for job, key in zip(jobs, keys):
+            if key is None:
+                results.append(run_inline(job))
+                continue
+            try:
+                results.append(_face_jobs.do_with_deadline(
+                    key, lambda shared, job=job: run_inline(job.detached(shared)), job.deadline
+                ))
+            except DeadlineExceeded:
+                job.reason = "deadline_exceeded"
+                results.append(job)
+        return results
+    
+    pending = [
+        _pipeline.submit(job) if key is None
+        else _face_jobs.submit_with_deadline(key, lambda shared, job=job: _pipeline.submit(job.detached(shared)), job.deadline)
+        for job, key in zip(jobs, keys)
+    ]
+    results = []
+    for job, key, work in zip(jobs, keys, pending):
+        try:
+            if key is not None:
+                results.append(work.result())
+            else:
+                results.append(work.result(job.deadline.remaining() if job.deadline is not None else None))
+        except (DeadlineExceeded, FutureTimeoutError):
+            if key is None:
+                work.cancel()  # Job só desta requisição: o pipeline descarta no próximo estágio
+            job.reason = "deadline_exceeded"
+            results.append(job)
+    return results
+
+def get_pipeline_stats():
+    """Vazão e utilização por estágio do pipeline deste processo"""
+    stats = _pipeline.stats() if _pipeline is not None else {"enabled": False}
+    stats["coalescing"] = _face_jobs.stats()
+    stats["cancellations"] = get_cancellation_stats()
+    stats["memory"] = get_memory_stats()
+    stats["quality"] = get_quality_stats()
+    stats["prefilter"] = get_prefilter_stats()
+    stats["detection"] = get_detection_stats()
+    stats["hints"] = get_hint_stats()
+    stats["engine"] = get_engine().describe()
+    stats["progressive"] = _progressive.stats() if _progressive is not None else {"enabled": False}
+    return stats
+
+def _job_failure(job, label):
+    """Monta a resposta de erro para um job que falhou"""
+    if job.reason in ("no_face", "encoding_failed"):
+        logger.warning(f"⚠️ Nenhum rosto encontrado na imagem {label}")
         return {
-            "success": True,
-            "match": match,
-            "confidence": round(confidence, 3),
-            "distance": round(distance, 4),
-            "threshold": threshold
+            "success": False,
+            "reason": f"Nenhum rosto encontrado na imagem {label}"
+        }
+    if job.reason in QUALITY_REASONS:
+        logger.warning(f"⚠️ Imagem {label} reprovada na qualidade: {job.reason}")
+        return {
+            "success": False,
+            "reason": f"Imagem {label} {QUALITY_REASONS[job.reason]}",
+            "quality": job.reason
+        }
+    if job.reason == "image_too_large":
+        return {
+            "success": False,
+            "reason": f"Resolução da imagem {label} muito alta para processamento"
+        }
+    if job.reason == "deadline_exceeded":
+        return {
+            "success": False,
+            "reason": "Tempo limite da requisição excedido"
+        }
+    if job.reason == "error":
+        return {
+            "success": False,
+            "reason": f"Erro na comparação: {job.metadata.get('error')}"
+        }
+    return {
+        "success": False,
+        "reason": f"Não foi possível processar a imagem {label}"
+    }
+
+def _faces_summary(job, face_index=0):
+    """Rostos detectados/codificados de um job e o rosto usado na decisão"""
+    return {
+        "faces_detected": job.metadata.get("faces_detected", len(job.locations)),
+        "faces_encoded": len(job.encodings),
+        "selection": job.metadata.get("face_selection"),
+        "hint": job.metadata.get("face_hint"),
+        "face_location": [int(v) for v in job.locations[face_index]]
+    }
+
+def _recheck_ambiguous(ref_job, cap_job, distance, threshold, deadline=None, images=(None, None), face_index=0):
+    """
+    Recodifica as duas imagens quando a distância barata está na faixa ambígua
+    
+    Reaproveita as caixas dos jobs baratos. Se o deadline expirar ou a
+    reavaliação falhar, mantém a distância barata.
+    
+    Args:
+        images (tuple): (referência, capturada) já decodificadas, para jobs
+            criados a partir de rgb
+    
+    Returns:
+        float: Distância usada na decisão
+    """
+    if not _progressive.is_ambiguous(distance, threshold):
+        _progressive.record(ambiguous=False)
+        return distance
+    
+    if deadline is not None and deadline.expired():
+        _progressive.record(ambiguous=True)
+        return distance
+    
+    start = time.perf_counter()
+    ref_recheck, cap_recheck = _run_jobs(
+        _progressive.recheck_job(ref_job, deadline, rgb=images[0]),
+        _progressive.recheck_job(cap_job, deadline, rgb=images[1], face_index=face_index)
+    )
+    elapsed = time.perf_counter() - start
+    if ref_recheck.failed or cap_recheck.failed:
+        logger.info("ℹ️ Reavaliação não concluída; mantendo distância barata")
+        _progressive.record(ambiguous=True)
+        return distance
+    
+    refined = get_engine().distance([cap_recheck.encodings[0]], ref_recheck.encodings[0])[0]
+    flipped = (refined < threshold) != (distance < threshold)
+    _progressive.record(ambiguous=True, rechecked=True, flipped=flipped, seconds=elapsed)
+    logger.info(
+        f"🎚️ Reavaliação: distância {distance:.4f} → {refined:.4f} "
+        f"({elapsed * 1000:.0f}ms{', decisão alterada' if flipped else ''})"
+    )
+    return refined
+
+def _compare_jobs(ref_job, cap_job, threshold, deadline=None, images=(None, None), profile=None):
+    """
+    Compara os encodings de dois jobs já processados
+    
+    Args:
+        deadline (Deadline): Limita a reavaliação da faixa ambígua (opcional)
+        images (tuple): Imagens rgb de origem dos jobs, se houver
+        profile (FaceProfile): Perfil usado nos jobs (decide a reavaliação)
+    
+    Returns:
+        dict: Resultado da comparação
+    """
+    if ref_job.failed:
+        return _job_failure(ref_job, "de referência")
+    
+    if ref_job.metadata.get("faces_detected", 1) > 1:
+        logger.warning(f"⚠️ Múltiplos rostos encontrados na imagem de referência ({ref_job.metadata['faces_detected']}). Usando o selecionado.")
+    
+    if cap_job.failed:
+        return _job_failure(cap_job, "capturada")
+    
+    if cap_job.metadata.get("faces_detected", 1) > 1:
+        logger.warning(f"⚠️ Múltiplos rostos encontrados na imagem capturada ({cap_job.metadata['faces_detected']}). Usando os selecionados.")
+    
+    # Rosto selecionado da referência contra os rostos selecionados da captura
+    ref_vector = ref_job.encodings[0]
+    
+    # Distância do motor configurado (com top-N na captura vale o rosto mais parecido)
+    distances = get_engine().distance(cap_job.encodings, ref_vector)
+    best = int(np.argmin(distances))
+    distance = distances[best]
+    
+    # Perto do limiar: recodificar com mais jitters antes de decidir
+    if _progressive is not None and (profile is None or profile.progressive):
+        distance = _recheck_ambiguous(ref_job, cap_job, distance, threshold, deadline, images, best)
+    
+    # Determinar match baseado no threshold
+    match = distance < threshold
+    
+    # Calcular confiança (aproximação)
+    # Confiança = 1 - distância, limitada entre 0 e 1
+    confidence = max(0.0, min(1.0, 1.0 - distance))
+    
+    # Log do resultado
+    match_emoji = "✅" if match else "❌"
+    logger.info(f"{match_emoji} Resultado: distância={distance:.4f}, threshold={threshold}, match={match}")
+    logger.info(f"📊 Confiança: {confidence:.3f} ({confidence*100:.1f}%)")
+    
+    return {
+        "success": True,
+        "match": bool(match),
+        "confidence": round(float(confidence), 3),
+        "distance": round(float(distance), 4),
+        "threshold": threshold,
+        "profile": profile.name if profile is not None else None,
+        "faces": {
+            "reference": _faces_summary(ref_job),
+            "captured": _faces_summary(cap_job, best)
         }
+    }
+
+def perform_face_comparison(reference_img, captured_img, threshold=0.6, profile=None):
+    """
+    Realiza a comparação facial entre duas imagens já carregadas
+    
+    Args:
+        reference_img (numpy.ndarray): Imagem de referência
+        captured_img (numpy.ndarray): Imagem capturada
+        threshold (float): Limiar para considerar match (padrão 0.6)
+        profile (str): Perfil fast, balanced ou accurate (padrão FACE_COMPARE_PROFILE)
+        
+    Returns:
+        dict: Resultado da comparação
+    """
+    try:
+        logger.debug("🔍 Extraindo encodings das imagens de referência e capturada...")
+        profile = get_profile(profile, COMPARE_PROFILE)
+        ref_job, cap_job = _run_jobs(
+            profile.job(rgb=reference_img, face_selection=FACE_SELECTION_POLICY, encode_limit=1),
+            profile.job(rgb=captured_img, face_selection=FACE_SELECTION_POLICY, encode_limit=FACE_SELECTION_LIMIT)
+        )
+        return _compare_jobs(ref_job, cap_job, threshold, images=(reference_img, captured_img), profile=profile)
         
     except Exception as e:
         logger.error(f"❌ Erro na comparação facial: {e}")
@@ -172,7 +445,8 @@ def perform_face_comparison(reference_img, captured_img, threshold=0.6):
             "reason": f"Erro na comparação: {str(e)}"
         }
 
-def compare_two_images(reference_b64, captured_b64, threshold=0.6):
+def compare_two_images(reference_b64, captured_b64, threshold=0.6, deadline=None, profile=None,
+                       reference_box=None, captured_box=None):
     """
     Compara duas imagens faciais em formato base64
     
@@ -180,6 +454,10 @@ def compare_two_images(reference_b64, captured_b64, threshold=0.6):
         reference_b64 (str): Imagem de referência em base64
         captured_b64 (str): Imagem capturada em base64
         threshold (float): Limiar para considerar match (padrão 0.6)
+        deadline (Deadline): Deadline da requisição (opcional)
+        profile (str): Perfil fast, balanced ou accurate (padrão FACE_COMPARE_PROFILE)
+        reference_box (tuple): Dica de caixa (top, right, bottom, left) da referência (opcional)
+        captured_box (tuple): Dica de caixa da imagem capturada (opcional)
         
     Returns:
         dict: Resultado da comparação
@@ -189,32 +467,43 @@ def compare_two_images(reference_b64, captured_b64, threshold=0.6):
             "confidence": float,
             "distance": float,
             "threshold": float,
+            "profile": str,
+            "faces": dict (rostos detectados/codificados por imagem),
             "reason": str (opcional)
         }
     """
     try:
         logger.info(f"🔍 Iniciando comparação facial com threshold={threshold}")
         
-        # Carregar imagem de referência
+        # Validar e extrair os bytes das imagens
         logger.debug("📥 Carregando imagem de referência...")
-        reference_img = load_image_from_base64(reference_b64)
-        if reference_img is None:
+        reference_bytes = decode_base64_image(reference_b64)
+        if reference_bytes is None:
             return {
                 "success": False,
                 "reason": "Não foi possível processar a imagem de referência"
             }
         
-        # Carregar imagem capturada
         logger.debug("📥 Carregando imagem capturada...")
-        captured_img = load_image_from_base64(captured_b64)
-        if captured_img is None:
+        captured_bytes = decode_base64_image(captured_b64)
+        if captured_bytes is None:
             return {
                 "success": False,
                 "reason": "Não foi possível processar a imagem capturada"
             }
         
+        # Decode → detect → encode das duas imagens no pipeline
+        profile = get_profile(profile, COMPARE_PROFILE)
+        ref_job, cap_job = _run_jobs(
+            profile.job(image_bytes=reference_bytes, min_dimension=MIN_IMAGE_DIMENSION, deadline=deadline,
+                        face_selection=FACE_SELECTION_POLICY, encode_limit=1, face_hint=reference_box),
+            profile.job(image_bytes=captured_bytes, min_dimension=MIN_IMAGE_DIMENSION, deadline=deadline,
+                        face_selection=FACE_SELECTION_POLICY, encode_limit=FACE_SELECTION_LIMIT,
+                        face_hint=captured_box)
+        )
+        
         # Realizar comparação facial
-        return perform_face_comparison(reference_img, captured_img, threshold)
+        return _compare_jobs(ref_job, cap_job, threshold, deadline, profile=profile)
         
     except ImportError as e:
         logger.error(f"❌ Dependência não encontrada: {e}")
@@ -229,6 +518,156 @@ def compare_two_images(reference_b64, captured_b64, threshold=0.6):
             "reason": f"Erro interno: {str(e)}"
         }
 
+def _recheck_ambiguous_many(ref_job, cap_jobs, distances, best_faces, threshold, deadline=None):
+    """
+    Reavaliação da faixa ambígua para várias capturas contra a mesma referência
+
+    A referência cara é codificada uma única vez, junto com as capturas
+    ambíguas, e as distâncias refinadas saem de uma só chamada ao motor.
+
+    Returns:
+        list: Distância usada na decisão de cada captura (na ordem de cap_jobs)
+    """
+    ambiguous = [i for i, distance in enumerate(distances)
+                 if distance is not None and _progressive.is_ambiguous(distance, threshold)]
+    for distance in distances:
+        if distance is not None and not _progressive.is_ambiguous(distance, threshold):
+            _progressive.record(ambiguous=False)
+    if not ambiguous:
+        return distances
+    if deadline is not None and deadline.expired():
+        for _ in ambiguous:
+            _progressive.record(ambiguous=True)
+        return distances
+
+    start = time.perf_counter()
+    rechecks = _run_jobs(
+        _progressive.recheck_job(ref_job, deadline),
+        *(_progressive.recheck_job(cap_jobs[i], deadline, face_index=best_faces[i]) for i in ambiguous)
+    )
+    elapsed = time.perf_counter() - start
+    ref_recheck, cap_rechecks = rechecks[0], rechecks[1:]
+    done = [(i, job) for i, job in zip(ambiguous, cap_rechecks) if not job.failed]
+    refined = list(distances)
+    if not ref_recheck.failed and done:
+        new_distances = get_engine().distance([job.encodings[0] for _, job in done], ref_recheck.encodings[0])
+        for (i, _), distance in zip(done, new_distances):
+            flipped = (distance < threshold) != (distances[i] < threshold)
+            _progressive.record(ambiguous=True, rechecked=True, flipped=flipped, seconds=elapsed / len(done))
+            refined[i] = float(distance)
+        done_indexes = {i for i, _ in done}
+    else:
+        done_indexes = set()
+    for i in ambiguous:
+        if i not in done_indexes:
+            _progressive.record(ambiguous=True)
+    logger.info(f"🎚️ Reavaliação em lote: {len(done_indexes)}/{len(ambiguous)} capturas ambíguas ({elapsed * 1000:.0f}ms)")
+    return refined
+
+def compare_reference_to_many(reference_b64, captured_list_b64, threshold=0.6, deadline=None, profile=None,
+                              reference_box=None):
+    """
+    Compara uma imagem de referência com várias capturas (auditorias)
+
+    A referência é decodificada e codificada uma única vez; as capturas
+    entram juntas no pipeline (em paralelo entre os workers) e todas as
+    distâncias saem de uma chamada vetorizada ao motor.
+
+    Args:
+        reference_b64 (str): Imagem de referência em base64
+        captured_list_b64 (list): Imagens capturadas em base64
+        threshold (float): Limiar para considerar match (padrão 0.6)
+        deadline (Deadline): Deadline da requisição (opcional)
+        profile (str): Perfil fast, balanced ou accurate (padrão FACE_COMPARE_PROFILE)
+        reference_box (tuple): Dica de caixa (top, right, bottom, left) da referência (opcional)
+
+    Returns:
+        dict: {"success", "threshold", "profile", "reference", "matches",
+        "results": [um resultado por captura, na ordem recebida]} ou
+        {"success": False, "reason"} se a referência falhar
+    """
+    try:
+        logger.info(f"🔍 Comparação em lote: 1 referência x {len(captured_list_b64)} capturas (threshold={threshold})")
+        reference_bytes = decode_base64_image(reference_b64)
+        if reference_bytes is None:
+            return {
+                "success": False,
+                "reason": "Não foi possível processar a imagem de referência"
+            }
+
+        profile = get_profile(profile, COMPARE_PROFILE)
+        captured_bytes = [decode_base64_image(image) for image in captured_list_b64]
+        valid = [i for i, data in enumerate(captured_bytes) if data is not None]
+        jobs = _run_jobs(
+            profile.job(image_bytes=reference_bytes, min_dimension=MIN_IMAGE_DIMENSION, deadline=deadline,
+                        face_selection=FACE_SELECTION_POLICY, encode_limit=1, face_hint=reference_box),
+            *(profile.job(image_bytes=captured_bytes[i], min_dimension=MIN_IMAGE_DIMENSION, deadline=deadline,
+                          face_selection=FACE_SELECTION_POLICY, encode_limit=FACE_SELECTION_LIMIT)
+              for i in valid)
+        )
+        ref_job, cap_jobs = jobs[0], dict(zip(valid, jobs[1:]))
+        if ref_job.failed:
+            return _job_failure(ref_job, "de referência")
+
+        # Todos os rostos de todas as capturas numa única matriz → uma chamada ao motor
+        encoded = [i for i in valid if not cap_jobs[i].failed]
+        owners = np.repeat(encoded, [len(cap_jobs[i].encodings) for i in encoded])
+        all_distances = get_engine().distance(
+            [encoding for i in encoded for encoding in cap_jobs[i].encodings], ref_job.encodings[0]
+        )
+
+        distances, best_faces = {}, {}
+        for i in encoded:
+            own = np.nonzero(owners == i)[0]
+            best_faces[i] = int(np.argmin(all_distances[own]))
+            distances[i] = float(all_distances[own][best_faces[i]])
+
+        if _progressive is not None and profile.progressive and encoded:
+            refined = _recheck_ambiguous_many(
+                ref_job, [cap_jobs[i] for i in encoded], [distances[i] for i in encoded],
+                [best_faces[i] for i in encoded], threshold, deadline
+            )
+            distances.update(zip(encoded, refined))
+
+        results = []
+        for index in range(len(captured_list_b64)):
+            if captured_bytes[index] is None:
+                results.append({
+                    "index": index,
+                    "success": False,
+                    "reason": "Não foi possível processar a imagem capturada"
+                })
+            elif index not in distances:
+                results.append(dict(_job_failure(cap_jobs[index], "capturada"), index=index))
+            else:
+                distance = distances[index]
+                results.append({
+                    "index": index,
+                    "success": True,
+                    "match": bool(distance < threshold),
+                    "confidence": round(max(0.0, min(1.0, 1.0 - distance)), 3),
+                    "distance": round(distance, 4),
+                    "faces": _faces_summary(cap_jobs[index], best_faces[index])
+                })
+
+        matches = sum(1 for result in results if result.get("match"))
+        logger.info(f"📊 Lote: {matches}/{len(results)} capturas compatíveis com a referência")
+        return {
+            "success": True,
+            "threshold": threshold,
+            "profile": profile.name,
+            "reference": _faces_summary(ref_job),
+            "matches": matches,
+            "results": results
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Erro inesperado na comparação em lote: {e}")
+        return {
+            "success": False,
+            "reason": f"Erro interno: {str(e)}"
+        }
+
 def set_threshold(new_threshold):
     """
     Define um novo threshold para comparação facial
@@ -254,8 +693,8 @@ def validate_base64_image(b64_string):
         dict: {"valid": bool, "reason": str (opcional)}
     """
     try:
-        img = load_image_from_base64(b64_string)
-        if img is not None:
+        # Apenas o cabeçalho: validar não precisa decodificar os pixels
+        if decode_base64_image(b64_string) is not None:
             return {"valid": True}
         else:
             return {"valid": False, "reason": "Imagem inválida ou formato não suportado"}
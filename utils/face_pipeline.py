@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""
+🏭 Pipeline de processamento facial em estágios
+decode (cv2.imdecode) → detect (face_locations) → encode (face_encodings)
+
+Cada requisição vira um FaceJob que atravessa os três estágios. O modo
+inline executa tudo em sequência na thread atual; o StagedPipeline roda cada
+estágio no seu próprio grupo de threads com filas limitadas entre eles, de
+forma que o decode da próxima imagem acontece enquanto a atual está na
+detecção.
+
+Jobs com deadline são verificados antes de cada estágio: se o deadline já
+passou, o job termina com reason "deadline_exceeded" sem gastar CPU nos
+estágios restantes.
+
+Com um orçamento de memória configurado (configure_memory_limits), o
+estágio de decode reserva o pico estimado pelo cabeçalho antes de
+decodificar; a reserva é devolvida quando o job termina. Com um QualityGate
+(configure_quality_gate), imagens borradas, escuras ou estouradas falham
+ainda no decode, antes de pagar a detecção. Com um CascadePrefilter
+(configure_prefilter), imagens sem nenhum candidato a rosto falham com
+"no_face" sem o HOG, e as caixas do cascade delimitam a busca do HOG. Jobs
+com escalate=True (verificação e comparação) usam a escada de detecção
+(configure_detection_ladder): reduzido sem upsample primeiro, e os degraus
+caros apenas quando nenhum rosto é encontrado.
+"""
+
+import os
+import time
+import hashlib
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field, replace
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Dict, List, Optional
+
+from utils.image_inspector import read_header
+from utils.image_quality import QualityGate
+from utils.cascade_prefilter import CascadePrefilter, union_box
+from utils.detection_ladder import DetectionLadder, locate_on_rung
+from utils.face_selection import select_faces
+from utils.face_hints import HintValidator, scale_box
+from utils.engines import get_engine
+from utils.memory_budget import (
+    MB, MemoryBudget, choose_reduce_factor, estimate_peak_bytes, estimate_unknown_bytes
+)
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+STAGES = ("decode", "detect", "encode")
+
+
+@dataclass
+class FaceJob:
+    """
+    Unidade de trabalho que atravessa os estágios do pipeline
+
+    Entrada: image_bytes (ou rgb já decodificado) e restrições da requisição.
+    Com locations já preenchido a detecção é pulada (caixas conhecidas).
+    Saída: rgb, locations, encodings ou reason (código da falha).
+    """
+    image_bytes: Optional[bytes] = None
+    rgb: Any = None
+    max_faces: Optional[int] = None      # Falha com "multiple_faces" acima disso
+    min_face_size: int = 0               # Falha com "face_too_small" abaixo disso (px)
+    min_dimension: int = 0               # Falha com "image_too_small" abaixo disso (px)
+    deadline: Any = None                 # utils.deadline.Deadline (opcional)
+    memory_reserved: int = 0             # Bytes reservados no orçamento de memória
+    check_quality: bool = True           # Passar pelo QualityGate (se configurado)
+    use_prefilter: bool = True           # Passar pelo CascadePrefilter (se configurado)
+    escalate: bool = False               # Usar a escada de detecção (se configurada)
+    detection: Any = None                # DetectionRung fixo (None = HOG em resolução cheia, upsample 1)
+    face_hint: Optional[tuple] = None    # Caixa (top, right, bottom, left) vinda do cliente, em px originais
+    face_selection: Optional[str] = None # Codificar só os rostos escolhidos: "largest" ou "central"
+    encode_limit: int = 1                # Quantos rostos a seleção mantém (top-N)
+    num_jitters: int = 1                 # Reamostragens no encoding (mais = estável e lento)
+    landmark_model: str = "small"        # Landmarks do encoding: "small" (5) ou "large" (68)
+    locations: List[tuple] = field(default_factory=list)
+    encodings: List[Any] = field(default_factory=list)
+    reason: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> bool:
+        return self.reason is not None
+
+    def coalesce_key(self):
+        """
+        Chave para coalescer jobs idênticos: hash do conteúdo da imagem mais
+        os parâmetros que alteram o resultado. None se não há bytes (rgb direto).
+        """
+        if self.image_bytes is None:
+            return None
+        digest = hashlib.blake2b(self.image_bytes, digest_size=16).hexdigest()
+        return (
+            digest, self.max_faces, self.min_face_size, self.min_dimension, self.escalate,
+            self.detection, self.face_hint, self.face_selection, self.encode_limit,
+            self.num_jitters, self.landmark_model, tuple(self.locations)
+        )
+
+    def detached(self, deadline):
+        """
+        Cópia do job para a execução compartilhada entre requisições coalescidas
+
+        O deadline não faz parte da chave: a cópia roda com o SharedDeadline
+        dos chamadores e nenhum deles escreve no job dos outros.
+        """
+        return replace(
+            self, deadline=deadline, metadata=dict(self.metadata), timings=dict(self.timings),
+            locations=list(self.locations), encodings=list(self.encodings)
+        )
+
+
+# Orçamento de memória do processo e limite de pixels decodificados
+_memory_budget = None
+_max_decode_pixels = 0
+
+
+def configure_memory_limits(budget_mb=0, max_decode_megapixels=0):
+    """
+    Configura o orçamento de memória e a redução de imagens enormes
+
+    Args:
+        budget_mb (int): Orçamento de memória do processo em MB (0 = sem limite)
+        max_decode_megapixels (float): Acima disso o JPEG é decodificado já
+            reduzido (IMREAD_REDUCED_COLOR_2/4/8); 0 = sempre tamanho original
+    """
+    global _memory_budget, _max_decode_pixels
+    _memory_budget = MemoryBudget(budget_mb * MB) if budget_mb else None
+    _max_decode_pixels = int(max_decode_megapixels * 1_000_000)
+
+
+# Avaliação de qualidade antes da detecção (None = desativada)
+_quality_gate = None
+
+
+def configure_quality_gate(gate: Optional[QualityGate]):
+    """
+    Define o QualityGate aplicado ao final do decode
+
+    Args:
+        gate (QualityGate): Limiares de qualidade, ou None para desativar
+    """
+    global _quality_gate
+    _quality_gate = gate
+
+
+def get_quality_stats():
+    """Rejeições por motivo do QualityGate deste processo"""
+    if _quality_gate is None:
+        return {"enabled": False}
+    return _quality_gate.stats()
+
+
+# Pré-filtro cascade antes do HOG (None = desativado)
+_prefilter = None
+
+
+def configure_prefilter(prefilter: Optional[CascadePrefilter]):
+    """
+    Define o pré-filtro cascade aplicado antes do face_locations
+
+    Args:
+        prefilter (CascadePrefilter): Detector permissivo, ou None para desativar
+    """
+    global _prefilter
+    _prefilter = prefilter
+
+
+def get_prefilter_stats():
+    """Rejeições rápidas e buscas delimitadas do pré-filtro deste processo"""
+    if _prefilter is None:
+        return {"enabled": False}
+    stats = _prefilter.stats()
+    with _prefilter_lock:
+        stats.update(_prefilter_outcomes)
+    return stats
+
+
+_prefilter_outcomes = {"seeded_hits": 0, "seeded_misses": 0}
+_prefilter_lock = threading.Lock()
+
+
+# Escada de detecção para jobs com escalate=True (None = face_locations padrão)
+_detection_ladder = None
+
+
+def configure_detection_ladder(ladder: Optional[DetectionLadder]):
+    """
+    Define a escada de detecção usada por verificação e comparação
+
+    Args:
+        ladder (DetectionLadder): Degraus em ordem de custo, ou None para desativar
+    """
+    global _detection_ladder
+    _detection_ladder = ladder
+
+
+def get_detection_stats():
+    """Quantas vezes cada degrau da escada resolveu a detecção"""
+    if _detection_ladder is None:
+        return {"enabled": False}
+    return _detection_ladder.stats()
+
+
+def configure_hint_validation(enabled: bool):
+    """
+    Liga ou desliga o uso das dicas de caixa enviadas pelos clientes
+
+    Args:
+        enabled (bool): False ignora as dicas e sempre roda a detecção
+    """
+    global _hint_validator
+    _hint_validator = HintValidator() if enabled else None
+
+
+def get_hint_stats():
+    """Dicas de caixa recebidas e aceitas neste processo"""
+    if _hint_validator is None:
+        return {"enabled": False}
+    return _hint_validator.stats()
+
+
+_hint_validator = HintValidator()
+
+
+def get_memory_stats():
+    """Uso do orçamento de memória deste processo"""
+    stats = _memory_budget.stats() if _memory_budget is not None else {"enabled": False}
+    stats["max_decode_megapixels"] = round(_max_decode_pixels / 1_000_000, 1)
+    return stats
+
+
+def decode_image(image_bytes, reduce_factor=1):
+    """
+    Decodifica bytes de imagem para um array RGB
+
+    Args:
+        image_bytes: bytes/bytearray/memoryview da imagem
+        reduce_factor (int): 1, 2, 4 ou 8 (o JPEG é decodificado já reduzido)
+
+    Returns:
+        numpy.ndarray: Imagem RGB ou None se não decodificável
+    """
+    flags = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }[reduce_factor]
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    image = cv2.imdecode(nparr, flags)
+    if image is None:
+        return None
+    # Converter para RGB (convenção dos motores faciais) no mesmo buffer
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+
+def _reserve_memory(job: FaceJob, nbytes) -> bool:
+    """Reserva o pico estimado do job; False se não couber ou o deadline expirar"""
+    if _memory_budget is None:
+        return True
+    if not _memory_budget.fits(nbytes):
+        logger.warning(f"⚠️ Imagem excede o orçamento de memória: {nbytes / MB:.0f}MB estimados")
+        job.reason = "image_too_large"
+        return False
+    start = time.perf_counter()
+    admitted = _memory_budget.acquire(nbytes, job.deadline)
+    # Espera pelo orçamento não conta como custo do estágio
+    job.timings["memory_wait"] = round(time.perf_counter() - start, 4)
+    if not admitted:
+        _record_cancellation("decode", job)
+        return False
+    job.memory_reserved = nbytes
+    return True
+
+
+def release_job_memory(job: FaceJob) -> None:
+    """
+    Devolve a reserva do job e solta o array decodificado
+
+    Chamado ao final do job: depois do encode o RGB não é mais usado.
+    """
+    job.rgb = None
+    if job.memory_reserved and _memory_budget is not None:
+        _memory_budget.release(job.memory_reserved)
+    job.memory_reserved = 0
+
+
+def decode_stage(job: FaceJob) -> None:
+    """Estágio 1: bytes → RGB"""
+    if job.rgb is not None:
+        height, width = job.rgb.shape[:2]
+        if not _reserve_memory(job, estimate_peak_bytes(width, height)):
+            return
+    else:
+        # Dimensões pelo cabeçalho, antes de alocar qualquer pixel
+        info = read_header(job.image_bytes)
+        if info is None:
+            factor = 1
+            nbytes = estimate_unknown_bytes(job.image_bytes)
+        else:
+            width, height = info.width, info.height
+            # IMREAD_REDUCED só economiza memória no JPEG (DCT escalonada);
+            # PNG/WebP seriam decodificados inteiros e depois reduzidos
+            factor = choose_reduce_factor(width, height, _max_decode_pixels) if info.format == "jpeg" else 1
+            nbytes = estimate_peak_bytes(width, height, factor)
+            job.metadata["format"] = info.format
+            if min(width, height) < job.min_dimension:
+                job.reason = "image_too_small"
+                return
+
+        if not _reserve_memory(job, nbytes):
+            return
+
+        job.rgb = get_engine().decode(job.image_bytes, factor)
+        if job.rgb is None:
+            job.reason = "invalid_image"
+            return
+        if factor > 1:
+            job.metadata["decode_scale"] = factor
+            logger.info(f"📉 Imagem {width}x{height} decodificada reduzida 1/{factor}")
+
+    height, width = job.rgb.shape[:2]
+    scale = job.metadata.get("decode_scale", 1)
+    if min(height, width) * scale < job.min_dimension:
+        job.reason = "image_too_small"
+        return
+
+    # Borrada, escura ou estourada: falhar aqui, sem custo de detecção
+    if _quality_gate is not None and job.check_quality:
+        reason, metrics = _quality_gate.check(job.rgb)
+        job.metadata["quality"] = metrics
+        if reason is not None:
+            job.reason = reason
+
+
+def _locate(job: FaceJob, image):
+    """face_locations, pela escada de detecção quando o job permite"""
+    if job.escalate and _detection_ladder is not None:
+        locations, rung = _detection_ladder.locate(image, job.deadline)
+        job.metadata["detection_rung"] = rung
+        return locations
+    if job.detection is not None:
+        return locate_on_rung(image, job.detection)
+    return get_engine().detect(image)
+
+
+def _seeded_locations(job: FaceJob, boxes):
+    """
+    HOG apenas na região das caixas do cascade
+
+    Só é usado quando o job não limita o número de rostos: para contar os
+    rostos (registro) o HOG precisa ver a imagem inteira.
+    """
+    if job.max_faces is not None:
+        return []
+    top, right, bottom, left = union_box(boxes)
+    crop = np.ascontiguousarray(job.rgb[top:bottom, left:right])
+    locations = [
+        (t + top, r + left, b + top, l + left)
+        for (t, r, b, l) in _locate(job, crop)
+    ]
+    with _prefilter_lock:
+        _prefilter_outcomes["seeded_hits" if locations else "seeded_misses"] += 1
+    job.metadata["prefilter"] = "seeded" if locations else "seeded_miss"
+    return locations
+
+
+def _hinted_locations(job: FaceJob):
+    """
+    Caixa do cliente conferida pelos landmarks, ou [] para detectar normalmente
+
+    Ignorada quando o job limita o número de rostos: para contar os rostos
+    (registro) a detecção precisa ver a imagem inteira.
+    """
+    if _hint_validator is None or job.max_faces is not None:
+        return []
+    box = scale_box(job.face_hint, job.metadata.get("decode_scale", 1), job.rgb.shape)
+    if _hint_validator.check(job.rgb, box):
+        job.metadata["face_hint"] = "accepted"
+        return [box]
+    job.metadata["face_hint"] = "rejected"
+    return []
+
+
+def detect_stage(job: FaceJob) -> None:
+    """Estágio 2: localização dos rostos"""
+    if not job.locations and job.face_hint is not None:
+        job.locations = _hinted_locations(job)
+
+    if job.locations:
+        # Caixas conhecidas (reavaliação de um job anterior ou dica aceita): só validar
+        pass
+    elif _prefilter is not None and job.use_prefilter:
+        boxes = _prefilter.find(job.rgb)
+        if not boxes:
+            # Nenhum candidato mesmo com o cascade permissivo: sem HOG
+            job.metadata["prefilter"] = "rejected"
+            job.reason = "no_face"
+            return
+        job.locations = _seeded_locations(job, boxes)
+
+    if not job.locations:
+        # Imagem inteira (sem pré-filtro, registro, ou o recorte não achou)
+        job.locations = _locate(job, job.rgb)
+
+    if not job.locations:
+        job.reason = "no_face"
+        return
+
+    if job.max_faces is not None and len(job.locations) > job.max_faces:
+        job.reason = "multiple_faces"
+        return
+
+    # Só os rostos selecionados seguem para o encoding
+    job.metadata["faces_detected"] = len(job.locations)
+    if job.face_selection and len(job.locations) > 1:
+        job.locations = select_faces(job.locations, job.rgb.shape, job.face_selection, job.encode_limit)
+        job.metadata["face_selection"] = job.face_selection
+    job.metadata["faces_encoded"] = len(job.locations)
+
+    # Tamanho do rosto na escala original (a imagem pode ter sido reduzida)
+    top, right, bottom, left = job.locations[0]
+    scale = job.metadata.get("decode_scale", 1)
+    if min(right - left, bottom - top) * scale < job.min_face_size:
+        job.reason = "face_too_small"
+
+
+def encode_stage(job: FaceJob) -> None:
+    """Estágio 3: encodings de 128 dimensões"""
+    job.encodings = get_engine().encode(
+        job.rgb, job.locations, num_jitters=job.num_jitters, landmark_model=job.landmark_model
+    )
+    if not job.encodings:
+        job.reason = "encoding_failed"
+
+
+STAGE_FUNCTIONS = {
+    "decode": decode_stage,
+    "detect": detect_stage,
+    "encode": encode_stage,
+}
+
+# Custo médio recente de cada estágio (média móvel) e trabalho cancelado
+_STAGE_COST_ALPHA = 0.1
+_stage_cost = {name: 0.0 for name in STAGES}
+_cancellations = {"by_stage": {name: 0 for name in STAGES}, "cpu_seconds_saved": 0.0}
+_cancellations_lock = threading.Lock()
+
+
+def _record_cancellation(name, job):
+    """Conta o job abortado antes do estágio `name` e estima a CPU poupada"""
+    remaining_stages = STAGES[STAGES.index(name):]
+    saved = sum(_stage_cost[stage] for stage in remaining_stages)
+    with _cancellations_lock:
+        _cancellations["by_stage"][name] += 1
+        _cancellations["cpu_seconds_saved"] += saved
+    job.reason = "deadline_exceeded"
+    job.metadata["cancelled_before"] = name
+
+
+def get_cancellation_stats():
+    """
+    Jobs abortados por deadline/desconexão em cada estágio e a estimativa de
+    CPU poupada (custo médio recente dos estágios que deixaram de rodar)
+    """
+    with _cancellations_lock:
+        return {
+            "by_stage": dict(_cancellations["by_stage"]),
+            "total": sum(_cancellations["by_stage"].values()),
+            "cpu_seconds_saved": round(_cancellations["cpu_seconds_saved"], 3),
+            "avg_stage_seconds": {name: round(cost, 4) for name, cost in _stage_cost.items()}
+        }
+
+
+def _run_stage(name, job):
+    if job.deadline is not None and job.deadline.expired():
+        _record_cancellation(name, job)
+        return None
+
+    start = time.perf_counter()
+    try:
+        STAGE_FUNCTIONS[name](job)
+    except Exception as e:
+        logger.error(f"❌ Erro no estágio {name}: {e}")
+        job.reason = "error"
+        job.metadata["error"] = str(e)
+    elapsed = time.perf_counter() - start
+    if name == "decode":
+        elapsed = max(0.0, elapsed - job.timings.get("memory_wait", 0.0))
+    job.timings[name] = round(elapsed, 4)
+    _stage_cost[name] += _STAGE_COST_ALPHA * (elapsed - _stage_cost[name])
+    return elapsed
+
+
+def run_inline(job: FaceJob) -> FaceJob:
+    """
+    Executa os estágios em sequência na thread atual
+
+    Args:
+        job (FaceJob): Trabalho a processar
+
+    Returns:
+        FaceJob: O mesmo job, preenchido
+    """
+    try:
+        for name in STAGES:
+            if job.failed:
+                break
+            _run_stage(name, job)
+    finally:
+        release_job_memory(job)
+    return job
+
+
+class _StageCounters:
+    """Contadores de vazão e utilização de um estágio"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, elapsed, failed):
+        with self.lock:
+            self.processed += 1
+            self.busy_seconds += elapsed
+            if failed:
+                self.failed += 1
+
+
+class StagedPipeline:
+    """
+    Pipeline com um grupo de threads por estágio e filas limitadas entre eles
+
+    A fila de entrada (decode) não é limitada: os bytes já estão em memória
+    quando a requisição chega. As filas decode→detect e detect→encode são
+    limitadas por queue_size e aplicam contrapressão ao estágio anterior.
+
+    Observação: o cv2.imdecode libera o GIL e roda em paralelo de verdade;
+    com o backend dlib, detect/encode disputam o GIL e mais de um worker
+    nesses estágios só ajuda com backends que liberam o GIL.
+
+    As threads são criadas no primeiro submit de cada processo, então a
+    instância pode ser criada no master do gunicorn antes do fork.
+    """
+
+    def __init__(self, decode_workers=2, detect_workers=1, encode_workers=1, queue_size=4):
+        self.workers = {
+            "decode": max(1, decode_workers),
+            "detect": max(1, detect_workers),
+            "encode": max(1, encode_workers),
+        }
+        self.queue_size = max(1, queue_size)
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._queues = {}
+        self._counters = {}
+        self._threads = []
+        self._started_at = None
+
+    def submit(self, job: FaceJob) -> Future:
+        """
+        Enfileira um job no primeiro estágio
+
+        Returns:
+            concurrent.futures.Future: Resolvido com o próprio job ao final
+        """
+        self._ensure_started()
+        future = Future()
+        self._queues["decode"].put((job, future))
+        return future
+
+    def process(self, job: FaceJob, timeout=None) -> FaceJob:
+        """Submete e aguarda o resultado (uso síncrono, ex.: Flask)"""
+        return self.submit(job).result(timeout)
+
+    def stats(self) -> dict:
+        """
+        Vazão e utilização por estágio
+
+        utilization = tempo ocupado / (tempo de vida * workers); o estágio com
+        utilização perto de 1.0 é o gargalo.
+        """
+        if self._pid != os.getpid():
+            return {"started": False, "workers": dict(self.workers)}
+
+        uptime = max(time.monotonic() - self._started_at, 1e-9)
+        stages = {}
+        for name in STAGES:
+            counters = self._counters[name]
+            with counters.lock:
+                processed = counters.processed
+                busy = counters.busy_seconds
+                failed = counters.failed
+            stages[name] = {
+                "workers": counters.workers,
+                "processed": processed,
+                "failed": failed,
+                "queue_depth": self._queues[name].qsize(),
+                "avg_seconds": round(busy / processed, 4) if processed else 0.0,
+                "throughput_per_second": round(processed / uptime, 3),
+                "utilization": round(busy / (uptime * counters.workers), 3),
+            }
+        return {
+            "started": True,
+            "uptime_seconds": round(uptime, 1),
+            "queue_size": self.queue_size,
+            "stages": stages,
+        }
+
+    def shutdown(self):
+        """Encerra as threads (aguarda os jobs já enfileirados)"""
+        if self._pid != os.getpid():
+            return
+        # Encerrar estágio por estágio para que nenhum job fique preso no meio
+        for name in STAGES:
+            for _ in range(self.workers[name]):
+                self._queues[name].put(None)
+            for thread in self._threads:
+                if thread.name.startswith(f"face-{name}-"):
+                    thread.join()
+        self._pid = None
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queues = {
+                "decode": queue.Queue(),
+                "detect": queue.Queue(maxsize=self.queue_size),
+                "encode": queue.Queue(maxsize=self.queue_size),
+            }
+            self._counters = {name: _StageCounters(self.workers[name]) for name in STAGES}
+            self._threads = []
+            for index, name in enumerate(STAGES):
+                next_name = STAGES[index + 1] if index + 1 < len(STAGES) else None
+                for n in range(self.workers[name]):
+                    thread = threading.Thread(
+                        target=self._worker, args=(name, next_name),
+                        name=f"face-{name}-{n}", daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+            self._started_at = time.monotonic()
+            self._pid = os.getpid()
+            logger.info(f"🏭 Pipeline facial iniciado: {self.workers}")
+
+    def _worker(self, name, next_name):
+        inbox = self._queues[name]
+        counters = self._counters[name]
+        while True:
+            item = inbox.get()
+            if item is None:
+                break
+
+            job, future = item
+            if future.cancelled():
+                # Quem esperava desistiu (deadline no chamador ou cliente desconectou)
+                _record_cancellation(name, job)
+                release_job_memory(job)
+                continue
+
+            elapsed = _run_stage(name, job)
+            if elapsed is not None:
+                counters.record(elapsed, job.failed)
+
+            if next_name and not job.failed:
+                self._queues[next_name].put(item)
+            else:
+                release_job_memory(job)
+                try:
+                    future.set_result(job)
+                except InvalidStateError:
+                    # Cancelado enquanto o estágio rodava
+                    pass
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+🎛️ Perfis de precisão/latência do reconhecimento facial
+Cada perfil agrupa detector, upsample, resolução máxima da detecção,
+modelo de landmarks e jitters do encoding. O quiosque quer a resposta mais
+rápida; o cadastro do RH quer o melhor template.
+
+- fast: HOG numa cópia de até 640px sem upsample, 1 jitter, 5 landmarks
+- balanced: escada de detecção + reavaliação da faixa ambígua (padrão da verificação)
+- accurate: HOG em resolução cheia com upsample, 68 landmarks e 5 jitters
+"""
+
+from typing import NamedTuple, Optional
+
+from utils.face_pipeline import FaceJob
+from utils.detection_ladder import DetectionRung
+
+
+class FaceProfile(NamedTuple):
+    """Configuração completa de detecção e encoding de um perfil"""
+    name: str
+    detector_model: str = "hog"          # "hog" ou "cnn"
+    upsample: int = 1                    # number_of_times_to_upsample
+    max_side: Optional[int] = None       # Lado maior da cópia usada na detecção (None = original)
+    landmark_model: str = "small"        # "small" (5 pontos) ou "large" (68 pontos)
+    num_jitters: int = 1                 # Reamostragens do encoding
+    escalate: bool = False               # Usar a escada de detecção (se configurada)
+    progressive: bool = False            # Reavaliar distâncias ambíguas na verificação
+
+    @property
+    def detection(self):
+        """Degrau de detecção fixo do perfil"""
+        return DetectionRung(self.name, max_side=self.max_side, upsample=self.upsample, model=self.detector_model)
+
+    def job(self, **kwargs):
+        """
+        Cria um FaceJob com as configurações do perfil
+
+        Args:
+            **kwargs: Demais campos do FaceJob (image_bytes, deadline, max_faces...);
+                campos do perfil passados aqui (ex.: landmark_model) prevalecem
+
+        Returns:
+            FaceJob: Job pronto para o pipeline
+        """
+        fields = dict(
+            detection=self.detection,
+            landmark_model=self.landmark_model,
+            num_jitters=self.num_jitters,
+            escalate=self.escalate
+        )
+        fields.update(kwargs)
+        job = FaceJob(**fields)
+        job.metadata["profile"] = self.name
+        return job
+
+    def describe(self):
+        """Configuração do perfil como dict (estatísticas e documentação)"""
+        return self._asdict()
+
+
+PROFILES = {
+    "fast": FaceProfile("fast", upsample=0, max_side=640),
+    "balanced": FaceProfile("balanced", escalate=True, progressive=True),
+    "accurate": FaceProfile("accurate", landmark_model="large", num_jitters=5),
+}
+
+
+def get_profile(name, default="balanced"):
+    """
+    Resolve um perfil pelo nome
+
+    Args:
+        name (str): Nome do perfil (None ou vazio usa o padrão)
+        default (str): Perfil usado quando name não é informado
+
+    Returns:
+        FaceProfile: Perfil encontrado
+
+    Raises:
+        ValueError: Se o nome não corresponder a nenhum perfil
+    """
+    key = (name or default).strip().lower()
+    if key not in PROFILES:
+        raise ValueError(f"Perfil desconhecido: {name}. Perfis disponíveis: {', '.join(PROFILES)}")
+    return PROFILES[key]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+🎯 Seleção dos rostos que serão codificados
+Com colegas ao fundo num quiosque o HOG encontra vários rostos, mas a
+verificação usa apenas um. Escolher antes do encoding evita pagar o
+encoding de 128 dimensões de quem não interessa.
+
+Políticas:
+- all: todos os rostos (comportamento anterior)
+- largest: os maiores rostos primeiro (a pessoa mais próxima da câmera)
+- central: os rostos mais próximos do centro da imagem primeiro
+"""
+
+SELECTION_POLICIES = ("all", "largest", "central")
+
+
+def face_area(box):
+    """Área da caixa (top, right, bottom, left)"""
+    top, right, bottom, left = box
+    return max(0, bottom - top) * max(0, right - left)
+
+
+def center_offset(box, shape):
+    """Distância do centro da caixa ao centro da imagem, normalizada pelo tamanho da imagem"""
+    top, right, bottom, left = box
+    height, width = shape[:2]
+    dx = ((left + right) / 2 - width / 2) / max(width, 1)
+    dy = ((top + bottom) / 2 - height / 2) / max(height, 1)
+    return (dx * dx + dy * dy) ** 0.5
+
+
+def select_faces(locations, shape, policy="largest", limit=1):
+    """
+    Ordena os rostos pela política e mantém os `limit` primeiros
+
+    Args:
+        locations (list): Caixas (top, right, bottom, left)
+        shape (tuple): Forma da imagem (altura, largura, ...)
+        policy (str): "all", "largest" ou "central"
+        limit (int): Quantos rostos manter (top-N)
+
+    Returns:
+        list: Caixas selecionadas, a escolhida primeiro
+
+    Raises:
+        ValueError: Se a política não existir
+    """
+    if policy not in SELECTION_POLICIES:
+        raise ValueError(f"Política de seleção desconhecida: {policy}. Use: {', '.join(SELECTION_POLICIES)}")
+    if policy == "all":
+        return list(locations)
+    if policy == "largest":
+        ordered = sorted(locations, key=face_area, reverse=True)
+    else:
+        ordered = sorted(locations, key=lambda box: center_offset(box, shape))
+    return ordered[:max(1, limit)]
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+🔎 Inspeção de imagens apenas pelo cabeçalho
+Lê formato e dimensões de JPEG (SOF), PNG (IHDR) e WebP (VP8/VP8L/VP8X)
+sem decodificar pixels, para rejeitar em microssegundos arquivos com
+formato trocado, imagens minúsculas e bombas de descompressão.
+"""
+
+import struct
+import logging
+from typing import NamedTuple, Optional
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Limite padrão de pixels (acima disso é tratado como bomba de descompressão)
+DEFAULT_MAX_PIXELS = 50_000_000
+
+# Extensões/MIME aceitos → formato
+FORMAT_ALIASES = {
+    "jpg": "jpeg",
+    "jpeg": "jpeg",
+    "png": "png",
+    "webp": "webp",
+}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Marcadores SOF do JPEG (exceto DHT C4, JPG C8 e DAC CC)
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+# Marcadores sem campo de tamanho
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+
+
+class ImageInfo(NamedTuple):
+    """Formato e dimensões lidos do cabeçalho"""
+    format: str
+    width: int
+    height: int
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+class ImageRejected(ValueError):
+    """
+    Imagem rejeitada na inspeção do cabeçalho
+
+    Attributes:
+        reason (str): Código da falha (unknown_format, format_mismatch,
+            invalid_header, image_too_small, too_many_pixels)
+        message (str): Mensagem para o cliente
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+def normalize_format(name):
+    """
+    Converte extensão ou MIME (jpg, image/jpeg, .PNG...) para o formato
+
+    Returns:
+        str: "jpeg", "png", "webp" ou None se não suportado
+    """
+    if not name:
+        return None
+    name = name.lower().rsplit("/", 1)[-1].rsplit(".", 1)[-1]
+    return FORMAT_ALIASES.get(name)
+
+
+def sniff_format(data) -> Optional[str]:
+    """Formato pelos magic bytes ("jpeg", "png", "webp") ou None"""
+    head = bytes(data[:12])
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(PNG_SIGNATURE):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _jpeg_size(data):
+    # Percorre os segmentos até o SOF; o SOS antes dele indica arquivo inválido
+    pos = 2
+    length = len(data)
+    while pos + 4 <= length:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Bytes de preenchimento entre segmentos
+            pos += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            return None
+        segment_length = struct.unpack_from(">H", data, pos + 2)[0]
+        if marker in _JPEG_SOF_MARKERS:
+            if pos + 9 > length:
+                return None
+            height, width = struct.unpack_from(">HH", data, pos + 5)
+            return width, height
+        pos += 2 + segment_length
+    return None
+
+
+def _png_size(data):
+    if len(data) < 24 or bytes(data[12:16]) != b"IHDR":
+        return None
+    return struct.unpack_from(">II", data, 16)
+
+
+def _webp_size(data):
+    if len(data) < 30:
+        return None
+    chunk = bytes(data[12:16])
+    if chunk == b"VP8 ":
+        # Quadro-chave: 3 bytes de tag, start code 9D 01 2A, largura/altura (14 bits)
+        if bytes(data[23:26]) != b"\x9d\x01\x2a":
+            return None
+        width, height = struct.unpack_from("<HH", data, 26)
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        if data[20] != 0x2F:
+            return None
+        bits = struct.unpack_from("<I", data, 21)[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(bytes(data[24:27]), "little") + 1
+        height = int.from_bytes(bytes(data[27:30]), "little") + 1
+        return width, height
+    return None
+
+
+_SIZE_READERS = {
+    "jpeg": _jpeg_size,
+    "png": _png_size,
+    "webp": _webp_size,
+}
+
+
+def read_header(data) -> Optional[ImageInfo]:
+    """
+    Lê formato e dimensões sem decodificar a imagem
+
+    Args:
+        data: bytes/bytearray/memoryview da imagem
+
+    Returns:
+        ImageInfo: Formato e dimensões, ou None se o cabeçalho não for reconhecido
+    """
+    image_format = sniff_format(data)
+    if image_format is None:
+        return None
+    try:
+        size = _SIZE_READERS[image_format](data)
+    except (struct.error, IndexError):
+        return None
+    if size is None or not all(size):
+        return None
+    return ImageInfo(image_format, int(size[0]), int(size[1]))
+
+
+def inspect_image(data, expected_format=None, min_dimension=0, max_pixels=DEFAULT_MAX_PIXELS) -> ImageInfo:
+    """
+    Valida a imagem apenas pelo cabeçalho
+
+    Args:
+        data: bytes/bytearray/memoryview da imagem
+        expected_format (str): Formato declarado (extensão ou MIME); None = não verificar
+        min_dimension (int): Menor largura/altura aceita em pixels
+        max_pixels (int): Maior número de pixels aceito (0 = sem limite)
+
+    Returns:
+        ImageInfo: Formato e dimensões
+
+    Raises:
+        ImageRejected: Se o cabeçalho for inválido ou violar algum limite
+    """
+    image_format = sniff_format(data)
+    if image_format is None:
+        raise ImageRejected("unknown_format", "Formato de imagem não reconhecido. Use JPG, PNG ou WEBP.")
+
+    declared = normalize_format(expected_format) if expected_format else None
+    if expected_format and declared != image_format:
+        raise ImageRejected(
+            "format_mismatch",
+            f"O conteúdo do arquivo é {image_format.upper()}, mas foi declarado como {(declared or expected_format).upper()}."
+        )
+
+    info = read_header(data)
+    if info is None:
+        raise ImageRejected("invalid_header", "Cabeçalho da imagem inválido ou truncado.")
+
+    if min(info.width, info.height) < min_dimension:
+        raise ImageRejected(
+            "image_too_small",
+            f"Imagem muito pequena ({info.width}x{info.height}). Mínimo: {min_dimension}px."
+        )
+
+    if max_pixels and info.pixels > max_pixels:
+        logger.warning(f"🚫 Possível bomba de descompressão: {info.width}x{info.height} ({info.format})")
+        raise ImageRejected(
+            "too_many_pixels",
+            f"Resolução muito alta ({info.width}x{info.height}). Máximo: {max_pixels // 1_000_000} megapixels."
+        )
+
+    return info
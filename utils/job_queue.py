@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+🗃️ Fila de jobs persistente em SQLite
+Compartilhada por todos os processos do servidor (e por workers avulsos)
+através do mesmo arquivo: um job enfileirado sobrevive a restart e é
+executado por exatamente um worker.
+
+- claim() marca o job como "running" numa transação BEGIN IMMEDIATE, então
+  dois processos nunca pegam o mesmo job
+- cada job em execução tem um prazo (lease); se o worker morrer, o job
+  volta para a fila depois do prazo, até max_attempts tentativas
+- a imagem fica no próprio banco até o fim do job e é apagada em seguida
+- enqueue(unique=True) confere e insere na mesma transação: no máximo um
+  job pendente por (funcionário, tipo), mesmo com requisições simultâneas
+- finish() só vale para o worker que detém o job; depois que o lease vence
+  e outro worker o retoma, o resultado do antigo é descartado
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import logging
+from contextlib import closing
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    employee_id TEXT,
+    status TEXT NOT NULL,
+    payload TEXT,
+    image BLOB,
+    result TEXT,
+    message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    callback_url TEXT,
+    callback_status TEXT,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_employee ON jobs (employee_id, status);
+"""
+
+# Colunas devolvidas por get() (sem a imagem)
+_PUBLIC_COLUMNS = (
+    "id, kind, employee_id, status, payload, result, message, attempts, callback_url, "
+    "callback_status, created_at, started_at, finished_at"
+)
+
+
+class JobAlreadyPending(Exception):
+    """Já existe um job na fila ou em execução para o funcionário (enqueue com unique=True)"""
+
+    def __init__(self, job_id):
+        super().__init__(f"Job pendente: {job_id}")
+        self.job_id = job_id
+
+
+class JobQueue:
+    """
+    Fila de jobs num arquivo SQLite
+
+    Args:
+        path (str): Arquivo do banco (criado se não existir)
+        lease_seconds (float): Prazo de um job "running" antes de voltar para a fila
+        max_attempts (int): Tentativas antes de o job falhar de vez por perda do worker
+    """
+
+    def __init__(self, path, lease_seconds=300.0, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # Leitores não bloqueiam o worker que grava
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # Uma conexão por operação: segura entre threads e processos
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, kind, image=None, employee_id=None, payload=None, callback_url=None, unique=False):
+        """
+        Enfileira um job
+
+        Args:
+            kind (str): Tipo do job (ex.: "register")
+            image (bytes): Imagem a processar (opcional)
+            employee_id (str): Funcionário do job (opcional)
+            payload (dict): Parâmetros do job, serializáveis em JSON
+            callback_url (str): URL notificada quando o job terminar (opcional)
+            unique (bool): Recusa se o funcionário já tem um job deste tipo pendente
+
+        Returns:
+            str: ID do job
+
+        Raises:
+            JobAlreadyPending: Com unique=True, se já houver job pendente
+        """
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE: a conferência e o INSERT não se intercalam com outro processo
+            conn.execute("BEGIN IMMEDIATE")
+            if unique and employee_id is not None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE employee_id = ? AND kind = ? AND status IN ('queued', 'running') LIMIT 1",
+                    (employee_id, kind)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("ROLLBACK")
+                    raise JobAlreadyPending(row["id"])
+            conn.execute(
+                "INSERT INTO jobs (id, kind, employee_id, status, payload, image, callback_url, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, employee_id, json.dumps(payload or {}),
+                 bytes(image) if image is not None else None, callback_url, time.time())
+            )
+            conn.execute("COMMIT")
+        except JobAlreadyPending:
+            raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return job_id
+
+    def claim(self, worker, kinds=None):
+        """
+        Pega o job mais antigo da fila (ou um "running" com prazo vencido)
+
+        Args:
+            worker (str): Identificação do worker (ex.: "pid:tarefa")
+            kinds (tuple): Tipos aceitos (padrão: todos)
+
+        Returns:
+            dict: Job com "image" e "payload" decodificado, ou None se a fila está vazia
+        """
+        now = time.time()
+        kind_filter = f" AND kind IN ({','.join('?' * len(kinds))})" if kinds else ""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Worker perdido (processo morto) e sem tentativas restantes: falha definitiva
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', message = 'worker_lost', image = NULL, finished_at = ? "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' OR (status = 'running' AND lease_until < ?))"
+                f"{kind_filter} ORDER BY created_at LIMIT 1",
+                (now, *(kinds or ()))
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row["status"] == "running":
+                logger.warning(f"♻️ Job {row['id']} retomado após perda do worker {row['worker']}")
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "lease_until = ?, started_at = ? WHERE id = ?",
+                (worker, now + self.lease_seconds, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        job.update(status="running", worker=worker, attempts=row["attempts"] + 1)
+        return job
+
+    def finish(self, job_id, worker, success, message=None, result=None):
+        """
+        Registra o fim do job e descarta a imagem
+
+        Args:
+            job_id (str): ID do job
+            worker (str): Worker que executou o job (o mesmo do claim)
+            success (bool): Se o job teve sucesso
+            message (str): Mensagem para o cliente
+            result (dict): Dados adicionais do resultado (opcional)
+
+        Returns:
+            bool: False se o job não pertence mais a este worker (lease vencido
+            e retomado por outro); nada é gravado nesse caso
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, result = ?, image = NULL, lease_until = NULL, "
+                "finished_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                ("succeeded" if success else "failed", message,
+                 json.dumps(result) if result is not None else None, time.time(), job_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def set_callback_status(self, job_id, status):
+        """Resultado da notificação do callback (ex.: "delivered", "failed: 500")"""
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (status, job_id))
+
+    def get(self, job_id):
+        """
+        Estado de um job (sem a imagem)
+
+        Returns:
+            dict: Job, ou None se não existir
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT {_PUBLIC_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def pending_for(self, employee_id, kind=None):
+        """ID de um job ainda não concluído do funcionário (ou None)"""
+        query = "SELECT id FROM jobs WHERE employee_id = ? AND status IN ('queued', 'running')"
+        params = [employee_id]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        with closing(self._connect()) as conn:
+            row = conn.execute(query + " LIMIT 1", params).fetchone()
+        return row["id"] if row else None
+
+    def pending_count(self, kind=None):
+        """Jobs na fila ou em execução (de um tipo, ou de todos)"""
+        query = "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+        params = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        with closing(self._connect()) as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def purge(self, max_age_seconds):
+        """
+        Remove jobs concluídos há mais de max_age_seconds
+
+        Returns:
+            int: Quantidade removida
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - max_age_seconds,)
+            )
+            return cursor.rowcount
+
+    def stats(self):
+        """Quantidade de jobs por status e idade do job mais antigo na fila"""
+        with closing(self._connect()) as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        stats = {status: counts.get(status, 0) for status in JOB_STATUSES}
+        stats["oldest_queued_age_s"] = round(time.time() - oldest, 1) if oldest else 0.0
+        return stats
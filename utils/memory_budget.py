@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+🧮 Orçamento de memória para decodificação de imagens
+Estima o pico de memória de cada imagem pelo cabeçalho (sem decodificar) e
+só admite o trabalho quando o total em uso cabe no orçamento do processo.
+
+Um JPEG de 10MB pode virar um array de 36MB+ e a detecção HOG (upsample 2x)
+multiplica isso; quatro desses em paralelo derrubam uma VPS de 4GB.
+"""
+
+import math
+import time
+import logging
+import threading
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Bytes por pixel decodificado: o array RGB (o cvtColor é feito in-place,
+# então BGR e RGB dividem o mesmo buffer) mais a detecção HOG, que com
+# number_of_times_to_upsample=1 trabalha numa cópia 2x (4x os pixels)
+DECODE_BYTES_PER_PIXEL = 3
+DETECT_BYTES_PER_PIXEL = 12
+PEAK_BYTES_PER_PIXEL = DECODE_BYTES_PER_PIXEL + DETECT_BYTES_PER_PIXEL
+
+# Cabeçalho ilegível: estimativa conservadora de pixels por byte comprimido
+UNKNOWN_PIXELS_PER_BYTE = 4
+
+# Fatores suportados por cv2.IMREAD_REDUCED_COLOR_*
+REDUCE_FACTORS = (1, 2, 4, 8)
+
+
+def choose_reduce_factor(width, height, max_pixels):
+    """
+    Menor fator de redução (1, 2, 4, 8) que deixa a imagem com até max_pixels
+
+    Args:
+        width (int): Largura original
+        height (int): Altura original
+        max_pixels (int): Limite de pixels decodificados (0 = sem limite)
+
+    Returns:
+        int: Fator para cv2.IMREAD_REDUCED_COLOR_* (1 = tamanho original)
+    """
+    if not max_pixels:
+        return 1
+    for factor in REDUCE_FACTORS:
+        if math.ceil(width / factor) * math.ceil(height / factor) <= max_pixels:
+            return factor
+    return REDUCE_FACTORS[-1]
+
+
+def estimate_peak_bytes(width, height, factor=1):
+    """
+    Pico estimado de memória para decodificar e detectar rostos na imagem
+
+    Args:
+        width (int): Largura original
+        height (int): Altura original
+        factor (int): Fator de redução aplicado na decodificação
+
+    Returns:
+        int: Bytes estimados
+    """
+    pixels = math.ceil(width / factor) * math.ceil(height / factor)
+    return pixels * PEAK_BYTES_PER_PIXEL
+
+
+def estimate_unknown_bytes(image_bytes):
+    """Estimativa conservadora quando o cabeçalho não pôde ser lido"""
+    return len(image_bytes) * UNKNOWN_PIXELS_PER_BYTE * PEAK_BYTES_PER_PIXEL
+
+
+class MemoryBudget:
+    """
+    Semáforo em bytes: cada job reserva o pico estimado antes de decodificar
+    e devolve ao terminar
+
+    O orçamento é por processo; com N workers do gunicorn, a memória total
+    fica limitada a N × budget_bytes (mais o consumo base de cada worker).
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = int(budget_bytes)
+        self.in_use = 0
+        self._cond = threading.Condition()
+        self._admitted = 0
+        self._waited = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_seconds = 0.0
+        self._peak_in_use = 0
+
+    def fits(self, nbytes):
+        """True se a reserva cabe no orçamento (com o processo ocioso)"""
+        return nbytes <= self.budget_bytes
+
+    def acquire(self, nbytes, deadline=None):
+        """
+        Reserva nbytes, aguardando enquanto o orçamento estiver ocupado
+
+        Args:
+            nbytes (int): Bytes a reservar
+            deadline (Deadline): Desiste quando expirar (opcional)
+
+        Returns:
+            bool: True se reservou; False se não cabe ou o deadline expirou
+        """
+        with self._cond:
+            if not self.fits(nbytes):
+                self._rejected += 1
+                return False
+
+            if self.in_use + nbytes > self.budget_bytes:
+                self._waited += 1
+                start = time.monotonic()
+                while self.in_use + nbytes > self.budget_bytes:
+                    if deadline is not None and deadline.expired():
+                        self._timed_out += 1
+                        self._wait_seconds += time.monotonic() - start
+                        return False
+                    # Acordar periodicamente para enxergar cancelamentos do deadline
+                    self._cond.wait(0.25)
+                self._wait_seconds += time.monotonic() - start
+
+            self.in_use += nbytes
+            self._admitted += 1
+            self._peak_in_use = max(self._peak_in_use, self.in_use)
+            return True
+
+    def release(self, nbytes):
+        """Devolve uma reserva feita com acquire"""
+        with self._cond:
+            self.in_use = max(0, self.in_use - nbytes)
+            self._cond.notify_all()
+
+    def stats(self):
+        """Uso atual, pico e contadores de admissão"""
+        with self._cond:
+            return {
+                "budget_mb": round(self.budget_bytes / MB, 1),
+                "in_use_mb": round(self.in_use / MB, 1),
+                "peak_in_use_mb": round(self._peak_in_use / MB, 1),
+                "admitted": self._admitted,
+                "waited": self._waited,
+                "wait_seconds": round(self._wait_seconds, 3),
+                "timed_out": self._timed_out,
+                "rejected_too_large": self._rejected
+            }
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+🎚️ Verificação em dois níveis: encoding barato primeiro, caro só na dúvida
+A maioria das comparações fica longe da tolerância e o encoding padrão
+(1 jitter, landmarks de 5 pontos) já decide. Só quando a distância cai numa
+faixa em torno da tolerância o rosto é recodificado com mais jitters,
+reaproveitando as caixas do primeiro job (sem nova detecção).
+
+Contra um template gravado, as duas passagens usam o modelo de landmarks do
+template (template_landmark_model): vetores de 5 e de 68 pontos não ficam no
+mesmo espaço, e comparar um com o outro aumentaria a distância. Assim a
+reavaliação só muda os jitters.
+"""
+
+import threading
+
+from utils.face_pipeline import FaceJob
+from utils.face_profiles import PROFILES
+
+
+def template_landmark_model(template):
+    """
+    Modelo de landmarks com que um template gravado foi calculado
+
+    Templates refinados gravam refine_landmarks e os novos gravam
+    landmark_model; nos antigos o modelo vem do perfil do cadastro. Sem nenhuma
+    dessas informações vale o padrão do FaceJob (5 pontos).
+
+    Args:
+        template (dict): Dados do encoding gravado
+
+    Returns:
+        str: "small" ou "large"
+    """
+    if template.get("template") == "refined":
+        return template.get("refine_landmarks", "large")
+    if template.get("landmark_model"):
+        return template["landmark_model"]
+    profile = PROFILES.get(template.get("profile") or "")
+    return profile.landmark_model if profile is not None else "small"
+
+
+class ProgressiveVerifier:
+    """
+    Decide quando reavaliar uma comparação e conta as escalações
+
+    Args:
+        margin (float): Meia-largura da faixa ambígua em torno da tolerância
+        recheck_jitters (int): num_jitters do encoding caro
+        recheck_model (str): Landmarks do encoding caro quando os dois lados são
+            recodificados (comparação de duas fotos); contra um template gravado
+            vale o modelo do template
+    """
+
+    def __init__(self, margin=0.05, recheck_jitters=5, recheck_model="large"):
+        self.margin = margin
+        self.recheck_jitters = recheck_jitters
+        self.recheck_model = recheck_model
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._ambiguous = 0
+        self._rechecked = 0
+        self._flipped = 0
+        self._recheck_seconds = 0.0
+
+    def is_ambiguous(self, distance, tolerance):
+        """A distância está perto demais da tolerância para decidir com o encoding barato?"""
+        return abs(distance - tolerance) <= self.margin
+
+    def recheck_job(self, job: FaceJob, deadline=None, rgb=None, face_index=0, landmark_model=None):
+        """
+        Monta o job caro a partir de um job barato já concluído
+
+        As caixas do primeiro job são reaproveitadas: o pipeline só
+        redecodifica e recodifica.
+
+        Args:
+            job (FaceJob): Job barato concluído com sucesso
+            deadline (Deadline): Prazo da requisição (opcional)
+            rgb (numpy.ndarray): Imagem já decodificada, para jobs criados a
+                partir de rgb (o pipeline libera job.rgb ao terminar)
+            face_index (int): Rosto do job barato que decidiu a comparação
+            landmark_model (str): Landmarks do template comparado (None = recheck_model)
+
+        Returns:
+            FaceJob: Job com num_jitters/landmark_model do nível caro
+        """
+        return FaceJob(
+            image_bytes=None if rgb is not None else job.image_bytes,
+            rgb=rgb,
+            deadline=deadline,
+            max_faces=job.max_faces,
+            min_face_size=job.min_face_size,
+            min_dimension=job.min_dimension,
+            check_quality=False,
+            use_prefilter=False,
+            num_jitters=self.recheck_jitters,
+            landmark_model=landmark_model or self.recheck_model,
+            locations=[job.locations[face_index]]
+        )
+
+    def record(self, ambiguous, rechecked=False, flipped=False, seconds=0.0):
+        """
+        Registra o resultado de uma verificação
+
+        Args:
+            ambiguous (bool): A distância barata caiu na faixa
+            rechecked (bool): O encoding caro foi de fato calculado
+            flipped (bool): O encoding caro mudou a decisão
+            seconds (float): Tempo gasto na reavaliação
+        """
+        with self._lock:
+            self._checked += 1
+            if ambiguous:
+                self._ambiguous += 1
+            if rechecked:
+                self._rechecked += 1
+                self._recheck_seconds += seconds
+            if flipped:
+                self._flipped += 1
+
+    def stats(self):
+        """Taxa de escalação, decisões alteradas e custo médio da reavaliação"""
+        with self._lock:
+            checked = self._checked
+            ambiguous = self._ambiguous
+            rechecked = self._rechecked
+            flipped = self._flipped
+            seconds = self._recheck_seconds
+        return {
+            "checked": checked,
+            "ambiguous": ambiguous,
+            "rechecked": rechecked,
+            "escalation_rate": round(rechecked / checked, 4) if checked else 0.0,
+            "decisions_flipped": flipped,
+            "flip_rate": round(flipped / rechecked, 4) if rechecked else 0.0,
+            "avg_recheck_ms": round(seconds / rechecked * 1000, 2) if rechecked else 0.0,
+            "margin": self.margin,
+            "recheck_jitters": self.recheck_jitters,
+            "recheck_model": self.recheck_model
+        }
+
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+📦 Transporte de imagens via memória compartilhada
+Coloca bytes de upload e arrays RGB decodificados em slots de um anel
+multiprocessing.shared_memory; entre a API e os processos de engine trafegam
+apenas descritores pequenos (nome do anel, slot, geração, tamanho, shape)
+"""
+
+import time
+import struct
+import logging
+import threading
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Cabeçalho de cada slot: geração (uint64) + bytes ocupados (uint64)
+SLOT_HEADER = struct.Struct('<QQ')
+
+# Estados do ciclo de vida de um slot
+SLOT_FREE = "free"
+SLOT_LEASED = "leased"
+
+# Descritor enviado entre processos (picklável e com poucos bytes)
+SlotDescriptor = namedtuple(
+    'SlotDescriptor',
+    ['ring_name', 'slot', 'generation', 'nbytes', 'kind', 'shape', 'dtype']
+)
+
+
+class RingFullError(RuntimeError):
+    """Nenhum slot livre no anel dentro do tempo de espera"""
+
+
+class StaleDescriptorError(RuntimeError):
+    """O slot foi liberado e reutilizado depois que o descritor foi criado"""
+
+
+class SharedMemoryRing:
+    """
+    Anel de slots de tamanho fixo sobre um único bloco de memória compartilhada
+
+    Ciclo de vida de um slot (controlado pelo processo dono, a API):
+    free → leased (put_bytes/put_array) → free (release).
+    Os processos de engine apenas anexam o bloco (attach) e leem/escrevem via
+    descritores; a geração gravada no cabeçalho do slot impede o uso de um
+    descritor antigo depois que o slot foi reutilizado.
+
+    Slots que ficam em "leased" além de leak_timeout são reportados por
+    check_leaks() e podem ser recuperados com reclaim_leaks().
+
+    As views sem cópia (view_bytes/view_array) só valem enquanto o slot
+    estiver reservado: quem lê deve chamar verify() depois de consumir a view
+    (ou usar read_bytes/read_array, que copiam e conferem) para descartar um
+    resultado calculado sobre um slot recuperado e reutilizado no meio da leitura.
+    """
+
+    def __init__(self, slot_count=8, slot_size=48 * 1024 * 1024, name=None,
+                 create=True, leak_timeout=60.0):
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.stride = SLOT_HEADER.size + slot_size
+        self.leak_timeout = leak_timeout
+        self.owner = create
+
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=self.stride * slot_count)
+        else:
+            # Processos de engine criados via multiprocessing compartilham o
+            # resource_tracker do dono, então anexar não transfere a posse do bloco
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+
+        self._lock = threading.Condition()
+        self._free = list(range(slot_count - 1, -1, -1))
+        self._leases = {}
+        self._generations = [0] * slot_count
+        self._stats = {"leased": 0, "released": 0, "reclaimed": 0, "full_waits": 0}
+
+    @classmethod
+    def attach(cls, name, slot_count, slot_size):
+        """Anexa um anel existente (lado do processo de engine)"""
+        return cls(slot_count=slot_count, slot_size=slot_size, name=name, create=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Lado do dono (API)
+    # ------------------------------------------------------------------
+
+    def put_bytes(self, data, tag=None, timeout=None):
+        """
+        Copia bytes (upload) para um slot livre
+
+        Args:
+            data: bytes, bytearray ou memoryview
+            tag (str): Identificação para o relatório de vazamentos
+            timeout (float): Espera máxima por um slot livre (None = sem espera)
+
+        Returns:
+            SlotDescriptor: Descritor do slot ocupado
+        """
+        view = memoryview(data).cast('B')
+        slot, generation = self._lease(view.nbytes, tag, timeout)
+        offset = self._data_offset(slot)
+        self._shm.buf[offset:offset + view.nbytes] = view
+        return SlotDescriptor(self.name, slot, generation, view.nbytes, 'bytes', None, None)
+
+    def put_array(self, array, tag=None, timeout=None):
+        """
+        Copia um numpy array (ex.: imagem RGB decodificada) para um slot livre
+
+        Returns:
+            SlotDescriptor: Descritor com shape e dtype do array
+        """
+        array = np.ascontiguousarray(array)
+        slot, generation = self._lease(array.nbytes, tag, timeout)
+        target = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf,
+                            offset=self._data_offset(slot))
+        target[...] = array
+        return SlotDescriptor(self.name, slot, generation, array.nbytes, 'array',
+                              tuple(array.shape), array.dtype.str)
+
+    def allocate_array(self, shape, dtype='|u1', tag=None, timeout=None):
+        """
+        Reserva um slot para um array que será escrito diretamente na memória
+        compartilhada (ex.: cv2.imdecode com dst=), evitando a cópia de put_array
+
+        Returns:
+            Tuple[SlotDescriptor, numpy.ndarray]: Descritor e view gravável do slot
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        slot, generation = self._lease(nbytes, tag, timeout)
+        view = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=self._data_offset(slot))
+        return SlotDescriptor(self.name, slot, generation, nbytes, 'array', tuple(shape), dtype.str), view
+
+    def release(self, descriptor):
+        """
+        Devolve o slot ao anel
+
+        Args:
+            descriptor (SlotDescriptor): Descritor retornado por put_*/allocate_array
+
+        Returns:
+            bool: False se o slot já tinha sido liberado (descritor antigo)
+        """
+        with self._lock:
+            lease = self._leases.get(descriptor.slot)
+            if lease is None or lease["generation"] != descriptor.generation:
+                return False
+            del self._leases[descriptor.slot]
+            self._invalidate(descriptor.slot)
+            self._free.append(descriptor.slot)
+            self._stats["released"] += 1
+            self._lock.notify()
+        return True
+
+    def check_leaks(self, max_age=None):
+        """
+        Lista os slots ocupados há mais de max_age segundos
+
+        Returns:
+            list: [{"slot", "tag", "age_seconds", "nbytes"}]
+        """
+        max_age = self.leak_timeout if max_age is None else max_age
+        now = time.monotonic()
+        with self._lock:
+            leaks = [
+                {
+                    "slot": slot,
+                    "tag": lease["tag"],
+                    "age_seconds": round(now - lease["leased_at"], 3),
+                    "nbytes": lease["nbytes"]
+                }
+                for slot, lease in self._leases.items()
+                if now - lease["leased_at"] > max_age
+            ]
+        for leak in leaks:
+            logger.warning(f"⚠️ Slot {leak['slot']} ocupado há {leak['age_seconds']}s (tag={leak['tag']})")
+        return leaks
+
+    def reclaim_leaks(self, max_age=None):
+        """
+        Libera à força os slots vazados; retorna quantos foram recuperados
+
+        Um leitor lento ainda pode estar com uma view sem cópia do slot: a
+        geração é zerada aqui, então o verify() que ele faz após a leitura
+        falha com StaleDescriptorError em vez de aceitar dados sobrescritos.
+        """
+        reclaimed = 0
+        for leak in self.check_leaks(max_age):
+            with self._lock:
+                lease = self._leases.pop(leak["slot"], None)
+                if lease is None:
+                    continue
+                self._invalidate(leak["slot"])
+                self._free.append(leak["slot"])
+                self._stats["reclaimed"] += 1
+                self._lock.notify()
+            reclaimed += 1
+        return reclaimed
+
+    def stats(self):
+        """Ocupação do anel e contadores do ciclo de vida"""
+        with self._lock:
+            return dict(
+                self._stats,
+                slots=self.slot_count,
+                slot_size_mb=round(self.slot_size / (1024 * 1024), 2),
+                in_use=len(self._leases)
+            )
+
+    def slot_state(self, slot):
+        """Estado atual de um slot (free/leased)"""
+        with self._lock:
+            return SLOT_LEASED if slot in self._leases else SLOT_FREE
+
+    # ------------------------------------------------------------------
+    # Lado do leitor (processo de engine ou a própria API)
+    # ------------------------------------------------------------------
+
+    def view_bytes(self, descriptor):
+        """
+        View sem cópia dos bytes de um slot
+
+        O conteúdo pode ser sobrescrito se o slot for liberado/recuperado
+        durante o uso: chame verify() depois de consumir a view.
+
+        Raises:
+            StaleDescriptorError: Se o slot foi reutilizado
+        """
+        self._check_generation(descriptor)
+        offset = self._data_offset(descriptor.slot)
+        return self._shm.buf[offset:offset + descriptor.nbytes]
+
+    def view_array(self, descriptor):
+        """
+        numpy array sem cópia apontando para o slot
+
+        Mesmas regras de view_bytes: chame verify() depois de consumir o array.
+
+        Raises:
+            StaleDescriptorError: Se o slot foi reutilizado
+        """
+        self._check_generation(descriptor)
+        return np.ndarray(descriptor.shape, dtype=np.dtype(descriptor.dtype), buffer=self._shm.buf,
+                          offset=self._data_offset(descriptor.slot))
+
+    def verify(self, descriptor):
+        """
+        Confere, depois da leitura, que o slot ainda pertence ao descritor
+
+        Raises:
+            StaleDescriptorError: Se o slot foi liberado ou reutilizado durante a leitura
+        """
+        self._check_generation(descriptor)
+
+    def read_bytes(self, descriptor):
+        """
+        Cópia dos bytes de um slot, conferida contra a geração após copiar
+
+        Returns:
+            bytes: Conteúdo do slot
+
+        Raises:
+            StaleDescriptorError: Se o slot foi reutilizado antes ou durante a cópia
+        """
+        view = self.view_bytes(descriptor)
+        try:
+            data = bytes(view)
+        finally:
+            view.release()
+        self.verify(descriptor)
+        return data
+
+    def read_array(self, descriptor):
+        """
+        Cópia do array de um slot, conferida contra a geração após copiar
+
+        Returns:
+            numpy.ndarray: Array independente da memória compartilhada
+
+        Raises:
+            StaleDescriptorError: Se o slot foi reutilizado antes ou durante a cópia
+        """
+        array = self.view_array(descriptor).copy()
+        self.verify(descriptor)
+        return array
+
+    def close(self):
+        """
+        Fecha o mapeamento; no processo dono também remove o bloco (unlink)
+        e reporta slots que nunca foram liberados
+        """
+        if self.owner:
+            with self._lock:
+                pending = list(self._leases.items())
+            for slot, lease in pending:
+                logger.warning(f"⚠️ Slot {slot} não liberado ao fechar o anel (tag={lease['tag']})")
+        try:
+            self._shm.close()
+        except BufferError:
+            # Ainda existem views exportadas; o mapeamento fecha quando forem coletadas
+            logger.warning("⚠️ Anel fechado com views ainda em uso")
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------------------------------------------
+
+    def _data_offset(self, slot):
+        return slot * self.stride + SLOT_HEADER.size
+
+    def _lease(self, nbytes, tag, timeout):
+        if not self.owner:
+            raise RuntimeError("Apenas o processo dono do anel pode reservar slots")
+        if nbytes > self.slot_size:
+            raise ValueError(f"Dados maiores que o slot ({nbytes} > {self.slot_size} bytes)")
+
+        with self._lock:
+            if not self._free:
+                self._stats["full_waits"] += 1
+                if not timeout or not self._lock.wait_for(lambda: self._free, timeout):
+                    raise RingFullError(f"Nenhum slot livre em {self.slot_count} slots")
+
+            slot = self._free.pop()
+            self._generations[slot] += 1
+            generation = self._generations[slot]
+            self._leases[slot] = {
+                "generation": generation,
+                "tag": tag,
+                "leased_at": time.monotonic(),
+                "nbytes": nbytes
+            }
+            self._stats["leased"] += 1
+
+        SLOT_HEADER.pack_into(self._shm.buf, slot * self.stride, generation, nbytes)
+        return slot, generation
+
+    def _invalidate(self, slot):
+        # Geração 0 nunca é emitida: leitores com descritores antigos falham na hora
+        SLOT_HEADER.pack_into(self._shm.buf, slot * self.stride, 0, 0)
+
+    def _check_generation(self, descriptor):
+        generation, _ = SLOT_HEADER.unpack_from(self._shm.buf, descriptor.slot * self.stride)
+        if generation != descriptor.generation:
+            raise StaleDescriptorError(
+                f"Slot {descriptor.slot} reutilizado (geração {generation} != {descriptor.generation})"
+            )
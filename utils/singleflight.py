@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+🔁 Coalescência de requisições concorrentes (single-flight)
+Chamadas simultâneas com a mesma chave compartilham uma única execução e o
+mesmo resultado (ex.: toques duplos no quiosque e retries do Laravel)
+
+Com deadline (do_with_deadline / submit_with_deadline), o trabalho
+compartilhado roda com um SharedDeadline: vale o prazo mais longo entre os
+chamadores que ainda esperam. Cada chamador desiste sozinho quando o próprio
+deadline passa (DeadlineExceeded) e nunca altera o resultado compartilhado;
+quando o último desiste, a chave sai da tabela e uma nova chamada começa um
+trabalho novo em vez de herdar o abandonado. Cancelar o deadline de um
+chamador (ex.: desconexão) só o retira da espera; o trabalho compartilhado
+é cancelado apenas quando não resta nenhum chamador.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from utils.deadline import DeadlineExceeded, SharedDeadline
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Intervalo para um chamador em espera perceber o cancelamento do próprio deadline
+CANCEL_POLL_SECONDS = 0.1
+
+
+class _Counters:
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def as_dict(self, in_flight):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "in_flight": in_flight
+        }
+
+
+class _Flight:
+    """Trabalho em andamento de uma chave e quem ainda o espera"""
+    __slots__ = ("work", "deadline")
+
+    def __init__(self):
+        self.work = None                   # asyncio.Task ou concurrent.futures.Future
+        self.deadline = SharedDeadline()
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight para asyncio (FastAPI)
+
+    A primeira chamada de uma chave cria uma task; as seguintes aguardam a
+    mesma task. A task é protegida com shield, então o cancelamento de um
+    cliente não cancela o trabalho dos demais.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._tasks = {}
+        self._flights = {}
+        self._counters = _Counters()
+
+    async def do(self, key, factory):
+        """
+        Executa factory() uma única vez por chave em andamento
+
+        Args:
+            key: Chave hashable (ex.: employee_id, hash da imagem)
+            factory: Função sem argumentos que retorna um awaitable
+
+        Returns:
+            O resultado compartilhado da execução
+        """
+        self._counters.calls += 1
+        task = self._tasks.get(key)
+        if task is None:
+            self._counters.executions += 1
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self._counters.coalesced += 1
+            logger.debug(f"🔁 [{self.name}] Requisição coalescida: {key}")
+        return await asyncio.shield(task)
+
+    async def do_with_deadline(self, key, factory, deadline=None):
+        """
+        Executa factory(shared) uma única vez por chave, com deadline por chamador
+
+        Args:
+            key: Chave hashable
+            factory: Função que recebe o SharedDeadline do trabalho e retorna um awaitable
+            deadline: Deadline deste chamador (None = espera sem limite)
+
+        Returns:
+            O resultado compartilhado da execução
+
+        Raises:
+            DeadlineExceeded: Se o deadline deste chamador passar antes do resultado
+        """
+        self._counters.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self._counters.executions += 1
+            flight = _Flight()
+            flight.deadline.join(deadline)
+            flight.work = asyncio.ensure_future(factory(flight.deadline))
+            self._flights[key] = flight
+            flight.work.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self._counters.coalesced += 1
+            flight.deadline.join(deadline)
+            logger.debug(f"🔁 [{self.name}] Requisição coalescida: {key}")
+
+        try:
+            if deadline is None:
+                await asyncio.wait({flight.work})
+            # Espera em fatias: o cancelamento do próprio deadline (cliente desconectou)
+            # tira este chamador da fila sem esperar o prazo inteiro
+            while not flight.work.done():
+                if deadline.expired():
+                    raise DeadlineExceeded("Deadline excedido aguardando o trabalho compartilhado")
+                await asyncio.wait({flight.work}, timeout=min(deadline.remaining(), CANCEL_POLL_SECONDS))
+            return flight.work.result()
+        finally:
+            flight.deadline.leave(deadline)
+            if not flight.work.done() and not flight.deadline.waiters():
+                # Último chamador desistiu: o trabalho é abandonado e a chave fica livre
+                self._counters.abandoned += 1
+                self._forget(key, flight)
+                flight.deadline.cancel()
+                flight.work.cancel()
+
+    def stats(self):
+        """Chamadas, execuções reais, chamadas coalescidas e trabalhos abandonados"""
+        return self._counters.as_dict(len(self._tasks) + len(self._flights))
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Single-flight para código síncrono com threads (Flask, pipeline)
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.RLock()  # Callbacks de Future concluído podem rodar dentro do lock
+        self._calls = {}
+        self._flights = {}
+        self._counters = _Counters()
+
+    def do(self, key, fn):
+        """
+        Executa fn() uma única vez por chave em andamento
+
+        Args:
+            key: Chave hashable
+            fn: Função sem argumentos
+
+        Returns:
+            O resultado compartilhado (exceções também são compartilhadas)
+        """
+        with self._lock:
+            self._counters.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._counters.executions += 1
+            else:
+                self._counters.coalesced += 1
+
+        if not leader:
+            logger.debug(f"🔁 [{self.name}] Requisição coalescida: {key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def do_with_deadline(self, key, fn, deadline=None):
+        """
+        Executa fn(shared) uma única vez por chave, com deadline por chamador
+
+        O primeiro chamador executa fn na própria thread; os demais esperam no
+        máximo até o próprio deadline.
+
+        Args:
+            key: Chave hashable
+            fn: Função que recebe o SharedDeadline do trabalho
+            deadline: Deadline deste chamador (None = espera sem limite)
+
+        Returns:
+            O resultado compartilhado
+
+        Raises:
+            DeadlineExceeded: Se o deadline de um chamador em espera passar antes do resultado
+        """
+        with self._lock:
+            self._counters.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                flight.work = _Call()
+                self._flights[key] = flight
+                self._counters.executions += 1
+            else:
+                self._counters.coalesced += 1
+            flight.deadline.join(deadline)
+
+        call = flight.work
+        if leader:
+            try:
+                call.result = fn(flight.deadline)
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    flight.deadline.leave(deadline)
+                    self._forget(key, flight)
+                call.event.set()
+            return call.result
+
+        logger.debug(f"🔁 [{self.name}] Requisição coalescida: {key}")
+        try:
+            if not call.event.wait(deadline.remaining() if deadline is not None else None):
+                raise DeadlineExceeded("Deadline excedido aguardando o trabalho compartilhado")
+        finally:
+            with self._lock:
+                flight.deadline.leave(deadline)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def submit_with_deadline(self, key, submit, deadline=None):
+        """
+        Variante para trabalho baseado em concurrent.futures (pipeline em estágios)
+
+        Args:
+            key: Chave hashable
+            submit: Função que recebe o SharedDeadline, inicia o trabalho e retorna um Future
+            deadline: Deadline deste chamador (None = espera sem limite)
+
+        Returns:
+            FlightTicket: Participação no trabalho; result() espera até o deadline do chamador
+        """
+        with self._lock:
+            self._counters.calls += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                flight.work = submit(flight.deadline)
+                self._flights[key] = flight
+                self._counters.executions += 1
+                flight.work.add_done_callback(lambda _: self._release(key, flight))
+            else:
+                self._counters.coalesced += 1
+            flight.deadline.join(deadline)
+        return FlightTicket(self, key, flight, deadline)
+
+    def stats(self):
+        """Chamadas, execuções reais, chamadas coalescidas e trabalhos abandonados"""
+        with self._lock:
+            return self._counters.as_dict(len(self._calls) + len(self._flights))
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _release(self, key, flight):
+        with self._lock:
+            self._forget(key, flight)
+
+    def _leave(self, key, flight, deadline):
+        with self._lock:
+            flight.deadline.leave(deadline)
+            if flight.work.done() or flight.deadline.waiters():
+                return
+            # Último chamador desistiu: o pipeline descarta o Future cancelado e a chave fica livre
+            self._counters.abandoned += 1
+            self._forget(key, flight)
+            flight.deadline.cancel()
+        flight.work.cancel()
+
+
+class FlightTicket:
+    """Participação de um chamador num trabalho compartilhado (SingleFlight.submit_with_deadline)"""
+
+    def __init__(self, owner, key, flight, deadline):
+        self._owner = owner
+        self._key = key
+        self._flight = flight
+        self._deadline = deadline
+
+    def result(self):
+        """
+        Resultado compartilhado, esperando no máximo até o deadline do chamador
+
+        Raises:
+            DeadlineExceeded: Se o deadline do chamador passar antes do resultado
+        """
+        try:
+            return self._flight.work.result(self._deadline.remaining() if self._deadline is not None else None)
+        except FutureTimeoutError:
+            raise DeadlineExceeded("Deadline excedido aguardando o trabalho compartilhado")
+        finally:
+            self._owner._leave(self._key, self._flight, self._deadline)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+🔬 Refinamento do template de cadastro (segunda etapa do cadastro em dois níveis)
+O cadastro grava na hora um encoding rápido (1 jitter, detecção reduzida).
+Em segundo plano a foto guardada é decodificada em resolução cheia, o rosto
+é recortado com margem e ampliado até um tamanho mínimo, e o encoding é
+recalculado com 68 landmarks e muitos jitters: mais lento, menos ruidoso.
+
+A caixa do rosto vem do encoding rápido (coordenadas da imagem decodificada,
+possivelmente reduzida 1/decode_scale), então não há nova detecção.
+"""
+
+import logging
+
+import cv2
+import numpy as np
+
+from utils.face_pipeline import FaceJob, decode_image
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Ampliação máxima do recorte (acima disso só se interpola ruído)
+MAX_UPSCALE = 4.0
+
+
+def refinement_crop(rgb, box, margin=0.5, face_size=300):
+    """
+    Recorte do rosto com margem, ampliado se o rosto for menor que face_size
+
+    Args:
+        rgb (numpy.ndarray): Imagem em resolução cheia
+        box (tuple): Rosto (top, right, bottom, left) em px da imagem
+        margin (float): Margem em cada lado, como fração do lado do rosto
+        face_size (int): Menor lado desejado para o rosto no recorte (px)
+
+    Returns:
+        tuple: (recorte RGB contíguo, caixa do rosto no recorte)
+    """
+    height, width = rgb.shape[:2]
+    top, right, bottom, left = box
+    pad_y, pad_x = int((bottom - top) * margin), int((right - left) * margin)
+    y0, y1 = max(0, top - pad_y), min(height, bottom + pad_y)
+    x0, x1 = max(0, left - pad_x), min(width, right + pad_x)
+    crop = rgb[y0:y1, x0:x1]
+    box = (top - y0, right - x0, bottom - y0, left - x0)
+
+    side = min(box[1] - box[3], box[2] - box[0])
+    scale = min(MAX_UPSCALE, face_size / side) if side > 0 else 1.0
+    if scale > 1.0:
+        crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        box = tuple(int(round(v * scale)) for v in box)
+    return np.ascontiguousarray(crop), box
+
+
+def build_refinement_job(image_bytes, face_location, decode_scale=1, num_jitters=20, margin=0.5, face_size=300):
+    """
+    FaceJob do refinamento (caixa conhecida: o pipeline pula a detecção)
+
+    Args:
+        image_bytes: Foto guardada do funcionário
+        face_location (tuple): Caixa gravada no encoding rápido
+        decode_scale (int): Redução aplicada na decodificação do cadastro
+        num_jitters (int): Reamostragens do encoding
+        margin (float): Margem do recorte (fração do rosto)
+        face_size (int): Menor lado do rosto no recorte (px)
+
+    Returns:
+        FaceJob: Job pronto para run_inline, ou None se a foto não decodificar
+    """
+    rgb = decode_image(image_bytes, 1)
+    if rgb is None:
+        return None
+    box = tuple(int(v * decode_scale) for v in face_location)
+    crop, box = refinement_crop(rgb, box, margin, face_size)
+    job = FaceJob(
+        rgb=crop,
+        locations=[box],
+        check_quality=False,     # A foto já passou pelo filtro no cadastro
+        use_prefilter=False,
+        num_jitters=num_jitters,
+        landmark_model="large"
+    )
+    job.metadata.update(refine_crop=list(crop.shape[:2]), refine_face=min(box[1] - box[3], box[2] - box[0]))
+    return job
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+🔥 Pré-carregamento e aquecimento dos modelos faciais
+Usado pelo gunicorn (master antes do fork, workers no post_fork) e pela API FastAPI
+"""
+
+import gc
+import os
+import time
+import logging
+import threading
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Estado do processo atual (reportado em /health e /statistics)
+_state = {
+    "pid": None,
+    "models_preloaded": False,
+    "gc_frozen_objects": 0,
+    "warmup_seconds": None,
+    "rss_after_warmup_mb": None,
+    "first_request_seconds": None,
+    "first_request_rss_mb": None,
+}
+_state_lock = threading.Lock()
+
+
+def get_rss_bytes():
+    """
+    Retorna a memória residente (RSS) do processo atual em bytes
+
+    Lê /proc/self/statm (Linux); em outros sistemas usa psutil se instalado.
+
+    Returns:
+        int: RSS em bytes ou 0 se não for possível medir
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1)
+
+
+def _reset_state_after_fork():
+    """Zera as métricas herdadas do master quando o processo é um worker novo"""
+    if _state["pid"] != os.getpid():
+        _state.update({
+            "pid": os.getpid(),
+            "warmup_seconds": None,
+            "rss_after_warmup_mb": None,
+            "first_request_seconds": None,
+            "first_request_rss_mb": None,
+        })
+
+
+def preload_face_models():
+    """
+    Carrega os modelos do motor facial configurado (FACE_ENGINE) no processo atual
+
+    O face_recognition carrega os modelos (detector HOG, preditor de landmarks
+    e ResNet de encoding) no import. Chamado no master antes do fork, as
+    páginas desses modelos ficam compartilhadas entre os workers.
+
+    Returns:
+        bool: True se os modelos foram carregados
+    """
+    try:
+        from utils.engines import get_engine, EngineUnavailable
+        engine = get_engine()
+    except (ImportError, EngineUnavailable) as e:
+        logger.warning(f"⚠️ Modelos faciais não pré-carregados (dependência ausente): {e}")
+        return False
+
+    _state["models_preloaded"] = True
+    logger.info(f"🧠 Modelos do motor {engine.name} pré-carregados")
+    return True
+
+
+def freeze_gc():
+    """
+    Coleta o lixo e congela os objetos atuais antes do fork
+
+    Objetos congelados não são mais percorridos pelo coletor cíclico, evitando
+    que os workers escrevam nas páginas herdadas do master (copy-on-write).
+
+    Returns:
+        int: Quantidade de objetos congelados
+    """
+    gc.collect()
+    if not hasattr(gc, 'freeze'):
+        return 0
+
+    gc.freeze()
+    frozen = gc.get_freeze_count()
+    _state["gc_frozen_objects"] = frozen
+    logger.info(f"🧊 gc.freeze(): {frozen} objetos congelados (RSS={_mb(get_rss_bytes())}MB)")
+    return frozen
+
+
+def warmup_inference():
+    """
+    Executa uma inferência completa (detecção + landmarks + encoding) descartável
+
+    Força a alocação dos buffers internos do dlib antes que o worker aceite
+    tráfego, tirando esse custo da primeira requisição real.
+
+    Returns:
+        float: Tempo do aquecimento em segundos, ou None se indisponível
+    """
+    with _state_lock:
+        _reset_state_after_fork()
+
+    try:
+        from utils.engines import get_engine, EngineUnavailable
+        engine = get_engine()
+    except (ImportError, EngineUnavailable):
+        return None
+
+    start = time.perf_counter()
+    try:
+        # Imagem sintética: o conteúdo não importa, apenas o caminho de execução
+        engine.warmup()
+    except Exception as e:
+        logger.warning(f"⚠️ Falha no aquecimento do modelo: {e}")
+        return None
+
+    elapsed = time.perf_counter() - start
+    with _state_lock:
+        _state["warmup_seconds"] = round(elapsed, 4)
+        _state["rss_after_warmup_mb"] = _mb(get_rss_bytes())
+    return elapsed
+
+
+def record_request_latency(seconds):
+    """
+    Registra a latência da primeira requisição atendida pelo processo
+
+    Args:
+        seconds (float): Duração da requisição em segundos
+
+    Returns:
+        bool: True se esta foi a primeira requisição do processo
+    """
+    with _state_lock:
+        _reset_state_after_fork()
+        if _state["first_request_seconds"] is not None:
+            return False
+        _state["first_request_seconds"] = round(seconds, 4)
+        _state["first_request_rss_mb"] = _mb(get_rss_bytes())
+    return True
+
+
+def get_process_report():
+    """
+    Retorna as métricas de memória e aquecimento do processo atual
+
+    Returns:
+        dict: pid, RSS atual, tempo de aquecimento e latência da primeira requisição
+    """
+    with _state_lock:
+        _reset_state_after_fork()
+        report = dict(_state)
+    report["rss_mb"] = _mb(get_rss_bytes())
+    return report